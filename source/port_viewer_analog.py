@@ -40,6 +40,7 @@ cfg_special = importlib.import_module(cfg_special_path)
 
 import numpy as np
 import matplotlib
+import port_viewer_utilities as viewer_util
 
 from PyQt5 import QtCore, QtGui, uic, QtWidgets
 import matplotlib.pyplot as plt
@@ -307,13 +308,13 @@ class AnalogPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Analog):
                     ax.set_ylim(float(start_val), float(end_val))
                 
             ax.set_ylabel('Magnitude')
-            ax.plot(self.time, self.signal, 
-                    color = cfg_analog.analog_time_signal_color, 
-                    linestyle = cfg_analog.analog_time_signal_linestyle,
-                    linewidth = cfg_analog.analog_time_signal_linewidth, 
-                    marker = cfg_analog.analog_time_signal_marker, 
-                    markersize = cfg_analog.analog_time_signal_markersize,
-                    label = 'Analog signal')
+            viewer_util.plot_decimated(ax, self.time, self.signal, 
+                                       color = cfg_analog.analog_time_signal_color, 
+                                       linestyle = cfg_analog.analog_time_signal_linestyle,
+                                       linewidth = cfg_analog.analog_time_signal_linewidth, 
+                                       marker = cfg_analog.analog_time_signal_marker, 
+                                       markersize = cfg_analog.analog_time_signal_markersize,
+                                       label = 'Analog signal')
             
             # MV 19.02.r2 15-Sep-19 (Cleaned up title - was getting too long & causing 
             # issues with tight layout)
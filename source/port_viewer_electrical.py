@@ -40,6 +40,7 @@ cfg_special = importlib.import_module(cfg_special_path)
 
 import numpy as np
 import matplotlib
+import port_viewer_utilities as viewer_util
 
 from PyQt5 import QtCore, QtGui, uic, QtWidgets
 import matplotlib.pyplot as plt
@@ -90,6 +91,7 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
         self.direction = direction
         #self.iteration = 1  
         self.signals = signal_data
+        self.worker = viewer_util.ViewerWorker() # Calculations and results (worker thread)
 
         # MV 20.01.r3 15-Jun-20 Set iteration to reflect main application setting
         # (iterators spin box)
@@ -370,6 +372,7 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
         self.time = signal_default[4] #Time sampling points
         self.signal = signal_default[5] #Electrical amplitudes
         self.noise = signal_default[6] #Noise samples
+        self.signal_iteration = self.iteration # Iteration of signal and noise
         self.carrier = signal_default[2]
         
         # MV 20.01.r3 18-Jun-20: Calculate avg value of signal 
@@ -393,22 +396,8 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
         k = np.arange(self.n)
         self.frq = k/T # Positive/negative freq (double sided)
         self.frq_pos = self.frq[range(int(self.n/2))] # Positive freq only     
-        # FFT computations (signal, noise, signal+noise)
-        self.Y = np.fft.fft(self.signal)
-        self.Y_pos = self.Y[range(int(self.n/2))]
-        # MV 20.01.r3 20-Jul-20: Folding of spectrum
-        self.Y_pos = self.Y_pos*np.sqrt(2)
-        self.Y_pos[0] = self.Y_pos[0]/np.sqrt(2) # DC component is not doubled
-        self.N = np.fft.fft(self.noise)
-        self.N_pos = self.N[range(int(self.n/2))]
-        # MV 20.01.r3 20-Jul-20: Folding of spectrum
-        self.N_pos = self.N_pos*np.sqrt(2) 
-        self.N_pos[0] = self.N_pos[0]/np.sqrt(2) # DC component is not doubled
-        self.Y_N = np.fft.fft(self.signal+self.noise)
-        self.Y_N_pos = self.Y_N[range(int(self.n/2))]
-        # MV 20.01.r3 20-Jul-20: Folding of spectrum
-        self.Y_N_pos = self.Y_N_pos*np.sqrt(2) 
-        self.Y_N_pos[0] = self.Y_N_pos[0]/np.sqrt(2) # DC component is not doubled
+        # Power spectra (signal, noise, signal+noise)
+        self.freq_spectra = self.worker.get(*self.spectrum_calculation(self.iteration))
 
         '''Setup background colors for frames=========================================='''
         # MV 20.01.r1 29-Oct-19 Added link to port viewers config file (frame bkrd clr)
@@ -491,6 +480,7 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
         signal_updated = self.signals[new_iteration]
         self.signal = signal_updated[5] #Electrical amplitudes
         self.noise = signal_updated[6]
+        self.signal_iteration = new_iteration
         self.carrier = signal_updated[3] #MV 20.01.r1 (23-Sep-2019)
         self.tabData.setCurrentWidget(self.tab_time)       
         self.plot_time_domain(0)
@@ -670,31 +660,31 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
     # MV 20.01.r1 Linked plot settings to config_port_viewers file variables (to provide ability to
     # manage look and feel of plots)
     def set_signal_plot_time_domain(self, time, signal):
-        self.ax.plot(time, signal, 
-                     color = cfg_elec.electrical_time_signal_color, 
-                     linestyle = cfg_elec.electrical_time_signal_linestyle, 
-                     linewidth= cfg_elec.electrical_time_signal_linewidth, 
-                     marker = cfg_elec.electrical_time_signal_marker , 
-                     markersize = cfg_elec.electrical_time_signal_markersize,
-                     label = 'Electrical signal') 
+        viewer_util.plot_decimated(self.ax, time, signal, 
+                                   color = cfg_elec.electrical_time_signal_color, 
+                                   linestyle = cfg_elec.electrical_time_signal_linestyle, 
+                                   linewidth= cfg_elec.electrical_time_signal_linewidth, 
+                                   marker = cfg_elec.electrical_time_signal_marker , 
+                                   markersize = cfg_elec.electrical_time_signal_markersize,
+                                   label = 'Electrical signal') 
         
     def set_noise_plot_time_domain(self, time, signal):
-        self.ax.plot(time, signal, 
-                     color = cfg_elec.electrical_time_noise_color, 
-                     linestyle = cfg_elec.electrical_time_noise_linestyle, 
-                     linewidth = cfg_elec.electrical_time_noise_linewidth, 
-                     marker = cfg_elec.electrical_time_noise_marker, 
-                     markersize = cfg_elec.electrical_time_noise_markersize,
-                     label ='Electrical noise')   
+        viewer_util.plot_decimated(self.ax, time, signal, 
+                                   color = cfg_elec.electrical_time_noise_color, 
+                                   linestyle = cfg_elec.electrical_time_noise_linestyle, 
+                                   linewidth = cfg_elec.electrical_time_noise_linewidth, 
+                                   marker = cfg_elec.electrical_time_noise_marker, 
+                                   markersize = cfg_elec.electrical_time_noise_markersize,
+                                   label ='Electrical noise')   
         
     def set_signal_and_noise_plot_time_domain(self, time, signal):
-        self.ax.plot(time, signal, 
-                     color = cfg_elec.electrical_time_sig_noise_color, 
-                     linestyle = cfg_elec.electrical_time_sig_noise_linestyle, 
-                     linewidth = cfg_elec.electrical_time_sig_noise_linewidth, 
-                     marker = cfg_elec.electrical_time_sig_noise_marker, 
-                     markersize = cfg_elec.electrical_time_sig_noise_markersize,
-                     label = 'Electrical signal + noise')
+        viewer_util.plot_decimated(self.ax, time, signal, 
+                                   color = cfg_elec.electrical_time_sig_noise_color, 
+                                   linestyle = cfg_elec.electrical_time_sig_noise_linestyle, 
+                                   linewidth = cfg_elec.electrical_time_sig_noise_linewidth, 
+                                   marker = cfg_elec.electrical_time_sig_noise_marker, 
+                                   markersize = cfg_elec.electrical_time_sig_noise_markersize,
+                                   label = 'Electrical signal + noise')
     #=====================================================================================
     
     def format_coord_time(self, x, y):
@@ -703,26 +693,53 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
     '''Freq data tab (plotting methods)================================================'''
     def value_change_freq(self):
         new_iteration = int(self.spinBoxFreq.value())
-        signal_updated = self.signals[new_iteration]   
-        self.Y = np.fft.fft(signal_updated[5])
-        self.Y_pos = self.Y[range(int(self.n/2))]
-        # MV 20.01.r3 20-Jul-20: Folding of spectrum
-        self.Y_pos = self.Y_pos*np.sqrt(2)
-        self.Y_pos[0] = self.Y_pos[0]/np.sqrt(2) # DC component is not doubled
-        self.N = np.fft.fft(signal_updated[6])
-        self.N_pos = self.N[range(int(self.n/2))] # Positive freq only
-        # MV 20.01.r3 20-Jul-20: Folding of spectrum
-        self.N_pos = self.N_pos*np.sqrt(2)
-        self.N_pos[0] = self.N_pos[0]/np.sqrt(2) # DC component is not doubled
-        self.Y_N = np.fft.fft(signal_updated[5]+signal_updated[6])
-        self.Y_N_pos = self.Y_N[range(int(self.n/2))] # Positive freq only
-        # MV 20.01.r3 20-Jul-20: Folding of spectrum
-        self.Y_N_pos = self.Y_N_pos*np.sqrt(2)
-        self.Y_N_pos[0] = self.Y_N_pos[0]/np.sqrt(2) # DC component is not doubled
         self.tabData.setCurrentWidget(self.tab_freq)       
+        self.worker.request([self.spectrum_calculation(new_iteration)], self.update_freq_plot)
+        if new_iteration + 1 in self.signals: # Next iteration (browsing of the iterations)
+            self.worker.prefetch([self.spectrum_calculation(new_iteration + 1)])
+        
+    def update_freq_plot(self):
+        new_iteration = int(self.spinBoxFreq.value())
+        self.freq_spectra = self.worker.get(*self.spectrum_calculation(new_iteration))
         self.plot_freq_domain(0)
         self.canvas_freq.draw()
         
+    def spectrum_calculation(self, iteration):
+        '''Returns the calculation (key, function for the worker thread) of the power
+           spectra of the signal, noise and signal+noise of an iteration and of their
+           frequency points (double sided, positive frequencies only). Long signals are
+           plotted with the averaged power spectrum (viewer_util.welch_spectrum)
+        '''
+        signal_updated = self.signals[iteration]
+        welch = viewer_util.welch_spectrum(self.n)
+        def calculate():
+            if welch: # Frequency points of the segments
+                m = min(int(cfg_special.psd_segment_length), self.n)
+                frq = np.arange(m)*self.fs/m
+                spectra = viewer_util.welch_power_spectra(
+                        lambda start, stop: (signal_updated[5][start:stop], 
+                                             signal_updated[6][start:stop]), self.n, m)
+            else:
+                m = self.n
+                frq = self.frq
+                # MV 20.01.r3 8-Jul-20: Changed to Y*conj(Y), from abs(Y)*abs(Y)
+                # MV 20.01.r3 18-Sep-20 Bug fix:
+                # Y*conj(Y) is now divided by n^2, previously was incorrectly
+                # dividing by n
+                spectra = []
+                for field in (signal_updated[5], signal_updated[6], 
+                              signal_updated[5] + signal_updated[6]):
+                    Y = np.fft.fft(field)
+                    spectra.append(np.real(Y*np.conjugate(Y))/(self.n*self.n))
+            results = [frq, frq[range(int(m/2))]] # Positive freq only
+            for P in spectra:
+                # MV 20.01.r3 20-Jul-20: Folding of spectrum
+                P_pos = 2*P[range(int(m/2))]
+                P_pos[0] = P_pos[0]/2 # DC component is not doubled
+                results += [P, P_pos]
+            return tuple(results)
+        return ('Freq', iteration), calculate
+        
     def check_signal_changed_freq(self):
         self.tabData.setCurrentWidget(self.tab_freq)       
         self.plot_freq_domain(0)
@@ -762,40 +779,25 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
             #==================================================================
             # 20.01.r1 2 Sep 19 - Updated this section by introducing new 
             # function to adjust plotting (adjust_units_for_plotting_freq)
-            # MV 20.01.r3 8-Jul-20: Changed to Y*conj(Y), from abs(Y)*abs(Y)
-            # MV 20.01.r3 18-Sep-20 Bug fix:
-            # Y*conj(Y) is now divided by n^2, previously was incorrectly
-            # dividing by n
+            (frq, frq_pos, sig_pwr, sig_pwr_pos, noise_pwr, noise_pwr_pos, 
+             sig_noise_pwr, sig_noise_pwr_pos) = self.freq_spectra
+            if self.checkBoxDisplayNegFreq.checkState() != 2: # Positive freq only
+                frq = frq_pos
+                sig_pwr = sig_pwr_pos
+                noise_pwr = noise_pwr_pos
+                sig_noise_pwr = sig_noise_pwr_pos
+                
             if self.signalCheckBoxFreq.checkState() == 2:
-
-                if self.checkBoxDisplayNegFreq.checkState() == 2:
-                    sig_pwr = self.Y*np.conjugate(self.Y)/(self.n*self.n)
-                    sig_pwr = self.adjust_units_for_plotting_freq(sig_pwr)
-                    self.set_signal_plot_freq_domain(self.frq, sig_pwr)                
-                else:
-                    sig_pwr = self.Y_pos*np.conjugate(self.Y_pos)/(self.n*self.n)
-                    sig_pwr = self.adjust_units_for_plotting_freq(sig_pwr)
-                    self.set_signal_plot_freq_domain(self.frq_pos, sig_pwr) 
+                sig_pwr = self.adjust_units_for_plotting_freq(sig_pwr)
+                self.set_signal_plot_freq_domain(frq, sig_pwr)                
                         
             if self.noiseCheckBoxFreq.checkState() == 2:
-                if self.checkBoxDisplayNegFreq.checkState() == 2:
-                    noise_pwr = self.N*np.conjugate(self.N)/(self.n*self.n)
-                    noise_pwr = self.adjust_units_for_plotting_freq(noise_pwr)
-                    self.set_noise_plot_freq_domain(self.frq, noise_pwr) 
-                else:
-                    noise_pwr = self.N_pos*np.conjugate(self.N_pos)/(self.n*self.n)
-                    noise_pwr = self.adjust_units_for_plotting_freq(noise_pwr)
-                    self.set_noise_plot_freq_domain(self.frq_pos, noise_pwr) 
+                noise_pwr = self.adjust_units_for_plotting_freq(noise_pwr)
+                self.set_noise_plot_freq_domain(frq, noise_pwr) 
                         
             if self.sigandnoiseCheckBoxFreq.checkState() == 2:
-                if self.checkBoxDisplayNegFreq.checkState() == 2:
-                    sig_noise_pwr = self.Y_N*np.conjugate(self.Y_N)/(self.n*self.n)
-                    sig_noise_pwr = self.adjust_units_for_plotting_freq(sig_noise_pwr)
-                    self.set_signal_and_noise_plot_freq_domain(self.frq, sig_noise_pwr)
-                else:
-                    sig_noise_pwr = self.Y_N_pos*np.conjugate(self.Y_N_pos)/(self.n*self.n)
-                    sig_noise_pwr = self.adjust_units_for_plotting_freq(sig_noise_pwr)
-                    self.set_signal_and_noise_plot_freq_domain(self.frq_pos, sig_noise_pwr)
+                sig_noise_pwr = self.adjust_units_for_plotting_freq(sig_noise_pwr)
+                self.set_signal_and_noise_plot_freq_domain(frq, sig_noise_pwr)
             #==================================================================
             
             # MV 20.01.r1 15-Sep-19 (Cleaned up title - was getting too long & causing 
@@ -914,15 +916,87 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
         signal_updated = self.signals[new_iteration]
         self.signal = signal_updated[5] #Electrical amplitudes
         self.noise = signal_updated[6]       
-        self.tabData.setCurrentWidget(self.tab_eye)       
-        self.plot_eye()
-        self.canvas_eye.draw()
+        self.signal_iteration = new_iteration
+        self.check_signal_changed_eye()
+        if new_iteration + 1 in self.signals: # Next iteration (browsing of the iterations)
+            self.worker.prefetch(self.eye_calculations(new_iteration + 1))
         
     def check_signal_changed_eye(self):
         self.tabData.setCurrentWidget(self.tab_eye)       
+        self.worker.request(self.eye_calculations(self.signal_iteration), 
+                            self.update_eye_plot)
+        
+    def update_eye_plot(self):
         self.plot_eye()
         self.canvas_eye.draw()
         
+    def eye_calculations(self, iteration):
+        '''Returns the calculations (key, function for the worker thread) of the eye
+           diagram intensity grids for the settings of the eye diagram tab
+        '''
+        if cfg_elec.electrical_eye_render != 'density':
+            return []
+        try:
+            eye_num = 3
+            if self.windowEye.text():
+                eye_num = int(round(float(self.windowEye.text())))
+        except ValueError: # Reported by plot_eye
+            return []
+        if self.radioButtonMagEye.isChecked() == 1:
+            signal_format = 0
+        elif self.radioButtonLinearPwrEye.isChecked() == 1:
+            signal_format = 1
+        else:
+            signal_format = 2
+        calculations = []
+        if self.signalCheckBoxEye.checkState() == 2:
+            calculations.append(self.eye_grid_calculation(iteration, eye_num, 
+                                                          signal_format, False))
+        if self.sigandnoiseCheckBoxEye.checkState() == 2:
+            calculations.append(self.eye_grid_calculation(iteration, eye_num, 
+                                                          signal_format, True))
+        return calculations
+        
+    def eye_grid_calculation(self, iteration, eye_num, signal_format, with_noise):
+        '''Returns the calculation (key, function for the worker thread) of the intensity
+           grid of the signal (or signal+noise) eye traces of an iteration
+        '''
+        signal_updated = self.signals[iteration]
+        time = self.time
+        eye_win = self.sym_period*eye_num
+        bins = tuple(cfg_elec.electrical_eye_density_bins)
+        def calculate():
+            time_wrapped, signal, noise = self.eye_traces(time, signal_updated[5],
+                                                          signal_updated[6], eye_win)
+            if with_noise:
+                signal = signal + noise
+            traces = self.format_eye_traces(signal, signal_format)
+            return viewer_util.eye_density_grid(time_wrapped[0], traces, eye_win, bins)
+        return ('Eye', iteration, eye_num, signal_format, with_noise, bins), calculate
+        
+    def eye_traces(self, time, signal, noise, eye_win):
+        '''Returns the time, signal and noise arrays of the eye diagram (2D arrays, one
+           row for each eye window)
+        '''
+        # Sample time data to be used for tiling
+        # MV 20.01.r1 1-Nov-19 (replaced append operation with searchsorted)
+        index_eye_win = np.searchsorted(time, eye_win, side='right')
+        eye_section = time[0:index_eye_win]            
+
+        #Rebuild time array by "tiling" time window defined for eye
+        num_tiles = round(self.n/np.size(eye_section))
+        eye_len = np.size(eye_section)
+        time_wrapped = np.tile(eye_section, num_tiles)
+        # Shorten arrays to be within a multiple of eye window                            
+        time_wrapped = np.resize(time_wrapped, num_tiles*eye_len)
+        signal = np.resize(signal, num_tiles*eye_len) # MV 20.01.r3 7-Jul-20
+        noise = np.resize(noise, num_tiles*eye_len) # MV 20.01.r3 7-Jul-20
+        # Re-organize arrays to match eye length
+        time_wrapped = np.reshape(time_wrapped, (num_tiles, eye_len))
+        signal = np.reshape(signal, (num_tiles, eye_len))
+        noise = np.reshape(noise, (num_tiles, eye_len))
+        return time_wrapped, signal, noise
+        
     def plot_eye(self):
         try:
             self.figure_eye.clf() # MV 20.01.r1 30-Oct-2019
@@ -942,26 +1016,10 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
                 if self.windowEye.text():
                     eye_num = int(round(float(self.windowEye.text())))
                     eye_win = self.sym_period*eye_num #Convert to time units      
-                # Initialize array for time window associated with eye
-                eye_section = np.array([])
-    
-                # Sample time data to be used for tiling
-                # MV 20.01.r1 1-Nov-19 (replaced append operation with searchsorted)
-                index_eye_win = np.searchsorted(self.time, eye_win, side='right')
-                eye_section = self.time[0:index_eye_win]            
-    
-                #Rebuild time array by "tiling" time window defined for eye
-                num_tiles = round(self.n/np.size(eye_section))
-                eye_len = np.size(eye_section)
-                time_wrapped = np.tile(eye_section, num_tiles)
-                # Shorten arrays to be within a multiple of eye window                            
-                time_wrapped = np.resize(time_wrapped, num_tiles*eye_len)
-                signal = np.resize(self.signal, num_tiles*eye_len) # MV 20.01.r3 7-Jul-20
-                noise = np.resize(self.noise, num_tiles*eye_len) # MV 20.01.r3 7-Jul-20
-                # Re-organize arrays to match eye length
-                time_wrapped = np.reshape(time_wrapped, (num_tiles, eye_len))
-                signal = np.reshape(signal, (num_tiles, eye_len))
-                noise = np.reshape(noise, (num_tiles, eye_len))
+                self.eye_num = eye_num
+                self.eye_win = eye_win
+                time_wrapped, signal, noise = self.eye_traces(self.time, self.signal,
+                                                              self.noise, eye_win)
                 
                 #------------------------------------------------------------------
                 # Eye metrics calculations
@@ -1158,15 +1216,14 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
     # MV 20.01.r1 Linked plot settings to config_port_viewers file variables (to provide 
     # ability to manage look and feel of plots)  
     def set_signal_plot_eye_diagram(self, time_wrapped, signal, signal_format):
+        if cfg_elec.electrical_eye_render == 'density':
+            self.set_density_plot_eye_diagram(signal_format, False,
+                                              cfg_elec.electrical_eye_signal_color,
+                                              cfg_elec.electrical_eye_signal_alpha, 10,
+                                              'Electrical signal')
+            return
+        signal = self.format_eye_traces(signal, signal_format)
         for i in range(len(time_wrapped)):
-            if signal_format == 0: # MV 20.01.r3 7-Jul-20
-                signal[i] = np.real(signal[i])
-            if signal_format == 1:
-                signal[i] = signal[i]*np.conjugate(signal[i]) # MV 20.01.r3 4-Jul-20
-                #signal[i] = signal[i]*signal[i]
-            if signal_format == 2:
-                signal[i] = 10*np.log10(signal[i]*np.conjugate(signal[i])*1e3) # MV 20.01.r3 4-Jul-20
-                #signal[i] = 10*np.log10(signal[i]*signal[i]*1e3)
             # MV 20.01.r3 10-Jul-20 Added alpha parameter to create density effect
             # Thanks to posters on stack overflow!
             # https://stackoverflow.com/questions/61574246/how-can-i-draw-an-eye-diagram-
@@ -1182,17 +1239,15 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
             
     def set_signal_noise_plot_eye_diagram(self, time_wrapped, signal,
                                           noise, signal_format):
+        if cfg_elec.electrical_eye_render == 'density':
+            self.set_density_plot_eye_diagram(signal_format, True,
+                                              cfg_elec.electrical_eye_sig_noise_color,
+                                              cfg_elec.electrical_eye_sig_noise_alpha, 2,
+                                              'Electrical signal + noise')
+            return
+        signal_noise = self.format_eye_traces(signal + noise, signal_format)
         for i in range(len(time_wrapped)):
-            signal_noise = signal[i] + noise[i]
-            if signal_format == 0: # MV 20.01.r3 7-Jul-20
-                signal_noise = np.real(signal_noise)
-            if signal_format == 1:
-                signal_noise = signal_noise*np.conjugate(signal_noise) # MV 20.01.r3 4-Jul-20
-                #signal_noise = signal_noise*signal_noise
-            if signal_format == 2:
-                signal_noise = 10*np.log10(signal_noise*np.conjugate(signal_noise)*1e3) # MV 20.01.r3 4-Jul-20
-                #signal_noise = 10*np.log10(signal_noise*signal_noise*1e3)
-            self.eye.plot(time_wrapped[i], signal_noise, 
+            self.eye.plot(time_wrapped[i], signal_noise[i], 
                           color = cfg_elec.electrical_eye_sig_noise_color,
                           linestyle = cfg_elec.electrical_eye_sig_noise_linestyle, 
                           linewidth = cfg_elec.electrical_eye_sig_noise_linewidth, 
@@ -1201,6 +1256,28 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
                           label = 'Electrical signal + noise',
                           alpha = cfg_elec.electrical_eye_sig_noise_alpha)
             
+    def format_eye_traces(self, signal, signal_format):
+        '''Returns the eye traces (signal[i]) as magnitude (0), power in W (1) or
+           power in dBm (2)
+        '''
+        if signal_format == 0: # MV 20.01.r3 7-Jul-20
+            return np.real(signal)
+        power = np.real(signal*np.conjugate(signal)) # MV 20.01.r3 4-Jul-20
+        if signal_format == 1:
+            return power
+        with np.errstate(divide='ignore'):
+            return 10*np.log10(power*1e3)
+            
+    def set_density_plot_eye_diagram(self, signal_format, with_noise, color, alpha, 
+                                     zorder, label):
+        '''Plots the eye traces (signal or signal+noise) as an intensity image (density
+           of the traces in each time/amplitude cell) instead of one line per trace
+        '''
+        grid, y_range = self.worker.get(*self.eye_grid_calculation(self.signal_iteration,
+                                        self.eye_num, signal_format, with_noise))
+        viewer_util.plot_eye_density(self.eye, grid, self.eye_win, y_range, color, alpha,
+                                     cfg_elec.electrical_eye_density_gamma, zorder, label)
+            
     '''def set_signal_plot_eye_hist(self, time_wrapped, signal, signal_format):
         time_wrapped_all = np.ravel(time_wrapped)
         signal_all = np.ravel(signal)
@@ -1223,14 +1300,8 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
         self.time = signal_updated[4] #MV 20.01.r2 15-Feb-20
         self.signal = signal_updated[5] #Electrical amplitudes
         self.noise = signal_updated[6]
+        self.signal_iteration = new_iteration
         self.update_signal_data()
-        # Freq domain data
-        self.Y = np.fft.fft(signal_updated[5])
-        self.Y_pos = self.Y[range(int(self.n/2))]
-        self.N = np.fft.fft(signal_updated[6])
-        self.N_pos = self.N[range(int(self.n/2))] # Positive freq only  
-        self.Y_N = np.fft.fft(signal_updated[5]+signal_updated[6])
-        self.Y_N_pos = self.Y_N[range(int(self.n/2))] # Positive freq only 
         
     def update_signal_data(self):
         try:
@@ -1275,6 +1346,10 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
         
             data1['index'] = index_array
             data2['index'] = index_array
+            if self.radioButtonSigTime.isChecked() != 1: # Freq domain data
+                signal, noise = self.signal, self.noise
+                self.Y, self.N = self.worker.get(('FFT', self.signal_iteration), 
+                        lambda: (np.fft.fft(signal), np.fft.fft(noise)))
                
             #Print signal data (magnitude) array
             self.signalBrowser.setCurrentFont(self.font_bold)
@@ -1366,6 +1441,7 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
         self.carrier = signal_updated[2]
         self.signal = signal_updated[5] #Electrical amplitudes
         self.noise = signal_updated[6]
+        self.signal_iteration = new_iteration
         self.update_signal_metrics() 
     
     def update_signal_metrics(self):
@@ -1451,6 +1527,7 @@ class ElectricalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Electrical
     
         '''Close event================================================================='''
     def closeEvent(self, event):
+        self.worker.stop()
         plt.close(self.figure)
         plt.close(self.figure_freq)
         plt.close(self.figure_eye)
@@ -40,6 +40,7 @@ cfg_special = importlib.import_module(cfg_special_path)
 
 import numpy as np
 import matplotlib
+import port_viewer_utilities as viewer_util
 
 from PyQt5 import QtCore, QtGui, uic, QtWidgets
 import matplotlib.pyplot as plt
@@ -471,63 +472,63 @@ class ElectricalDataAnalyzerMultiplePort(QtWidgets.QDialog, Ui_MultiPortDataWind
             if np.count_nonzero(signal) == np.size(signal): 
                 signal = 10*np.log10(signal*signal*1e3)
             else:
-                signal += 1e-30 #Set to very low value
+                signal = signal + 1e-30 #Set to very low value
                 signal = 10*np.log10(signal*signal*1e3)  
         return signal
     
     def set_signal_plot_time_domain(self, time, signal, num):
         if self.radioButtonOverlay.isChecked() == 1:
-            self.ax[0].plot(time, signal, 
-                            color = self.colors_time[num-1], 
-                            linestyle = self.linestyle_time[num-1], 
-                            linewidth= self.linewidth_time[num-1], 
-                            marker = self.markers_time[num-1], 
-                            markersize = self.markersize_time[num-1],
-                            label = 'Electrical signal (Port: ' + str(num) + ')')
+            viewer_util.plot_decimated(self.ax[0], time, signal, 
+                                       color = self.colors_time[num-1], 
+                                       linestyle = self.linestyle_time[num-1], 
+                                       linewidth= self.linewidth_time[num-1], 
+                                       marker = self.markers_time[num-1], 
+                                       markersize = self.markersize_time[num-1],
+                                       label = 'Electrical signal (Port: ' + str(num) + ')')
         else:
-            self.ax[num-1].plot(time, signal,
-                                color = self.colors_time[0], 
-                                linestyle = self.linestyle_time[0], 
-                                linewidth= self.linewidth_time[0], 
-                                marker = self.markers_time[0], 
-                                markersize = self.markersize_time[0],
-                                label = 'Electrical signal (Port: ' + str(num) + ')')
+            viewer_util.plot_decimated(self.ax[num-1], time, signal,
+                                       color = self.colors_time[0], 
+                                       linestyle = self.linestyle_time[0], 
+                                       linewidth= self.linewidth_time[0], 
+                                       marker = self.markers_time[0], 
+                                       markersize = self.markersize_time[0],
+                                       label = 'Electrical signal (Port: ' + str(num) + ')')
         
     def set_noise_plot_time_domain(self, time, signal, num):
         if self.radioButtonOverlay.isChecked() == 1:
-            self.ax[0].plot(time, signal, 
-                            color = self.colors_noise[num-1], 
-                            linestyle = self.linestyle_noise[num-1], 
-                            linewidth = self.linewidth_noise[num-1], 
-                            marker = self.markers_noise[num-1],
-                            markersize = self.markersize_noise[num-1],
-                            label = 'Electrical noise (Port: ' + str(num) + ')')
+            viewer_util.plot_decimated(self.ax[0], time, signal, 
+                                       color = self.colors_noise[num-1], 
+                                       linestyle = self.linestyle_noise[num-1], 
+                                       linewidth = self.linewidth_noise[num-1], 
+                                       marker = self.markers_noise[num-1],
+                                       markersize = self.markersize_noise[num-1],
+                                       label = 'Electrical noise (Port: ' + str(num) + ')')
         else:
-            self.ax[num-1].plot(time, signal, 
-                                color = self.colors_noise[0], 
-                                linestyle = self.linestyle_noise[0], 
-                                linewidth = self.linewidth_noise[0], 
-                                marker = self.markers_noise[0], 
-                                markersize = self.markersize_noise[0],
-                                label = 'Electrical noise: (Port: ' + str(num) + ')')
+            viewer_util.plot_decimated(self.ax[num-1], time, signal, 
+                                       color = self.colors_noise[0], 
+                                       linestyle = self.linestyle_noise[0], 
+                                       linewidth = self.linewidth_noise[0], 
+                                       marker = self.markers_noise[0], 
+                                       markersize = self.markersize_noise[0],
+                                       label = 'Electrical noise: (Port: ' + str(num) + ')')
         
     def set_signal_and_noise_plot_time_domain(self, time, signal, num):
         if self.radioButtonOverlay.isChecked() == 1:
-            self.ax[0].plot(time, signal, 
-                            color = self.colors_sig_noise[num-1], 
-                            linestyle = self.linestyle_noise[num-1], 
-                            linewidth = self.linewidth_noise[num-1],
-                            marker = self.markers_sig_noise[num-1],
-                            markersize = self.markersize_sig_noise[num-1],
-                            label = 'Electrical signal + noise (Port: ' + str(num) + ')')
+            viewer_util.plot_decimated(self.ax[0], time, signal, 
+                                       color = self.colors_sig_noise[num-1], 
+                                       linestyle = self.linestyle_noise[num-1], 
+                                       linewidth = self.linewidth_noise[num-1],
+                                       marker = self.markers_sig_noise[num-1],
+                                       markersize = self.markersize_sig_noise[num-1],
+                                       label = 'Electrical signal + noise (Port: ' + str(num) + ')')
         else:
-            self.ax[num-1].plot(time, signal, 
-                                color = self.colors_sig_noise[0],
-                                linestyle = self.linestyle_noise[0], 
-                                linewidth = self.linewidth_noise[0], 
-                                marker = self.markers_sig_noise[0],
-                                markersize = self.markersize_sig_noise[0],
-                                label = 'Electrical signal + noise (Port: ' + str(num) + ')')
+            viewer_util.plot_decimated(self.ax[num-1], time, signal, 
+                                       color = self.colors_sig_noise[0],
+                                       linestyle = self.linestyle_noise[0], 
+                                       linewidth = self.linewidth_noise[0], 
+                                       marker = self.markers_sig_noise[0],
+                                       markersize = self.markersize_sig_noise[0],
+                                       label = 'Electrical signal + noise (Port: ' + str(num) + ')')
     #=====================================================================================
     
     def format_coord_time(self, x, y):
@@ -800,13 +801,13 @@ class ElectricalDataAnalyzerMultiplePort(QtWidgets.QDialog, Ui_MultiPortDataWind
             if np.count_nonzero(signal) == np.size(signal):
                 signal = 10*np.log10(signal*1e3/self.fs)                 
             else:
-                signal += 1e-30 #Set zero elements to very low value
+                signal = signal + 1e-30 #Set zero elements to very low value
                 signal = 10*np.log10(signal*1e3/self.fs)  
         else:
             if np.count_nonzero(signal) == np.size(signal):
                 signal = 10*np.log10(signal*1e3)
             else:
-                signal += 1e-30 #Set to very low value
+                signal = signal + 1e-30 #Set to very low value
                 signal = 10*np.log10(signal*1e3)  
         return signal
     #=====================================================================================
@@ -42,6 +42,7 @@ cfg_special = importlib.import_module(cfg_special_path)
 
 import numpy as np
 import matplotlib
+import port_viewer_utilities as viewer_util
 from scipy import constants
 
 from PyQt5 import QtCore, QtGui, uic, QtWidgets
@@ -94,6 +95,7 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         self.direction = direction
         self.signals = signal_data # List of signals for each iteration      
         self.fs = design_settings['sampling_rate'] 
+        self.worker = viewer_util.ViewerWorker() # Calculations and results (worker thread)
         
         # MV 20.01.r3 15-Jun-20 Set iteration to reflect main application setting
         # (iterators spin box)
@@ -332,6 +334,7 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         optical_list = signal_default[5] #MV 20.01.r1 (previously signal_default[4])       
         self.signal = optical_list[0][3]
         self.noise = optical_list[0][4]
+        self.signal_key = (self.iteration, optical_list[0][0]) # Iteration, channel of signal
         # MV 20.01.r1 5-Dec-2019
         #https://stackoverflow.com/questions/21299798/check-if-numpy-array-is-multidimensional-or-not
         #https://docs.scipy.org/doc/numpy/reference/generated/numpy.ndarray.ndim.html
@@ -492,6 +495,150 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         #Return to time tab
         self.tabData.setCurrentWidget(self.tab_time)
         
+    '''Calculations (worker thread, results kept for each iteration/channel/setting)==='''
+    def selected_pol(self, radio_x, radio_y, pol_xy):
+        '''Returns the polarization selected with the radio buttons of a tab'''
+        if radio_x.isChecked() == 1:
+            return 'X'
+        if radio_y.isChecked() == 1:
+            return 'Y'
+        return pol_xy
+    
+    def channel_fields(self, iteration, number):
+        '''Returns the Jones vector, signal and noise fields of optical channel number'''
+        optical_list = self.signals[iteration][5]
+        for k in range(len(optical_list)):
+            if optical_list[k][0] == number:
+                break
+        return optical_list[k][2], optical_list[k][3], optical_list[k][4]
+    
+    def channel_frequency(self, iteration, number):
+        '''Returns the centre frequency of optical channel number'''
+        optical_list = self.signals[iteration][5]
+        for k in range(len(optical_list)):
+            if optical_list[k][0] == number:
+                break
+        return optical_list[k][1]
+    
+    def prefetch_next_iteration(self, calculation, iteration, *settings):
+        '''Starts the calculation for the next iteration (browsing of the iterations)'''
+        if iteration + 1 in self.signals:
+            self.worker.prefetch([calculation(iteration + 1, *settings)])
+    
+    def power_calculation(self, iteration, number, pol):
+        '''Time data tab: signal, noise and signal+noise power'''
+        jones, signal, noise = self.channel_fields(iteration, number)
+        def calculate():
+            sig, noise_pol, sig_pwr, noise_pwr = self.set_signal_data(pol, signal, noise, jones)
+            # MV 20.01.r3 9-Jun-20 Bug fix, was adding sig_pwr+noise_pwr directly
+            # Correct calculation: np.abs(sig + noise)*np.abs(sig + noise)
+            sig_noise_pwr = np.abs(sig + noise_pol)*np.abs(sig + noise_pol)
+            return sig_pwr, noise_pwr, sig_noise_pwr
+        return ('Time', iteration, number, pol), calculate
+    
+    def spectrum_calculation(self, iteration, number, pol):
+        '''Freq data tab: power spectra of the signal, noise and signal+noise and their
+           frequency points (long signals: averaged power spectrum, see 
+           viewer_util.welch_spectrum)
+        '''
+        jones, signal, noise = self.channel_fields(iteration, number)
+        channel_freq = self.channel_frequency(iteration, number)
+        def calculate():
+            if viewer_util.welch_spectrum(self.n):
+                m = min(int(cfg_special.psd_segment_length), self.n)
+                def fields(start, stop):
+                    sig, noise_pol, sig_pwr, noise_pwr = self.set_signal_data(pol, 
+                            signal[..., start:stop], noise[start:stop], jones)
+                    return sig, noise_pol
+                spectra = viewer_util.welch_power_spectra(fields, self.n, m)
+                return ((self.update_freq_array(m, channel_freq),) 
+                        + tuple(np.fft.fftshift(P) for P in spectra))
+            sig, noise_pol, sig_pwr, noise_pwr = self.set_signal_data(pol, signal, noise, jones)
+            # MV 20.01.r3 18-Sep-20 Bug fix:
+            # np.abs(Y)*np.abs(Y) is now divided by n^2, 
+            # previously was incorrectly dividing by n
+            # Same applies for noise and sig+noise
+            spectra = [self.update_freq_array(self.n, channel_freq)]
+            for field in (sig, noise_pol, sig + noise_pol):
+                Y = np.fft.fftshift(np.fft.fft(field))
+                spectra.append(np.abs(Y)*np.abs(Y)/(self.n*self.n))
+            return tuple(spectra)
+        return ('Freq', iteration, number, pol), calculate
+    
+    def stokes_calculation(self, iteration, number):
+        '''Polarization analysis tab: average Stokes parameters S0 to S3 (None if the
+           intensity is 0 at some sampling points)
+        '''
+        jones, signal, noise = self.channel_fields(iteration, number)
+        def calculate():
+            sig_x = np.full(self.n, 0 + 1j*0, dtype=complex)
+            sig_y = np.full(self.n, 0 + 1j*0, dtype=complex)
+            if self.dual_pol_data:
+                sig_x = signal[0]
+                sig_y = signal[1]
+            else:
+                sig_x = jones[0]*signal
+                sig_y = jones[1]*signal
+            sig_x_pwr = np.abs(sig_x)*np.abs(sig_x)
+            sig_y_pwr = np.abs(sig_y)*np.abs(sig_y)
+            # Stokes Vector (Ref 3, Eq 6.4)
+            # P0 = Ex^2 + Ey^2 overall intensity
+            # P1 = Ex^2 - Ey^2 intensity difference
+            # P2 = 2*Ex*Ey*cos(phi) (P_pi/4 - P_-pi/4)
+            # P3 = 2*Ex*Ey*sin(phi) (P_RHC - P_LNC)
+            P0 = sig_x_pwr + sig_y_pwr
+            P1 = sig_x_pwr - sig_y_pwr 
+            phi = np.angle(jones[1]) - np.angle(jones[0])
+            P2 = 2*np.abs(sig_x)*np.abs(sig_y)*np.cos(phi) #P2 = 2*Ex*Ey*cos(phi)
+            P3 = 2*np.abs(sig_x)*np.abs(sig_y)*np.sin(phi) #P3 = 2*Ex*Ey*sin(phi)
+            
+            #Normalize and calculate average values
+            if P0.all() > 0:
+                S0 = P0/P0
+                S1 = P1/P0
+                S2 = P2/P0
+                S3 = P3/P0
+                S0_avg = np.sum(S0)/self.n
+                S1_avg = np.sum(S1)/self.n
+                S2_avg = np.sum(S2)/self.n
+                S3_avg = np.sum(S3)/self.n
+                return S0_avg, S1_avg, S2_avg, S3_avg
+            return None
+        return ('Pol', iteration, number), calculate
+    
+    def all_ch_freq_axis(self, optical_list):
+        '''Returns the frequency axis of the all channels tab (all optical channels)'''
+        frequencies = [channel[1] for channel in optical_list]
+        return np.arange( min(frequencies) - (self.fs/2), max(frequencies) + (self.fs/2), 
+                         int(np.round((self.fs/self.n))) )
+    
+    def all_ch_calculation(self, iteration, pol):
+        '''All channels tab: power spectra of the signal, noise and signal+noise (field
+           envelopes of all the optical channels mapped to a common frequency axis)
+        '''
+        optical_list = self.signals[iteration][5]
+        def calculate():
+            freq_x_axis = self.all_ch_freq_axis(optical_list)
+            field_env_fft = np.full(np.size(freq_x_axis), 0 + 1j*0, dtype=complex)
+            noise_env_fft = field_env_fft.copy()
+            field_noise_env_fft = field_env_fft.copy()
+            # Iterate through all optical channels
+            for k in range(len(optical_list)):
+                frq = self.update_freq_array(self.n, optical_list[k][1])
+                sig, noise, sig_pwr, noise_pwr = self.set_signal_data(pol, optical_list[k][3],
+                                                optical_list[k][4], optical_list[k][2])
+                # Map field envelopes to extended frequency axis
+                # MV 20.01.r3 17-Jun-20 Cleaned up code for field envelope mapping
+                j = np.max(np.where(freq_x_axis <= frq[0]))
+                field_env_fft[j:j+self.n] += np.fft.fftshift(np.fft.fft(sig))[0:self.n]
+                noise_env_fft[j:j+self.n] += np.fft.fftshift(np.fft.fft(noise))[0:self.n]
+                field_noise_env_fft[j:j+self.n] += np.fft.fftshift(
+                        np.fft.fft(sig + noise))[0:self.n]
+            # MV 20.01.r3 18-Sep-20 Bug fix: power is divided by n^2 (was n)
+            return tuple(abs(env_fft)*abs(env_fft)/(self.n*self.n) for env_fft in 
+                         (field_env_fft, noise_env_fft, field_noise_env_fft))
+        return ('All channels', iteration, pol), calculate
+            
     '''Time data tab (plotting methods)================================================'''
     def iteration_change_time(self):
         new_iteration = int(self.spinBoxTime.value())
@@ -510,17 +657,23 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         index_key = k
 
         self.signal = optical_list[index_key][3] # X+Y (combined field)
+        self.signal_key = (new_iteration, optical_list[index_key][0])
         self.jones_vector = optical_list[index_key][2]
         self.noise = optical_list[index_key][4]           
         ch_freq = optical_list[index_key][1]
         self.opticalChTime.setText(str(format(ch_freq, '0.5E')))
         
-        self.tabData.setCurrentWidget(self.tab_time)
-        self.plot_time_domain(0)
-        self.canvas.draw()
+        self.check_signal_changed_time()
+        pol = self.selected_pol(self.radioButtonPolX, self.radioButtonPolY, 'X-Y')
+        self.prefetch_next_iteration(self.power_calculation, *self.signal_key, pol)
     
     def check_signal_changed_time(self):
-        self.tabData.setCurrentWidget(self.tab_time)       
+        self.tabData.setCurrentWidget(self.tab_time)
+        pol = self.selected_pol(self.radioButtonPolX, self.radioButtonPolY, 'X-Y')
+        self.worker.request([self.power_calculation(*self.signal_key, pol)],
+                            self.update_time_plot)
+        
+    def update_time_plot(self):
         self.plot_time_domain(0)
         self.canvas.draw()
         
@@ -560,8 +713,8 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         if self.radioButtonPolY.isChecked() == 1:
             pol = 'Y'
 
-        sig, noise, sig_pwr, noise_pwr = self.set_signal_data(pol, self.signal,
-                                                              self.noise, self.jones_vector)
+        sig_pwr, noise_pwr, sig_noise_pwr = self.worker.get(
+                *self.power_calculation(*self.signal_key, pol))
         
         #20.01.r1 2 Sep 19 - Updated this section by introducing new functions=============
         #to adjust plotting (adjust_units_for_plotting_time)
@@ -582,9 +735,6 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
                 self.set_noise_plot_time_domain(noise_pwr_dbm)
             
         if self.sigandnoiseCheckBox.checkState() == 2:
-            # MV 20.01.r3 9-Jun-20 Bug fix, was adding sig_pwr+noise_pwr directly
-            # Correct calculation: np.abs(sig + noise)*np.abs(sig + noise)
-            sig_noise_pwr = np.abs(sig + noise)*np.abs(sig + noise)
             if self.radioButtonLinear.isChecked() == 1:
                 self.set_signal_and_noise_plot_time_domain(sig_noise_pwr)
             else:
@@ -611,13 +761,13 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
             else:
                 self.ax2.set_ylabel('Phase (rad)')
                 
-            self.ax2.plot(self.time, phase_map, 
-                          color=cfg_opt.optical_time_phase_color,
-                          linestyle=cfg_opt.optical_time_phase_linestyle,
-                          linewidth=cfg_opt.optical_time_phase_linewidth, 
-                          marker=cfg_opt.optical_time_phase_marker,
-                          markersize=cfg_opt.optical_time_phase_markersize, 
-                          label = 'Optical phase')  
+            viewer_util.plot_decimated(self.ax2, self.time, phase_map, 
+                                       color=cfg_opt.optical_time_phase_color,
+                                       linestyle=cfg_opt.optical_time_phase_linestyle,
+                                       linewidth=cfg_opt.optical_time_phase_linewidth, 
+                                       marker=cfg_opt.optical_time_phase_marker,
+                                       markersize=cfg_opt.optical_time_phase_markersize, 
+                                       label = 'Optical phase')  
             self.ax2.set_aspect('auto')
         
         # MV 20.01.r1 15-Sep-19 (Shortended title - causing issues with tight layout)
@@ -701,7 +851,7 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         if np.count_nonzero(signal) == np.size(signal): 
             signal = 10*np.log10(signal*1e3)
         else:
-            signal += 1e-30 #Set to very low value
+            signal = signal + 1e-30 #Set to very low value
             signal = 10*np.log10(signal*1e3)  
         return signal
     
@@ -709,31 +859,31 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
     # MV 20.01.r1 Linked plot settings to config_port_viewers file variables (to provide ability to
     # manage look and feel of plots)  
     def set_signal_plot_time_domain(self, signal):
-        self.ax.plot(self.time, signal,
-                     color = cfg_opt.optical_time_signal_color, 
-                     linestyle = cfg_opt.optical_time_signal_linestyle, 
-                     linewidth = cfg_opt.optical_time_signal_linewidth, 
-                     marker = cfg_opt.optical_time_signal_marker, 
-                     markersize = cfg_opt.optical_time_signal_markersize,
-                     label = 'Optical signal') 
+        viewer_util.plot_decimated(self.ax, self.time, signal,
+                                   color = cfg_opt.optical_time_signal_color, 
+                                   linestyle = cfg_opt.optical_time_signal_linestyle, 
+                                   linewidth = cfg_opt.optical_time_signal_linewidth, 
+                                   marker = cfg_opt.optical_time_signal_marker, 
+                                   markersize = cfg_opt.optical_time_signal_markersize,
+                                   label = 'Optical signal') 
         
     def set_noise_plot_time_domain(self, signal):
-        self.ax.plot(self.time, signal, 
-                     color = cfg_opt.optical_time_noise_color, 
-                     linestyle = cfg_opt.optical_time_noise_linestyle, 
-                     linewidth = cfg_opt.optical_time_noise_linewidth, 
-                     marker = cfg_opt.optical_time_noise_marker, 
-                     markersize = cfg_opt.optical_time_noise_markersize,
-                     label = 'Optical noise')   
+        viewer_util.plot_decimated(self.ax, self.time, signal, 
+                                   color = cfg_opt.optical_time_noise_color, 
+                                   linestyle = cfg_opt.optical_time_noise_linestyle, 
+                                   linewidth = cfg_opt.optical_time_noise_linewidth, 
+                                   marker = cfg_opt.optical_time_noise_marker, 
+                                   markersize = cfg_opt.optical_time_noise_markersize,
+                                   label = 'Optical noise')   
         
     def set_signal_and_noise_plot_time_domain(self, signal):
-        self.ax.plot(self.time, signal, 
-                     color = cfg_opt.optical_time_sig_noise_color, 
-                     linestyle = cfg_opt.optical_time_sig_noise_linestyle, 
-                     linewidth = cfg_opt.optical_time_sig_noise_linewidth, 
-                     marker = cfg_opt.optical_time_sig_noise_marker, 
-                     markersize = cfg_opt.optical_time_sig_noise_markersize,
-                     label = 'Optical signal + noise')
+        viewer_util.plot_decimated(self.ax, self.time, signal, 
+                                   color = cfg_opt.optical_time_sig_noise_color, 
+                                   linestyle = cfg_opt.optical_time_sig_noise_linestyle, 
+                                   linewidth = cfg_opt.optical_time_sig_noise_linewidth, 
+                                   marker = cfg_opt.optical_time_sig_noise_marker, 
+                                   markersize = cfg_opt.optical_time_sig_noise_markersize,
+                                   label = 'Optical signal + noise')
     #=====================================================================================
                 
     def format_coord_time(self, x, y):
@@ -772,18 +922,24 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         #self.frq = self.update_freq_array(self.n, self.channel_freq)
         self.jones_vector = optical_list[index_key][2]
         self.signal = optical_list[index_key][3]
+        self.signal_key = (new_iteration, optical_list[index_key][0])
         self.noise = optical_list[index_key][4]
         # PSD noise array
         #self.noise_freq = optical_list[index_key][5]
         self.noise_freq = signal_updated[4] #MV 20.01.r1
         self.frq = self.update_freq_array(self.n, self.channel_freq)
           
-        self.tabData.setCurrentWidget(self.tab_freq)       
-        self.plot_freq_domain(0)
-        self.canvas_freq.draw()
+        self.check_signal_changed_freq()
+        pol = self.selected_pol(self.radioButtonPolXFreq, self.radioButtonPolYFreq, 'X+Y')
+        self.prefetch_next_iteration(self.spectrum_calculation, *self.signal_key, pol)
         
     def check_signal_changed_freq(self):
-        self.tabData.setCurrentWidget(self.tab_freq)    
+        self.tabData.setCurrentWidget(self.tab_freq)
+        pol = self.selected_pol(self.radioButtonPolXFreq, self.radioButtonPolYFreq, 'X+Y')
+        self.worker.request([self.spectrum_calculation(*self.signal_key, pol)],
+                            self.update_freq_plot)
+        
+    def update_freq_plot(self):
         self.plot_freq_domain(0)
         self.canvas_freq.draw()
         
@@ -810,27 +966,9 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
                 self.noise_freq_psd = 0.5*self.noise_freq_psd #MV 20.01.r1 7-Dec-19 (DoP is 0%)
                 self.noise_freq_pwr = 0.5*self.noise_freq_pwr
     
-            sig, noise, sig_pwr, noise_pwr = self.set_signal_data(pol, self.signal,
-                                                    self.noise, self.jones_vector)
-            
-            # Calculate fft for signal
-            self.Y = np.fft.fft(sig)
-            self.Y = np.fft.fftshift(self.Y)
-            # MV 20.01.r3 18-Sep-20 Bug fix:
-            # np.abs(self.Y)*np.abs(self.Y) is now divided by n^2, 
-            # previously was incorrectly dividing by n
-            # Same applies for noise and sig+noise
-            optical_power_fft = np.abs(self.Y)*np.abs(self.Y)/(self.n*self.n)
-            
-            # Calculate fft for noise
-            self.N = np.fft.fft(noise)
-            self.N = np.fft.fftshift(self.N)
-            optical_noise_fft = np.abs(self.N)*np.abs(self.N)/(self.n*self.n)
-            
-            # Calculate fft for signal + noise
-            self.Y_N = np.fft.fft(sig + noise)
-            self.Y_N = np.fft.fftshift(self.Y_N)
-            optical_signal_and_noise_fft = np.abs(self.Y_N)*np.abs(self.Y_N)/(self.n*self.n)
+            (frq, optical_power_fft, optical_noise_fft, 
+             optical_signal_and_noise_fft) = self.worker.get(
+                     *self.spectrum_calculation(*self.signal_key, pol))
             
             self.figure_freq.clf()
             # MV 20.01.r1 Added new feature to select plot area background color
@@ -853,10 +991,6 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
                     self.af.set_ylim(float(start_val), float(end_val))    
                 
             if self.signalCheckBoxEnableResolution.checkState() == 2:
-                optical_power_fft_avg = np.zeros(self.n)
-                optical_noise_fft_avg = np.zeros(self.n)
-                optical_signal_and_noise_fft_avg = np.zeros(self.n)
-                
                 #MV 20.01.r1 31-Aug-19 Added check in case field is left blank================
                 if self.spectralResolution.text(): 
                     window = float(self.spectralResolution.text())
@@ -865,17 +999,13 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
                 #=============================================================================
                 x = int(round(window/self.fs))
                 if x > 1:
-                    for i in range(0,self.n):
-                        for a in range(-x,x):
-                            if (i+a < 0) or (i+a > self.n-1): 
-                                pass
-                            else:
-                                optical_power_fft_avg[i] += optical_power_fft[i+a]
-                                optical_noise_fft_avg[i] += optical_noise_fft[i+a]
-                                optical_signal_and_noise_fft_avg[i] += optical_signal_and_noise_fft[i+a]
-                    optical_power_fft = optical_power_fft_avg
-                    optical_noise_fft = optical_noise_fft_avg
-                    optical_signal_and_noise_fft = optical_signal_and_noise_fft_avg
+                    key = ('Freq',) + self.signal_key + (pol, x)
+                    optical_power_fft = self.spectral_resolution(key + ('Signal',),
+                                                                 optical_power_fft, x)
+                    optical_noise_fft = self.spectral_resolution(key + ('Noise',),
+                                                                 optical_noise_fft, x)
+                    optical_signal_and_noise_fft = self.spectral_resolution(
+                            key + ('Signal+noise',), optical_signal_and_noise_fft, x)
     
             if self.radioButtonLinearFreq.isChecked() == 1:
                 self.af.set_ylabel('Power (W)')
@@ -887,10 +1017,10 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
                 self.af.set_ylabel('Power (dBm)')
                
             if self.radioButtonNm.isChecked() == 1:
-                self.freq_plot = (constants.c/self.frq)*1e9
+                self.freq_plot = (constants.c/frq)*1e9
                 self.af.set_xlabel('Freq (nm)')
             else:
-                self.freq_plot = self.frq
+                self.freq_plot = frq
                 self.af.set_xlabel('Freq (Hz)')
                 
             if self.signalCheckBoxFreq.checkState() == 2:
@@ -1065,6 +1195,14 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
             if rtnval == QtWidgets.QMessageBox.Ok:
                 msg.close()
                     
+    def spectral_resolution(self, key, spectrum, bins):
+        '''Returns the spectrum with a resolution bandwidth of 2*bins frequency bins
+           (results are kept for each iteration/channel/polarization/resolution key)
+        '''
+        shape = cfg_opt.optical_rbw_shape
+        return self.worker.get(key + (shape,), 
+                               lambda: viewer_util.rbw_filter(spectrum, bins, shape))
+    
     def adjust_units_for_plotting_freq(self, signal):
         if self.radioButtonLinearFreq.isChecked() == 1:
             pass
@@ -1074,13 +1212,13 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
             if np.count_nonzero(signal) == np.size(signal):
                 signal = 10*np.log10(signal*1e3/self.fs)                 
             else:
-                signal += 1e-30 #Set zero elements to very low value
+                signal = signal + 1e-30 #Set zero elements to very low value
                 signal = 10*np.log10(signal*1e3/self.fs)  
         else:
             if np.count_nonzero(signal) == np.size(signal):
                 signal = 10*np.log10(signal*1e3)
             else:
-                signal += 1e-30 #Set to very low value
+                signal = signal + 1e-30 #Set to very low value
                 signal = 10*np.log10(signal*1e3)  
         return signal
     
@@ -1143,10 +1281,13 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         index_key = k
         
         self.signal = optical_list[index_key][3] #Electrical amplitudes
+        self.signal_key = (new_iteration, optical_list[index_key][0])
         self.jones_vector = optical_list[index_key][2]
         
         self.tabData.setCurrentWidget(self.tab_polarization) 
-        self.plot_poincare_sphere()
+        self.worker.request([self.stokes_calculation(*self.signal_key)],
+                            self.plot_poincare_sphere)
+        self.prefetch_next_iteration(self.stokes_calculation, *self.signal_key)
         
     def update_poincare_sphere(self):
         self.plot_poincare_sphere()
@@ -1166,37 +1307,9 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
             self.p_sph = self.figure_pol.add_subplot(111, projection='3d')
     
             #Stokes parameters
-            sig_x = np.full(self.n, 0 + 1j*0, dtype=complex)
-            sig_y = np.full(self.n, 0 + 1j*0, dtype=complex)
-            if self.dual_pol_data:
-                sig_x = self.signal[0]
-                sig_y = self.signal[1]
-            else:
-                sig_x = self.jones_vector[0]*self.signal
-                sig_y = self.jones_vector[1]*self.signal
-            sig_x_pwr = np.abs(sig_x)*np.abs(sig_x)
-            sig_y_pwr = np.abs(sig_y)*np.abs(sig_y)
-            # Stokes Vector (Ref 3, Eq 6.4)
-            # P0 = Ex^2 + Ey^2 overall intensity
-            # P1 = Ex^2 - Ey^2 intensity difference
-            # P2 = 2*Ex*Ey*cos(phi) (P_pi/4 - P_-pi/4)
-            # P3 = 2*Ex*Ey*sin(phi) (P_RHC - P_LNC)
-            P0 = sig_x_pwr + sig_y_pwr
-            P1 = sig_x_pwr - sig_y_pwr 
-            phi = np.angle(self.jones_vector[1]) - np.angle(self.jones_vector[0])
-            P2 = 2*np.abs(sig_x)*np.abs(sig_y)*np.cos(phi) #P2 = 2*Ex*Ey*cos(phi)
-            P3 = 2*np.abs(sig_x)*np.abs(sig_y)*np.sin(phi) #P3 = 2*Ex*Ey*sin(phi)
-            
-            #Normalize and calculate average values
-            if P0.all() > 0:
-                S0 = P0/P0
-                S1 = P1/P0
-                S2 = P2/P0
-                S3 = P3/P0
-                S0_avg = np.sum(S0)/self.n
-                S1_avg = np.sum(S1)/self.n
-                S2_avg = np.sum(S2)/self.n
-                S3_avg = np.sum(S3)/self.n
+            stokes = self.worker.get(*self.stokes_calculation(*self.signal_key))
+            if stokes is not None:
+                S0_avg, S1_avg, S2_avg, S3_avg = stokes
                 self.stokesPar0.setText(str(format(S0_avg, '0.3E')))
                 self.stokesPar1.setText(str(format(S1_avg, '0.3E')))
                 self.stokesPar2.setText(str(format(S2_avg, '0.3E')))
@@ -1216,7 +1329,7 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
             z = np.outer(np.ones(np.size(u)), np.cos(v))
             self.p_sph.plot_surface(x, y, z, rstride=4, cstride=3, alpha = 0.4, linewidth = 1.0,
                                color='#e0e0e0')
-            if P0.all() > 0:
+            if stokes is not None:
                 self.p_sph.scatter(S1_avg, S2_avg, S3_avg, color = 'blue', marker = 'o')
                 x = [0, S1_avg]
                 y = [0, S2_avg]
@@ -1303,6 +1416,7 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         index_key = k
         
         self.signal = optical_list[index_key][3] #Electrical amplitudes
+        self.signal_key = (new_iteration, optical_list[index_key][0])
         self.noise = optical_list[index_key][4]
         self.jones_vector = optical_list[index_key][2]
         self.channel_freq = optical_list[index_key][1]    
@@ -1478,6 +1592,7 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         index_key = k
         
         self.signal = optical_list[index_key][3] #Electrical amplitudes
+        self.signal_key = (new_iteration, optical_list[index_key][0])
         self.noise = optical_list[index_key][4]
         self.jones_vector = optical_list[index_key][2]
         self.channel_freq = optical_list[index_key][1]
@@ -1613,8 +1728,7 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
         self.numberOptChannelsAllCh.setText(str(format(len(optical_list), 'n')))
         
         # Build consolidated freq axis      
-        self.freq_x_axis = np.arange( freq_min - (self.fs/2), freq_max + (self.fs/2), 
-                                int(np.round((self.fs/self.n))) )
+        self.freq_x_axis = self.all_ch_freq_axis(optical_list)
         
         self.freq_axis_size = np.size(self.freq_x_axis)
         
@@ -1631,67 +1745,22 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
             self.noise_freq_psd = 0.5*self.noise_freq_psd
             self.noise_freq_pwr = 0.5*self.noise_freq_pwr
         
-        # Initialize
         if (self.signalCheckBoxAllCh.checkState() == 2 or 
             self.noiseCheckBoxAllCh.checkState() == 2 or
             self.sigandnoiseCheckBoxAllCh.checkState() == 2):
-            self.all_ch_field_env_fft = np.full(self.freq_axis_size, 0 + 1j*0, dtype=complex) 
-            self.all_ch_noise_env_fft = self.all_ch_field_env_fft.copy()
-            self.all_ch_field_noise_env_fft = self.all_ch_field_env_fft.copy()
-            
-            pol = 'X-Y'
-            if self.radioButtonPolXAllCh.isChecked() == 1:
-                pol = 'X'
-            if self.radioButtonPolYAllCh.isChecked() == 1:
-                pol = 'Y'  
-        
-            # Iterate through all optical channels
-            for k in range(len(optical_list)):       
-                channel_freq = optical_list[k][1]
-                frq = self.update_freq_array(self.n, channel_freq)
-                current_jones_vector = optical_list[k][2]            
-                current_signal_field = optical_list[k][3]
-                current_noise_field = optical_list[k][4]
-                
-                sig, noise, sig_pwr, noise_pwr = self.set_signal_data(pol, current_signal_field,
-                                                current_noise_field, current_jones_vector)   
-                
-                # Calculate fft for signal
-                self.Y = np.fft.fft(sig)
-                self.Y = np.fft.fftshift(self.Y)
-                
-                # Calculate fft for noise
-                self.N = np.fft.fft(noise)
-                self.N = np.fft.fftshift(self.N)
-                
-                # Calculate fft for signal + noise
-                self.Y_N = np.fft.fft(sig + noise)
-                self.Y_N = np.fft.fftshift(self.Y_N)  
-            
-                # Map field envelopes to extended frequency axis
-                # MV 20.01.r3 17-Jun-20 Cleaned up code for field envelope
-                # mapping
-                j = np.max(np.where(self.freq_x_axis <= frq[0]))
-                
-                '''j = 0
-                while True:
-                    if self.freq_x_axis[j] == self.freq_x_axis[-1]: #Last element of array
-                        break
-                    if (frq[0] >= self.freq_x_axis[j] and frq[0] < self.freq_x_axis[j+1]):
-                        break
-                    else:
-                        j += 1'''
-            
-                self.all_ch_field_env_fft[j:j+self.n] += self.Y[0:self.n]
-                self.all_ch_noise_env_fft[j:j+self.n] += self.N[0:self.n]
-                self.all_ch_field_noise_env_fft[j:j+self.n] += self.Y_N[0:self.n]
-                
-        self.plot_all_channels(0)
-        self.canvas_all_ch.draw()
+            pol = self.selected_pol(self.radioButtonPolXAllCh, self.radioButtonPolYAllCh,
+                                    'X-Y')
+            self.worker.request([self.all_ch_calculation(new_iteration, pol)],
+                                self.update_all_ch_plot)
+            self.prefetch_next_iteration(self.all_ch_calculation, new_iteration, pol)
+        else:
+            self.update_all_ch_plot()
 
     def check_signal_changed_all_ch(self):
         self.tabData.setCurrentWidget(self.tab_channels) 
         self.iteration_change_all_ch()
+        
+    def update_all_ch_plot(self):
         self.plot_all_channels(0)
         self.canvas_all_ch.draw()
         
@@ -1726,28 +1795,15 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
                     end_val = self.endYAxisAllCh.text()
                     self.a_ch.set_ylim(float(start_val), float(end_val))   
                 
-            if self.signalCheckBoxAllCh.checkState() == 2:
-                # MV 20.01.r3 18-Sep-20 Bug fix:
-                # np.abs(self.Y)*np.abs(self.Y) is now divided by n^2, 
-                # previously was incorrectly dividing by n
-                # Same applies for noise and sig+noise
-                self.optical_power_fft = (abs(self.all_ch_field_env_fft)
-                                          *abs(self.all_ch_field_env_fft)/(self.n*self.n))  
-            
-            if self.noiseCheckBoxAllCh.checkState() == 2:
-                self.optical_noise_fft = (abs(self.all_ch_noise_env_fft)
-                                          *abs(self.all_ch_noise_env_fft)/(self.n*self.n))
-            
-            if self.sigandnoiseCheckBoxAllCh.checkState() == 2:
-                self.optical_signal_and_noise_fft = (abs(self.all_ch_field_noise_env_fft)
-                                              *abs(self.all_ch_field_noise_env_fft)/(self.n*self.n))
+            if (self.signalCheckBoxAllCh.checkState() == 2 or 
+                self.noiseCheckBoxAllCh.checkState() == 2 or
+                self.sigandnoiseCheckBoxAllCh.checkState() == 2):
+                (self.optical_power_fft, self.optical_noise_fft,
+                 self.optical_signal_and_noise_fft) = self.worker.get(
+                         *self.all_ch_calculation(int(self.spinBoxAllCh.value()), pol))
             
             #Update spectral resolution for plot (if selected)
             if self.signalCheckBoxEnableResolutionAllCh.checkState() == 2:
-                optical_power_fft_avg = np.zeros(self.freq_axis_size)
-                optical_noise_fft_avg = np.zeros(self.freq_axis_size)
-                optical_signal_and_noise_fft_avg = np.zeros(self.freq_axis_size)
-                
                 if self.spectralResolutionAllCh.text():
                     window = float(self.spectralResolutionAllCh.text())
                 else:
@@ -1755,20 +1811,16 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
                 
                 x = int(round(window/self.fs))
                 if x > 1:
-                    for i in range(0,np.size(self.freq_x_axis)-1):
-                        for a in range(-x,x):
-                            if (i+a < 0) or (i+a > np.size(self.freq_x_axis)-1): 
-                                pass
-                            else:
-                                if self.signalCheckBoxAllCh.checkState() == 2:
-                                    optical_power_fft_avg[i] += self.optical_power_fft[i+a]
-                                if self.noiseCheckBoxAllCh.checkState() == 2:
-                                    optical_noise_fft_avg[i] += self.optical_noise_fft[i+a]
-                                if self.sigandnoiseCheckBoxAllCh.checkState() == 2:
-                                    optical_signal_and_noise_fft_avg[i] += self.optical_signal_and_noise_fft[i+a]
-                    self.optical_power_fft = optical_power_fft_avg
-                    self.optical_noise_fft = optical_noise_fft_avg
-                    self.optical_signal_and_noise_fft = optical_signal_and_noise_fft_avg
+                    key = ('All channels', self.spinBoxAllCh.value(), pol, x)
+                    if self.signalCheckBoxAllCh.checkState() == 2:
+                        self.optical_power_fft = self.spectral_resolution(
+                                key + ('Signal',), self.optical_power_fft, x)
+                    if self.noiseCheckBoxAllCh.checkState() == 2:
+                        self.optical_noise_fft = self.spectral_resolution(
+                                key + ('Noise',), self.optical_noise_fft, x)
+                    if self.sigandnoiseCheckBoxAllCh.checkState() == 2:
+                        self.optical_signal_and_noise_fft = self.spectral_resolution(
+                                key + ('Signal+noise',), self.optical_signal_and_noise_fft, x)
             
             if self.radioButtonLinearAllCh.isChecked() == 1:
                 self.a_ch.set_ylabel('Power (W)')
@@ -1874,13 +1926,13 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
             if np.count_nonzero(signal) == np.size(signal):
                 signal = 10*np.log10(signal*1e3/self.fs)                 
             else:
-                signal += 1e-30 #Set zero elements to very low value
+                signal = signal + 1e-30 #Set zero elements to very low value
                 signal = 10*np.log10(signal*1e3/self.fs)  
         else:
             if np.count_nonzero(signal) == np.size(signal):
                 signal = 10*np.log10(signal*1e3)
             else:
-                signal += 1e-30#Set zero elements to very low value
+                signal = signal + 1e-30#Set zero elements to very low value
                 signal = 10*np.log10(signal*1e3)  
         return signal
     
@@ -1927,6 +1979,7 @@ class OpticalPortDataAnalyzer(QtWidgets.QDialog, Ui_PortDataWindow_Optical):
  
     '''Close event====================================================================='''
     def closeEvent(self, event):
+        self.worker.stop()
         plt.close(self.figure)
         plt.close(self.figure_freq)
         plt.close(self.figure_pol)
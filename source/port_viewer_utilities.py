@@ -0,0 +1,379 @@
+'''
+    SystemLab-Design Version 20.01
+    Copyright © 2019-2020 SystemLab Inc. All rights reserved.
+
+    NOTICE================================================================================
+    This file is part of SystemLab-Design 20.01.
+
+    SystemLab-Design 20.01 is free software: you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License,
+    or (at your option) any later version.
+
+    SystemLab-Design 20.01 is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with SystemLab-Design 20.01.  If not, see <https://www.gnu.org/licenses/>.
+    ======================================================================================
+
+    SystemLab module for plotting methods shared by the port analyzer (GUI) classes
+'''
+import importlib
+import concurrent.futures
+import numpy as np
+from matplotlib import colors
+from PyQt5 import QtCore
+import systemlab_utilities as util
+cfg_port_viewers = importlib.import_module('syslab_config_files.config_port_viewers')
+
+'''Time-domain plots (level of detail)=======================================================
+'''
+class DecimatedLine():
+    '''Line plot of a long signal (x must be increasing) holding only about
+       time_plot_points_per_pixel points per pixel of the visible x range. The minimum
+       and maximum of the signal over blocks of 2, 4, 8... samples (min/max pyramid) are
+       calculated when the line is created; each time the x-axis limits change (zoom,
+       pan) the line is set to the min/max of the coarsest level that still has
+       enough points, or to the samples themselves when zoomed in far enough
+    '''
+    def __init__(self, axes, x, y, **plot_settings):
+        self.axes = axes
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        if np.iscomplexobj(self.y): # e.g. power calculated as signal*conj(signal)
+            self.y = np.real(self.y)
+        # Min/max pyramid (level k: blocks of 2**(k+1) samples)
+        self.levels = []
+        y_min = y_max = self.y
+        while len(y_min) > 2:
+            if len(y_min) % 2: # Last block is repeated to complete the pair
+                y_min = np.append(y_min, y_min[-1])
+                y_max = np.append(y_max, y_max[-1])
+            y_min = np.fmin(y_min[0::2], y_min[1::2])
+            y_max = np.fmax(y_max[0::2], y_max[1::2])
+            self.levels.append((y_min, y_max))
+        x_plot, y_plot = self.select(0, len(self.x))
+        self.line = axes.plot(x_plot, y_plot, **plot_settings)[0]
+        # The callback (function) keeps the decimated line alive with the axes
+        for ax in axes.get_shared_x_axes().get_siblings(axes):
+            ax.callbacks.connect('xlim_changed', lambda ax: self.update())
+
+    def select(self, start, stop):
+        '''Returns the points to plot for samples start to stop'''
+        max_points = max(int(cfg_port_viewers.time_plot_points_per_pixel
+                             *self.axes.bbox.width), 2)
+        if stop - start <= max_points:
+            return self.x[start:stop], self.y[start:stop]
+        # Coarsest level needed: 2 points (min, max) per block
+        level = int(np.ceil(np.log2(2*(stop - start)/max_points))) - 1
+        level = min(max(level, 0), len(self.levels) - 1)
+        block = 2**(level + 1)
+        blocks = np.arange(start//block, -(-stop//block))
+        y_min, y_max = self.levels[level]
+        x_plot = np.repeat(self.x[blocks*block], 2)
+        y_plot = np.column_stack((y_min[blocks], y_max[blocks])).ravel()
+        # Keep the exact end of the visible range
+        return np.append(x_plot, self.x[stop - 1]), np.append(y_plot, self.y[stop - 1])
+
+    def update(self):
+        x_start, x_stop = sorted(self.axes.get_xlim())
+        start = max(int(np.searchsorted(self.x, x_start)) - 1, 0)
+        stop = min(int(np.searchsorted(self.x, x_stop, side='right')) + 1, len(self.x))
+        if stop <= start:
+            return
+        self.line.set_data(*self.select(start, stop))
+
+def plot_decimated(axes, x, y, **plot_settings):
+    '''Plots y(x) on axes (matplotlib plot settings) and returns the line. Signals of
+       time_plot_min_samples or more samples are plotted with a DecimatedLine
+    '''
+    if (not cfg_port_viewers.time_plot_decimation
+            or np.size(y) < cfg_port_viewers.time_plot_min_samples):
+        return axes.plot(x, y, **plot_settings)[0]
+    return DecimatedLine(axes, x, y, **plot_settings).line
+
+'''Eye diagrams============================================================================
+'''
+def eye_density_grid(time, traces, t_max, bins, chunk_size=1 << 22):
+    '''Returns the intensity grid of an eye diagram (bins[1] amplitude rows x bins[0]
+       time columns, number of traces crossing each cell) and its amplitude range
+       time: sampling times of the traces (0 to t_max, increasing)
+       traces: 2D array (one trace per row)
+       Consecutive samples of a trace are joined by line segments. In each time column
+       (half-open interval) the cells between the lowest and highest point of the
+       trace within the column are counted once (vertical runs are accumulated as +1/-1
+       steps and summed over the amplitude axis). chunk_size sets the number of
+       (trace, column) pairs processed at once
+    '''
+    nx, ny = int(bins[0]), int(bins[1])
+    traces = np.asarray(traces, dtype=float)
+    finite = np.isfinite(traces)
+    if np.any(finite):
+        y_min, y_max = np.min(traces[finite]), np.max(traces[finite])
+    else:
+        y_min, y_max = 0.0, 1.0
+    # Add margins (5% of the amplitude range) around the traces
+    y_span = y_max - y_min
+    if y_span <= 0:
+        y_span = abs(y_max) or 1.0
+    y_min, y_max = y_min - 0.05*y_span, y_max + 0.05*y_span
+
+    # Time columns [c, c+1) crossed by each segment (samples j, j+1) and the start/end
+    # of the segment within each column. Sample times within eps of a column boundary
+    # are on the boundary (rounding of the times does not extend a segment into the
+    # next column)
+    eps = 1e-9
+    px = np.clip(np.asarray(time, dtype=float)*(nx/t_max), 0, nx)
+    first = np.clip(np.floor(px[:-1] + eps).astype(np.int64), 0, nx - 1)
+    last = np.clip(np.ceil(px[1:] - eps).astype(np.int64) - 1, first, nx - 1)
+    count = last - first + 1
+    seg = np.repeat(np.arange(len(first)), count)
+    col = np.arange(len(seg)) - np.repeat(np.cumsum(count) - count, count) + first[seg]
+    dx = np.diff(px)[seg]
+    dx[dx == 0] = 1
+    frac_a = np.clip((col - px[seg])/dx, 0, 1)
+    frac_b = np.clip((col + 1 - px[seg])/dx, 0, 1)
+    # (segment, column) pairs are ordered by column: the pairs of a column are merged
+    # into a single vertical run per trace
+    starts = np.flatnonzero(np.diff(col, prepend=-1))
+    cols = col[starts]
+
+    py = (traces - y_min)*(ny/(y_max - y_min))
+    diff = np.zeros((ny + 1)*nx)
+    rows_chunk = max(1, chunk_size//max(1, len(seg)))
+    for r in range(0, len(py), rows_chunk):
+        y0 = py[r:r + rows_chunk, seg]
+        dy = py[r:r + rows_chunk, seg + 1] - y0
+        y_a = y0 + frac_a*dy
+        y_b = y0 + frac_b*dy
+        # Lowest and highest point of each trace in each column (segments with
+        # non-finite samples are skipped)
+        y_low = np.fmin.reduceat(np.minimum(y_a, y_b), starts, axis=1)
+        y_high = np.fmax.reduceat(np.maximum(y_a, y_b), starts, axis=1)
+        keep = np.isfinite(y_low) & np.isfinite(y_high)
+        runs_col = np.broadcast_to(cols, keep.shape)[keep]
+        low = np.clip(np.floor(y_low[keep]), 0, ny - 1).astype(np.int64)
+        high = np.clip(np.floor(y_high[keep]), 0, ny - 1).astype(np.int64)
+        diff += np.bincount(low*nx + runs_col, minlength=(ny + 1)*nx)
+        diff -= np.bincount((high + 1)*nx + runs_col, minlength=(ny + 1)*nx)
+    grid = np.cumsum(diff.reshape(ny + 1, nx), axis=0)[:ny]
+    return grid, (y_min, y_max)
+
+def plot_eye_density(axes, grid, t_max, y_range, color, alpha, gamma, zorder, label):
+    '''Displays an eye diagram intensity grid (see eye_density_grid) as a single image
+       Cells are shown in color with an opacity from alpha (cells crossed by a single
+       trace) to 1 (cell with the highest density), empty cells are transparent
+    '''
+    cmap = colors.LinearSegmentedColormap.from_list('eye_density',
+                                [colors.to_rgba(color, alpha), colors.to_rgba(color, 1)])
+    density = np.ma.masked_equal(grid, 0)
+    norm = colors.PowerNorm(gamma, vmin=1, vmax=max(np.max(grid), 2))
+    return axes.imshow(density, cmap=cmap, norm=norm, origin='lower',
+                       extent=(0, t_max, y_range[0], y_range[1]), aspect='auto',
+                       interpolation='nearest', zorder=zorder, label=label)
+
+'''Spectra (spectral resolution)===========================================================
+'''
+def window_sums(values, offset, width):
+    '''Returns the sums of values[i+offset:i+offset+width] for each sample i (samples
+       outside the array count as 0, -width <= offset <= 0), in O(n). The array is
+       split into blocks of width samples: each window is the end of one block plus the
+       start of the next, so the partial sums only include samples of the window (no
+       loss of precision for small values next to large ones, as with a difference of
+       cumulative sums)
+    '''
+    n = len(values)
+    blocks = -(-(n + 2*width)//width) + 1
+    padded = np.zeros(blocks*width)
+    padded[width:width + n] = values
+    padded = padded.reshape(blocks, width)
+    block_start_sums = np.cumsum(padded, axis=1).ravel() # Block start to sample
+    block_end_sums = np.cumsum(padded[:, ::-1], axis=1)[:, ::-1].ravel() # Sample to block end
+    start = np.arange(n) + offset + width
+    sums = block_end_sums[start]
+    split = start % width != 0 # Window over two blocks
+    sums[split] += block_start_sums[start[split] + width - 1]
+    return sums
+
+def rbw_filter(spectrum, bins, shape='rectangular'):
+    '''Returns the spectrum (power of each frequency bin) measured with a resolution
+       bandwidth of 2*bins frequency bins
+       rectangular: sum of the power of bins i-bins to i+bins-1
+       gaussian: Gaussian filter (peak gain 1, -3 dB width of 2*bins bins) calculated
+       as three passes of a moving sum
+    '''
+    spectrum = np.asarray(spectrum, dtype=float)
+    if shape == 'gaussian':
+        sigma = 2*bins/(2*np.sqrt(2*np.log(2)))
+        half_width = max(int(np.round((np.sqrt(4*sigma**2 + 1) - 1)/2)), 1)
+        width = 2*half_width + 1
+        box = np.ones(width)/width
+        peak_gain = np.max(np.convolve(np.convolve(box, box), box))
+        for i in range(3):
+            spectrum = window_sums(spectrum, -half_width, width)/width
+        return spectrum/peak_gain
+    return window_sums(spectrum, -bins, 2*bins)
+
+def welch_spectrum(n):
+    '''Returns True if the Freq-domain tabs plot the averaged power spectrum (Welch
+       method, systemlab_utilities.WelchEstimator) of signals of n samples instead of
+       the FFT of the complete signal (config_port_viewers.freq_plot_estimator)
+    '''
+    estimator = cfg_port_viewers.freq_plot_estimator
+    if estimator == 'auto':
+        return n > cfg_port_viewers.freq_plot_max_fft_samples
+    return estimator == 'welch'
+
+def welch_power_spectra(fields, n, segment_length, chunk_size=1 << 20):
+    '''Returns the averaged power spectra (Welch method, fft order) of the signal, noise
+       and signal+noise. fields(start, stop) returns the signal and noise samples from
+       start to stop: the samples are analysed chunk_size at a time, so the arrays
+       held in memory do not depend on the number of samples n
+    '''
+    estimators = [util.WelchEstimator(segment_length) for i in range(3)]
+    for start in range(0, n, chunk_size):
+        signal, noise = fields(start, min(start + chunk_size, n))
+        for estimator, x in zip(estimators, (signal, noise, signal + noise)):
+            estimator.add(x)
+    return tuple(estimator.power_spectrum(centred=False) for estimator in estimators)
+
+'''Calculation results====================================================================
+'''
+class ResultCache():
+    '''Results of port viewer calculations (key: signal/iteration/view settings), the
+       least recently used results are discarded after max_entries or when the arrays
+       of the results exceed max_bytes
+    '''
+    def __init__(self, max_entries=32, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.results = {}
+        self.sizes = {}
+        self.total_bytes = 0
+
+    def __contains__(self, key):
+        return key in self.results
+
+    def get(self, key, calculate):
+        '''Returns the result for key (calculate() if it is not in the cache)'''
+        if key in self.results:
+            self.results[key] = self.results.pop(key) # Most recently used
+            return self.results[key]
+        return self.store(key, calculate())
+
+    def store(self, key, result):
+        '''Adds the result for key to the cache and returns it'''
+        self.discard(key)
+        self.results[key] = result
+        self.sizes[key] = result_size(result)
+        self.total_bytes += self.sizes[key]
+        while len(self.results) > 1 and (len(self.results) > self.max_entries
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+            self.discard(next(iter(self.results))) # Least recently used
+        return result
+
+    def discard(self, key):
+        if key in self.results:
+            del self.results[key]
+            self.total_bytes -= self.sizes.pop(key)
+
+def result_size(result):
+    '''Returns the memory (bytes) of the arrays of a result (array or tuple/list)'''
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, (tuple, list)):
+        return sum(result_size(x) for x in result)
+    return 0
+
+class ViewerWorker():
+    '''Calculations of a port viewer (spectra, powers, Stokes parameters, eye diagram
+       grids) done on a worker thread, with the results kept in a ResultCache so that
+       returning to an iteration (or view setting) already displayed is immediate
+       A calculation is a key (port data/iteration/view settings) and a function
+       without arguments, called on the worker thread: it must only use the signal
+       arrays and settings it was given (not the widgets of the viewer)
+    '''
+    executor = None # Worker thread (shared by the port viewers)
+
+    def __init__(self):
+        self.cache = ResultCache(cfg_port_viewers.viewer_cache_entries,
+                                 cfg_port_viewers.viewer_cache_size*1e6)
+        self.pending = {} # Key -> future (calculations submitted to the worker thread)
+        self.requests = {} # Callback -> keys of the results it is waiting for
+        self.timer = QtCore.QTimer()
+        self.timer.setInterval(20)
+        self.timer.timeout.connect(self.deliver)
+
+    def submit(self, key, calculate):
+        if key in self.cache or key in self.pending:
+            return
+        if ViewerWorker.executor is None:
+            ViewerWorker.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.pending[key] = ViewerWorker.executor.submit(calculate)
+
+    def get(self, key, calculate):
+        '''Returns the result for key: from the cache, from the worker thread (waits for
+           the calculation if it has started) or calculate() on the calling thread
+        '''
+        if key in self.cache:
+            return self.cache.get(key, calculate)
+        future = self.pending.pop(key, None)
+        if future is not None and not future.cancel():
+            return self.cache.store(key, future.result())
+        return self.cache.store(key, calculate())
+
+    def request(self, calculations, callback):
+        '''Starts calculations (list of (key, function)) on the worker thread and calls
+           callback() once their results are available (immediately if they are all in
+           the cache). A request with the same callback that is still waiting is
+           replaced (e.g. iterations skipped while browsing a sweep)
+        '''
+        self.requests.pop(callback, None)
+        if not cfg_port_viewers.viewer_background_calculation:
+            callback()
+            return
+        for key, calculate in calculations:
+            self.submit(key, calculate)
+        keys = [key for key, calculate in calculations if key in self.pending]
+        if not keys:
+            callback()
+            return
+        self.requests[callback] = keys
+        self.timer.start()
+
+    def prefetch(self, calculations):
+        '''Starts calculations (list of (key, function)) whose results are likely to be
+           requested next (e.g. next iteration)
+        '''
+        if cfg_port_viewers.viewer_background_calculation:
+            for key, calculate in calculations:
+                self.submit(key, calculate)
+            self.timer.start()
+
+    def deliver(self):
+        '''Moves the results of the finished calculations to the cache and calls back
+           the requests that are complete (timer, GUI thread). Failed calculations are not
+           kept: they are repeated (and raise their error) when the callback gets them
+        '''
+        for key, future in list(self.pending.items()):
+            if future.done():
+                del self.pending[key]
+                if not future.cancelled() and future.exception() is None:
+                    self.cache.store(key, future.result())
+        for callback, keys in list(self.requests.items()):
+            if not any(key in self.pending for key in keys):
+                del self.requests[callback]
+                callback()
+        if not self.pending and not self.requests:
+            self.timer.stop()
+
+    def stop(self):
+        '''Cancels the requests and the calculations not started (viewer closed)'''
+        self.timer.stop()
+        self.requests.clear()
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
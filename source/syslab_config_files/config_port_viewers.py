@@ -105,6 +105,10 @@ opt_chnls_freq_maj_grid_color = 'darkGray'
 opt_chnls_freq_min_grid_linestyle = '-'
 opt_chnls_freq_min_grid_linewidth = 0.5
 opt_chnls_freq_min_grid_color = 'darkGray'
+# Spectral resolution (Freq-domain and all ch tabs): shape of the resolution bandwidth
+# filter ('rectangular' - sum over the resolution bandwidth, 'gaussian' - Gaussian 
+# filter with a -3 dB width equal to the resolution bandwidth)
+optical_rbw_shape = 'rectangular'
 
 """Electrical port viewer---------------------------------------------------"""
 electrical_frame_background_color = '#f9f9f9'
@@ -190,6 +194,11 @@ electrical_eye_min_grid_linewidth = 0.5
 electrical_eye_min_grid_color = 'darkGray'
 electrical_eye_hist_color = 'magenta' #MV 20.01.r3 18-Jun-20
 electrical_eye_hist_alpha = 1.0 #MV 20.01.r3 18-Jun-20
+# Eye tab (rendering: 'density' - traces accumulated into an intensity image, 
+# 'lines' - one line per trace (slow for long signals))
+electrical_eye_render = 'density'
+electrical_eye_density_bins = [600, 300] # Number of cells (time, amplitude)
+electrical_eye_density_gamma = 0.5 # Power-law scaling of the trace density
 
 """Digital port viewer------------------------------------------------------"""
 digital_frame_background_color = '#f9f9f9'
@@ -314,4 +323,28 @@ m_electrical_freq_maj_grid_linewidth = 0.5
 m_electrical_freq_maj_grid_color = 'gray'
 m_electrical_freq_min_grid_linestyle = ':'
 m_electrical_freq_min_grid_linewidth = 0.5
-m_electrical_freq_min_grid_color = 'lightGray'
\ No newline at end of file
+m_electrical_freq_min_grid_color = 'lightGray'
+
+"""Time-domain plots (all port viewers)-------------------------------------"""
+# Long signals are plotted with min/max decimation (level of detail): the plotted
+# line holds about time_plot_points_per_pixel points per pixel of the visible time
+# range and full resolution is used once the user has zoomed in far enough
+time_plot_decimation = True
+time_plot_points_per_pixel = 2
+time_plot_min_samples = 20000 # Signals with fewer samples are plotted directly
+
+"""Freq-domain plots (electrical/optical port viewers)----------------------"""
+# Spectrum plotted in the Freq-domain tabs: 'periodogram' - FFT of the complete signal
+# (one frequency point per sample), 'welch' - averaged power spectrum of overlapping
+# segments (Welch method, settings psd_* of config_special), 'auto' - averaged power
+# spectrum for signals of more than freq_plot_max_fft_samples samples
+freq_plot_estimator = 'auto'
+freq_plot_max_fft_samples = 2**24
+
+"""Calculations (all port viewers)------------------------------------------"""
+# Spectra, powers, Stokes parameters and eye diagram grids are calculated on a
+# worker thread (the window stays responsive) and kept for each port/iteration/view
+# setting, up to viewer_cache_entries results or viewer_cache_size MB per viewer
+viewer_background_calculation = True
+viewer_cache_entries = 256
+viewer_cache_size = 512 # MB
@@ -34,6 +34,137 @@ open_script_on_left_double_click = False # Opens script after left double-clicki
 num_samples_threshold = 1e8  # Issues warning before starting simulation (simulation can be
                              # aborted)
                              
+'''Simulation status updates===================================================
+During a simulation the GUI events are processed and the status windows updated at most
+gui_update_rate times per second (status messages are buffered in between). Per-block
+tracing messages (running block, script loading, time to complete) are only displayed
+in the sim status window when sim_status_trace is True. All messages are recorded in the
+event log of the simulation, written to sim_event_log_path (CSV) if specified.
+'''
+gui_update_rate = 20 # Hz
+sim_status_trace = False
+sim_event_log_path = None # e.g. 'simulation_event_log.csv'
+
+'''Simulation profiling==========================================================
+When enabled, the wall time of each functional block calculation is recorded per
+iteration (input marshalling, script import, module.run, output allocation) together with
+the size of the signal arrays at each port. A summary table (sortable, per block) is
+displayed after the simulation and written to <profiling_report_path>_profile.json/.csv
+if a path is specified.
+'''
+profiling_enabled = False
+profiling_report_path = None # e.g. 'simulation' (-> simulation_profile.json/.csv)
+profiling_status_rows = 10 # Blocks listed in the sim status window
+
+'''Project file format=========================================================
+Format used when saving projects (.slb): 'zip' (zip archive with a JSON manifest and
+.npy files for arrays) or 'pickle' (format of earlier releases, can be opened by
+SystemLab-Design 20.01.r3 and earlier). Both formats can be opened
+'''
+project_file_format = 'zip'
+
+'''FFT library (fb scripts)===================================================================
+FFT library used by the spectral procedures of systemlab_utilities (frequency grids,
+centred spectra and transfer functions of the fb scripts): 'numpy' (numpy.fft), 'scipy'
+(scipy.fft, multi-threaded with fft_workers) or 'pyfftw' (FFTW plans are kept between
+calls, requires the pyFFTW package). numpy.fft is used if the library is not installed
+'''
+fft_backend = 'scipy'
+fft_workers = None # Threads per FFT (None: 1, -1: number of CPUs). Keep at None when
+                   # blocks are calculated in parallel
+
+'''Spectrum analysis (averaged power spectrum)============================================
+Settings of the averaged power spectrum (Welch method) of systemlab_utilities
+(WelchEstimator), used by the Freq-domain tabs of the port viewers and the measurement
+node scripts. The signal is divided into segments of psd_segment_length samples that
+overlap by psd_overlap (fraction of the segment length), each segment is multiplied by
+the window (psd_window: 'hann', 'hamming', 'blackman' or 'rectangular') and the power
+spectra of the segments are averaged (psd_averages: number of segments averaged, None:
+all segments). The frequency resolution is sampling_rate/psd_segment_length. Segments
+are transformed psd_block_segments at a time, so the memory used does not depend on the
+number of samples. The measurement nodes use the averaged power spectrum for signals of
+more than psd_max_fft_samples samples (and in streaming mode, where the spectrum is
+averaged over all the frames), and the FFT of the complete signal otherwise.
+'''
+psd_segment_length = 4096
+psd_overlap = 0.5
+psd_window = 'hann'
+psd_averages = None
+psd_block_segments = 64
+psd_max_fft_samples = 2**24
+
+'''Independent iterations=================================================================
+Number of worker processes used for projects with the setting "Independent iterations"
+(project settings). The iterations are calculated concurrently, each worker calculates
+the complete design for one iteration (None: number of CPUs). Scripts must not carry
+data between iterations (e.g. lists appended over the iterations) and graphs created
+by scripts in the worker processes are not displayed.
+'''
+iteration_workers = None
+
+'''Port signal history on disk==============================================================
+If set to True, the port signals saved for each iteration ("save port data" option) are
+written to memory-mapped .npy files in a directory for each simulation run instead of
+being kept in memory. The directory is created in signal_history_path (system temporary
+folder if None) and is removed at the next simulation of the project or when the
+application is closed. The port viewers load the signals of an iteration on demand and
+the signals of the most recently used port iterations (signal_history_cache_size) are
+kept in memory.
+'''
+signal_history_on_disk = False
+signal_history_path = None
+signal_history_cache_size = 32
+
+'''Incremental re-simulation===============================================================
+If set to True, the outputs of each functional block are kept after a simulation. On the
+next simulation of the project, blocks with unchanged script, parameters, ports and
+project settings (and no changed upstream blocks) are not calculated again - their
+previous outputs are loaded into the ports. Not available with feedback or streaming
+modes. Note: source blocks with random outputs (e.g. PRBS) also reuse their previous
+outputs, and the outputs of all blocks are kept in memory between simulations.
+'''
+incremental_simulation = False
+
+'''Signal hand-off between linked ports=========================================
+When True, signal arrays returned by a functional block script are shared by the output
+port, the linked input port and the downstream script as read-only arrays (no copies).
+Scripts that modify an input array in place must first copy it (systemlab_signals.writable)
+'''
+shared_signal_buffers = True
+
+'''Parallel execution of functional blocks=====================================
+Independent functional blocks (no signal path between them) are calculated concurrently.
+'thread' runs the scripts on a thread pool (numpy/scipy release the GIL during most
+array operations), 'process' runs them on a process pool (outputs to the status/data
+windows are not displayed). Only the scripts of the script library (syslab_fb_scripts)
+are calculated concurrently: scripts of the project folders (which may open windows)
+and the library scripts listed in parallel_main_thread_scripts (scripts that open graph
+windows) are always run on the main thread.
+'''
+parallel_execution = False
+parallel_executor = 'thread' # 'thread' or 'process'
+parallel_workers = None # Number of workers (None: number of CPUs)
+parallel_main_thread_scripts = ['Fiber_Bragg_Grating', 'MZ_Modulator_V2', 'Optical_Filter_V2',
+                                'NG_PON2_Ch_Filter_V2', 'Decision_Circuit_V2',
+                                'Transimpedance_Limiting_Amplifier', 'BER_Analysis_V2',
+                                'BER_Analysis_V3', 'Analog_Filter', 'Analog_Filter_V2',
+                                'Multiple_Port_Viewer_Electrical']
+
+'''Streaming mode (block-wise simulation)======================================
+The time window is calculated as a sequence of frames (streaming_frame_samples per
+frame), so the size of the signal arrays is bounded by the frame size. Stream-aware
+source blocks (PRBS_V2, Sine_Generator, Laser_Source_V3) continue their output from
+frame to frame and FFT-based blocks (Optical_Fiber_Linear, Analog_Filter_V2) use
+overlap-save (streaming_overlap_samples of the previous frame are prepended to each
+frame). The dispersion response of Optical_Fiber_Linear is two-sided: its output is
+delayed by streaming_overlap_samples/2 samples, which must exceed the spread of the
+dispersion impulse response. Port data and results hold the last frame. Not used with
+feedback mode.
+'''
+streaming_mode = False
+streaming_frame_samples = 65536
+streaming_overlap_samples = 4096
+                             
 '''Default font setting for dialogs============================================
 Can be specified in pixels (px) or points (pt)
 '''
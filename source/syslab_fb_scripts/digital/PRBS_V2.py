@@ -7,15 +7,18 @@ Version 2.0 (8-Nov-19)
 
 import numpy as np
 import config
+import systemlab_utilities as util
 
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'PRBS Gen'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
     time_win = settings['time_window']
+    stream_state = settings.get('stream_state') # Streaming mode (None if not used)
     #symbol_rate = settings['symbol_rate']
 
     if config.sim_status_win_enabled == True:
@@ -43,12 +46,24 @@ def run(input_signal_data, parameters_input, settings):
     '''==CALCULATIONS======================================================='''
     binary_seq_length = int(round(bit_rate*time_win))
     time_array = np.linspace(0, time_win, n)
+    if stream_state is not None:
+        # Streaming mode: bits of the current frame (sequence continues from the
+        # previous frame)
+        seq_start = stream_state.get('bits', 0)
+        frame_end_time = settings['stream_start_time'] + time_win
+        binary_seq_length = int(round(bit_rate*frame_end_time)) - seq_start
+        stream_state['bits'] = seq_start + binary_seq_length
+        time_array = time_array + settings['stream_start_time']
     
     if seq_type == 'PRBS':
-        seq_binary = np.random.randint(2, size=binary_seq_length)
+        seq_binary = rng.integers(2, size=binary_seq_length)
     else:        
         seq = np.fromstring(seq_defined, dtype=int, sep=',')
-        seq_binary = np.tile(seq, round(binary_seq_length/np.size(seq)))
+        if stream_state is not None: # Continue user-defined sequence
+            seq_index = (seq_start + np.arange(binary_seq_length)) % np.size(seq)
+            seq_binary = seq[seq_index]
+        else:
+            seq_binary = np.tile(seq, round(binary_seq_length/np.size(seq)))
     
     '''==OUTPUT PARAMETERS LIST============================================='''
     prbs_parameters = []
@@ -36,6 +36,7 @@ http://www.cjs-labs.com/sitebuildercontent/sitebuilderfiles/GroupDelay.pdf (acce
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 
 def run(input_signal_data, parameters_input, settings):
     
@@ -77,6 +78,15 @@ def run(input_signal_data, parameters_input, settings):
     # noise = np.zeros(n)  
     noise = input_signal_data[0][6]
     
+    # Streaming mode (overlap-save): the end of the previous frame is prepended to the
+    # input signals before applying the transfer function
+    stream_state = settings.get('stream_state')
+    if stream_state is not None:
+        overlap = settings['stream_overlap']
+        signal = util.overlap_save_input(stream_state, 'signal', signal, overlap)
+        noise = util.overlap_save_input(stream_state, 'noise', noise, overlap)
+        n = np.size(signal)
+    
     '''==CALCULATIONS=====================================================================
     '''
     # Convert freq cut-off units from Hz to rad/s
@@ -84,15 +94,10 @@ def run(input_signal_data, parameters_input, settings):
     w_z = np.pi*2*freq_zero
 
     """Apply FFT (time -> freq domain)-------------------------------------------------"""
-    T = n/fs
-    k = np.arange(n)
-    frq = k/T # Positive/negative freq (double sided)
-    Y = np.fft.fft(signal)
-    Y = np.fft.fftshift(Y)
-    N = np.fft.fft(noise)
-    N = np.fft.fftshift(N)
-    # Adjust frequencies
-    frq = frq - frq[int(round(n/2))]
+    Y = util.spectrum(signal)
+    N = util.spectrum(noise)
+    # Frequency points (double sided)
+    frq = util.frequency_grid(n, fs)
     
     """Apply transfer function (freq domain)--------------------------------------------"""
     if filter_type == 'Low-pass':
@@ -181,8 +186,11 @@ def run(input_signal_data, parameters_input, settings):
     """Apply IFFT (Re-build time-domain signal)--------------------------------"""
     # REF: https://www.mathworks.com/matlabcentral/answers/17885-time-domain-
     # signal-reconstruction-from-frequency-domain (accessed 7-Jul-20)
-    sig_out = np.fft.ifft(np.fft.ifftshift(Y_trans)) 
-    noise_out = np.fft.ifft(np.fft.ifftshift(N_trans))
+    sig_out = util.inverse_spectrum(Y_trans)
+    noise_out = util.inverse_spectrum(N_trans)
+    if stream_state is not None: # Remove overlap samples
+        sig_out = util.overlap_save_output(sig_out, overlap)
+        noise_out = util.overlap_save_output(noise_out, overlap)
     
     '''==OUTPUT PARAMETERS LIST===========================================================
     '''
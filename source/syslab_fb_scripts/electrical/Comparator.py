@@ -41,8 +41,8 @@ def run(input_signal_data, parameters_input, settings):
     noise_in_v_neg = input_signal_data[1][6]
     
     '''==CALCULATIONS======================================================='''
-    sig_in_v_pos += noise_in_v_pos
-    sig_in_v_neg += noise_in_v_neg
+    sig_in_v_pos = sig_in_v_pos + noise_in_v_pos
+    sig_in_v_neg = sig_in_v_neg + noise_in_v_neg
     noise_out = np.zeros(n)
     sig_out = np.zeros(n)  
     
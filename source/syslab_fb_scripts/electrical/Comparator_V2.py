@@ -43,8 +43,8 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==CALCULATIONS======================================================='''
     if add_noise_to_signal == 2:
-        sig_in_v_pos += noise_in_v_pos
-        sig_in_v_neg += noise_in_v_neg
+        sig_in_v_pos = sig_in_v_pos + noise_in_v_pos
+        sig_in_v_neg = sig_in_v_neg + noise_in_v_neg
     noise_out = np.zeros(n)
     sig_out = np.zeros(n)  
     
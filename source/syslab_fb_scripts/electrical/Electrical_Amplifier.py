@@ -14,12 +14,14 @@ https://www.analogictips.com/rf-microwave-noise-part-1-noise-figure-basics-faq/
 
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import signal
 
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS=============================================================='''
     module_name = 'Script template'
+    rng = util.block_rng(settings)
     #Main settings
     n = settings['num_samples'] #Total samples for simulation
     n = int(round(n))    
@@ -79,7 +81,7 @@ def run(input_signal_data, parameters_input, settings):
     noise_amp_var = (nf_linear - 1)*noise_pwr_in*gain_linear
     #Calculate standard deviation (sigma) & build output noise array (Gaussian noise dist)
     sigma = np.sqrt(noise_amp_var/n) #Amplifier contribution to noise 
-    noise_array = np.random.normal(0, sigma, n) + noise_in*np.sqrt(gain_linear) # Add input noise
+    noise_array = rng.normal(0, sigma, n) + noise_in*np.sqrt(gain_linear) # Add input noise
     
     #Calculate input & output SNR
     sig_pwr_in = np.sum(np.abs(sig_in)*np.abs(sig_in))
@@ -11,12 +11,14 @@ http://literature.cdn.keysight.com/litweb/pdf/5952-8255E.pdf (accessed 9 APr 201
 
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants
 
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS=============================================================='''
     module_name = 'Script template'
+    rng = util.block_rng(settings)
     #Main settings
     n = settings['num_samples'] #Total samples for simulation
     n = int(round(n))    
@@ -89,7 +91,7 @@ def run(input_signal_data, parameters_input, settings):
 
     #Calculate standard deviation (sigma) & build output noise array (Gaussian noise dist)
     sigma = np.sqrt(noise_amp_var/n) #Amplifier contribution to noise 
-    noise_array = np.random.normal(0, sigma, n) + noise_in*np.sqrt(gain_linear) # Add input noise
+    noise_array = rng.normal(0, sigma, n) + noise_in*np.sqrt(gain_linear) # Add input noise
     
     #Calculate input & output SNR
     sig_pwr_in = np.sum(np.abs(sig_in)*np.abs(sig_in))
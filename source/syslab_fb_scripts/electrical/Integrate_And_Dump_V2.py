@@ -40,7 +40,7 @@ def run(input_signal_data, parameters_input, settings):
     symbol_rate = 5e9
     
     if add_noise_to_signal == 2:
-        sig_in += noise_in
+        sig_in = sig_in + noise_in
         noise_in = np.zeros(n)
    
     samples_per_bit = int(fs/bit_rate)
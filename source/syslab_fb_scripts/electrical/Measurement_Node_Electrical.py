@@ -5,6 +5,7 @@ Measurement node (electrical)
 """
 import config
 import numpy as np
+import systemlab_utilities as util
 
 def run(input_signal_data, parameters_input, settings):
     
@@ -27,6 +28,7 @@ def run(input_signal_data, parameters_input, settings):
     segment = int(round(segment))
     samples_segment = settings['samples_per_segment'] #Samples per feedback segment
     feedback_mode = settings['feedback_enabled'] #Feedback mode is enabled(2)/disabled(0)
+    stream_state = settings.get('stream_state') # Streaming mode (None if not used)
     
     # Status message (send to Simulation status panel)
     if config.sim_status_win_enabled == True:
@@ -64,6 +66,22 @@ def run(input_signal_data, parameters_input, settings):
     
     snr = sig_pwr/noise_pwr
     snr_db = 10*np.log10(snr)
+    
+    #Averaged power spectrum of the signal (Welch method, calculated in segments). In
+    #streaming mode the spectrum is averaged over all the frames
+    if stream_state is None:
+        sig_psd = util.welch_power_spectrum(sig_in, centred=False)
+    else:
+        if 'signal_psd' not in stream_state:
+            stream_state['signal_psd'] = util.WelchEstimator()
+        stream_state['signal_psd'].add(sig_in)
+        sig_psd = None
+        if stream_state['signal_psd'].segments > 0:
+            sig_psd = stream_state['signal_psd'].power_spectrum(centred=False)
+    peak_freq = 'NA'
+    sig_bw = 'NA'
+    if sig_psd is not None and np.sum(sig_psd) > 0:
+        peak_freq, sig_bw = calculate_spectrum_metrics(sig_psd, fs, np.isrealobj(sig_in))
 
     '''==OUTPUT PARAMETERS LIST===========================================================
     '''
@@ -78,9 +96,33 @@ def run(input_signal_data, parameters_input, settings):
     snr_result = ['Signal/noise ratio', snr, ' ', ' ', False]
     snr_db_result = ['Signal/noise ratio (dB)', snr_db, ' ', ' ', False]
     noise_std_result = ['Noise standard dev', noise_std_dev , ' ', ' ', False]
-    node_results = [sig_pwr_result, noise_pwr_result, snr_result, snr_db_result, noise_std_result]
+    peak_freq_result = ['Signal peak frequency', peak_freq, 'Hz', ' ', False]
+    sig_bw_result = ['Signal bandwidth (99% power)', sig_bw, 'Hz', ' ', False]
+    node_results = [sig_pwr_result, noise_pwr_result, snr_result, snr_db_result, noise_std_result,
+                    peak_freq_result, sig_bw_result]
     
     '''==RETURN (Output Signals, Parameters, Results)==================================
     '''
     electrical_out = [2, sig_type, carrier, fs, time_array, sig_in, noise_in] 
     return ([electrical_out], node_parameters, node_results)
+
+# Method for calculating the peak frequency and 99% power bandwidth of a power spectrum
+# (fft order). Real signals: positive frequencies (negative frequencies folded), complex 
+# signals: frequencies from 0.5% to 99.5% of the power
+def calculate_spectrum_metrics(psd, fs, real_signal):
+    m = np.size(psd)
+    if real_signal:
+        k = np.abs(np.round(np.fft.fftfreq(m)*m)).astype(int)
+        psd = np.bincount(k, weights=psd) # Power of frequencies 0 to fs/2
+        frq = np.arange(np.size(psd))*fs/m
+    else:
+        psd = np.fft.fftshift(psd)
+        frq = np.fft.fftshift(np.fft.fftfreq(m, 1/fs))
+    cum_pwr = np.cumsum(psd)
+    peak_freq = frq[np.argmax(psd)]
+    if real_signal:
+        sig_bw = frq[np.searchsorted(cum_pwr, 0.99*cum_pwr[-1])]
+    else:
+        sig_bw = (frq[np.searchsorted(cum_pwr, 0.995*cum_pwr[-1])] 
+                  - frq[np.searchsorted(cum_pwr, 0.005*cum_pwr[-1])])
+    return peak_freq, sig_bw
@@ -39,8 +39,8 @@ def run(input_signal_data, parameters_input, settings):
     lo_noise = input_signal_data[1][6]
     
     if add_noise_to_signal == 2:
-        signal += noise
-        lo_signal += lo_noise
+        signal = signal + noise
+        lo_signal = lo_signal + lo_noise
         noise = np.zeros(n)
         lo_noise= np.zeros(n)
     
@@ -3,6 +3,7 @@ Noise source module
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants
 # REF: https://docs.scipy.org/doc/scipy/reference/constants.html
 
@@ -10,6 +11,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Noise Source - Electrical'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -55,7 +57,7 @@ def run(input_signal_data, parameters_input, settings):
         psd_linear_thermal = constants.k*noise_temp
         sigma = np.sqrt(psd_linear_thermal*fs/n)
 
-    noise_array = np.random.normal(0, sigma, n)
+    noise_array = rng.normal(0, sigma, n)
     if add_noise_to_sig == 2:
         signal_array = noise_array
     
@@ -4,6 +4,7 @@ Version 2.0 (20.01.r3 9-Jun-20)
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants
 # REF: https://docs.scipy.org/doc/scipy/reference/constants.html
 
@@ -11,6 +12,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Noise Source - Electrical'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -57,7 +59,7 @@ def run(input_signal_data, parameters_input, settings):
         sigma = np.sqrt(psd_linear_thermal*fs/n)
         
     # Create sampled array of noise
-    noise_array = np.random.normal(0, sigma, n)
+    noise_array = rng.normal(0, sigma, n)
     
     #Re-calculate total power of output signal
     total_noise_pwr = np.sum(np.square(noise_array))
@@ -37,6 +37,10 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==CALCULATIONS======================================================='''
     time_array = np.linspace(0, time, n)
+    if settings.get('stream_state') is not None:
+        # Streaming mode: time of the current frame (phase continues from the
+        # previous frame)
+        time_array = settings['stream_start_time'] + np.arange(0, n)/fs
     signal_array = signal_amp * np.sin(2*np.pi*freq*time_array) + bias
     noise_array = np.zeros(n)    
   
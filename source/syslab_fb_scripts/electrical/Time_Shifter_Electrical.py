@@ -5,7 +5,6 @@ Version 1.0 (20.01.r3 25-Jun-20)
 """
 import numpy as np
 import config
-import copy
 
 def run(input_signal_data, parameters_input, settings):
     
@@ -37,8 +36,8 @@ def run(input_signal_data, parameters_input, settings):
     sig_type = input_signal_data[0][1]
     carrier = input_signal_data[0][2]
     time_array = input_signal_data[0][4]
-    sig_t_shift = copy.deepcopy(input_signal_data[0][5])
-    noise_t_shift = copy.deepcopy(input_signal_data[0][6])
+    sig_t_shift = input_signal_data[0][5]
+    noise_t_shift = input_signal_data[0][6]
     
     '''==CALCULATIONS======================================================='''       
     time_samples_shift = int(np.round(t_shift*fs))
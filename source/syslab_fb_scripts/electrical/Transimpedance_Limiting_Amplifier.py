@@ -21,7 +21,7 @@ Source: https://www.keysight.com/upload/cmc_upload/All/Download2.pdf (accessed 1
 import os
 import numpy as np
 import config
-import copy
+import systemlab_utilities as util
 from scipy import signal, special
 
 def run(input_signal_data, parameters_input, settings):
@@ -29,6 +29,7 @@ def run(input_signal_data, parameters_input, settings):
     '''==PROJECT SETTINGS===================================================
     '''
     module_name = settings['fb_name']
+    rng = util.block_rng(settings)
     n = settings['num_samples'] #Total samples for simulation
     n = int(round(n))    
     time = settings['time_window'] #Time window for simulation (sec)
@@ -98,10 +99,8 @@ def run(input_signal_data, parameters_input, settings):
     # Electrical: portID(0), signal_type(1), carrier(2), sample_rate(3), time_array(4), 
     # amplitude_array(5), noise_array(6)
     time_array = input_signal_data[0][4]
-    sig_in = np.zeros(n)
-    noise_in = np.zeros(n)
-    sig_in = copy.deepcopy(input_signal_data[0][5])
-    noise_in = copy.deepcopy(input_signal_data[0][6])
+    sig_in = input_signal_data[0][5]
+    noise_in = input_signal_data[0][6]
     
     '''==CALCULATIONS=========================================
     '''
@@ -130,9 +129,9 @@ def run(input_signal_data, parameters_input, settings):
         if freq_resp_curves == 2:
             build_freq_response_curve(Y, Y_trans, frq, n, freq_cut_off, filter_type)
         # Convert back to time domain
-        sig_array = np.fft.ifft(np.fft.ifftshift(Y_trans))
+        sig_array = util.inverse_spectrum(Y_trans)
         if include_noise_array == 2: # MV 20.01.r3 26-Aug-20
-            noise_array = np.fft.ifft(np.fft.ifftshift(N_trans))
+            noise_array = util.inverse_spectrum(N_trans)
     
     """Noise calculations (TIA)----------------------------------------------------------------"""
     tia_v_noise = np.zeros(n)
@@ -144,7 +143,7 @@ def run(input_signal_data, parameters_input, settings):
         #v_noise_sigma = np.sqrt(output_noise_variance)
         #config.display_data('Voltage sigma (TIA): ', v_noise_sigma, 0, 0) 
         # Add noise to noise array
-        tia_v_noise = np.random.normal(0, i_noise_referred*z_tia, n)
+        tia_v_noise = rng.normal(0, i_noise_referred*z_tia, n)
         noise_array += tia_v_noise
     else: # Input referred noise is not modeled
         i_noise_referred = 0
@@ -207,7 +206,7 @@ def run(input_signal_data, parameters_input, settings):
         # Input referred noise (TIA + LA)
         i_noise_input_tia_la = (np.sqrt(np.square(i_noise_referred) 
                                           + np.square(n_la/z_tia)))
-        v_noise = np.random.normal(0, i_noise_input_tia_la*z_tia, n)
+        v_noise = rng.normal(0, i_noise_input_tia_la*z_tia, n)
         noise_array += v_noise - tia_v_noise
         
         # Add noise to sig_array
@@ -253,10 +252,10 @@ def run(input_signal_data, parameters_input, settings):
         n_symbols = int(round(n/samples_per_sym))
         if jitter_det > 0.0 or jitter_rdm > 0.0:
             for i in range(0, n_symbols-1):
-                dirac = np.random.randint(2)
+                dirac = rng.integers(2)
                 if dirac == 0:
                     dirac = -1
-                dirac_offset = float(dirac)*jitter_det/2 + np.random.normal(0, jitter_rdm)
+                dirac_offset = float(dirac)*jitter_det/2 + rng.normal(0, jitter_rdm)
                 idx_1 = i*samples_per_sym
                 idx_2 = (i+1)*samples_per_sym
                 sig_array[idx_1:idx_2] = np.interp(time_array[idx_1:idx_2] + dirac_offset, 
@@ -278,14 +277,14 @@ def run(input_signal_data, parameters_input, settings):
         
         """Noise calculations (LA)-------------------------------------------------------------------"""
         # Apply LA voltage noise to output noise array (Note: average gain is used)
-        #la_v_noise = np.random.normal(0, n_la, n)
-        #tia_v_noise = np.random.normal(0, n_la*gain_la_linear, n)
+        #la_v_noise = rng.normal(0, n_la, n)
+        #tia_v_noise = rng.normal(0, n_la*gain_la_linear, n)
         #noise_array += la_v_noise*gain_la_linear
         
         #output_noise_variance = np.square(n_rms*z_tia)
         #v_noise_sigma = np.sqrt(output_noise_variance)
         
-        #la_v_noise = np.random.normal(0, v_noise_sigma, n)
+        #la_v_noise = rng.normal(0, v_noise_sigma, n)
         #noise_array += la_v_noise
     
     # Add noise to signal array? Applies to TIA only model
@@ -362,27 +361,18 @@ def run(input_signal_data, parameters_input, settings):
     return ([electrical_out], script_parameters, results)
     
 def transfer_lowpass_1st_order(Y, frq, w_0, fs, n):
-    Y_trans =  np.full(n, 0 + 1j*0, dtype=complex) 
-    for i in range(0, n):
-        s = 1j*frq[i]*2*np.pi
-        H_w = w_0 / (s + w_0)
-        Y_trans[i] = Y[i] * H_w
-    return Y_trans
+    s = 1j*frq*2*np.pi
+    H_w = w_0 / (s + w_0)
+    return Y * H_w
     
 def transfer_lowpass_2nd_order(Y, frq, w_0, Q, fs, n):   
-    Y_trans =  np.full(n, 0 + 1j*0, dtype=complex) 
-    for i in range(0, n):
-        s = 1j*frq[i]*2*np.pi
-        H_w = (w_0*w_0) / ((s*s) + ((w_0/Q)*s) + (w_0*w_0))
-        Y_trans[i] = Y[i] * H_w
-    return Y_trans
+    s = 1j*frq*2*np.pi
+    H_w = (w_0*w_0) / ((s*s) + ((w_0/Q)*s) + (w_0*w_0))
+    return Y * H_w
 
 def convert_freq_domain(sig, fs, n):
-    T = n/fs
-    k = np.arange(n)
-    frq = k/T
-    frq = frq - frq[int(round(n/2))]
-    return np.fft.fftshift(np.fft.fft(sig)), frq
+    frq = util.frequency_grid(n, fs)
+    return util.spectrum(sig), frq
     
 def apply_rise_fall_time(sig, trans_points, rise_fall_time, fs, n):
     if trans_points == '10%-90%':
@@ -392,15 +382,13 @@ def apply_rise_fall_time(sig, trans_points, rise_fall_time, fs, n):
         bw = 0.22/rise_fall_time # Based on t_r = 4/sigma*(inv_error_function(0.6))
         sigma = bw/0.0935
     # Apply filtering
-    Y_trans =  np.full(n, 0 + 1j*0, dtype=complex) 
     Y, frq = convert_freq_domain(sig, fs, n)
     bw = 0.35/rise_fall_time
     w_0 = np.pi*2*bw
-    for i in range(0, n):
-        w = frq[i]*2*np.pi
-        Y_trans[i] = Y[i] * np.exp(-np.square(w/sigma))
+    w = frq*2*np.pi
+    Y_trans = Y * np.exp(-np.square(w/sigma))
     # Convert back to time domain and return
-    return np.fft.ifft(np.fft.ifftshift(Y_trans))
+    return util.inverse_spectrum(Y_trans)
     
 def build_freq_response_curve(Y, Y_trans, frq, n, freq_cut_off, filter_type):
         mag = np.abs(Y_trans/Y)
@@ -31,8 +31,15 @@ fiber-bragg-grating-apodization-profile-tTSH.php?article_id=7017 (accessed 3-Dec
 
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants
 
+# Reflection/transmission spectra of the last grating calculations (key: grating
+# parameters and wavelength grid). Iterations with an unchanged grating reuse the
+# spectra instead of repeating the coupled mode calculation
+cmt_spectra_cache = {}
+cmt_spectra_cache_size = 8
+
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
@@ -113,11 +120,10 @@ def run(input_signal_data, parameters_input, settings):
     
     # Setup apodization profile
     profile_z = set_apodization_profile(apod, dz, N, L)
-    
-    # Prepare freq array
-    T = n/fs
-    k = np.arange(n)
-    frq = k/T # Positive/negative freq (double sided)
+    # Design wavelength of the last section (linear chirp)
+    design_wave_chirp = bragg_wave + (chirp_coeff*1e-6)*(N-1)*(L/N)
+    # Grating parameters (cache key of the reflection/transmission spectra)
+    grating_key = (bragg_wave, n_eff, n_mod, L, N, apod, chirp_coeff)
     
     # Initialize output field arrays for all optical channels
     if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
@@ -134,148 +140,56 @@ def run(input_signal_data, parameters_input, settings):
                                                                     + str(wave_freq[ch]))
             config.app.processEvents()
             
-        # Apply FFT (time -> freq domain)
-        if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-            Y_trans_x = np.fft.fft(opt_field_rcv[ch, 0])
-            Y_trans_x = np.fft.fftshift(Y_trans_x)
-            Y_trans_y = np.fft.fft(opt_field_rcv[ch, 1])
-            Y_trans_y = np.fft.fftshift(Y_trans_y)
-            Y_ref_x = np.fft.fft(opt_field_rcv[ch, 0])
-            Y_ref_x = np.fft.fftshift(Y_ref_x)
-            Y_ref_y = np.fft.fft(opt_field_rcv[ch, 1])
-            Y_ref_y = np.fft.fftshift(Y_ref_y)
+        # Apply FFT (time -> freq domain, both polarizations for format Ex-Ey)
+        Y = util.spectrum(opt_field_rcv[ch])
+        
+        # Setup frequency array (for envelope)
+        frq = util.frequency_grid(n, fs, wave_freq[ch])
+        wave[ch] = c/frq
+        # Grating strength calculation (for results)
+        ac_cross_c = (pi/wave[ch, int(round(n/2))])*n_mod
+        grating_strength[ch] = ac_cross_c*L
+        
+        # Reflection and transmission coefficients (amplitude) of all frequency points
+        spectra_key = grating_key + ('signal', n, fs, wave_freq[ch])
+        if spectra_key in cmt_spectra_cache:
+            r[ch], t[ch] = cmt_spectra_cache[spectra_key]
+            if config.sim_status_win_enabled == True:
+                config.sim_status_win.textEdit.append('Grating unchanged - coupled mode results reused')
         else:
-            Y_trans = np.fft.fft(opt_field_rcv[ch])
-            Y_trans = np.fft.fftshift(Y_trans)
-            Y_ref = np.fft.fft(opt_field_rcv[ch])
-            Y_ref = np.fft.fftshift(Y_ref)
+            T = cmt_transfer_matrix(wave[ch], bragg_wave, n_eff, n_mod, L, N, chirp_coeff,
+                                    profile_z, True)
+            r[ch] = -T[:, 1, 0]/T[:, 0, 0] #T21/T11
+            t[ch] = 1/T[:, 0, 0] #1/T11
+            store_cmt_spectra(spectra_key, r[ch], t[ch])
         
-        #Loop over each frequency point of the channel envelope
-        for i in range(0, n):
-            #Provide update on calculation status
-            display_cmt_progress(i, n)
-            # Setup frequency array (for envelope)
-            frq = frq - frq[int(round(n/2))] + wave_freq[ch]
-            wave[ch] = c/frq
-            # Grating strength calculation (for results)
-            ac_cross_c = (pi/wave[ch, int(round(n/2))])*n_mod
-            grating_strength[ch] = ac_cross_c*L
-            
-            # Initialize transfer function matrices
-            T = np.full([2, 2], 0 + 1j*0, dtype=complex)
-            T_section = np.full([2, 2], 0 + 1j*0, dtype=complex)
-            
-            #CMT model--------------------------------------------------------------------------------------------
-            for m in range (N-1, -1, -1): #T = T(M)*T(M-1)*...*T(2)*T(1)
-                bragg_wave_chirp = bragg_wave + (chirp_coeff*1e-6)*m*(L/N) #Eq 5 (Ref 3) Lg = L/N
-                if m == N-1:
-                    design_wave_chirp = bragg_wave_chirp
-                ac_cross_c = (pi/wave[ch, i])*n_mod*profile_z[m] #(pi/lambda)*mod_index*profile(z) 
-                detuning = 2*pi*n_eff*( (1/wave[ch, i]) - (1/(bragg_wave_chirp)) )
-                dc_self_c = detuning + ((2*pi/wave[ch, i])*n_mod*profile_z[m])
-            
-                # Calculate gamma
-                if ( (ac_cross_c*ac_cross_c) > (dc_self_c*dc_self_c) ):
-                    gamma = np.sqrt( (ac_cross_c*ac_cross_c) - (dc_self_c*dc_self_c) )
-                else:
-                    gamma = 1j*np.sqrt( (dc_self_c*dc_self_c) - (ac_cross_c*ac_cross_c) )
-            
-                # Calculate transfer matrix element values (for m-th section)
-                T_section[0,0] = np.cosh(gamma*dz)  - 1j*(dc_self_c/gamma)*np.sinh(gamma*dz) #T11
-                T_section[0,1] = -1j*(ac_cross_c/gamma)*np.sinh(gamma*dz) #T12
-                T_section[1,0] = 1j*(ac_cross_c/gamma)*np.sinh(gamma*dz) #T21
-                T_section[1,1] = np.cosh(gamma*dz) +1j*(dc_self_c/gamma)*np.sinh(gamma*dz) #T22
-            
-                # Matrix multiplication (NumPy matmul)
-                if m == N-1:
-                    T = T_section
-                else:
-                    T = np.matmul(T, T_section) 
-            #--------------------------------------------------------------------------------------------------------
-            # Calculate reflection and transmission coefficients (amplitude)
-            r[ch, i] = -T[1,0]/T[0,0] #T21/T11
-            t[ch, i] = 1/T[0,0] #1/T11
-            
-            if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-                Y_trans_x[i] = Y_trans_x[i]*t[ch, i]
-                Y_trans_y[i] = Y_trans_y[i]*t[ch, i]
-                Y_ref_x[i] = Y_ref_x[i]*r[ch, i]
-                Y_ref_y[i] = Y_ref_y[i]*r[ch, i]
-            else:
-                Y_trans[i] = Y_trans[i]*t[ch, i]
-                Y_ref[i] = Y_ref[i]*r[ch, i]
-            
-           #opt_field_trans[ch, i] = t[ch, i]*opt_field_rcv[ch, i] 
-           #opt_field_ref[ch, i] = r[ch, i]*opt_field_rcv[ch, i] 
-            
-            #r[ch] = -T[1,0]/T[0,0] #T21/T11
-            #t[ch] = 1/T[0,0] #1/T11
         # Apply FFT (freq -> time domain)
-        if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-            Y_trans_x = np.fft.fftshift(Y_trans_x)
-            opt_field_trans[ch, 0] = np.fft.ifft(Y_trans_x)
-            Y_trans_y = np.fft.fftshift(Y_trans_y)
-            opt_field_trans[ch, 1] = np.fft.ifft(Y_trans_y)
-            Y_ref_x = np.fft.fftshift(Y_ref_x)
-            opt_field_ref[ch, 0] = np.fft.ifft(Y_ref_x)
-            Y_ref_y = np.fft.fftshift(Y_ref_y)
-            opt_field_ref[ch, 1] = np.fft.ifft(Y_ref_y)
-        else:
-            Y_trans = np.fft.fftshift(Y_trans)
-            opt_field_trans[ch] = np.fft.ifft(Y_trans)
-            Y_ref = np.fft.fftshift(Y_ref)
-            opt_field_ref[ch] = np.fft.ifft(Y_ref)
+        opt_field_trans[ch] = util.inverse_spectrum(Y*t[ch])
+        opt_field_ref[ch] = util.inverse_spectrum(Y*r[ch])
         
     if display_graphs == 2:
         if config.sim_status_win_enabled == True:
             config.sim_status_win.textEdit.append('Running coupled mode transmission calculation for graphing')
             config.app.processEvents()
         #Create transmissivity and reflectivity curves
-        r_graph =np.full(pts, 0 + 1j*0, dtype=complex) 
-        t_graph =np.full(pts, 0 + 1j*0, dtype=complex) 
-        wave_graph = np.empty(pts)
-        ref_graph = np.empty(pts)
-        trans_graph = np.empty(pts)
-        for i in range(0, pts):
-            wave_graph[i] = start_wave + (i*spacing)
-            T = np.full([2, 2], 0 + 1j*0, dtype=complex)
-            T_section = np.full([2, 2], 0 + 1j*0, dtype=complex)
-            
-            #CMT model--------------------------------------------------------------------------------------------
-            for m in range (N-1, -1, -1): #T = T(M)*T(M-1)*...*T(2)*T(1)
-                bragg_wave_chirp = bragg_wave + (chirp_coeff*1e-6)*m*(L/N)
-                detuning = 2*pi*n_eff*( (1/wave_graph[i]) - (1/(bragg_wave_chirp)) )
-                dc_self_c = detuning + ((2*pi/wave_graph[i])*n_mod*profile_z[m]) 
-                ac_cross_c = (pi/wave_graph[i])*n_mod*profile_z[m] #(pi/lambda)*mod_index*profile(z)
-                
-                # Calculate gamma
-                if ( (ac_cross_c*ac_cross_c) > (dc_self_c*dc_self_c) ):
-                    gamma = np.sqrt( (ac_cross_c*ac_cross_c) - (dc_self_c*dc_self_c) )
-                else:
-                    gamma = 1j*np.sqrt( (dc_self_c*dc_self_c) - (ac_cross_c*ac_cross_c) )
-                    
-                # Calculate transfer matrix element values (for m-th section)
-                T_section[0,0] = np.cosh(gamma*dz)  - 1j*(dc_self_c/gamma)*np.sinh(gamma*dz) #T11
-                T_section[0,1] = -1j*(ac_cross_c/gamma)*np.sinh(gamma*dz) #T12
-                T_section[1,0] = 1j*(ac_cross_c/gamma)*np.sinh(gamma*dz) #T21
-                T_section[1,1] = np.cosh(gamma*dz) +1j*(dc_self_c/gamma)*np.sinh(gamma*dz) #T22
-                
-                # Matrix multiplication (numpy matmul)
-                if m == N-1:
-                    T = T_section
-                else:
-                    T = np.matmul(T, T_section)
-            
+        wave_graph = start_wave + (np.arange(pts)*spacing)
+        spectra_key = grating_key + ('graph', pts, start_wave, spacing)
+        if spectra_key in cmt_spectra_cache:
+            r_graph, t_graph = cmt_spectra_cache[spectra_key]
+        else:
+            T = cmt_transfer_matrix(wave_graph, bragg_wave, n_eff, n_mod, L, N, chirp_coeff,
+                                    profile_z)
             # Calculate transmission & reflection coefficients
-            r_graph[i] = -T[1,0]/T[1,1] #T21/T11
-            t_graph[i] = 1/T[0,0] #1/T11
+            r_graph = -T[:, 1, 0]/T[:, 1, 1] #T21/T11
+            t_graph = 1/T[:, 0, 0] #1/T11
+            store_cmt_spectra(spectra_key, r_graph, t_graph)
             
-            # Add data points to graph arrays
-            wave_graph[i] = wave_graph[i]*1e9 #Convert to nm
-            ref_graph[i] = np.abs(r_graph[i])*np.abs(r_graph[i])
-            trans_graph[i] = np.abs(t_graph[i])*np.abs(t_graph[i])
-            z_pos = np.linspace(0, L, N)
-            index_profile = profile_z*n_mod
+        # Add data points to graph arrays
+        wave_graph = wave_graph*1e9 #Convert to nm
+        ref_graph = np.abs(r_graph)*np.abs(r_graph)
+        trans_graph = np.abs(t_graph)*np.abs(t_graph)
+        z_pos = np.linspace(0, L, N)
+        index_profile = profile_z*n_mod
             
         #Create an FBG graphing object (with data) and display results
         config.fbg_graph = config.view.FBGAnalyzer(wave_graph, 
@@ -366,6 +280,47 @@ def set_apodization_profile(profile, dz, N, L):
                 profile_z[m] *= np.tanh(2*alpha*(L-z)/L)/np.tanh(alpha)
     return profile_z
 
+def cmt_transfer_matrix(wave, bragg_wave, n_eff, n_mod, L, N, chirp_coeff, profile_z,
+                        display_progress = False):
+    '''Coupled mode theory: transfer matrix T = T(M)*T(M-1)*...*T(2)*T(1) of the grating
+       for all wavelengths of the wave array (returned as an array of 2x2 matrices). The
+       matrices of each section are calculated for all wavelengths at once
+    '''
+    pi = constants.pi
+    dz = L/N
+    T = None
+    for m in range (N-1, -1, -1):
+        if display_progress == True: #Provide update on calculation status
+            display_cmt_progress(N-1-m, N)
+        bragg_wave_chirp = bragg_wave + (chirp_coeff*1e-6)*m*(L/N) #Eq 5 (Ref 3) Lg = L/N
+        ac_cross_c = (pi/wave)*n_mod*profile_z[m] #(pi/lambda)*mod_index*profile(z) 
+        detuning = 2*pi*n_eff*( (1/wave) - (1/(bragg_wave_chirp)) )
+        dc_self_c = detuning + ((2*pi/wave)*n_mod*profile_z[m])
+        
+        # Calculate gamma (imaginary if dc_self_c^2 > ac_cross_c^2)
+        gamma = np.sqrt( (ac_cross_c*ac_cross_c) - (dc_self_c*dc_self_c) + 0j )
+        
+        # Calculate transfer matrix element values (for m-th section)
+        cosh_gamma = np.cosh(gamma*dz)
+        sinh_gamma = np.sinh(gamma*dz)
+        T_section = np.empty([np.size(wave), 2, 2], dtype=complex)
+        T_section[:, 0, 0] = cosh_gamma - 1j*(dc_self_c/gamma)*sinh_gamma #T11
+        T_section[:, 0, 1] = -1j*(ac_cross_c/gamma)*sinh_gamma #T12
+        T_section[:, 1, 0] = 1j*(ac_cross_c/gamma)*sinh_gamma #T21
+        T_section[:, 1, 1] = cosh_gamma + 1j*(dc_self_c/gamma)*sinh_gamma #T22
+        
+        # Matrix multiplication (NumPy matmul, all wavelengths)
+        if T is None:
+            T = T_section
+        else:
+            T = np.matmul(T, T_section)
+    return T
+
+def store_cmt_spectra(spectra_key, r, t):
+    if len(cmt_spectra_cache) >= cmt_spectra_cache_size: # Remove oldest spectra
+        del cmt_spectra_cache[next(iter(cmt_spectra_cache))]
+    cmt_spectra_cache[spectra_key] = (np.copy(r), np.copy(t))
+
 def display_cmt_progress(i, n):       
     if i == int(round(n/4)):
         config.sim_status_win.textEdit.append('25% complete')
@@ -10,6 +10,7 @@ Refs:
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 
 from scipy import constants #https://docs.scipy.org/doc/scipy/reference/constants.html
 
@@ -17,6 +18,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Laser Array Source'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -112,7 +114,7 @@ def run(input_signal_data, parameters_input, settings):
             noise_pwr = rin_linear * ref_bw * (optical_pwr*1e-3)**2
             #Penalty (noise var) at receiver is: 2*(RP1)^2*RIN*BW
             sigma_field = np.sqrt(np.sqrt(noise_pwr))
-            noise_array_rin = np.random.normal(0, sigma_field , n)
+            noise_array_rin = rng.normal(0, sigma_field , n)
             noise_array[ch, :] = noise_array_rin + 1j*0
             if add_rin_to_signal == 2:
                 e_field_array[ch, :] = e_field_array[ch, :] + noise_array_rin
@@ -141,7 +143,7 @@ def run(input_signal_data, parameters_input, settings):
             phase = phase_rad
             phase_array = np.full(n, phase)
             for i in range(1,n):
-                phase_walk = np.random.normal(0, phase_sigma)*np.sqrt(t_step)
+                phase_walk = rng.normal(0, phase_sigma)*np.sqrt(t_step)
                 phase_array[i] = phase_array[i-1] + phase_walk
                 e_field_array_real[i] = e_field_array[ch, i]*np.cos(phase_array[i])
                 e_field_array_imag[i] = e_field_array[ch, i]*np.sin(phase_array[i])
@@ -168,8 +170,8 @@ def run(input_signal_data, parameters_input, settings):
                     pwr_ase += psd_array[1, i]*ng_w
             #Convert to time-domain noise
             sigma_ase = np.sqrt(pwr_ase/2)
-            noise_ase_real = np.random.normal(0, sigma_ase , n)
-            noise_ase_imag = np.random.normal(0, sigma_ase , n)
+            noise_ase_real = rng.normal(0, sigma_ase , n)
+            noise_ase_imag = rng.normal(0, sigma_ase , n)
             noise_array_ase = noise_ase_real + 1j*noise_ase_imag
             noise_array[ch, :] += noise_array_ase
             # Add noise to time domain signal and remove from noise array
@@ -9,12 +9,14 @@ Refs:
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants #https://docs.scipy.org/doc/scipy/reference/constants.html
 
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Laser Source'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -80,7 +82,7 @@ def run(input_signal_data, parameters_input, settings):
         noise_pwr = rin_linear * ref_bw * (optical_pwr*1e-3)**2
         #Penalty (noise var) at receiver is: 2*(RP1)^2*RIN*BW
         sigma_field = np.sqrt(np.sqrt(noise_pwr))
-        noise_array = np.random.normal(0, sigma_field , n)
+        noise_array = rng.normal(0, sigma_field , n)
         e_field_array = e_field_array + noise_array
     
     # Build electrial field
@@ -118,7 +120,7 @@ def run(input_signal_data, parameters_input, settings):
                 
         #Convert to time-domain noise
         sigma_ase = np.sqrt(pwr_ase)
-        noise_ase = np.random.normal(0, sigma_ase , n)
+        noise_ase = rng.normal(0, sigma_ase , n)
         noise_array += noise_ase
     
     #Add phase noise to field envelope (Brownian randon walk) - Ref 1, Eq. 4.7
@@ -127,7 +129,7 @@ def run(input_signal_data, parameters_input, settings):
     phase_array = np.full(n, phase)
     
     for i in range(1,n):
-        phase_walk = np.random.normal(0, phase_sigma)*np.sqrt(t_step)
+        phase_walk = rng.normal(0, phase_sigma)*np.sqrt(t_step)
         phase_array[i] = phase_array[i-1] + phase_walk
         e_field_array_real[i] = e_field_array[i]*np.cos(phase_array[i])
         e_field_array_imag[i] = e_field_array[i]*np.sin(phase_array[i])
@@ -9,12 +9,14 @@ Refs:
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants #https://docs.scipy.org/doc/scipy/reference/constants.html
 
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Laser Source'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -84,7 +86,7 @@ def run(input_signal_data, parameters_input, settings):
         noise_pwr = rin_linear * ref_bw * (optical_pwr*1e-3)**2
         #Penalty (noise var) at receiver is: 2*(RP1)^2*RIN*BW
         sigma_field = np.sqrt(np.sqrt(noise_pwr))
-        noise_array = np.random.normal(0, sigma_field , n)
+        noise_array = rng.normal(0, sigma_field , n)
         e_field_array = e_field_array + noise_array
     
     # Initialize electric field arrays
@@ -128,7 +130,7 @@ def run(input_signal_data, parameters_input, settings):
                 pwr_ase += psd_array[1, i]*ng_w
         #Convert to time-domain noise
         sigma_ase = np.sqrt(pwr_ase)
-        noise_ase = np.random.normal(0, sigma_ase , n)
+        noise_ase = rng.normal(0, sigma_ase , n)
         noise_array += noise_ase
     
     #Add phase noise to field envelope (Brownian randon walk) - Ref 1, Eq. 4.7
@@ -136,7 +138,7 @@ def run(input_signal_data, parameters_input, settings):
     phase = phase_rad
     phase_array = np.full(n, phase)
     for i in range(1,n):
-        phase_walk = np.random.normal(0, phase_sigma)*np.sqrt(t_step)
+        phase_walk = rng.normal(0, phase_sigma)*np.sqrt(t_step)
         phase_array[i] = phase_array[i-1] + phase_walk
         e_field_array_real[i] = e_field_array[i]*np.cos(phase_array[i])
         e_field_array_imag[i] = e_field_array[i]*np.sin(phase_array[i])
@@ -9,18 +9,21 @@ Refs:
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants #https://docs.scipy.org/doc/scipy/reference/constants.html
 
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Laser Source'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
     time = settings['time_window']
     fs = settings['sampling_rate']
     t_step = settings['sampling_period']
+    stream_state = settings.get('stream_state') # Streaming mode (None if not used)
 
     # Status message - initiation of fb_script (Sim status panel & Info/Status window)
     fb_title_string = 'Running ' + str(module_name) + ' - Iteration #: ' + str(iteration)
@@ -83,6 +86,8 @@ def run(input_signal_data, parameters_input, settings):
 
     # Prepare initial electrical field definition for optical signal
     time_array = np.linspace(0, time, n)
+    if stream_state is not None: # Streaming mode: time of the current frame
+        time_array = time_array + settings['stream_start_time']
     e_field_array = np.full(n, np.sqrt(optical_pwr*1e-3))
     
     #Add RIN to field values (if selected) - Ref 1, Eq 4.127
@@ -92,7 +97,7 @@ def run(input_signal_data, parameters_input, settings):
         noise_pwr = rin_linear * ref_bw * (optical_pwr*1e-3)**2
         #Penalty (noise var) at receiver is: 2*(RP1)^2*RIN*BW
         sigma_field = np.sqrt(np.sqrt(noise_pwr))
-        noise_array_rin = np.random.normal(0, sigma_field , n)
+        noise_array_rin = rng.normal(0, sigma_field , n)
         noise_array = noise_array_rin + 1j*0
         if add_rin_to_signal == 2:
             e_field_array = e_field_array + noise_array_rin
@@ -131,9 +136,15 @@ def run(input_signal_data, parameters_input, settings):
     if include_phase_noise == 2:
         phase_sigma = np.sqrt(np.pi*2*line_width*1e6)
         phase = phase_rad
+        i_start = 1
+        if stream_state is not None and 'phase' in stream_state:
+            # Streaming mode: random walk continues from the last phase of the previous
+            # frame (for i = 0, phase_array[i-1] is the initial phase value)
+            phase = stream_state['phase']
+            i_start = 0
         phase_array = np.full(n, phase)
-        for i in range(1, n):
-            phase_walk = np.random.normal(0, phase_sigma)*np.sqrt(t_step)
+        for i in range(i_start, n):
+            phase_walk = rng.normal(0, phase_sigma)*np.sqrt(t_step)
             phase_array[i] = phase_array[i-1] + phase_walk
             e_field_array_real[i] = e_field_array[i]*np.cos(phase_array[i])
             e_field_array_imag[i] = e_field_array[i]*np.sin(phase_array[i])
@@ -142,6 +153,8 @@ def run(input_signal_data, parameters_input, settings):
             else:
                 e_field_env[0][i] = e_field_array_real[i] + 1j*e_field_array_imag[i]
                 e_field_env[1][i] = e_field_array_real[i] + 1j*e_field_array_imag[i]
+        if stream_state is not None:
+            stream_state['phase'] = phase_array[-1]
     
     # Apply Jones vector to Ex and Ey complex arrays
     if e_field_format == 'Ex-Ey':
@@ -161,8 +174,8 @@ def run(input_signal_data, parameters_input, settings):
                 pwr_ase += psd_array[1, i]*ng_w
         #Convert to time-domain noise
         sigma_ase = np.sqrt(pwr_ase/2)
-        noise_ase_real = np.random.normal(0, sigma_ase , n)
-        noise_ase_imag = np.random.normal(0, sigma_ase , n)
+        noise_ase_real = rng.normal(0, sigma_ase , n)
+        noise_ase_imag = rng.normal(0, sigma_ase , n)
         noise_array_ase = noise_ase_real + 1j*noise_ase_imag
         noise_array += noise_array_ase
         # Add noise to time domain signal and remove from noise array
@@ -4,6 +4,7 @@ Measurement node (Optical)
 """
 import config
 import numpy as np
+import systemlab_utilities as util
 from scipy import constants
 #https://docs.scipy.org/doc/scipy/reference/constants.html
 c = constants.c # Speed of light (m/s)
@@ -30,6 +31,7 @@ def run(input_signal_data, parameters_input, settings):
     segment = int(round(segment))
     samples_segment = settings['samples_per_segment'] #Samples per feedback segment
     feedback_mode = settings['feedback_enabled'] #Feedback mode is enabled(2)/disabled(0)
+    stream_state = settings.get('stream_state') # Streaming mode (None if not used)
     
     '''==Status message (send to Simulation status panel)==============================='''
     # Status message - initiation of fb_script (Sim status panel & Info/Status window)
@@ -107,7 +109,8 @@ def run(input_signal_data, parameters_input, settings):
             tot_sig_pwr, avg_sig_pwr, ph_rate = calculate_signal_metrics('x-y', pol_format, opt_field_rcv[ch],
                                                                                                     jones_vector[ch], wave_freq[ch], n, time_period)
             osnr = calculate_osnr_metrics('x-y', pol_format, opt_field_rcv[ch], noise_field_rcv[ch], jones_vector[ch], 
-                                                         wave_freq[ch], n, fs, osnr_bw)
+                                                         wave_freq[ch], n, fs, osnr_bw,
+                                                         stream_state, ch)
             photons_per_bit = ph_rate
             # Results list
             if pwr_units == 'W':
@@ -140,7 +143,8 @@ def run(input_signal_data, parameters_input, settings):
             tot_sig_pwr, avg_sig_pwr, ph_rate = calculate_signal_metrics('x', pol_format, opt_field_rcv[ch],
                                                                                                     jones_vector[ch], wave_freq[ch], n, time_period)
             osnr = calculate_osnr_metrics('x', pol_format, opt_field_rcv[ch], noise_field_rcv[ch], jones_vector[ch], 
-                                                         wave_freq[ch], n, fs, osnr_bw)
+                                                         wave_freq[ch], n, fs, osnr_bw,
+                                                         stream_state, ch)
             # Results list
             if pwr_units == 'W':
                 data_1 = ['Total signal power (X)', tot_sig_pwr, 'W', '', False, num_format_1]
@@ -172,7 +176,8 @@ def run(input_signal_data, parameters_input, settings):
             tot_sig_pwr, avg_sig_pwr, ph_rate = calculate_signal_metrics('y', pol_format, opt_field_rcv[ch],
                                                                                                     jones_vector[ch], wave_freq[ch], n, time_period)       
             osnr = calculate_osnr_metrics('y', pol_format, opt_field_rcv[ch], noise_field_rcv[ch], jones_vector[ch], 
-                                                           wave_freq[ch], n, fs, osnr_bw)
+                                                           wave_freq[ch], n, fs, osnr_bw,
+                                                           stream_state, ch)
             # Results list
             if pwr_units == 'W':
                 data_1 = ['Total signal power (Y)', tot_sig_pwr, 'W', '', False, num_format_1]
@@ -238,37 +243,25 @@ def calculate_signal_metrics(pol, pol_format, sig_array, jones, wave, n, time_pe
     ph_rate_sig = (avg_sig_pwr*time_period)/(h*wave)
     return total_sig_pwr, avg_sig_pwr, ph_rate_sig
     
-def calculate_osnr_metrics(pol, pol_format, sig_array, noise_array, jones, ctr_freq, n, fs, obw):
-    T = n/fs
-    k = np.arange(n)
-    frq = k/T
-    frq = frq - frq[int(round(n/2))] + ctr_freq
+def calculate_osnr_metrics(pol, pol_format, sig_array, noise_array, jones, ctr_freq, n, fs, obw,
+                           stream_state=None, ch=0):
+    if util.averaged_spectrum(n, stream_state is not None):
+        return calculate_osnr_metrics_averaged(pol, pol_format, sig_array, noise_array, jones, 
+                                               ctr_freq, fs, obw, stream_state, ch)
+    frq = util.frequency_grid(n, fs, ctr_freq)
     
-    # Apply FFT (time -> freq domain)
-    if pol_format == 'Ex-Ey': # Polarization format: Ex-Ey
-        Y_x = np.fft.fftshift(np.fft.fft(sig_array[0]))
-        Y_y = np.fft.fftshift(np.fft.fft(sig_array[1]))
-    else:
-        Y = np.fft.fftshift(np.fft.fft(sig_array))
-    N = np.fft.fftshift(np.fft.fft(noise_array))
+    # Apply FFT (time -> freq domain, both polarizations for format Ex-Ey)
+    Y = util.spectrum(sig_array)
+    N = util.spectrum(noise_array)
     
     # Calculate transfer function
     tr_fcn_filt = rect_profile(frq, ctr_freq, obw)
-    
-    if pol_format == 'Ex-Ey': # Polarization format: Ex-Ey
-        Y_x = Y_x*tr_fcn_filt
-        Y_y = Y_y*tr_fcn_filt
-    else:
-        Y = Y*tr_fcn_filt
+    Y = Y*tr_fcn_filt
     N = N*tr_fcn_filt
     
     # Apply IFFT (freq -> time domain)
-    if pol_format == 'Ex-Ey': # Polarization format: Ex-Ey
-        sig_array[0] = np.fft.ifft(np.fft.ifftshift(Y_x))
-        sig_array[1] = np.fft.ifft(np.fft.ifftshift(Y_y))
-    else:
-        sig_array = np.fft.ifft(np.fft.ifftshift(Y))
-    noise_array = np.fft.ifft(np.fft.ifftshift(N))
+    sig_array = util.inverse_spectrum(Y)
+    noise_array = util.inverse_spectrum(N)
     
     if pol_format == 'Ex-Ey':
         if pol == 'x-y':
@@ -299,9 +292,57 @@ def calculate_osnr_metrics(pol, pol_format, sig_array, noise_array, jones, ctr_f
         osnr = 'NA'
     return osnr
     
+def calculate_osnr_metrics_averaged(pol, pol_format, sig_array, noise_array, jones, ctr_freq, 
+                                    fs, obw, stream_state, ch):
+    # OSNR from the averaged power spectra (Welch method) of the signal and noise, the 
+    # signal is analysed in segments (no FFT of the complete signal). In streaming mode 
+    # the spectra are averaged over all the frames
+    # Polarization: field analysed and power scaling (Jones vector)
+    if pol_format == 'Ex-Ey':
+        if pol == 'x-y':
+            sig_field, sig_scale = sig_array, 1
+        elif pol == 'x':
+            sig_field, sig_scale = sig_array[0], 1
+        else:
+            sig_field, sig_scale = sig_array[1], 1
+    else:
+        if pol == 'x-y':
+            sig_field, sig_scale = sig_array, np.abs(jones[0])**2 + np.abs(jones[1])**2
+        elif pol == 'x':
+            sig_field, sig_scale = sig_array, np.abs(jones[0])**2
+        else:
+            sig_field, sig_scale = sig_array, np.abs(jones[1])**2
+    if pol == 'x-y':
+        noise_scale = 1
+    elif pol == 'x':
+        noise_scale = np.abs(jones[0])**2
+    else:
+        noise_scale = np.abs(jones[1])**2
+    
+    key = ('osnr', ch, pol)
+    if stream_state is not None and key in stream_state:
+        sig_psd, noise_psd = stream_state[key]
+    else:
+        sig_psd = util.WelchEstimator()
+        noise_psd = util.WelchEstimator()
+        if stream_state is not None:
+            stream_state[key] = (sig_psd, noise_psd)
+    sig_psd.add(sig_field)
+    noise_psd.add(noise_array)
+    if sig_psd.segments == 0:
+        return 'NA'
+    
+    f_start = ctr_freq - (obw/2)
+    f_end = ctr_freq + (obw/2)
+    sig_pwr = np.sum(sig_psd.band_power(fs, f_start, f_end, ctr_freq))*sig_scale
+    noise_pwr = np.sum(noise_psd.band_power(fs, f_start, f_end, ctr_freq))*noise_scale
+    if noise_pwr > 0 and sig_pwr > 0:
+        osnr = 10*np.log10(sig_pwr/noise_pwr)
+    else:
+        osnr = 'NA'
+    return osnr
+    
 def rect_profile(frq, ctr_freq, bw):
     tr_fcn_filter = np.full(np.size(frq), 0 + 1j*0, dtype=complex)
-    for i in range(0, np.size(frq)):
-        if frq[i] >= ctr_freq - (bw/2) and frq[i] <= ctr_freq + (bw/2):
-            tr_fcn_filter[i] = 1 + 1j*0
+    tr_fcn_filter[(frq >= ctr_freq - (bw/2)) & (frq <= ctr_freq + (bw/2))] = 1 + 1j*0
     return tr_fcn_filter
\ No newline at end of file
@@ -5,6 +5,7 @@ Version 1.0 (4 June 2020)
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 import systemlab_viewers_ng_pon2 as view
 import project_config as project
 from scipy import constants
@@ -80,18 +81,8 @@ def run(input_signal_data, parameters_input, settings):
         noise_field_rcv[ch] = opt_channels[ch][4]
 
     '''==CALCULATIONS=============================================='''
-    # Initialize output fields (for 4 ports)
-    if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-        opt_field_out_1 = np.full([channels, 2, n], 0 + 1j*0, dtype=complex)
-    else: # Polarization format: Exy
-        opt_field_out_1 = np.full([channels, n], 0 + 1j*0, dtype=complex)
-    noise_field_output = np.full([channels, n], 0 + 1j*0, dtype=complex)
     noise_field_output = noise_field_rcv
     
-    # Prepare freq array (sampled signals)
-    T = n/fs
-    k = np.arange(n)
-    frq = k/T # Positive/negative freq (double sided) 
     wave = np.empty(channels)
     
     bw_3_db = 'NA'
@@ -101,58 +92,35 @@ def run(input_signal_data, parameters_input, settings):
     adj_isolation_ratio = 'NA'
     
     """Apply port filtering to all input channels-----------------------------------------"""
+    if profile == 'Rectangular':
+        filter_key = (profile, ctr_freq_1, bw)
+    else:
+        if sigma_calc == 'Direct':
+            sig_filter = sigma
+        else:
+            sig_filter = bw/(2*np.sqrt(2*np.log2(2)))
+        filter_key = (profile, ctr_freq_1, sig_filter, pwr_gauss)
+    tr_fcn_filt = np.empty([channels, n], dtype=complex)
     for ch in range(0, channels):
         config.status_message('Applying port filtering to channel: ' + str(ch) + ' (' +
                                            str(wave_freq[ch]*1e-12) + ' THz)')
-        # Frequency array adjusted to center frequency of optical channel
-        frq = frq - frq[int(round(n/2))] + wave_freq[ch]
-        # Apply FFT (time -> freq domain)
-        if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-            # PORT 1
-            Y_x_1 = np.fft.fft(opt_field_rcv[ch, 0])
-            Y_x_1 = np.fft.fftshift(Y_x_1)
-            Y_y_1 = np.fft.fft(opt_field_rcv[ch, 1])
-            Y_y_1 = np.fft.fftshift(Y_y_1)
-        else:
-            # PORT 1
-            Y_1 = np.fft.fft(opt_field_rcv[ch])
-            Y_1 = np.fft.fftshift(Y_1)
-            
-        """Apply transfer function to field envelope of channel---------------"""
-        if profile == 'Rectangular':
-            tr_fcn_filt_1 = rect_profile(frq, ctr_freq_1, bw)
-        elif profile == 'Gaussian':
-            if sigma_calc == 'Direct':
-                sig_filter = sigma
-            else:
-                sig_filter = bw/(2*np.sqrt(2*np.log2(2)))
-            tr_fcn_filt_1 = gaussian_profile(frq, ctr_freq_1, sig_filter)
-        elif profile == 'Super-Gaussian':
-            if sigma_calc == 'Direct':
-                sig_filter = sigma
-            else:
-                sig_filter = bw/(2*np.sqrt(2*np.log2(2)))
-            tr_fcn_filt_1 = super_gaussian_profile(frq, ctr_freq_1, sig_filter, pwr_gauss)
-            
-        if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-            # PORT 1
-            Y_x_1 = Y_x_1*tr_fcn_filt_1
-            Y_y_1 = Y_y_1*tr_fcn_filt_1
-        else:
-            # PORT 1
-            Y_1 = Y_1*tr_fcn_filt_1
-
-        # Apply IFFT (freq -> time domain)
-        if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-            # PORT 1
-            Y_x_1 = np.fft.ifftshift(Y_x_1)
-            opt_field_out_1[ch, 0] = np.fft.ifft(Y_x_1)
-            Y_y_1 = np.fft.ifftshift(Y_y_1)
-            opt_field_out_1[ch, 1] = np.fft.ifft(Y_y_1)
-        else:
-            # PORT 1
-            Y_1 = np.fft.ifftshift(Y_1)
-            opt_field_out_1[ch] = np.fft.ifft(Y_1)
+        def filter_transfer_function():
+            # Frequency array adjusted to center frequency of optical channel
+            frq_ch = util.frequency_grid(n, fs, wave_freq[ch])
+            if profile == 'Rectangular':
+                return rect_profile(frq_ch, ctr_freq_1, bw)
+            elif profile == 'Gaussian':
+                return gaussian_profile(frq_ch, ctr_freq_1, sig_filter)
+            elif profile == 'Super-Gaussian':
+                return super_gaussian_profile(frq_ch, ctr_freq_1, sig_filter, pwr_gauss)
+        # Transfer function of channel (calculated once for the filter settings, number of
+        # samples and channel frequency)
+        tr_fcn_filt[ch] = util.transfer_function(('Optical_Filter',) + filter_key
+                                                 + (n, fs, wave_freq[ch]), filter_transfer_function)
+    
+    # Apply transfer functions to field envelopes of all channels
+    # PORT 1
+    opt_field_out_1 = util.apply_transfer_function(opt_field_rcv, tr_fcn_filt)
             
     """Perform filter analysis (passband, transfer function graph, isolation)--------------------"""
     # Build pass band profile for all channels 
@@ -228,19 +196,13 @@ def run(input_signal_data, parameters_input, settings):
                  
 def rect_profile(frq, ctr_freq, bw):
     tr_fcn_filter = np.full(np.size(frq), 0 + 1j*0, dtype=complex)
-    for i in range(0, np.size(frq)):
-        if frq[i] >= ctr_freq - (bw/2) and frq[i] <= ctr_freq + (bw/2):
-            tr_fcn_filter[i] = 1 + 1j*0
+    tr_fcn_filter[(frq >= ctr_freq - (bw/2)) & (frq <= ctr_freq + (bw/2))] = 1 + 1j*0
     return tr_fcn_filter
     
 def gaussian_profile(frq, ctr_freq, sigma):
-    tr_fcn_filter = np.full(np.size(frq), 0 + 1j*0, dtype=complex)
-    for i in range(0, np.size(frq)):
-        tr_fcn_filter[i] = np.exp(-((frq[i] - ctr_freq)**2)/(2*sigma**2))
+    tr_fcn_filter = np.exp(-((frq - ctr_freq)**2)/(2*sigma**2)) + 1j*0
     return tr_fcn_filter
     
 def super_gaussian_profile(frq, ctr_freq, sigma, pwr_gauss):
-    tr_fcn_filter = np.full(np.size(frq), 0 + 1j*0, dtype=complex)
-    for i in range(0, np.size(frq)):
-        tr_fcn_filter[i] = np.exp(-np.power(((frq[i] - ctr_freq)**2)/(2*sigma**2), pwr_gauss))
+    tr_fcn_filter = np.exp(-np.power(((frq - ctr_freq)**2)/(2*sigma**2), pwr_gauss)) + 1j*0
     return tr_fcn_filter
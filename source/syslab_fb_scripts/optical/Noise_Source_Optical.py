@@ -9,12 +9,14 @@ Refs:
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants #https://docs.scipy.org/doc/scipy/reference/constants.html
 
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Optical Noise Source'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -94,7 +96,7 @@ def run(input_signal_data, parameters_input, settings):
                 
         #Convert to time-domain noise
         sigma = np.sqrt(pwr_opt_noise)
-        noise_opt = np.random.normal(0, sigma , n)
+        noise_opt = rng.normal(0, sigma , n)
         noise_array += noise_opt
         
     '''==OUTPUT PARAMETERS LIST===========================================================
@@ -9,12 +9,14 @@ Refs:
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants #https://docs.scipy.org/doc/scipy/reference/constants.html
 
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Optical Noise Source'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -76,8 +78,8 @@ def run(input_signal_data, parameters_input, settings):
                 #psd_array[1, i] = 0
         #Convert to time-domain noise
         sigma_ase = np.sqrt(pwr_opt_noise/2)
-        noise_ase_real = np.random.normal(0, sigma_ase , n)
-        noise_ase_imag = np.random.normal(0, sigma_ase , n)
+        noise_ase_real = rng.normal(0, sigma_ase , n)
+        noise_ase_imag = rng.normal(0, sigma_ase , n)
         noise_array_ase = noise_ase_real + 1j*noise_ase_imag
         noise_array += noise_array_ase
         if add_ase_to_signal == 2:
@@ -10,6 +10,7 @@ Refs:
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 
 from scipy import constants # https://docs.scipy.org/doc/scipy/reference/constants.html
 
@@ -17,6 +18,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Optical Amplifier'
+    rng = util.block_rng(settings)
     #Main settings
     n = settings['num_samples'] #Total samples for simulation
     n = int(round(n))   
@@ -126,7 +128,7 @@ def run(input_signal_data, parameters_input, settings):
                 
         #Convert to time-domain noise
         sigma_ase = np.sqrt(pwr_ase)
-        noise_ase = np.random.normal(0, sigma_ase , n)
+        noise_ase = rng.normal(0, sigma_ase , n)
         noise_array += noise_ase
     
     '''==OUTPUT PARAMETERS LIST============================================='''
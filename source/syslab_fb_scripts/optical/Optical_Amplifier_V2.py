@@ -14,6 +14,7 @@ Refs:
 version = 3 #New versioning system for functional block scripts (8-Jun-20)
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import optimize
 
 from scipy import constants # https://docs.scipy.org/doc/scipy/reference/constants.html
@@ -22,6 +23,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Optical Amplifier'
+    rng = util.block_rng(settings)
     #Main settings
     n = settings['num_samples'] #Total samples for simulation
     n = int(round(n))   
@@ -154,7 +156,7 @@ def run(input_signal_data, parameters_input, settings):
                     pwr_ase += psd_out[1, i]*ng_w
             # Convert to time-domain noise
             sigma_ase = np.sqrt(pwr_ase)
-            noise_ase = np.random.normal(0, sigma_ase , n)
+            noise_ase = rng.normal(0, sigma_ase , n)
             noise_field_out[ch] += noise_ase
             
     # Amplifier ASE calculation
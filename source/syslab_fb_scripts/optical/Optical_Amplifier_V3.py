@@ -19,6 +19,7 @@ Source: https://www.ciscopress.com/articles/article.asp?p=30886&seqNum=5
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import optimize
 
 from scipy import constants # https://docs.scipy.org/doc/scipy/reference/constants.html
@@ -28,6 +29,7 @@ def run(input_signal_data, parameters_input, settings):
     '''==PROJECT SETTINGS===================================================
     '''
     module_name = settings['fb_name'] 
+    rng = util.block_rng(settings)
     #Main settings
     n = settings['num_samples'] #Total samples for simulation
     n = int(round(n))   
@@ -207,17 +209,13 @@ def run(input_signal_data, parameters_input, settings):
         for ch in range(0, channels):
             pwr_ase = 0
             # Build time-domain freq points
-            T = n/fs
-            k = np.arange(n)
-            frq = (k/T)
-            frq = frq - frq[int(round(n/2))] + wave_freq[ch]
-            for i in range(0, ng):
-                if psd_array[0, i] > frq[0] and psd_array[0, i] < frq[n-1]:
-                    pwr_ase += 2*psd_out[1, i]*ng_w # Ref 1, Eq 4.37 (Pwr = 2*psd_ase*bw)
+            frq = util.frequency_grid(n, fs, wave_freq[ch])
+            in_range = (psd_array[0, :] > frq[0]) & (psd_array[0, :] < frq[n-1])
+            pwr_ase += 2*np.sum(psd_out[1, in_range])*ng_w # Ref 1, Eq 4.37 (Pwr = 2*psd_ase*bw)
             # Convert to time-domain noise
             sigma_ase = np.sqrt(pwr_ase/2)
-            noise_ase_real = np.random.normal(0, sigma_ase , n)
-            noise_ase_imag = np.random.normal(0, sigma_ase , n)
+            noise_ase_real = rng.normal(0, sigma_ase , n)
+            noise_ase_imag = rng.normal(0, sigma_ase , n)
             noise_array_ase = noise_ase_real + 1j*noise_ase_imag
             noise_field_out[ch] += noise_array_ase
             
@@ -233,13 +231,8 @@ def run(input_signal_data, parameters_input, settings):
                 
         # Set psd_array points to zero (very low value)
         for ch in range(0, channels):
-            T = n/fs
-            k = np.arange(n)
-            frq = k/T
-            frq = frq - frq[int(round(n/2))] + wave_freq[ch]
-            for i in range(0, ng):
-                if psd_out[0, i] > frq[0] and psd_out[0, i] < frq[n-1]:
-                    psd_out[1, i] = 1e-30
+            frq = util.frequency_grid(n, fs, wave_freq[ch])
+            psd_out[1, (psd_out[0, :] > frq[0]) & (psd_out[0, :] < frq[n-1])] = 1e-30
                     
     """Calculate average power exiting amplifier (all channels)----------------------------------------"""
     pwr_out_amp = 0
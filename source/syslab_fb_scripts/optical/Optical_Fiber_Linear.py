@@ -24,6 +24,8 @@ http://www.opticsjournal.net/ViewFull0.htm?aid=OJ160926000009u1w4z7
 
 import numpy as np
 import config
+import systemlab_utilities as util
+import systemlab_signals as signls
 from scipy import constants
 
 def run(input_signal_data, parameters_input, settings):
@@ -39,6 +41,7 @@ def run(input_signal_data, parameters_input, settings):
     time = settings['time_window']
     fs = settings['sampling_rate']
     t_step = settings['sampling_period']
+    stream_state = settings.get('stream_state') # Streaming mode (None if not used)
 
     if config.sim_status_win_enabled == True:
         config.sim_status_win.textEdit.append('Running ' + module_name + 
@@ -79,56 +82,44 @@ def run(input_signal_data, parameters_input, settings):
     wave_key = np.empty(channels)
     wave_freq = np.empty(channels)
     jones_vector = np.full([channels, 2], 0 + 1j*0, dtype=complex) 
-    if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-        opt_field_rcv = np.full([channels, 2, n], 0 + 1j*0, dtype=complex) 
-    else: # Polarization format: Exy
-        opt_field_rcv = np.full([channels, n], 0 + 1j*0, dtype=complex) 
-    noise_field_rcv = np.full([channels, n], 0 + 1j*0, dtype=complex) 
-    noise_field_rcv = np.full([channels, n], 0 + 1j*0, dtype=complex) 
     for ch in range(0, channels): #Load wavelength channels
         wave_key[ch] = opt_channels[ch][0]
         wave_freq[ch] = opt_channels[ch][1]
         jones_vector[ch] = opt_channels[ch][2]
-        opt_field_rcv[ch] = opt_channels[ch][3]
-        noise_field_rcv[ch] = opt_channels[ch][4]
+    # Signal & noise field envelopes are read directly from the input channels (the
+    # attenuated fields are calculated below)
 
     '''==CALCULATIONS=============================================='''
     # Calculate signal loss
     link_loss_db = alpha_db*length
     link_loss_linear = np.power(10, -link_loss_db/10)
-    if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-        opt_field_out = np.full([channels, 2, n], 0 + 1j*0, dtype=complex)
-    else: # Polarization format: Exy
-        opt_field_out = np.full([channels, n], 0 + 1j*0, dtype=complex) 
-    noise_field_out = np.full([channels, n], 0 + 1j*0, dtype=complex)
-    for ch in range(0, channels):
-        opt_field_out[ch] = np.sqrt(link_loss_linear)*opt_field_rcv[ch]
-        noise_field_out[ch] = np.sqrt(link_loss_linear)*noise_field_rcv[ch]
+    # Attenuated fields of all channels (channels x samples for polarization format Exy,
+    # channels x 2 x samples for Ex-Ey) - calculated on the channel block of the port
+    opt_field_out = np.sqrt(link_loss_linear)*signls.stack_channels(
+                        [opt_channels[ch][3] for ch in range(0, channels)])
+    opt_field_out = opt_field_out.astype(complex, copy=False)
+    noise_field_out = np.sqrt(link_loss_linear)*signls.stack_channels(
+                        [opt_channels[ch][4] for ch in range(0, channels)])
+    noise_field_out = noise_field_out.astype(complex, copy=False)
+    
+    # Streaming mode (overlap-save): the end of the previous frame is prepended to the
+    # field envelopes before applying the transfer function
+    if stream_state is not None:
+        overlap = settings['stream_overlap']
+        opt_field_out = util.overlap_save_input(stream_state, 'signal', opt_field_out, overlap)
+        noise_field_out = util.overlap_save_input(stream_state, 'noise', noise_field_out, overlap)
+        n = np.size(noise_field_out, -1)
 
     # Calculate linear propagation parameters
-    # Prepare freq array
-    T = n/fs
-    k = np.arange(n)
-    frq = k/T # Positive/negative freq (double sided) 
     # Initialize wave/beta arrays
     beta_1 = 0
     wave = np.empty(channels)
     beta_2 = np.empty(channels)
     beta_3 = np.empty(channels)
 
+    H = np.empty([channels, n], dtype=complex)
+
     for ch in range(0, channels):
-        frq = frq - frq[int(round(n/2))] + wave_freq[ch]
-        # Apply FFT (time -> freq domain)
-        if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-            Y_x = np.fft.fft(opt_field_out[ch, 0])
-            Y_x = np.fft.fftshift(Y_x)
-            Y_y = np.fft.fft(opt_field_out[ch, 1])
-            Y_y = np.fft.fftshift(Y_y)
-        else:
-            Y = np.fft.fft(opt_field_out[ch])
-            Y = np.fft.fftshift(Y)
-        Y_N = np.fft.fft(noise_field_out[ch])
-        Y_N = np.fft.fftshift(Y_N)
         # Calculate betas----------------------------------------------------------------------------------
         # Freq domain transfer function: H(w) = exp(-j*beta(w)*length) 
         # beta(w) = beta_0 + beta_1(w-w0) + 1/2*beta_2(w-w0)^2 + 1/6*beta_3(w-w0)^3 + ...
@@ -145,35 +136,31 @@ def run(input_signal_data, parameters_input, settings):
         if include_beta3 == 2:
             beta_3[ch] = slope*a*a*1e3 #s^3/m ( beta3 = S*(lambda^2/2*pi*c)^2 )
             #Other equation (Ref 1/Eq 2.15: beta3 = (S - (4*pi*c/lambda^3)*beta2)*(lambda^2/2*pi*c)^2
-        # Apply transfer function to field envelope of each channel
-        for i in range(0, n):
+        
+        def dispersion_transfer_function():
             #H(w) = exp(-j*(beta_2*length*w^2)/2) where w = 2*pi*freq
-            w = 2*pi*frq[i]
+            frq_ch = util.frequency_grid(n, fs, wave_freq[ch])
+            w = 2*pi*frq_ch
             wo = 2*pi*wave_freq[ch]
             w = w - wo
-            # Apply linear dispersion transfer function
-            if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-                Y_x[i] = Y_x[i] * np.exp( -1j*length*1e3*( (beta_1*w) + ((beta_2[ch]*w*w)/2)
-                                            + ((beta_3[ch]*w*w*w)/6)) )
-                Y_y[i] = Y_y[i] * np.exp( -1j*length*1e3*( (beta_1*w) + ((beta_2[ch]*w*w)/2)
+            return np.exp( -1j*length*1e3*( (beta_1*w) + ((beta_2[ch]*w*w)/2)
                                             + ((beta_3[ch]*w*w*w)/6)) )
-            else:
-                Y[i] = Y[i] * np.exp( -1j*length*1e3*( (beta_1*w) + ((beta_2[ch]*w*w)/2)
-                                            + ((beta_3[ch]*w*w*w)/6)) )
-                                            
-            Y_N[i] = Y_N[i] * np.exp( -1j*length*1e3*( (beta_1*w) + ((beta_2[ch]*w*w)/2)
-                                            + ((beta_3[ch]*w*w*w)/6)) )
-        # Apply FFT (freq -> time domain)
-        if opt_channels[0][3].ndim == 2: # Polarization format: Ex-Ey
-            Y_x = np.fft.fftshift(Y_x)
-            opt_field_out[ch, 0] = np.fft.ifft(Y_x)
-            Y_y = np.fft.fftshift(Y_y)
-            opt_field_out[ch, 1] = np.fft.ifft(Y_y)
-        else:
-            Y = np.fft.fftshift(Y)
-            opt_field_out[ch] = np.fft.ifft(Y)
-        Y_N = np.fft.fftshift(Y_N)
-        noise_field_out[ch] = np.fft.ifft(Y_N)
+        # Linear dispersion transfer function of the channel (calculated once for the
+        # fiber parameters, number of samples and channel frequency)
+        H[ch] = util.transfer_function(('Optical_Fiber_Linear', length, beta_1, beta_2[ch],
+                                        beta_3[ch], n, fs, wave_freq[ch]),
+                                       dispersion_transfer_function)
+    
+    # Apply transfer functions to field envelopes of all channels (signal & noise)
+    opt_field_out = util.apply_transfer_function(opt_field_out, H)
+    noise_field_out = util.apply_transfer_function(noise_field_out, H)
+    
+    if stream_state is not None: # Remove overlap samples
+        # The dispersion response is two-sided (non-causal): half of the overlap is
+        # removed at each end of the frame, the streamed output is delayed by
+        # overlap//2 samples
+        opt_field_out = util.overlap_save_output(opt_field_out, overlap, overlap//2)
+        noise_field_out = util.overlap_save_output(noise_field_out, overlap, overlap//2)
         
     '''==OUTPUT PARAMETERS LIST======================================='''
     opt_fiber_parameters = []
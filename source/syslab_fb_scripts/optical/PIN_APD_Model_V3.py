@@ -20,8 +20,8 @@ http://www2.optics.rochester.edu/users/gpa/opt428c.pdf (accessed 20 Aug 2020)
 """
 import os
 import numpy as np
-import copy
 import config
+import systemlab_utilities as util
 from scipy import constants, special 
 #https://docs.scipy.org/doc/scipy/reference/constants.html
 
@@ -33,6 +33,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = settings['fb_name']
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -97,7 +98,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==INPUT SIGNAL======================================================='''
     time_array = input_signal_data[0][3]
-    psd_array = input_signal_data[0][4]
+    psd_array = np.copy(input_signal_data[0][4]) # Modified below (ASE noise groups)
     opt_channels = input_signal_data[0][5] #Optical channel list
     channels = len(opt_channels)
     jones_vector = np.full([channels, 2], 0 + 1j*0, dtype=complex) 
@@ -117,9 +118,9 @@ def run(input_signal_data, parameters_input, settings):
     for ch in range(0, channels): #Load wavelength channels
         wave_key[ch] = opt_channels[ch][0]
         wave_freq[ch] = opt_channels[ch][1]
-        opt_field_rcv[ch] = copy.deepcopy(opt_channels[ch][3])
-        jones_vector[ch] = copy.deepcopy(opt_channels[ch][2])
-        noise_field_rcv[ch] = copy.deepcopy(opt_channels[ch][4])
+        opt_field_rcv[ch] = opt_channels[ch][3]
+        jones_vector[ch] = opt_channels[ch][2]
+        noise_field_rcv[ch] = opt_channels[ch][4]
         # Co-polarized component of noise field (50% of received ASE power)
         #noise_field_rcv_cpol[ch] = copy.deepcopy(opt_channels[ch][4])/np.sqrt(2)
         # Orthogonal component of noise field (50% of received ASE power)
@@ -137,19 +138,16 @@ def run(input_signal_data, parameters_input, settings):
     indices = np.where(wave_key == ch_key_ref)
     if np.size(indices[0]) > 0:
         ch_index = indices[0][0]
-    T = n/fs
-    k_freq = np.arange(n)
-    frq = k_freq/T # Positive/negative freq (double sided)
-    frq = frq - frq[int(round(n/2))] + wave_freq[ch_index]
+    frq = util.frequency_grid(n, fs, wave_freq[ch_index])
     
-    Y = np.fft.fftshift(np.fft.fft(opt_field_rcv[ch_index]))
-    N = np.fft.fftshift(np.fft.fft(noise_field_rcv[ch_index]))
+    Y = util.spectrum(opt_field_rcv[ch_index])
+    N = util.spectrum(noise_field_rcv[ch_index])
     tr_fcn_filt = rect_profile(frq, wave_freq[ch_index], opt_filter_bw)
     Y = Y*tr_fcn_filt
     N = N*tr_fcn_filt
     
-    osnr_sig_array = np.fft.ifft(np.fft.ifftshift(Y))
-    osnr_noise_array = np.fft.ifft(np.fft.ifftshift(N))
+    osnr_sig_array = util.inverse_spectrum(Y)
+    osnr_noise_array = util.inverse_spectrum(N)
     rcv_sig_pwr_ch = calculate_total_opt_pwr(osnr_sig_array)
     rcv_noise_pwr_ch = calculate_total_opt_pwr(osnr_noise_array)
     
@@ -182,22 +180,22 @@ def run(input_signal_data, parameters_input, settings):
     indices = np.where(wave_key == ch_key_ref)
     if np.size(indices[0]) > 0: 
         ch_index = indices[0][0]
-    P0 = 0
+    if opt_channels[0][3].ndim == 2:
+        # Dual-pol field: power of both polarizations (noise field projected on the
+        # polarizations with the Jones vector)
+        pwr = np.sum(np.square(np.abs(opt_field_rcv[ch_index]
+                     + jones_vector[ch_index][:, np.newaxis]*noise_field_rcv[ch_index])),
+                     axis=0)
+    else:
+        pwr = np.square(np.abs(opt_field_rcv[ch_index] + noise_field_rcv[ch_index]))
+    avg_pwr = np.mean(pwr)
+    # Samples above the average power are "1" levels, all other samples are "0" levels
+    level_1 = pwr > avg_pwr
+    count_P1 = np.count_nonzero(level_1)
     P1 = 0
-    avg_pwr = calculate_avg_opt_pwr(opt_field_rcv[ch_index] + noise_field_rcv[ch_index])
-    count_P0 = 0
-    count_P1 = 0
-    for i in range(0, n):
-        pwr = np.square(np.abs(opt_field_rcv[ch_index, i] + noise_field_rcv[ch_index, i]))
-        if pwr  > avg_pwr:
-            P1 += pwr
-            count_P1 += 1
-        else:
-            P0 += pwr
-            count_P0 += 1
     if count_P1 > 0:
-        P1 = P1/count_P1
-    P0 = P0/count_P0
+        P1 = np.sum(pwr[level_1])/count_P1
+    P0 = np.sum(pwr[~level_1])/(n - count_P1)
     ext_ratio_linear = P1/P0
     
     # Export extinction ratio to project config
@@ -214,14 +212,11 @@ def run(input_signal_data, parameters_input, settings):
     for ch in range(0, channels):
         # If coherent selected, model interference effects (signal beating)
         if opt_regime == 'Coherent': 
-            for i in range (0, n):
-                if opt_channels[0][3].ndim == 2:
-                    opt_field_rcv[ch, 0, i] = opt_field_rcv[ch, 0, i]*np.exp(1j*2*pi*wave_freq[ch]*time_array[i])
-                    opt_field_rcv[ch, 1, i] = opt_field_rcv[ch, 1, i]*np.exp(1j*2*pi*wave_freq[ch]*time_array[i])
-                else:
-                    opt_field_rcv[ch, i] = opt_field_rcv[ch, i]*np.exp(1j*2*pi*wave_freq[ch]*time_array[i])
-                # Co-polarized component of noise field
-                #noise_field_rcv_cpol[ch, i] = noise_field_rcv_cpol[ch, i]*np.exp(1j*2*pi*wave_freq[ch]*time_array[i])
+            # Optical carrier (applied to both polarizations if dual-pol field)
+            carrier = np.exp(1j*2*pi*wave_freq[ch]*time_array)
+            opt_field_rcv[ch] = opt_field_rcv[ch]*carrier
+            # Co-polarized component of noise field
+            #noise_field_rcv_cpol[ch] = noise_field_rcv_cpol[ch]*carrier
                 
             # Add channel fields together (linear superposition)
             if opt_channels[0][3].ndim == 2:
@@ -334,7 +329,7 @@ def run(input_signal_data, parameters_input, settings):
             k = constants.k # Boltzmann constant
             th_variance = rbw*4*k*noise_temp/r_load #Ref 1, Eq 4.32
         th_sigma = np.sqrt(th_variance)
-        i_th = np.random.normal(0, th_sigma , n) # Thermal noise current array
+        i_th = rng.normal(0, th_sigma , n) # Thermal noise current array
     
     """Calculate shot noise (Ref 1, Section 4.1.4)----------------------------------------------------"""
     i_shot = np.zeros(n)
@@ -342,22 +337,22 @@ def run(input_signal_data, parameters_input, settings):
     shot_sigma_avg = 0
     shot_variance_avg = 0
     if shot_noise_active == 2:
-        for i in range (0, n):
-            if shot_noise_model == 'Gaussian' or detection_model == 'APD':
-                shot_variance = 2*q*i_signal[i]*rbw # Ref 1, Eq 4.24
-                if detection_model == 'APD':
-                    # MV 20.01.r3 15-Jun-20: Bug fix, i_signal was already increased by 
-                    # factor of m_apd (during i_signal calculation) so m_apd^2 was changed
-                    # to m_apd
-                    shot_variance = m_apd*enf_apd*shot_variance 
-                shot_sigma = np.sqrt(shot_variance)
-                i_shot_sample = np.random.normal(0, shot_sigma, 1)                
-            else: #Poisson
-                mean_photons = round( (i_signal[i]*t_step) / q ) #Ref 1, Eq. 4.20
-                photons_detected = np.random.poisson(mean_photons, 1)
-                i_shot_sample = photons_detected*q/t_step # Convert to current (Ref 1, Eq. 4.22)
-                i_shot_sample = i_shot_sample - i_signal[i] # MV 20.01.r3 21-Aug-20
-            i_shot[i] = i_shot_sample
+        # Noise samples are drawn for all samples at once (variance/mean photons of
+        # each sample)
+        if shot_noise_model == 'Gaussian' or detection_model == 'APD':
+            shot_variance = 2*q*i_signal*rbw # Ref 1, Eq 4.24
+            if detection_model == 'APD':
+                # MV 20.01.r3 15-Jun-20: Bug fix, i_signal was already increased by 
+                # factor of m_apd (during i_signal calculation) so m_apd^2 was changed
+                # to m_apd
+                shot_variance = m_apd*enf_apd*shot_variance 
+            shot_sigma = np.sqrt(shot_variance)
+            i_shot = rng.normal(0, shot_sigma, n)
+        else: #Poisson
+            mean_photons = np.round( (i_signal*t_step) / q ) #Ref 1, Eq. 4.20
+            photons_detected = rng.poisson(mean_photons, n)
+            i_shot = photons_detected*q/t_step # Convert to current (Ref 1, Eq. 4.22)
+            i_shot = i_shot - i_signal # MV 20.01.r3 21-Aug-20
         # Calculate average photons + shot noise variance
         shot_variance_avg = 2*q*i_signal_mean*rbw
         shot_sigma_avg = np.sqrt(shot_variance_avg)
@@ -368,40 +363,34 @@ def run(input_signal_data, parameters_input, settings):
     sig_ase_variance = 0
     ase_ase_variance = 0
     sig_ase_variance_avg = 0
-    count = 0
     pwr_ase = 0
     psd_ase = 0
     if include_optical_noise == 2 and optical_noise_model == 'Analytical':
         # Check if psd has already been converted (from optical noise received)
         if opt_noise_psd_dbm < -200.0: 
             ng_w = psd_array[0, 1] - psd_array[0, 0]
-            ng = len(psd_array[0, :])
             for ch in range(0, channels):
                 # Build time-domain freq points
-                T = n/fs
-                k = np.arange(n)
-                frq = (k/T)
-                frq = frq - frq[int(round(n/2))] + wave_freq[ch]
-                for i in range(0, ng):
-                    if psd_array[0, i] > frq[0] and psd_array[0, i] < frq[n-1]:
-                        count += 1
-                        pwr_ase += 2*psd_array[1, i]*ng_w # Ref 1, Eq 4.37 (Pwr = 2*psd_ase*bw)
-                        #psd_ase += psd_array[1, i]
-                        psd_array[1, i] = 0
-            # Calculate average PSD
-            #psd_ase = psd_ase/count
+                frq = util.frequency_grid(n, fs, wave_freq[ch])
+                # Noise groups inside the frequency range of the channel (each group
+                # is only counted once)
+                in_range = (psd_array[0, :] > frq[0]) & (psd_array[0, :] < frq[n-1])
+                pwr_ase += 2*np.sum(psd_array[1, in_range])*ng_w # Ref 1, Eq 4.37 (Pwr = 2*psd_ase*bw)
+                psd_array[1, in_range] = 0
             psd_ase = pwr_ase/fs
         else:
             psd_ase = opt_noise_psd
         # Ref 1, Eq 4.42 & Ref 4, Slide 271
         ase_ase_variance = 2*(r_mean**2)*(psd_ase**2)*((2*opt_filter_bw) - rbw)*rbw
-        i_ase_ase = np.random.normal(0, np.sqrt(ase_ase_variance), n)
-        # Calculate signal-ase beating noise
-        for i in range (0, n):
-            s_pwr = np.square(np.abs(opt_field_rcv[ch_index, i]))
-            # Ref 1, Eq 4.43 & Ref 4, Slide 271
-            sig_ase_variance = 4*(r_mean**2)*(s_pwr*psd_ase)*rbw
-            i_sig_ase[i] = np.random.normal(0, np.sqrt(sig_ase_variance), 1)
+        i_ase_ase = rng.normal(0, np.sqrt(ase_ase_variance), n)
+        # Calculate signal-ase beating noise (signal power of each sample, both
+        # polarizations if dual-pol field)
+        s_pwr = np.square(np.abs(opt_field_rcv[ch_index]))
+        if s_pwr.ndim == 2:
+            s_pwr = np.sum(s_pwr, axis=0)
+        # Ref 1, Eq 4.43 & Ref 4, Slide 271
+        sig_ase_variance = 4*(r_mean**2)*(s_pwr*psd_ase)*rbw
+        i_sig_ase = rng.normal(0, np.sqrt(sig_ase_variance), n)
         # Calculate average variance (all samples)
         sig_ase_variance_avg = 4*(r_mean**2)*rcv_pwr*psd_ase*rbw
 
@@ -411,7 +400,7 @@ def run(input_signal_data, parameters_input, settings):
     if detection_model == 'APD':
         noise_d_variance = np.square(m_apd)*enf_apd*noise_d_variance #Ref 1, Eq 4.30
     noise_d_sigma = np.sqrt(noise_d_variance)
-    i_d_noise = np.random.normal(0, noise_d_sigma, n)
+    i_d_noise = rng.normal(0, noise_d_sigma, n)
     
     # Noise statistics (thermal) - for results
     th_psd_measured = np.var(i_th)/rbw
@@ -623,9 +612,7 @@ def calculate_avg_opt_pwr(input_field):
     
 def rect_profile(frq, ctr_freq, bw):
     tr_fcn_filter = np.full(np.size(frq), 0 + 1j*0, dtype=complex)
-    for i in range(0, np.size(frq)):
-        if frq[i] >= ctr_freq - (bw/2) and frq[i] <= ctr_freq + (bw/2):
-            tr_fcn_filter[i] = 1 + 1j*0
+    tr_fcn_filter[(frq >= ctr_freq - (bw/2)) & (frq <= ctr_freq + (bw/2))] = 1 + 1j*0
     return tr_fcn_filter
     
 # Future feature
@@ -0,0 +1,566 @@
+'''
+    SystemLab-Design Version 20.01
+    Copyright © 2019-2020 SystemLab Inc. All rights reserved.
+
+    NOTICE================================================================================
+    This file is part of SystemLab-Design 20.01.
+
+    SystemLab-Design 20.01 is free software: you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License,
+    or (at your option) any later version.
+
+    SystemLab-Design 20.01 is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with SystemLab-Design 20.01.  If not, see <https://www.gnu.org/licenses/>.
+    ======================================================================================
+
+    ABOUT THIS MODULE
+    Name: systemlab_batch
+    Headless (batch) simulation of SystemLab projects (.slb files). The project is
+    loaded without building the design layout (no widgets are instantiated) and the
+    iterations/feedback segments are calculated with the same functional block
+    scripts and dataflow scheduler as the main application. Results are written to
+    an output folder:
+      <project>_results.csv      Results of all functional blocks (per iteration)
+      <project>_parameters.pkl   Parameters of all functional blocks (per iteration)
+      <project>_data_tables.pkl  Data panel tables (per iteration)
+      <project>_port_data.pkl    Input/return signals of all ports (--save-port-data)
+      <project>_event_log.csv    Event log of the simulation (incl. per-block tracing)
+      <project>_profile.json/csv Per-block profile (--profile)
+    Projects with the setting "Independent iterations" are calculated with one worker
+    process per iteration (config_special.iteration_workers processes).
+    The random seed of a run is written to the event log. A single iteration of a run
+    can be re-calculated with --iteration N --set random_seed=<seed>.
+
+    Usage:
+    python systemlab_batch.py project_1.slb [project_2.slb ...] [-o output_folder]
+                              [--set iterations=10 --set num_samples=2048]
+                              [--save-port-data] [--stream 65536] [--profile]
+                              [--iteration 3] [--verbose]
+'''
+import os
+import sys
+import argparse
+import ast
+import csv
+import pickle
+import time as time_data
+import traceback
+import importlib
+
+launch_path = os.getcwd()
+root_path = os.path.dirname(os.path.abspath(__file__))
+# Config/viewer modules and scripts are loaded relative to the source folder
+os.chdir(root_path)
+sys.path.insert(0, root_path)
+
+# Graph windows created by some scripts (if enabled in their parameters) are
+# rendered offscreen (no display is required)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+try:
+    import sip # Required for loading the QPointF positions saved in .slb files
+except ImportError: # PyQt5 5.11+ (sip module is provided as PyQt5.sip)
+    from PyQt5 import sip
+    sys.modules['sip'] = sip
+
+import config
+import systemlab_scene_models as models
+import systemlab_scheduler as scheduler
+import systemlab_engine as engine
+import systemlab_profiler as profiler
+import systemlab_project_file as project_file
+config_special = importlib.import_module('syslab_config_files.config_special')
+
+fb_lib_path = str('syslab_config_files.config_fb_library')
+config_lib = importlib.import_module(fb_lib_path)
+
+'''Project loading========================================================================
+'''
+def load_project(file_path):
+    '''Loads a .slb project file (dict_list format: design settings, functional blocks,
+       signal links, description boxes, data boxes, ...) and rebuilds the functional
+       block and signal link data models. Returns (design_settings, fb_list,
+       signal_links_list, data_sources)
+    '''
+    dict_list = project_file.load_project(file_path, mmap_arrays=True)
+    design_settings = dict_list[0]
+    # MV 20.01.r2 6-Mar-20 New dictionary items (projects from earlier releases)
+    if not 'project_parameters_filename' in design_settings.keys():
+        design_settings['project_parameters_filename'] = 'project_parameters.txt'
+    if not 'project_config_filename' in design_settings.keys():
+        design_settings['project_config_filename'] = 'project_config.py'
+    if not 'independent_iterations' in design_settings.keys():
+        design_settings['independent_iterations'] = 0
+    if not 'random_seed' in design_settings.keys():
+        design_settings['random_seed'] = None
+    base_file_name = os.path.basename(file_path).rsplit(".", 1)
+    design_settings['project_name'] = base_file_name[0]
+
+    fb_list = {}
+    for fb_key in dict_list[1]:
+        fb = dict_list[1][fb_key]
+        fb_list[fb_key] = models.FunctionalBlock(fb_key, fb.fb_name, fb.display_name,
+                            fb.display_port_name, fb.fb_geometry, fb.fb_dim,
+                            fb.fb_position, fb.fb_script_module, fb.fb_icon_display,
+                            fb.fb_icon, fb.fb_icon_x, fb.fb_icon_y,
+                            fb.fb_parameters_list, fb.fb_results_list, fb.text_size,
+                            fb.text_length, fb.text_color, fb.text_bold, fb.text_italic,
+                            fb.fb_color, fb.fb_color_2, fb.fb_gradient,
+                            fb.fb_border_color, fb.fb_border_style, fb.text_pos_x,
+                            fb.text_pos_y, fb.port_label_size, fb.port_label_bold,
+                            fb.port_label_italic, fb.port_label_color)
+        fb_list[fb_key].fb_ports_list = fb.fb_ports_list
+
+    signal_links_list = {}
+    for l in dict_list[2]:
+        link = dict_list[2][l]
+        signal_links_list[link.link_key] = models.SignalLink(link.link_key,
+                            link.link_name, link.fb_start_key, link.fb_start,
+                            link.start_port, link.start_port_ID, link.fb_end_key,
+                            link.fb_end, link.end_port, link.end_port_ID, link.line_mode)
+        #Update associated ports (connected)
+        scheduler.port_entry(fb_list[link.fb_start_key], link.start_port_ID)[5] = True
+        scheduler.port_entry(fb_list[link.fb_end_key], link.end_port_ID)[5] = True
+
+    data_sources = []
+    for d in dict_list[4]:
+        data_source_file = dict_list[4][d].data_source_file
+        if data_source_file != '':
+            data_sources.append(data_source_file)
+    return design_settings, fb_list, signal_links_list, data_sources
+
+def project_folder(path, project_path):
+    '''Project script folders are saved as Windows relative paths (.\\folder\\) - returns
+       the folder for the current platform (or the folder of the project file if the
+       saved folder does not exist)
+    '''
+    path = str(path).replace('\\', os.sep)
+    if path and os.path.isdir(path):
+        return path
+    return os.path.dirname(project_path)
+
+
+class BatchSimulation():
+    '''Headless simulation of a project file. The data attributes that are held by the
+       design views in the main application (port signal objects, iteration
+       dictionaries) are held by this class. project: (design_settings, fb_list,
+       signal_links_list, data_sources) of a project that has already been loaded
+       (the project file is loaded if None)
+    '''
+    def __init__(self, file_path, save_port_data=False, profile=False, project=None):
+        self.file_path = os.path.abspath(file_path)
+        self.save_port_data = save_port_data
+        self.profiler = profiler.BlockProfiler(profile)
+        if project is None:
+            project = load_project(self.file_path)
+        (self.design_settings, self.fb_list, self.signal_links_list,
+                 self.data_sources) = project
+        self.project_name = self.design_settings['project_name']
+        self.fb_signals = {} # fb_key -> {portID: signal object}
+        self.iterations_parameters = {} # fb_key -> {iteration: parameters}
+        self.iterations_results = {} # fb_key -> {iteration: results}
+        self.iterations_input_signals = {} # (fb_key, portID) -> {iteration: signal_list}
+        self.iterations_return_signals = {} # (fb_key, portID) -> {iteration: signal_list}
+        self.unable_to_complete = set()
+        self.error = None
+        self.log = engine.SimulationLog()
+
+    def message(self, text, level='info', fb_key=None):
+        self.log.add(level, text, fb_key)
+        config.status.setText(text)
+
+    def set_design_setting(self, key, value):
+        if not key in self.design_settings:
+            raise KeyError('Unknown project setting: ' + str(key))
+        self.design_settings[key] = value
+        # Keep time window/number of samples consistent with the sampling rate
+        fs = self.design_settings['sampling_rate']
+        if key == 'num_samples':
+            self.design_settings['time_window'] = value/fs
+        elif key == 'time_window':
+            self.design_settings['num_samples'] = int(round(value*fs))
+        elif key == 'sampling_rate':
+            self.design_settings['time_window'] = self.design_settings['num_samples']/fs
+
+    def build_port_signals(self):
+        fs = self.design_settings['sampling_rate']
+        for fb_key in self.fb_list:
+            self.fb_signals[fb_key] = {}
+            for port in self.fb_list[fb_key].fb_ports_list:
+                self.fb_signals[fb_key][port[0]] = engine.create_port_signal(port[0],
+                                                                    port[4], fs)
+
+    def run(self, iterations=None):
+        '''Runs all iterations of the project (or the listed iterations). Returns True
+           if the simulation has completed without errors
+        '''
+        settings = self.design_settings
+        self.iterations_sim = int(settings['iterations'])
+        self.iterations_list = iterations
+        if iterations is None:
+            self.iterations_list = list(range(1, self.iterations_sim + 1))
+        self.script_paths = engine.script_search_paths(root_path,
+                                    config_lib.scripts_path_list, settings)
+        self.script_paths[-2] = os.path.abspath(project_folder(settings['file_path_1'],
+                                                               self.file_path))
+        self.script_paths[-1] = os.path.abspath(project_folder(settings['file_path_2'],
+                                                               self.file_path))
+        engine.set_script_search_paths(self.script_paths)
+        self.build_port_signals()
+        self.scheduler = scheduler.DataflowScheduler(self.fb_list, self.signal_links_list)
+        for fb_key in self.scheduler.order:
+            if fb_key in self.scheduler.blocked:
+                self.message(self.fb_list[fb_key].fb_name + ' (ID:' + str(fb_key)
+                             + ') will not be calculated: ' + self.scheduler.blocked[fb_key],
+                             'warning', fb_key)
+            self.iterations_parameters[fb_key] = {}
+            self.iterations_results[fb_key] = {}
+        for ID in self.data_sources:
+            config.data_box_dict[ID] = {}
+            config.data_tables_iterations[ID] = {}
+            config.data_tables[ID] = []
+        self.random_streams = engine.RandomStreams(engine.project_seed(settings))
+        self.message('Random seed: ' + str(self.random_streams.seed))
+
+        if (iterations is None and int(settings.get('independent_iterations', 0)) == 2
+                and self.iterations_sim > 1):
+            return self.run_iterations_parallel()
+
+        # Streaming mode: the time window is calculated as a sequence of frames (not
+        # available with feedback mode)
+        self.streaming = None
+        if (config_special.streaming_mode == True
+                and int(settings['feedback_enabled']) != 2):
+            self.streaming = engine.StreamingFrames(settings,
+                                        config_special.streaming_frame_samples,
+                                        config_special.streaming_overlap_samples)
+        try:
+            return self.run_iterations()
+        finally:
+            if self.streaming is not None:
+                self.streaming.restore()
+
+    def run_iterations(self):
+        settings = self.design_settings
+        config.stop_sim_flag = False
+        for self.iteration in self.iterations_list:
+            self.message('Starting simulation iteration ' + str(self.iteration) + '...')
+            settings['current_iteration'] = self.iteration
+            if int(settings['feedback_enabled']) == 2:
+                segments = int(round(settings['feedback_segments']))
+                for i in range(1, segments + 1):
+                    settings['feedback_current_segment'] = i
+                    self.message('Starting feedback segment ' + str(i) + '...')
+                    if not self.run_blocks():
+                        return False
+            elif self.streaming is not None:
+                self.streaming.reset()
+                for frame in range(1, self.streaming.frames + 1):
+                    self.streaming.set_frame(frame)
+                    self.message('Starting stream frame ' + str(frame) + ' of '
+                                 + str(self.streaming.frames) + '...')
+                    if not self.run_blocks():
+                        return False
+            elif not self.run_blocks():
+                return False
+            for ID in self.data_sources:
+                config.data_tables_iterations[ID][self.iteration] = config.data_tables[ID]
+                config.data_box_dict[ID] = config.data_tables_iterations[ID]
+            self.message('Simulation iteration: ' + str(self.iteration) + ' is complete')
+        return True
+
+    def run_iterations_parallel(self):
+        '''Independent iterations: the iterations are calculated in worker processes and
+           their outputs are loaded in iteration order
+        '''
+        design_settings = dict(self.design_settings) # Workers use the seed of this run
+        design_settings['random_seed'] = self.random_streams.seed
+        project = (design_settings, self.fb_list, self.signal_links_list,
+                   self.data_sources)
+        sweep = engine.IterationSweep(self.file_path, project, self.iterations_list,
+                                      self.save_port_data, config_special.iteration_workers)
+        try:
+            for self.iteration in self.iterations_list:
+                try:
+                    outputs = sweep.result(self.iteration)
+                except:
+                    self.error = ('Error/exception while calculating iteration '
+                                  + str(self.iteration) + ' in a worker process\n'
+                                  + str(traceback.format_exc()))
+                    self.log.add('error', self.error)
+                    return False
+                if not self.load_iteration_outputs(outputs): # Incl. the event log
+                    return False                             # of the worker
+        finally:
+            sweep.shutdown()
+        return True
+
+    def load_iteration_outputs(self, outputs):
+        '''Loads the outputs of an iteration calculated in a worker process. Returns
+           False if the calculation of the iteration has not been completed
+        '''
+        iteration = outputs.iteration
+        for time_entry, level, fb_key, text in outputs.log_entries:
+            self.log.add(level, text, fb_key)
+        self.unable_to_complete.update(outputs.unable_to_complete)
+        if not outputs.completed:
+            self.error = outputs.error
+            return False
+        for fb_key in outputs.results:
+            self.fb_list[fb_key].fb_parameters_list = outputs.parameters[fb_key]
+            self.fb_list[fb_key].fb_results_list = outputs.results[fb_key]
+            self.iterations_parameters[fb_key][iteration] = outputs.parameters[fb_key]
+            self.iterations_results[fb_key][iteration] = outputs.results[fb_key]
+        for ID in outputs.data_tables:
+            config.data_tables[ID] = outputs.data_tables[ID]
+            config.data_tables_iterations[ID][iteration] = outputs.data_tables[ID]
+            config.data_box_dict[ID] = config.data_tables_iterations[ID]
+        for port_key in outputs.input_signals:
+            self.iterations_input_signals.setdefault(port_key, {})
+            self.iterations_input_signals[port_key][iteration] = (
+                    outputs.input_signals[port_key])
+        for port_key in outputs.return_signals:
+            self.iterations_return_signals.setdefault(port_key, {})
+            self.iterations_return_signals[port_key][iteration] = (
+                    outputs.return_signals[port_key])
+        return True
+
+    def run_blocks(self):
+        '''Runs the functional blocks of the current iteration (or feedback segment) in
+           dataflow order
+        '''
+        for fb_key in self.fb_list:
+            #Reset all fb port "data ready" attributes to False (with exception of
+            #disabled and feedback ports)
+            for port in self.fb_list[fb_key].fb_ports_list:
+                if port[4] == 'Disabled' or port[3] == 'In-Feedback':
+                    port[6] = True
+                else:
+                    port[6] = False
+        self.scheduler.start()
+        while True:
+            fb_key = self.scheduler.next_ready()
+            if fb_key is None:
+                break
+            self.message('Running calculation for ' + self.fb_list[fb_key].fb_name
+                         + ' (ID:'+ str(fb_key)+ ')', 'trace', fb_key)
+            if not self.run_fb_script(fb_key):
+                return False
+            self.scheduler.block_complete(fb_key)
+        for fb_key in list(self.scheduler.blocked) + self.scheduler.unresolved_blocks():
+            self.unable_to_complete.add(fb_key)
+        return True
+
+    def run_fb_script(self, fb_key):
+        fb = self.fb_list[fb_key]
+        settings = self.design_settings
+        clear_port_data = (not self.save_port_data
+                           and self.iteration == self.iterations_list[-1])
+        profile = self.profiler.block(fb_key, fb.fb_name, str(fb.fb_script_module),
+                                      self.iteration)
+        step = 'loading input signals'
+        try:
+            time_window = settings['time_window']
+            num_samples = int(round(settings['num_samples']))
+            input_signals_data = engine.prepare_input_signals(fb, self.fb_signals[fb_key],
+                                        time_window, num_samples, clear_port_data)
+            if self.save_port_data:
+                for signal_list in input_signals_data:
+                    port_key = (fb_key, signal_list[0])
+                    self.iterations_input_signals.setdefault(port_key, {})
+                    self.iterations_input_signals[port_key][self.iteration] = signal_list
+            profile.mark('inputs')
+            profile.add_signals(input_signals_data)
+            step = 'loading python script module'
+            module = engine.load_script_module(str(fb.fb_script_module))
+            profile.mark('import')
+            step = 'calculating python script module'
+            start_time = time_data.time()
+            settings['fb_name'] = fb.fb_name
+            if self.streaming is not None:
+                settings['stream_state'] = self.streaming.state(fb_key)
+            settings['rng'] = self.random_streams.generator(fb_key, settings)
+            try:
+                signals_data, parameters, results = module.run(input_signals_data,
+                                                    fb.fb_parameters_list, settings)
+            finally:
+                settings.pop('fb_name')
+                settings.pop('stream_state', None)
+                settings.pop('rng')
+            profile.mark('run')
+            step = 'loading return signals'
+            if len(signals_data) > 0:
+                if not engine.load_output_signals(fb_key, signals_data, self.fb_list,
+                                    self.fb_signals, self.scheduler.downstream_ports,
+                                    clear_port_data):
+                    raise ValueError('Incorrect port ID specified. Attempted to allocate'
+                                     + ' output signal data to an input port or to a'
+                                     + ' disabled port.')
+                if self.save_port_data:
+                    for signal_list in signals_data:
+                        port_key = (fb_key, signal_list[0])
+                        self.iterations_return_signals.setdefault(port_key, {})
+                        self.iterations_return_signals[port_key][self.iteration] = (
+                                signal_list)
+        except:
+            self.error = ('Error/exception while ' + step + ' for FB: ' + str(fb.fb_name)
+                          + ' (ID:' + str(fb_key) + ')\n' + str(traceback.format_exc()))
+            self.log.add('error', self.error, fb_key)
+            config.stop_sim_flag = True
+            return False
+        profile.add_signals(signals_data)
+        profile.mark('outputs')
+        fb.fb_parameters_list = parameters
+        fb.fb_results_list = results
+        self.iterations_parameters[fb_key][self.iteration] = parameters
+        self.iterations_results[fb_key][self.iteration] = results
+        time_elapsed = time_data.time() - start_time
+        self.message('Time to complete script: ' + str(round(time_elapsed, 3)) + ' sec',
+                     'trace', fb_key)
+        return True
+
+    def write_results(self, output_path):
+        '''Writes the results, parameters and data tables of all iterations (and port
+           signals if save_port_data is True) to the output folder. Returns the list
+           of files written
+        '''
+        os.makedirs(output_path, exist_ok=True)
+        base_name = os.path.join(output_path, self.project_name)
+        files = []
+        file_name = base_name + '_results.csv'
+        with open(file_name, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Iteration', 'FB ID', 'FB name', 'Result', 'Value', 'Units'])
+            for fb_key in self.scheduler.order:
+                fb_name = self.fb_list[fb_key].fb_name
+                for iteration in self.iterations_results[fb_key]:
+                    for result in self.iterations_results[fb_key][iteration]:
+                        units = result[2] if len(result) > 2 else ''
+                        writer.writerow([iteration, fb_key, fb_name, result[0], result[1],
+                                         str(units).strip()])
+        files.append(file_name)
+        file_name = base_name + '_parameters.pkl'
+        with open(file_name, 'wb') as f:
+            pickle.dump(self.iterations_parameters, f)
+        files.append(file_name)
+        if self.data_sources:
+            file_name = base_name + '_data_tables.pkl'
+            with open(file_name, 'wb') as f:
+                pickle.dump(config.data_tables_iterations, f)
+            files.append(file_name)
+        if self.save_port_data:
+            file_name = base_name + '_port_data.pkl'
+            with open(file_name, 'wb') as f:
+                pickle.dump([self.iterations_input_signals,
+                             self.iterations_return_signals], f)
+            files.append(file_name)
+        file_name = base_name + '_event_log.csv'
+        self.log.write_csv(file_name)
+        files.append(file_name)
+        if self.profiler.enabled:
+            files += self.profiler.write_report(base_name)
+        return files
+
+'''Command line interface=================================================================
+'''
+def parse_setting(text):
+    '''Returns (key, value) for a project setting override (key=value)'''
+    key, value = text.split('=', 1)
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError): # String value
+        pass
+    return key.strip(), value
+
+qt_app = None
+
+def application_instance():
+    '''Returns the Qt application instance (created if required) - graph windows created
+       by scripts require an application instance (None if PyQt5 is not available)
+    '''
+    global qt_app
+    if qt_app is None:
+        try:
+            from PyQt5 import QtWidgets
+            qt_app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        except ImportError:
+            pass
+    return qt_app
+
+def reset_config():
+    '''Resets the global data of the config module (between projects)'''
+    config.stop_sim_flag = False
+    config.sim_pause_flag = False
+    config.data_box_dict = {}
+    config.data_tables = {}
+    config.data_tables_iterations = {}
+    config.dist_graph = {}
+    config.xy_graph_dict = {}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='systemlab_batch',
+                        description='Headless simulation of SystemLab project files')
+    parser.add_argument('projects', nargs='+', help='Project files (.slb)')
+    parser.add_argument('-o', '--output', default='batch_results',
+                        help='Output folder (default: batch_results)')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='Override a project setting (e.g. iterations=10)')
+    parser.add_argument('--save-port-data', action='store_true',
+                        help='Save input/return signals of all ports (all iterations)')
+    parser.add_argument('--stream', type=int, default=None, metavar='FRAME_SAMPLES',
+                        help='Streaming mode: calculate the time window in frames')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the functional block calculations (per phase)')
+    parser.add_argument('--iteration', type=int, action='append', default=None,
+                        metavar='N', help='Calculate only iteration N (repeatable)')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Print simulation status messages')
+    args = parser.parse_args(argv)
+    if args.stream is not None:
+        config_special.streaming_mode = True
+        config_special.streaming_frame_samples = args.stream
+
+    projects = [os.path.join(launch_path, p) for p in args.projects]
+    output_path = os.path.join(launch_path, args.output)
+    overrides = [parse_setting(s) for s in args.set]
+    engine.install_console_outputs(args.verbose)
+    application_instance()
+
+    failed = 0
+    for file_path in projects:
+        reset_config()
+        sim_time_start = time_data.time()
+        try:
+            sim = BatchSimulation(file_path, args.save_port_data, args.profile)
+            for key, value in overrides:
+                sim.set_design_setting(key, value)
+        except:
+            print('Error loading project: ' + file_path)
+            print(traceback.format_exc())
+            failed += 1
+            continue
+        print('Running ' + file_path)
+        completed = sim.run(args.iteration)
+        if not completed:
+            print(sim.error)
+            failed += 1
+        elif sim.unable_to_complete:
+            names = [sim.fb_list[k].fb_name for k in sorted(sim.unable_to_complete)]
+            print('NOTE: Calculations could not be completed for: ' + ', '.join(names))
+        if args.profile:
+            for text in sim.profiler.report_lines(10):
+                print(text)
+        for file_name in sim.write_results(output_path):
+            print('  ' + file_name)
+        time_to_complete = str(round((time_data.time() - sim_time_start)/60, 3))
+        print(('Completed' if completed else 'Stopped') + ' (simulation time (min): '
+              + time_to_complete + ')')
+    return 1 if failed > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1007 @@
+'''
+    SystemLab-Design Version 20.01
+    Copyright © 2019-2020 SystemLab Inc. All rights reserved.
+
+    NOTICE================================================================================
+    This file is part of SystemLab-Design 20.01.
+
+    SystemLab-Design 20.01 is free software: you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License,
+    or (at your option) any later version.
+
+    SystemLab-Design 20.01 is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with SystemLab-Design 20.01.  If not, see <https://www.gnu.org/licenses/>.
+    ======================================================================================
+
+    ABOUT THIS MODULE
+    Name: systemlab_engine
+    Simulation engine routines that do not depend on the GUI: loading of functional
+    block script modules, preparation of the input signals for a script (from the
+    signal objects of its ports), random number generators of the scripts, transfer of
+    the returned signals to the output ports and linked downstream ports, frame sequence
+    of the streaming mode, outputs cache of the incremental re-simulation, throttled GUI
+    updates and event log of a simulation, and dispatch of script calculations to a thread or process pool
+    (parallel execution of independent functional blocks) or of complete iterations to
+    worker processes (independent iterations)
+'''
+import os
+import sys
+import time
+import csv
+import copy
+import hashlib
+import importlib
+import importlib.machinery
+import threading
+import queue
+import concurrent.futures
+import collections.abc
+import multiprocessing
+import numpy as np
+
+import config
+config_special = importlib.import_module('syslab_config_files.config_special')
+import systemlab_signals as signls
+import systemlab_scheduler as scheduler
+
+'''Functional block script modules========================================================
+'''
+def script_search_paths(root_path, scripts_path_list, design_settings):
+    '''Returns the list of folders searched when importing a functional block script
+       (current working dir, default script folders, project script folders)
+    '''
+    paths = [str(os.getcwd())] # MV 20.01.r3 27-May-20 (current working directory)
+    for i in range(0, len(scripts_path_list)):
+        script_path = os.path.join(root_path, 'syslab_fb_scripts', str(scripts_path_list[i]))
+        paths.append(os.path.abspath(script_path))
+    paths.append(os.path.abspath(design_settings['file_path_1']))
+    paths.append(os.path.abspath(design_settings['file_path_2']))
+    return paths
+
+# Module search paths of the interpreter (standard library/site-packages) - these are
+# kept after the script folders when sys.path is reset
+base_sys_path = list(sys.path)
+search_paths_set = None # Script folders set with set_script_search_paths
+
+# Cache of the script modules that have been loaded: script file path -> (module,
+# file signature). A module is only reloaded when its file has been modified (scripts
+# edited during a session are still picked up)
+script_modules = {}
+script_files = {} # script name -> script file path (for the current search paths)
+# Functional block script library (scripts of the project folders are not part of it)
+library_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'syslab_fb_scripts')
+
+def set_script_search_paths(paths):
+    '''Sets sys.path to the script folders (called once per simulation run)'''
+    global search_paths_set
+    sys.path.clear()
+    sys.path.extend(paths)
+    for path in base_sys_path:
+        if path not in paths:
+            sys.path.append(path)
+    search_paths_set = list(paths)
+    script_files.clear()
+
+def file_signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def script_file(script_name):
+    '''Returns the file path of a functional block script (current search paths)'''
+    if script_name not in script_files:
+        spec = importlib.machinery.PathFinder.find_spec(script_name, sys.path)
+        if spec is None or spec.origin is None:
+            raise ImportError('No script module named ' + str(script_name))
+        script_files[script_name] = spec.origin
+    return script_files[script_name]
+
+def library_script(script_name):
+    '''Returns True if the script is found in the functional block script library'''
+    try:
+        file_path = os.path.normcase(os.path.abspath(script_file(script_name)))
+    except ImportError:
+        return False
+    return file_path.startswith(os.path.normcase(library_path) + os.sep)
+
+def load_script_module(script_name):
+    '''Returns the module for a functional block script. The module is imported (or
+       reloaded) only if it has not been loaded from this file before or if the
+       file has been modified since it was last loaded
+    '''
+    file_path = script_file(script_name)
+    signature = file_signature(file_path)
+    if file_path in script_modules:
+        module, module_signature = script_modules[file_path]
+        if module_signature == signature and sys.modules.get(script_name) is module:
+            return module
+    module = sys.modules.get(script_name)
+    if module is not None and getattr(module, '__file__', None) == file_path:
+        importlib.reload(module)
+    else: # Not imported yet (or imported from another script folder)
+        sys.modules.pop(script_name, None)
+        module = importlib.import_module(script_name)
+    script_modules[file_path] = (module, signature)
+    return module
+
+'''Input/output signals===================================================================
+'''
+def create_port_signal(portID, signal_type, fs):
+    '''Returns a new (empty) signal object for a port, based on its signal type'''
+    if signal_type == 'Electrical':
+        return signls.SignalAnalogElectrical(portID, signal_type, 0, fs, np.array([]),
+                                             np.array([]), np.array([]))
+    elif signal_type == 'Optical':
+        port_sig = signls.SignalAnalogOpticalCollection(portID, signal_type, fs,
+                                                        np.array([]), np.array([]))
+        #MV - Update (20.01.r1 8-Sep-19)
+        port_sig.set_channels([[1, 193.1, np.full([1, 2], 0+1j*0, dtype=complex),
+                                np.array([]), np.array([])]])
+        return port_sig
+    elif signal_type == 'Digital':
+        return signls.SignalDigital(portID, signal_type, 10e9, 10e9, 1, np.array([]),
+                                    np.array([]))
+    elif signal_type == 'Analog (1)': #Analog generic (1)
+        return signls.SignalAnalogGeneric(portID, signal_type, fs, np.array([]),
+                                          np.array([]))
+    elif signal_type == 'Analog (2)': #Analog generic (2)
+        return signls.SignalAnalogGeneric2(portID, signal_type, fs, np.array([]),
+                                           np.array([]))
+    else: #Analog generic (3)
+        return signls.SignalAnalogGeneric3(portID, signal_type, fs, np.array([]),
+                                           np.array([]))
+
+def prepare_input_signals(fb, port_signals, time_window, num_samples, clear_port_data):
+    '''Builds the input_signals_data list passed to module.run from the signal objects
+       of the IN (and In-Feedback) ports that have data available. When clear_port_data
+       is True the data arrays held by the port signal objects are released.
+    '''
+    num_sym = 100
+    input_signals_data = []
+    for port in fb.fb_ports_list:
+        portID = port[0]
+        direction = port[3]
+        signal_type = port[4]
+        connected = port[5]
+        data_ready = port[6]
+        if not ((direction == 'In' or direction == 'In-Feedback')
+                and (connected == True) and (data_ready == True)):
+            continue
+        port_sig = port_signals[portID]
+        #Electrical signal
+        if signal_type == 'Electrical':
+            if port_sig.time_array.size != 0:
+                t = port_sig.time_array
+                a = port_sig.amplitude_array
+                noise = port_sig.noise_array
+            else:
+                t = np.linspace(0, time_window, num_samples)
+                a = np.zeros(num_samples)
+                noise = np.zeros(num_samples)
+            carrier = port_sig.carrier
+            fs = port_sig.sample_rate
+            signal_list = [portID, signal_type, carrier, fs, t, a, noise, carrier]
+            input_signals_data.append(signal_list)
+            if clear_port_data:
+                port_sig.time_array = np.array([])
+                port_sig.amplitude_array  = np.array([])
+                port_sig.noise_array = np.array([])
+        #Optical signal
+        elif signal_type == 'Optical':
+            signals_optical = []
+            if port_sig.time_array.size != 0:
+                t = port_sig.time_array
+                noise_freq = port_sig.psd_array #MV 20.01.r1 26 Sep 2019
+                # Channel arrays are views of the port channel blocks
+                for channel in port_sig.channels_list():
+                    signals_optical.append(channel + [noise_freq])
+            else:
+                t = np.linspace(0, time_window, num_samples)
+                a = np.zeros(num_samples)
+                noise_time = np.zeros(num_samples)
+                noise_freq = np.array([np.zeros(20), np.zeros(20)])
+                signal_optical = [port_sig.wave_keys[0], port_sig.wave_channels[0],
+                                  port_sig.jones_vectors[0], a, noise_time]
+                signals_optical.append(signal_optical)
+            fs  = port_sig.sample_rate
+            signal_list = [portID, signal_type, fs, t, noise_freq, signals_optical]
+            input_signals_data.append(signal_list)
+            if clear_port_data:
+                port_sig.time_array = np.array([])
+                port_sig.psd_array = np.array([])
+                port_sig.clear_channel_data()
+        #Digital signal
+        elif signal_type == 'Digital':
+            if port_sig.time_array.size != 0:
+                t = port_sig.time_array
+                a = port_sig.discrete_array
+            else:
+                t = np.linspace(0, time_window, num_samples)
+                a = np.zeros(num_sym)
+            signal_list = [portID, signal_type, port_sig.symbol_rate, port_sig.bit_rate,
+                           port_sig.order, t, a]
+            input_signals_data.append(signal_list)
+            if clear_port_data:
+                port_sig.time_array = np.array([])
+                port_sig.discrete_array  = np.array([])
+        #Analog signal
+        elif (signal_type == 'Analog (1)' or signal_type == 'Analog (2)'
+              or signal_type == 'Analog (3)'):
+            if port_sig.time_array.size != 0:
+                t = port_sig.time_array
+                a = port_sig.amplitude_array
+            else:
+                t = np.linspace(0, time_window, num_samples)
+                a = np.zeros(num_samples)
+            signal_list = [portID, signal_type, port_sig.sample_rate, t, a]
+            input_signals_data.append(signal_list)
+            if clear_port_data:
+                port_sig.time_array = np.array([])
+                port_sig.amplitude_array  = np.array([])
+    return input_signals_data
+
+def shared_signal_list(signal_list):
+    '''Returns a copy of a signal list (format returned by module.run) with its
+       arrays replaced by read-only views (see signls.read_only)
+    '''
+    shared_list = [signls.read_only(item) for item in signal_list]
+    if signal_list[1] == 'Optical': # Optical channels [key, freq, jones, signal, noise]
+        shared_list[5] = [[signls.read_only(item) for item in channel]
+                          for channel in signal_list[5]]
+    return shared_list
+
+def load_output_signals(fb_key, signals_data, fb_list, fb_signals, downstream_ports,
+                        clear_port_data):
+    '''Transfers the signals returned by module.run to the signal objects of the
+       output ports and (if linked) to the downstream ports, which are then set
+       to "data ready". fb_signals holds the port signal objects of all functional
+       blocks ({fb_key: {portID: signal}}) and downstream_ports is the link map of the
+       dataflow scheduler. The signal arrays are shared by both ports (no copies are
+       made). Returns False if a signal was allocated to an IN port or to
+       a disabled port.
+    '''
+    port_signals = fb_signals[fb_key]
+    for i in range(0, len(signals_data)):
+        signal_list = signals_data[i]
+        if config_special.shared_signal_buffers == True:
+            signal_list = shared_signal_list(signal_list)
+        portID = signal_list[0]
+        port_sig = port_signals[portID]
+        port = scheduler.port_entry(fb_list[fb_key], portID)
+        if (port[3] == 'In' or port[3] == 'In-Feedback' or port[4] == 'Disabled'):
+            # MV 20.01.r1 - Added condition for 'Disabled'
+            return False
+
+        d_port_sig = None
+        if (fb_key, portID) in downstream_ports:
+            d_port_fb_key, d_port_ID = downstream_ports[(fb_key, portID)]
+            d_port_sig = fb_signals[d_port_fb_key][d_port_ID]
+
+        #Electrical signal (IF)===========================================
+        if signal_list[1] == 'Electrical':
+            for sig in [port_sig, d_port_sig]:
+                if sig is not None:
+                    sig.carrier = signal_list[2]
+                    sig.sample_rate = signal_list[3]
+                    sig.time_array = signal_list[4]
+                    sig.amplitude_array = signal_list[5]
+                    sig.noise_array = signal_list[6]
+            if clear_port_data:
+                port_sig.time_array = np.array([])
+                port_sig.amplitude_array  = np.array([])
+                port_sig.noise_array = np.array([])
+
+        #Optical signal (IF)==================================================
+        if signal_list[1] == 'Optical':
+            sig = signal_list[5] #MV 20.01.r1 - previously [i][4]
+            # Channel arrays are loaded into contiguous channel blocks (replacing the
+            # previous channel group), which are shared by the downstream port
+            port_sig.set_channels(sig, config_special.shared_signal_buffers)
+            for opt_sig in [port_sig, d_port_sig]:
+                if opt_sig is not None:
+                    opt_sig.sample_rate = signal_list[2]
+                    opt_sig.time_array = signal_list[3]
+                    opt_sig.psd_array = signal_list[4] #MV 20.01.r1 26-Sep-19
+            if d_port_sig is not None:
+                d_port_sig.share_channels(port_sig)
+            if clear_port_data:
+                port_sig.time_array = np.array([])
+                port_sig.psd_array = np.array([]) #MV - Update (20.01.r1 26-Sep-19)
+                port_sig.clear_channel_data()
+
+        #Digital signal (IF)==================================================
+        if signal_list[1] == 'Digital':
+            for sig in [port_sig, d_port_sig]:
+                if sig is not None:
+                    sig.symbol_rate = signal_list[2]
+                    sig.bit_rate = signal_list[3]
+                    sig.order = signal_list[4]
+                    sig.time_array = signal_list[5]
+                    sig.discrete_array = signal_list[6]
+            if clear_port_data:
+                port_sig.time_array = np.array([])
+                port_sig.discrete_array  = np.array([])
+
+        #Analog signal (IF)===================================================
+        if (signal_list[1] == 'Analog (1)' or signal_list[1] == 'Analog (2)'
+            or signal_list[1] == 'Analog (3)'):
+            for sig in [port_sig, d_port_sig]:
+                if sig is not None:
+                    sig.sample_rate = signal_list[2]
+                    sig.time_array = signal_list[3]
+                    sig.amplitude_array = signal_list[4]
+            if clear_port_data:
+                port_sig.time_array = np.array([])
+                port_sig.amplitude_array  = np.array([])
+
+        # Downstream port now has data available
+        if d_port_sig is not None:
+            d_port = scheduler.port_entry(fb_list[d_port_fb_key], d_port_ID)
+            d_port[6] = True
+    return True
+
+'''Streaming mode (block-wise simulation)=================================================
+The time window of the project is calculated as a sequence of frames of
+config_special.streaming_frame_samples samples. For each frame the design settings
+num_samples/time_window are set to the frame size, so the port signals (and the arrays
+allocated by the fb scripts) never exceed the frame size. Stream-aware scripts read the
+frame position from the settings and keep the data that must be carried over to the
+next frame (generator phase, overlap-save tail of FFT-based blocks) in
+settings['stream_state'] (a dict specific to each functional block).
+'''
+class StreamingFrames():
+    '''Frame sequence for the time window of design_settings (frame_samples per frame,
+       the last frame holds the remaining samples)
+    '''
+    def __init__(self, design_settings, frame_samples, overlap_samples):
+        self.settings = design_settings
+        self.saved_settings = {'num_samples': design_settings['num_samples'],
+                               'time_window': design_settings['time_window']}
+        self.total_samples = int(round(design_settings['num_samples']))
+        self.frame_samples = max(1, int(frame_samples))
+        self.overlap_samples = max(0, int(overlap_samples))
+        self.frames = max(1, int(np.ceil(self.total_samples/self.frame_samples)))
+        self.block_state = {} # fb_key -> stream state dict
+
+    def reset(self):
+        '''Clears the stream state of all blocks (called at the start of each iteration)'''
+        self.block_state = {}
+
+    def set_frame(self, frame):
+        '''Sets the design settings for frame (1...frames)'''
+        fs = self.settings['sampling_rate']
+        start = (frame - 1)*self.frame_samples
+        n = min(self.frame_samples, self.total_samples - start)
+        self.settings['num_samples'] = n
+        self.settings['time_window'] = n/fs
+        self.settings['stream_frame'] = frame
+        self.settings['stream_frames'] = self.frames
+        self.settings['stream_start_sample'] = start
+        self.settings['stream_start_time'] = start/fs
+        self.settings['stream_overlap'] = self.overlap_samples
+
+    def state(self, fb_key):
+        if fb_key not in self.block_state:
+            self.block_state[fb_key] = {}
+        return self.block_state[fb_key]
+
+    def restore(self):
+        '''Restores the design settings of the project (full time window)'''
+        self.settings.update(self.saved_settings)
+        for key in ['stream_frame', 'stream_frames', 'stream_start_sample',
+                    'stream_start_time', 'stream_overlap']:
+            self.settings.pop(key, None)
+
+'''Random number generators===============================================================
+Each functional block calculation receives its own random number generator
+(settings['rng'], numpy.random.Generator). The generators are derived from the master
+seed of the project (setting 'random_seed') with the spawn tree of numpy SeedSequence:
+the generator of a block calculation is the child (iteration, fb_key) of the master
+seed, extended by the feedback segment and stream frame. The generator is independent of
+the order of the calculations, so serial, parallel and worker process runs produce the
+same outputs, and a single iteration can be re-calculated in isolation. Scripts obtain
+the generator with systemlab_utilities.block_rng(settings).
+'''
+def project_seed(settings):
+    '''Returns the master seed of a project (None if a new seed is used for each run)'''
+    seed = settings.get('random_seed')
+    if seed is None or str(seed).strip() == '':
+        return None
+    return int(seed)
+
+class RandomStreams():
+    '''Random number generators of the functional block calculations of a simulation
+       run (seed: master seed, a new seed is created if None)
+    '''
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self.seed = int(seed)
+
+    def spawn_key(self, fb_key, settings):
+        spawn_key = [int(settings['current_iteration']), int(fb_key)]
+        if int(settings.get('feedback_enabled', 0)) == 2:
+            spawn_key.append(int(settings['feedback_current_segment']))
+        if 'stream_frame' in settings: # Streaming mode
+            spawn_key.append(int(settings['stream_frame']))
+        return tuple(spawn_key)
+
+    def generator(self, fb_key, settings):
+        '''Returns the generator for the calculation of a block (current iteration,
+           feedback segment and stream frame of settings)
+        '''
+        seed_sequence = np.random.SeedSequence(self.seed,
+                                               spawn_key=self.spawn_key(fb_key, settings))
+        return np.random.Generator(np.random.PCG64(seed_sequence))
+
+'''Incremental re-simulation===============================================================
+The outputs of each block calculation (per iteration) are kept together with a key (hash)
+of everything the calculation depends on: script file, parameters, ports, project
+settings, master seed of the run, iteration, signal links to the input ports and the keys of the upstream
+blocks. On the next run, a block with an unchanged key is not calculated (the outputs
+of the previous run are loaded into its ports), so only the blocks downstream of a
+change are re-calculated.
+'''
+# Settings keys that are not part of a block key
+transient_settings = ['fb_name', 'stream_state', 'rng', 'current_iteration',
+                      'feedback_current_segment']
+
+def script_fingerprint(script_name):
+    '''Returns the file path and file signature of a script module'''
+    load_script_module(script_name)
+    file_path = script_files[script_name]
+    return (file_path, script_modules[file_path][1])
+
+def data_tables_snapshot():
+    '''Copy of the data panel tables (config.data_tables) - used to determine the
+       tables updated by a script
+    '''
+    snapshot = {}
+    for ID in config.data_tables:
+        table = config.data_tables[ID]
+        snapshot[ID] = list(table) if isinstance(table, list) else table
+    return snapshot
+
+def data_tables_changes(snapshot, data_tables=None):
+    '''Returns the data panel tables (default: config.data_tables) that have been updated
+       since the snapshot
+    '''
+    if data_tables is None:
+        data_tables = config.data_tables
+    changes = {}
+    for ID in data_tables:
+        table = data_tables[ID]
+        try:
+            unchanged = ID in snapshot and bool(snapshot[ID] == table)
+        except ValueError: # Tables holding arrays
+            unchanged = False
+        if not unchanged:
+            changes[ID] = table
+    return changes
+
+class ResultCache():
+    '''Outputs of the previous simulation run of a project, per block and iteration'''
+    def __init__(self):
+        self.entries = {} # (fb_key, iteration) -> (key, signals, parameters, results, tables)
+        self.keys = {} # (fb_key, iteration) -> key (current run)
+        self.inputs = {} # fb_key -> links to input ports [(start_key, start_port, end_port)]
+        self.seed = None # Master seed of the current run (RandomStreams.seed)
+
+    def start_run(self, downstream_ports, seed):
+        '''Called at the start of a run (downstream_ports: link map of the scheduler,
+           seed: master seed of the run)
+        '''
+        self.keys = {}
+        self.seed = seed
+        self.inputs = {}
+        for start, end in downstream_ports.items():
+            self.inputs.setdefault(end[0], []).append((start[0], start[1], end[1]))
+        for fb_key in self.inputs:
+            self.inputs[fb_key].sort(key=repr)
+
+    def block_key(self, fb_key, iteration, fb, settings):
+        '''Calculates (and records for the current run) the key of a block calculation.
+           fb is the FunctionalBlock data model
+        '''
+        settings_items = sorted((k, repr(settings[k])) for k in settings
+                                if k not in transient_settings)
+        ports = [port[:6] for port in fb.fb_ports_list] # Without "data ready" flag
+        upstream = [(link, self.keys.get((link[0], iteration)))
+                    for link in self.inputs.get(fb_key, [])]
+        text = repr((script_fingerprint(str(fb.fb_script_module)), fb.fb_parameters_list,
+                     ports, settings_items, self.seed, iteration, upstream))
+        key = hashlib.sha1(text.encode()).hexdigest()
+        self.keys[(fb_key, iteration)] = key
+        return key
+
+    def lookup(self, fb_key, iteration):
+        '''Returns (signals_data, parameters, results, data_tables) of the previous run
+           if the key of the block is unchanged (None otherwise)
+        '''
+        entry = self.entries.get((fb_key, iteration))
+        if entry is not None and entry[0] == self.keys.get((fb_key, iteration)):
+            return entry[1:]
+        return None
+
+    def store(self, fb_key, iteration, signals_data, parameters, results, data_tables):
+        key = self.keys.get((fb_key, iteration))
+        if key is None:
+            return
+        if config_special.shared_signal_buffers == True:
+            signals_data = [shared_signal_list(signal_list) for signal_list in signals_data]
+        else: # Signal arrays may be modified by downstream scripts
+            signals_data = copy.deepcopy(signals_data)
+        self.entries[(fb_key, iteration)] = (key, signals_data, parameters, results,
+                                             data_tables)
+
+    def finish_run(self):
+        '''Removes the entries of blocks/iterations that were not part of the run'''
+        for entry_key in list(self.entries):
+            if entry_key not in self.keys:
+                del self.entries[entry_key]
+
+'''GUI updates during a simulation========================================================
+Event processing (config.app.processEvents) and the updates of the status widgets are
+throttled while a simulation is running: calls to config.app.processEvents (from the
+engine and from the scripts) are forwarded at most gui_update_rate times per second, and
+the updates of config.status, config.sim_status_win and config.sim_data_view (text
+appends, colors, progress bar) are buffered and applied in one batch before the events
+are processed (consecutive text appends are combined into a single append). The buffered
+calls are only applied on the main thread (calls recorded from worker threads are applied
+at the next flush on the main thread).
+'''
+# Widget methods that are buffered (all other attributes are read directly, after the
+# buffered calls have been applied)
+buffered_methods = ['append', 'text_update', 'setText', 'setTextColor', 'setCurrentFont',
+                    'setFontWeight', 'setValue', 'update_progress_bar']
+
+class BufferedWidget():
+    '''Wrapper for a status widget - calls to buffered methods are recorded by the
+       GuiThrottle and applied when the throttle is flushed
+    '''
+    def __init__(self, target, throttle):
+        self._target = target
+        self._throttle = throttle
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in buffered_methods:
+            return lambda *args, **kwargs: self._throttle.record(
+                                                (self._target, name, args, kwargs))
+        if not callable(attr) and hasattr(attr, 'metaObject'): # Qt child widget
+            return BufferedWidget(attr, self._throttle)
+        if threading.current_thread() is threading.main_thread():
+            self._throttle.flush() # Attribute is read in its current state
+        return attr
+
+class ThrottledApp():
+    '''Wrapper for config.app (processEvents is forwarded by the GuiThrottle)'''
+    def __init__(self, app, throttle):
+        self._app = app
+        self._throttle = throttle
+
+    def processEvents(self, *args):
+        self._throttle.pump()
+
+    def __getattr__(self, name):
+        return getattr(self._app, name)
+
+class GuiThrottle():
+    def __init__(self, max_rate=20):
+        self.interval = 1/max_rate if max_rate else 0
+        self.calls = [] # (widget, method name, args, kwargs)
+        self.calls_lock = threading.Lock()
+        self.last_pump = 0
+        self.gui_objects = None
+
+    def install(self):
+        '''Wraps the config GUI objects (called at the start of the simulation)'''
+        if self.gui_objects is None:
+            self.gui_objects = [config.app, config.status, config.sim_status_win,
+                                config.sim_data_view]
+            config.app = ThrottledApp(config.app, self)
+            config.status = BufferedWidget(config.status, self)
+            if config.sim_status_win is not None:
+                config.sim_status_win = BufferedWidget(config.sim_status_win, self)
+            if config.sim_data_view is not None:
+                config.sim_data_view = BufferedWidget(config.sim_data_view, self)
+
+    def restore(self):
+        '''Applies the buffered calls and restores the config GUI objects'''
+        if self.gui_objects is not None:
+            self.flush()
+            config.app, config.status, config.sim_status_win, config.sim_data_view = (
+                    self.gui_objects)
+            self.gui_objects = None
+            config.app.processEvents()
+
+    def record(self, call):
+        with self.calls_lock:
+            self.calls.append(call)
+
+    def flush(self):
+        '''Applies the buffered widget calls (in order). Main thread only'''
+        with self.calls_lock:
+            calls = self.calls
+            self.calls = []
+        i = 0
+        while i < len(calls):
+            target, name, args, kwargs = calls[i]
+            if name in ['append', 'text_update'] and len(args) == 1 and not kwargs:
+                # Consecutive plain text appends to the same widget -> single append
+                lines = [str(args[0])]
+                while (i + 1 < len(calls) and calls[i+1][0] is target
+                       and calls[i+1][1] == name and len(calls[i+1][2]) == 1
+                       and not calls[i+1][3]):
+                    lines.append(str(calls[i+1][2][0]))
+                    i += 1
+                if len(lines) > 1 and not any('<' in line for line in lines):
+                    args = ('\n'.join(lines),)
+                else:
+                    for line in lines[:-1]:
+                        getattr(target, name)(line)
+                    args = (lines[-1],)
+            getattr(target, name)(*args, **kwargs)
+            i += 1
+
+    def pump(self, force=False):
+        '''Applies the buffered calls and processes the pending GUI events, at most once
+           per update interval (unless force is True, main thread only). Returns True if
+           the events have been processed
+        '''
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        now = time.perf_counter()
+        if not force and now - self.last_pump < self.interval:
+            return False
+        self.last_pump = now
+        self.flush()
+        if self.gui_objects is not None:
+            self.gui_objects[0].processEvents()
+        else:
+            config.app.processEvents()
+        return True
+
+class SimulationLog():
+    '''Event log of a simulation. Entries: (time since start (s), level, fb_key, message),
+       levels: 'info', 'warning', 'error', 'trace' (per-block tracing)
+    '''
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.entries = []
+
+    def add(self, level, message, fb_key=None):
+        self.entries.append((time.perf_counter() - self.start_time, level, fb_key,
+                             message))
+
+    def write_csv(self, file_path):
+        with open(file_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Time (s)', 'Level', 'FB ID', 'Message'])
+            for entry in self.entries:
+                writer.writerow([format(entry[0], '0.6f'), entry[1], entry[2], entry[3]])
+
+'''Parallel execution of functional blocks================================================
+Ready blocks are dispatched to a concurrent.futures pool. Only the scripts of the script
+library are dispatched: scripts of the project folders (which may open windows) and the
+library scripts listed in config_special.parallel_main_thread_scripts (scripts that open
+graph windows) are always calculated on the main thread.
+'''
+class GuiRelay():
+    '''Wrapper for the GUI objects shared with the scripts through the config module
+       (config.app, config.status, config.sim_status_win, config.sim_data_view). Calls
+       made from the main thread are forwarded to the wrapped object. Calls made from
+       worker threads are queued and replayed on the main thread with replay().
+    '''
+    def __init__(self, target, calls):
+        self._target = target
+        self._calls = calls
+
+    def __getattr__(self, name):
+        if threading.current_thread() is threading.main_thread():
+            return getattr(self._target, name)
+        if name == 'processEvents':
+            return lambda *args: None
+        # The attribute is inspected on the wrapped Qt object (reading attributes of a
+        # BufferedWidget/ThrottledApp is not thread-safe), calls are replayed through
+        # the wrapper on the main thread
+        attr = getattr(unwrapped(self._target), name)
+        if callable(attr):
+            return lambda *args, **kwargs: self._calls.put(
+                                                (self._target, name, args, kwargs))
+        if hasattr(attr, 'metaObject'): # Qt child widget (e.g. textEdit)
+            return GuiRelay(getattr(self._target, name), self._calls)
+        return attr
+
+def unwrapped(gui_object):
+    # GUI object wrapped by GuiRelay/BufferedWidget/ThrottledApp -> Qt object
+    while isinstance(gui_object, (GuiRelay, BufferedWidget, ThrottledApp)):
+        if isinstance(gui_object, ThrottledApp):
+            gui_object = gui_object._app
+        else:
+            gui_object = gui_object._target
+    return gui_object
+
+def replay(calls):
+    while True:
+        try:
+            target, name, args, kwargs = calls.get_nowait()
+        except queue.Empty:
+            break
+        getattr(target, name)(*args, **kwargs)
+
+class ConsoleStatus():
+    '''Stand-in for config.status/config.sim_status_win when no GUI is available
+       (worker processes, batch simulations)
+    '''
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.textEdit = self
+        self.dataEdit = self
+
+    def setText(self, text):
+        if self.verbose:
+            print(text)
+
+    def append(self, text):
+        if self.verbose:
+            print(text)
+
+    def __getattr__(self, name): # Any other widget method (setTextColor, etc.)
+        return lambda *args, **kwargs: None
+
+class ConsoleApp():
+    def processEvents(self):
+        pass
+
+def install_console_outputs(verbose=False):
+    '''Replaces the GUI objects of the config module with console stand-ins'''
+    config.app = ConsoleApp()
+    config.status = ConsoleStatus(verbose)
+    config.sim_status_win = ConsoleStatus(verbose)
+    config.sim_data_view = ConsoleStatus(verbose)
+    config.sim_status_win_enabled = False
+    config.sim_data_activate = False
+
+def init_process_worker(config_values):
+    '''Initializer of the process pool workers (spawned workers import the default
+       config_special values)
+    '''
+    for key in config_values:
+        setattr(config_special, key, config_values[key])
+    install_console_outputs()
+
+def run_script_in_process(script_name, search_paths, input_signals_data,
+                          parameters_input, settings):
+    '''Entry point for process pool workers. Returns the script outputs together with
+       the data panel tables updated by the script (config.data_tables) and the stream
+       state of the block (streaming mode)
+    '''
+    if not isinstance(config.app, ConsoleApp):
+        install_console_outputs()
+    if search_paths_set != search_paths:
+        set_script_search_paths(search_paths)
+    module = importlib.import_module(script_name)
+    config.data_tables = {}
+    signals_data, parameters, results = module.run(input_signals_data,
+                                                   parameters_input, settings)
+    # Stream state is returned to the main process (streaming mode)
+    return (signals_data, parameters, results, config.data_tables,
+            settings.get('stream_state'))
+
+class ThreadDataTables(collections.abc.MutableMapping):
+    '''Data panel tables (config.data_tables) in the thread mode of the BlockExecutor.
+       Scripts calculated on worker threads read and update their own copy of the
+       tables (the updated tables are returned with the script outputs and merged on
+       the main thread), the main thread uses the shared tables.
+    '''
+    def __init__(self, shared):
+        self.shared = shared
+        self.local = threading.local()
+
+    def tables(self):
+        return getattr(self.local, 'tables', self.shared)
+
+    def __getitem__(self, ID):
+        return self.tables()[ID]
+
+    def __setitem__(self, ID, table):
+        self.tables()[ID] = table
+
+    def __delitem__(self, ID):
+        del self.tables()[ID]
+
+    def __iter__(self):
+        return iter(self.tables())
+
+    def __len__(self):
+        return len(self.tables())
+
+class BlockExecutor():
+    '''Pool used to calculate independent functional blocks concurrently.
+       mode: 'thread' (ThreadPoolExecutor) or 'process' (ProcessPoolExecutor)
+    '''
+    def __init__(self, mode='thread', workers=None):
+        self.mode = mode
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if mode == 'process':
+            # Spawned (not forked) workers do not inherit the GUI state and threads of
+            # the main process
+            self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=init_process_worker,
+                                        initargs=(config_special_values(),))
+        else:
+            self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.calls = queue.Queue()
+        self.gui_objects = None
+        self.data_tables = None
+
+    def main_thread_script(self, script_name):
+        '''Returns True if the script must be calculated on the main thread (scripts of
+           the project folders and scripts listed in parallel_main_thread_scripts)
+        '''
+        return (script_name in config_special.parallel_main_thread_scripts
+                or not library_script(script_name))
+
+    def submit(self, script_name, search_paths, input_signals_data, parameters_input,
+               settings):
+        if self.mode == 'process':
+            return self.pool.submit(run_script_in_process, script_name, search_paths,
+                                    input_signals_data, parameters_input, settings)
+        module = load_script_module(script_name) # Import on main thread
+        snapshot = data_tables_snapshot() # Data panel tables of the script
+        return self.pool.submit(self.run_script_in_thread, module, input_signals_data,
+                                parameters_input, settings, snapshot)
+
+    def run_script_in_thread(self, module, input_signals_data, parameters_input, settings,
+                             snapshot):
+        '''Runs the script with its own copy of the data panel tables. Returns the
+           script outputs together with the tables updated by the script
+        '''
+        tables = dict((ID, list(table) if isinstance(table, list) else table)
+                      for ID, table in snapshot.items())
+        self.data_tables.local.tables = tables
+        try:
+            signals_data, parameters, results = module.run(input_signals_data,
+                                                           parameters_input, settings)
+        finally:
+            del self.data_tables.local.tables
+        return (signals_data, parameters, results, data_tables_changes(snapshot, tables),
+                None)
+
+    def relay_gui_calls(self):
+        '''Wraps the config GUI objects and the data panel tables (thread mode) - called
+           before dispatching blocks
+        '''
+        if self.mode == 'thread' and self.gui_objects is None:
+            self.data_tables = ThreadDataTables(config.data_tables)
+            config.data_tables = self.data_tables
+            self.gui_objects = [config.app, config.status, config.sim_status_win,
+                                config.sim_data_view]
+            config.app = GuiRelay(config.app, self.calls)
+            config.status = GuiRelay(config.status, self.calls)
+            if config.sim_status_win is not None:
+                config.sim_status_win = GuiRelay(config.sim_status_win, self.calls)
+            if config.sim_data_view is not None:
+                config.sim_data_view = GuiRelay(config.sim_data_view, self.calls)
+
+    def restore_gui_calls(self):
+        replay(self.calls)
+        if self.gui_objects is not None:
+            config.app, config.status, config.sim_status_win, config.sim_data_view = (
+                    self.gui_objects)
+            self.gui_objects = None
+            config.data_tables = self.data_tables.shared
+
+    def wait(self, futures, timeout=0.05):
+        '''Waits for at least one of the futures to complete (replays queued GUI calls
+           while waiting). Returns the set of completed futures
+        '''
+        done, not_done = concurrent.futures.wait(futures, timeout=timeout,
+                                    return_when=concurrent.futures.FIRST_COMPLETED)
+        replay(self.calls)
+        return done
+
+    def shutdown(self):
+        self.restore_gui_calls()
+        self.pool.shutdown(wait=True)
+
+'''Independent iterations=================================================================
+Iterations that do not depend on each other (project setting "Independent iterations")
+are calculated concurrently in worker processes. Each worker calculates the complete
+block graph of one iteration with the headless simulation of systemlab_batch.
+'''
+def config_special_values():
+    '''Current config_special settings (worker processes import the default values)'''
+    values = {}
+    for key, value in vars(config_special).items():
+        if not key.startswith('_') and isinstance(value, (bool, int, float, str, list,
+                                                          tuple, dict, type(None))):
+            values[key] = value
+    return values
+
+class IterationOutputs():
+    '''Outputs of an iteration calculated in a worker process (sim: BatchSimulation)'''
+    def __init__(self, sim, iteration, completed):
+        self.iteration = iteration
+        self.completed = completed
+        self.error = sim.error
+        self.parameters = {} # fb_key -> parameters
+        self.results = {} # fb_key -> results
+        for fb_key in sim.iterations_results:
+            if iteration in sim.iterations_results[fb_key]:
+                self.parameters[fb_key] = sim.iterations_parameters[fb_key][iteration]
+                self.results[fb_key] = sim.iterations_results[fb_key][iteration]
+        self.data_tables = {} # Data source ID -> data panel table
+        for ID in sim.data_sources:
+            if iteration in config.data_tables_iterations.get(ID, {}):
+                self.data_tables[ID] = config.data_tables_iterations[ID][iteration]
+        self.input_signals = {} # (fb_key, portID) -> signal list (save port data)
+        for port_key in sim.iterations_input_signals:
+            if iteration in sim.iterations_input_signals[port_key]:
+                self.input_signals[port_key] = sim.iterations_input_signals[port_key][iteration]
+        self.return_signals = {}
+        for port_key in sim.iterations_return_signals:
+            if iteration in sim.iterations_return_signals[port_key]:
+                self.return_signals[port_key] = sim.iterations_return_signals[port_key][iteration]
+        self.unable_to_complete = set(sim.unable_to_complete)
+        self.log_entries = list(sim.log.entries)
+
+def run_iteration_in_process(file_path, project, iteration, save_port_data,
+                             config_values):
+    '''Entry point for the worker processes of the independent iterations mode.
+       project: (design_settings, fb_list, signal_links_list, data_sources)
+    '''
+    import systemlab_batch as batch # Headless environment (graphs are rendered offscreen)
+    for key in config_values:
+        setattr(config_special, key, config_values[key])
+    batch.reset_config()
+    install_console_outputs()
+    batch.application_instance()
+    sim = batch.BatchSimulation(file_path, save_port_data, project=project)
+    completed = sim.run([iteration])
+    return IterationOutputs(sim, iteration, completed)
+
+class IterationSweep():
+    '''Worker processes calculating the iterations of a project concurrently (the
+       iterations are submitted in order)
+    '''
+    def __init__(self, file_path, project, iterations, save_port_data=False, workers=None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(iterations)))
+        # Spawned (not forked) workers do not inherit the GUI state of the main process
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        config_values = config_special_values()
+        # Copy of the project (the arguments are pickled when the workers start)
+        project = copy.deepcopy(project)
+        self.futures = {} # iteration -> future
+        for iteration in iterations:
+            self.futures[iteration] = self.pool.submit(run_iteration_in_process, file_path,
+                                        project, iteration, save_port_data, config_values)
+
+    def done(self, iteration):
+        return self.futures[iteration].done()
+
+    def result(self, iteration):
+        '''Returns the IterationOutputs of an iteration (waits for the worker)'''
+        return self.futures[iteration].result()
+
+    def shutdown(self):
+        '''Cancels the iterations that have not been started (iterations that are being
+           calculated are completed by the workers and discarded)
+        '''
+        for future in self.futures.values():
+            future.cancel()
+        self.pool.shutdown(wait=False)
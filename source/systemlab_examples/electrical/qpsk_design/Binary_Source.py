@@ -4,6 +4,7 @@ PRBS BinarySource
 
 import numpy as np
 import config
+import systemlab_utilities as util
 
 '''
 Signal formats:
@@ -19,6 +20,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Binary Source'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     i = settings['current_iteration']
@@ -43,7 +45,7 @@ def run(input_signal_data, parameters_input, settings):
 
     '''==CALCULATIONS======================================================='''
     time_array = np.linspace(0, time_win, n)
-    seq_binary = np.random.randint(2, size=binary_seq_length)
+    seq_binary = rng.integers(2, size=binary_seq_length)
     
     '''==OUTPUT PARAMETERS LIST============================================='''
     #Parameters table
@@ -6,6 +6,7 @@ import time as t
 import numpy as np
 from scipy import special
 import config
+import systemlab_utilities as util
 import project_qpsk as project
 
 import importlib
@@ -20,6 +21,7 @@ def run(input_signal_data, parameters_input, settings):
     '''==PROJECT SETTINGS=================================================================
     '''
     module_name = 'NRZ Gen'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -89,10 +91,10 @@ def run(input_signal_data, parameters_input, settings):
     # Build noise array (AWGN)
     #~ status_NRZ.text_update('Building noise array...')
     #~ config.app.processEvents()
-    #noise_sig_out = np.random.normal(0,std_dev,n)
+    #noise_sig_out = rng.normal(0,std_dev,n)
     noise_sig_out = np.zeros(n, )
     for i in range(0, n):
-        noise_sig_out[i] = np.random.normal(0,std_dev)
+        noise_sig_out[i] = rng.normal(0,std_dev)
         #~ status_NRZ.update_progress_bar(100*(i/(n-1)))
     #~ status_NRZ.text_update('Noise array complete...')
     #~ config.app.processEvents()
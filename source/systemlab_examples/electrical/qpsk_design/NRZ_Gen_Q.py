@@ -4,6 +4,7 @@ NRZ Generator module
 
 import numpy as np
 import config
+import systemlab_utilities as util
 import project_qpsk as project
 
 #import imp
@@ -21,6 +22,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'NRZ Gen'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -98,10 +100,10 @@ def run(input_signal_data, parameters_input, settings):
     
     # Build noise array (AWGN)
     config.sim_status_win.textEdit.append('Building noise array...')
-    #noise_sig_out = np.random.normal(0,std_dev,n)
+    #noise_sig_out = rng.normal(0,std_dev,n)
     noise_sig_out = np.zeros(n, )
     for i in range(0, n):
-       noise_sig_out[i] = np.random.normal(0,std_dev)
+       noise_sig_out[i] = rng.normal(0,std_dev)
     config.sim_status_win.textEdit.append('Noise array complete...')
     
     #Add noise to signal
@@ -4,6 +4,7 @@ Laser Source (Fabry_Perot interferometer project)
 
 import numpy as np
 import config
+import systemlab_utilities as util
 import project_fabry_perot as project
 from scipy import constants
 # REF: https://docs.scipy.org/doc/scipy/reference/constants.html
@@ -12,6 +13,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'Laser Source'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -73,7 +75,7 @@ def run(input_signal_data, parameters_input, settings):
         rin_linear = np.power(10, rin/10)
         noise_pwr = rin_linear * ref_bw * optical_pwr*1e-3
         sigma_field = np.sqrt(np.sqrt(noise_pwr))
-        rin_noise_array = np.random.normal(0, sigma_field , n)
+        rin_noise_array = rng.normal(0, sigma_field , n)
         e_field_array = e_field_array + rin_noise_array
     
     #Build electrial field
@@ -108,7 +110,7 @@ def run(input_signal_data, parameters_input, settings):
     phase_array = np.full(n, phase)
     
     for i in range(1,n):
-        phase_walk = np.random.normal(0, phase_sigma)*np.sqrt(t_step)
+        phase_walk = rng.normal(0, phase_sigma)*np.sqrt(t_step)
         phase_array[i] = phase_array[i-1] + phase_walk
         e_field_array_real[i] = e_field_array[i]*np.cos(phase_array[i])
         e_field_array_imag[i] = e_field_array[i]*np.sin(phase_array[i])
@@ -13,6 +13,7 @@ Refs:
 """
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import optimize
 
 from scipy import constants # https://docs.scipy.org/doc/scipy/reference/constants.html
@@ -31,6 +32,7 @@ def run(input_signal_data, parameters_input, settings):
     #module_name = 'Optical Amplifier'
     # MV 20.01.r3 13-Jun-20 Update to module name now directly reads functional block name
     module_name = settings['fb_name'] 
+    rng = util.block_rng(settings)
     #Main settings
     n = settings['num_samples'] #Total samples for simulation
     n = int(round(n))   
@@ -210,8 +212,8 @@ def run(input_signal_data, parameters_input, settings):
                     pwr_ase += 2*psd_out[1, i]*ng_w # Ref 1, Eq 4.37 (Pwr = 2*psd_ase*bw)
             # Convert to time-domain noise
             sigma_ase = np.sqrt(pwr_ase/2)
-            noise_ase_real = np.random.normal(0, sigma_ase , n)
-            noise_ase_imag = np.random.normal(0, sigma_ase , n)
+            noise_ase_real = rng.normal(0, sigma_ase , n)
+            noise_ase_imag = rng.normal(0, sigma_ase , n)
             noise_array_ase = noise_ase_real + 1j*noise_ase_imag
             noise_field_out[ch] += noise_array_ase
             
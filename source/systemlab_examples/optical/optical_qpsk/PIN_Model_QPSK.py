@@ -10,6 +10,7 @@ Refs:
 import os
 import numpy as np
 import config
+import systemlab_utilities as util
 from scipy import constants, special #https://docs.scipy.org/doc/scipy/reference/constants.html
 
 import importlib
@@ -20,6 +21,7 @@ def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'PIN'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -107,7 +109,7 @@ def run(input_signal_data, parameters_input, settings):
             k = constants.k # Boltzmann constant
             th_variance = rbw*4*k*T/r_load #Ref 1, Eq 4.32
         th_sigma = np.sqrt(th_variance)
-        i_th = np.random.normal(0, th_sigma , n) #Thermal noise current array
+        i_th = rng.normal(0, th_sigma , n) #Thermal noise current array
     
     #Calculate shot noise (Ref 1, Section 4.1.4)
     i_shot = np.zeros(n)
@@ -121,10 +123,10 @@ def run(input_signal_data, parameters_input, settings):
                 if detection_model == 'APD':
                     shot_variance = np.square(gain)*enf*shot_variance      
                 shot_sigma = np.sqrt(shot_variance)
-                i_shot_sample = np.random.normal(0, shot_sigma, 1)                
+                i_shot_sample = rng.normal(0, shot_sigma, 1)                
             else: #Poisson
                 mean_photons = round( (i_signal[i]*t_step) / q ) #Ref 1, Eq. 4.20
-                photons_detected = np.random.poisson(mean_photons, 1)
+                photons_detected = rng.poisson(mean_photons, 1)
                 i_shot_sample = photons_detected*q/t_step #Convert to current (Ref 1, Eq. 4.22)
             i_shot[i] = i_shot_sample
         #Calculate average photons + shot noise variance
@@ -136,7 +138,7 @@ def run(input_signal_data, parameters_input, settings):
     if detection_model == 'APD':
         noise_d_variance = np.square(gain)*enf*noise_d_variance
     noise_d_sigma = np.sqrt(noise_d_variance)
-    i_d_noise = np.random.normal(0, noise_d_sigma, n)
+    i_d_noise = rng.normal(0, noise_d_sigma, n)
 
     #Noise statistics (thermal) - for results
     th_psd_measured = np.var(i_th)/rbw
@@ -5,11 +5,13 @@ Version 1.0 (19.02 23 Feb 2019)
 
 import numpy as np
 import config
+import systemlab_utilities as util
 
 def run(input_signal_data, parameters_input, settings):
     
     '''==PROJECT SETTINGS==================================================='''
     module_name = 'PRBS Gen'
+    rng = util.block_rng(settings)
     n = settings['num_samples']
     n = int(round(n))
     iteration = settings['current_iteration']
@@ -46,7 +48,7 @@ def run(input_signal_data, parameters_input, settings):
     time_array = np.linspace(0, time_win, n)
     
     if seq_type == 'PRBS':
-        seq_binary = np.random.randint(2, size=binary_seq_length)
+        seq_binary = rng.integers(2, size=binary_seq_length)
     else:        
         seq = np.fromstring(seq_defined, dtype=int, sep=',')
         seq_binary = np.tile(seq, round(binary_seq_length/np.size(seq)))
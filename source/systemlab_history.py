@@ -0,0 +1,161 @@
+'''
+    SystemLab-Design Version 20.01
+    Copyright © 2019-2020 SystemLab Inc. All rights reserved.
+
+    NOTICE================================================================================
+    This file is part of SystemLab-Design 20.01.
+
+    SystemLab-Design 20.01 is free software: you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License,
+    or (at your option) any later version.
+
+    SystemLab-Design 20.01 is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with SystemLab-Design 20.01.  If not, see <https://www.gnu.org/licenses/>.
+    ======================================================================================
+
+    ABOUT THIS MODULE
+    Name: systemlab_history
+    Disk-backed history of the port signals saved for each iteration ("save port data"
+    option). The signal arrays of each port and iteration are written to .npy files in
+    a directory for each simulation run and are loaded on demand as memory-mapped
+    (read-only) arrays. The signal lists of the most recently used port iterations are
+    kept in memory (LRU cache).
+'''
+import os
+import tempfile
+import shutil
+import atexit
+import collections
+import numpy as np
+
+# Arrays smaller than this size (bytes) are kept in memory
+min_file_bytes = 4096
+
+class ArrayFile():
+    '''Placeholder for an array stored in a .npy file'''
+    __slots__ = ['file_path']
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+def store_arrays(item, history, files):
+    '''Returns a copy of a signal list (nested lists/tuples) with the arrays replaced by
+       ArrayFile placeholders. The paths of the written files are added to files
+    '''
+    if isinstance(item, np.ndarray):
+        if item.dtype == object or item.nbytes < min_file_bytes:
+            return item
+        file_path = history.new_file()
+        np.save(file_path, item)
+        files.append(file_path)
+        return ArrayFile(file_path)
+    elif isinstance(item, list):
+        return [store_arrays(x, history, files) for x in item]
+    elif isinstance(item, tuple):
+        return tuple(store_arrays(x, history, files) for x in item)
+    return item
+
+def load_arrays(item):
+    '''Returns the signal list for a stored copy (arrays are memory-mapped)'''
+    if isinstance(item, ArrayFile):
+        return np.load(item.file_path, mmap_mode='r')
+    elif isinstance(item, list):
+        return [load_arrays(x) for x in item]
+    elif isinstance(item, tuple):
+        return tuple(load_arrays(x) for x in item)
+    return item
+
+
+class SignalHistory():
+    '''Directory and LRU cache for the port signal histories of a simulation run.
+       base_path: folder for the run directory (system temporary folder if None)
+       cache_size: number of port iterations (signal lists) kept in memory
+    '''
+    def __init__(self, base_path=None, cache_size=32):
+        self.directory = tempfile.mkdtemp(prefix='syslab_history_', dir=base_path)
+        self.cache_size = max(int(cache_size), 0)
+        self.cache = collections.OrderedDict() # (port name, iteration) -> signal list
+        self.file_count = 0
+        atexit.register(self.close)
+
+    def port(self, name):
+        '''Returns a new (empty) history for a port (name must be unique in the run)'''
+        return PortHistory(self, name)
+
+    def new_file(self):
+        self.file_count += 1
+        return os.path.join(self.directory, str(self.file_count) + '.npy')
+
+    def cache_get(self, key):
+        signal_list = self.cache.get(key)
+        if signal_list is not None:
+            self.cache.move_to_end(key)
+        return signal_list
+
+    def cache_put(self, key, signal_list):
+        self.cache[key] = signal_list
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def close(self):
+        '''Removes the run directory (arrays already loaded stay valid)'''
+        self.cache.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class PortHistory():
+    '''Signal lists of a port for each iteration. Used in place of the iteration
+       dictionaries of a port (history[iteration], len(history))
+    '''
+    def __init__(self, history, name):
+        self.history = history
+        self.name = name
+        self.entries = {} # iteration -> (stored signal list, files)
+
+    def __setitem__(self, iteration, signal_list):
+        self.discard(iteration)
+        files = []
+        self.entries[iteration] = (store_arrays(signal_list, self.history, files), files)
+        self.history.cache_put((self.name, iteration), signal_list)
+
+    def __getitem__(self, iteration):
+        stored, files = self.entries[iteration]
+        signal_list = self.history.cache_get((self.name, iteration))
+        if signal_list is None:
+            signal_list = load_arrays(stored)
+            self.history.cache_put((self.name, iteration), signal_list)
+        return signal_list
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, iteration):
+        return iteration in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def keys(self):
+        return self.entries.keys()
+
+    def get(self, iteration, default=None):
+        if iteration in self.entries:
+            return self[iteration]
+        return default
+
+    def discard(self, iteration):
+        '''Removes the signals of an iteration (and their files)'''
+        if iteration in self.entries:
+            stored, files = self.entries.pop(iteration)
+            self.history.cache.pop((self.name, iteration), None)
+            for file_path in files:
+                try:
+                    os.remove(file_path) # Memory-mapped arrays remain valid
+                except OSError:
+                    pass
@@ -86,9 +86,9 @@ import config
 import sys
 import numpy as np
 from scipy import constants
-import pickle
-import hashlib
 import copy #MV 20.01.r1
+import zipfile
+import pickle
 import traceback
 import importlib
 import time as time_data
@@ -101,6 +101,11 @@ import systemlab_utilities as util
 import systemlab_set_link as set_link
 import systemlab_signals as signls
 import systemlab_scene_models as models
+import systemlab_scheduler as scheduler
+import systemlab_engine as engine
+import systemlab_profiler as profiler
+import systemlab_history as history
+import systemlab_project_file as project_file
 import port_viewer_digital as port_digital
 import port_viewer_electrical as port_electrical
 import port_viewer_optical as port_optical
@@ -313,8 +318,7 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
         self.project_views_list = {}      
         #Dictionaries for storing binary images of each project
         #(used for file comparisons)
-        self.hash_list_open = {}
-        self.hash_list_close = {}
+        self.saved_generation = {} # Generation of each project when opened/saved
         #Dictionary for tracking project file paths 
         self.project_file_paths_list = {}
         #Dictionary for data boxes (all projects)
@@ -1024,6 +1028,7 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
         tab_index, key_index = retrieve_current_project_key_index()
         if key_index is not None:
             self.project_scenes_list[key_index].design_settings['current_iteration'] = new_iteration
+            self.project_scenes_list[key_index].project_modified()
             self.update_data_boxes(new_iteration, 0)
             #self.update_data_boxes()
         
@@ -1090,11 +1095,10 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
         self.project_scenes_list[i].setSceneRect(QtCore.QRectF(0, 0, w, h))
         #self.project_views_list[i].ensureVisible(0, 0, w/2, h/2) 
         
-        #Create hash digest of new project file (to track if it's been modified)
+        #Save generation of new project (to track if it's been modified)
         tab_index, key_index = retrieve_current_project_key_index()
         proj = self.project_scenes_list[key_index]
-        dict_list_image = window.prepare_project_data_and_items(proj, proj.items())
-        self.hash_list_open[key_index] = hashlib.sha256(str(dict_list_image).encode()).hexdigest()
+        self.saved_generation[key_index] = proj.generation
         
         # MV 20.01.r3 13-Jul-20
         self.action_SaveProject.setEnabled(True) 
@@ -1117,7 +1121,23 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
                                                       filter = '*.slb')
         
         if fname[0]:
-            dict_list = pickle.load(open(fname[0], 'rb'))
+            try:
+                # Large arrays are memory-mapped from the file (save_project replaces
+                # the file instead of overwriting it)
+                dict_list = project_file.load_project(fname[0], mmap_arrays=True)
+            except (ValueError, KeyError, zipfile.BadZipFile, pickle.UnpicklingError,
+                    EOFError) as err:
+                # Not a project file, damaged file or newer file format
+                msg = QtWidgets.QMessageBox()
+                syslab_icon = set_icon_window()
+                msg.setWindowIcon(syslab_icon)
+                msg.setIcon(QtWidgets.QMessageBox.Warning)
+                msg.setText('Project file could not be opened')
+                msg.setInformativeText(str(err))
+                msg.setWindowTitle("Project open dialog")
+                msg.setStandardButtons(QtWidgets.QMessageBox.Ok)
+                msg.exec()
+                return
             truncated_file_path = fname[0].rsplit("/", 1) 
             
             self.file_path.setText(truncated_file_path[0])
@@ -1178,10 +1198,9 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
             proj.setSceneRect(QtCore.QRectF(0, 0, w, h))
             proj_view.ensureVisible(0, 0, w/2, h/2)   
             
-            #Create hash digest of opened project (to track for modifications)
+            #Save generation of opened project (to track for modifications)
             tab_index, key_index = retrieve_current_project_key_index()
-            dict_list_image = window.prepare_project_data_and_items(proj, items)
-            self.hash_list_open[key_index] = hashlib.sha256(str(dict_list_image).encode()).hexdigest()
+            self.saved_generation[key_index] = proj.generation
             
             # MV 20.01.r3 13-Jul-20
             self.action_SaveProject.setEnabled(True) 
@@ -1220,6 +1239,10 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
         if not 'project_config_filename' in proj_settings.keys():
             config_file = 'project_config.py'        
             proj_settings['project_config_filename'] = config_file
+        if not 'independent_iterations' in proj_settings.keys():
+            proj_settings['independent_iterations'] = 0
+        if not 'random_seed' in proj_settings.keys():
+            proj_settings['random_seed'] = None
         #----------------------------------------------------------------------
             
         proj.design_settings['project_name'] = project_name
@@ -1564,17 +1587,11 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
             if path_list_verify[-1]:
                 proj_path += '\\'
                 proj.design_settings['file_path_1'] = proj_path
-            # Python object structure is serialized into a byte stream (non human readable)
-            # Default protocol is used (Version 3). Can only be converted back using Python
-            # Suffix used for SystemLab-Design file is .slb (systemlab binary)
-            # Ref: https://docs.python.org/3/library/pickle.html
-            pickle.dump(dict_list_save, open(proj_path + project_name + '.slb', 'wb'))
-            # Update hash digest of saved project
-            # MV 20.01.r1 22-Nov-19 (items now passed as argument to method 
-            # prepare project data/items)
-            items = proj.items()
-            dict_list_image = window.prepare_project_data_and_items(proj, items)
-            self.hash_list_open[key_index] = hashlib.sha256(str(dict_list_image).encode()).hexdigest()
+            # Suffix used for SystemLab-Design file is .slb (zip archive with JSON manifest,
+            # see systemlab_project_file)
+            project_file.save_project(proj_path + project_name + '.slb', dict_list_save)
+            # Update generation of saved project
+            self.saved_generation[key_index] = proj.generation
             # Send update to Info/Status (StatusBar)
             if not proj_path:
                 config.status.setText('File saved to: '+ str(root_path))
@@ -1702,30 +1719,22 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
             #Update title of project tab to reflect updated project name
             window.tabWidget.setTabText(tab_index, saved_project_name)
             
-            #Save binary file and update hash digest of saved project---------------------
+            #Save project file and update generation of saved project---------------------
             # MV 20.01.r1 22-Nov-19 (items now passed as argument to method prepare project data/items)
             proj = self.project_scenes_list[key_index]
             items = proj.items()
             dict_list_save = window.prepare_project_data_and_items(proj, items)
-            # Python object structure is serialized into a byte stream (non human readable)
-            # Default protocol is used (Version 3). Can only be converted back using Python
-            # Suffix used for SystemLab-Design file is .slb (systemlab binary)
-            # Ref: https://docs.python.org/3/library/pickle.html
-            pickle.dump(dict_list_save, open(str(fileName[0]), 'wb'))       
-            self.hash_list_open[key_index] = ( 
-                    hashlib.sha256(str(dict_list_save).encode()).hexdigest() )
+            # Suffix used for SystemLab-Design file is .slb (zip archive with JSON manifest,
+            # see systemlab_project_file)
+            project_file.save_project(str(fileName[0]), dict_list_save)
+            self.saved_generation[key_index] = proj.generation
             #-----------------------------------------------------------------------------
            
     def project_close(self):
         tab_index, key_index = retrieve_current_project_key_index()   
         project_name = self.tabWidget.tabText(tab_index)
-        # MV 20.01.r1 22-Nov-19 (items now passed as argument to method 
-        # prepare project data/items)
         proj = self.project_scenes_list[key_index]
-        dict_list_close = window.prepare_project_data_and_items(proj, proj.items())
-        self.hash_list_close[key_index] = hashlib.sha256(str(dict_list_close).encode()).hexdigest()
-        
-        if self.hash_list_close[key_index] != self.hash_list_open[key_index]:  
+        if proj.generation != self.saved_generation.get(key_index):
             msg = QtWidgets.QMessageBox()
             syslab_icon = set_icon_window()
             msg.setWindowIcon(syslab_icon)
@@ -2639,7 +2648,8 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
             self.actionPause.setEnabled(True)
             self.actionEnd.setEnabled(True)
             self.actionStart.setEnabled(False)
-            # Start main algorithm for system simulation
+            # Start main algorithm for system simulation (scripts update the data models)
+            scene.project_modified()
             window.disable_tabs_temporarily() # MV 20.01.r3 28-Aug-20
             window.calculation_orchestrator()
         else: # Quit simulation (there are no functional blocks)
@@ -2657,10 +2667,126 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
         self.tab_index, self.key_index = retrieve_current_project_key_index()
         proj = self.project_scenes_list[self.key_index] #Local instance of current project
         self.iterations_sim = proj.design_settings['iterations']
-        self.max_attempts = proj.design_settings['max_calculation_attempts']
         if self.check_box_sim_status.checkState() == 2:
             config.sim_status_win.totalIterations.setText(str(self.iterations_sim))
         self.s_iterations = 0
+
+        # Script search paths (default script folders and project script folders) -
+        # sys.path is set once per simulation run (script modules are cached by
+        # the engine and only reloaded if the script file has been modified)
+        self.script_paths = engine.script_search_paths(root_path, 
+                                    config_lib.scripts_path_list, proj.design_settings)
+        engine.set_script_search_paths(self.script_paths)
+        
+        # Event log of the simulation and throttled GUI updates (status widgets are
+        # updated and events are processed at most config_special.gui_update_rate
+        # times per second)
+        self.sim_log = engine.SimulationLog()
+        self.gui_throttle = engine.GuiThrottle(config_special.gui_update_rate)
+        self.gui_throttle.install()
+        
+        # Per-block profiling (calculation phases and port array sizes)
+        self.profiler = profiler.BlockProfiler(config_special.profiling_enabled)
+        self.block_profiles = {} # fb_key -> profile (blocks submitted to the executor)
+        
+        # Block executor for the parallel execution mode (independent functional
+        # blocks are calculated concurrently)
+        self.executor = None
+        if config_special.parallel_execution == True:
+            self.executor = engine.BlockExecutor(config_special.parallel_executor,
+                                                 config_special.parallel_workers)
+            self.executor.relay_gui_calls()
+        
+        # Streaming mode: the time window is calculated as a sequence of frames (not
+        # available with feedback mode, feedback segments use the full time window)
+        self.streaming = None
+        if (config_special.streaming_mode == True 
+                and int(proj.design_settings['feedback_enabled']) != 2):
+            self.streaming = engine.StreamingFrames(proj.design_settings,
+                                        config_special.streaming_frame_samples,
+                                        config_special.streaming_overlap_samples)
+        
+        # Build dependency graph of the functional blocks (once per simulation) and
+        # report blocks that can never be calculated
+        self.scheduler = scheduler.DataflowScheduler(self.fb_calculation_list,
+                                                     proj.signal_links_list)
+        for fb_key in self.scheduler.order:
+            if fb_key in self.scheduler.blocked:
+                text_blocked = (self.fb_calculation_list[fb_key].fb_name + ' (ID:'
+                                + str(fb_key) + ') will not be calculated: '
+                                + self.scheduler.blocked[fb_key])
+                self.sim_log.add('warning', text_blocked, fb_key)
+                if self.check_box_sim_status.checkState() == 2:
+                    config.sim_status_win.textEdit.setTextColor(QtGui.QColor('#aa5500'))
+                    config.sim_status_win.text_update(text_blocked)
+                    config.sim_status_win.textEdit.setTextColor(QtGui.QColor('#000000'))
+        
+        # Random number generators of the scripts (master seed of the project or a new
+        # seed for each run). The seed is logged so that a run can be repeated
+        self.random_streams = engine.RandomStreams(engine.project_seed(proj.design_settings))
+        text_seed = 'Random seed: ' + str(self.random_streams.seed)
+        self.sim_log.add('info', text_seed)
+        if self.check_box_sim_status.checkState() == 2:
+            config.sim_status_win.text_update(text_seed)
+        
+        # Incremental re-simulation: blocks that are unchanged since the previous run
+        # of the project (and have no changed upstream blocks) reuse their previous
+        # outputs (not available with feedback or streaming modes). The master seed is
+        # part of the block keys: without a project seed, random blocks are re-calculated
+        self.result_cache = None
+        if (config_special.incremental_simulation == True and self.streaming is None
+                and int(proj.design_settings['feedback_enabled']) != 2):
+            if getattr(proj, 'result_cache', None) is None:
+                proj.result_cache = engine.ResultCache()
+            self.result_cache = proj.result_cache
+            self.result_cache.start_run(self.scheduler.downstream_ports,
+                                         self.random_streams.seed)
+        
+        # Port signal history on disk ("save port data" option): the signals of each
+        # iteration are written to a run directory (the directory of the previous run
+        # of the project is removed)
+        if getattr(proj, 'signal_history', None) is not None:
+            proj.signal_history.close()
+        proj.signal_history = None
+        if (config_special.signal_history_on_disk == True
+                and self.check_box_port_data.checkState() == 2):
+            proj.signal_history = history.SignalHistory(
+                                        config_special.signal_history_path,
+                                        config_special.signal_history_cache_size)
+        self.signal_history = proj.signal_history
+        
+        # Independent iterations (project setting): iterations 2 to N are calculated
+        # in worker processes while iteration 1 is calculated here. The outputs of the
+        # workers are loaded in iteration order. The workers locate the script folders
+        # from the project file (projects that have not been saved are calculated
+        # sequentially)
+        self.iteration_sweep = None
+        if (int(proj.design_settings.get('independent_iterations', 0)) == 2
+                and self.iterations_sim > 1):
+            project_file_path = os.path.join(window.project_file_paths_list[self.key_index],
+                                    str(proj.design_settings['project_name']) + '.slb')
+            if not os.path.isfile(project_file_path):
+                text_unsaved = ('Independent iterations: the project has not been saved - '
+                                'iterations are calculated sequentially')
+                self.sim_log.add('warning', text_unsaved)
+                if self.check_box_sim_status.checkState() == 2:
+                    config.sim_status_win.textEdit.setTextColor(QtGui.QColor('#aa5500'))
+                    config.sim_status_win.text_update(text_unsaved)
+                    config.sim_status_win.textEdit.setTextColor(QtGui.QColor('#000000'))
+            else:
+                data_sources = []
+                for key in proj.data_box_list:
+                    if proj.data_box_list[key].data_source_file != '':
+                        data_sources.append(proj.data_box_list[key].data_source_file)
+                # Workers use the master seed of this run
+                design_settings = dict(proj.design_settings)
+                design_settings['random_seed'] = self.random_streams.seed
+                project = (design_settings, proj.fb_list, proj.signal_links_list,
+                           data_sources)
+                self.iteration_sweep = engine.IterationSweep(project_file_path, project,
+                            list(range(2, self.iterations_sim + 1)),
+                            self.check_box_port_data.checkState() == 2,
+                            config_special.iteration_workers)
         
         # Reset Iteration (Cur) and Segment (Cur) fields in top tool bar
         self.tableWidget3.item(0, 1).setText('')
@@ -2671,6 +2797,7 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
         
         for self.iteration in range(1, self.iterations_sim + 1):
             text_start = 'Starting simulation iteration ' + str(self.iteration) + '...'
+            self.sim_log.add('info', text_start)
             if self.check_box_sim_status.checkState() == 2:
                 config.sim_status_win.textEdit.setTextColor(QtGui.QColor('#007900'))
                 config.sim_status_win.text_update(text_start)
@@ -2695,7 +2822,9 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
             '''MAIN simulation loop===================================================='''
             # Check if feedback mode has been set to True
             self.feedback = int(proj.design_settings['feedback_enabled'])
-            if self.feedback == 2:
+            if self.iteration_sweep is not None and self.iteration > 1:
+                self.load_sweep_iteration()
+            elif self.feedback == 2:
                 self.main_simulation_loop_feedback()
             else:
                 self.main_simulation_loop()
@@ -2755,6 +2884,22 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
                         break      
         '''End ITERATIONS loop============================================================
         '''        
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.iteration_sweep is not None:
+            self.iteration_sweep.shutdown()
+            self.iteration_sweep = None
+        if self.streaming is not None:
+            self.streaming.restore()
+            self.streaming = None
+        self.gui_throttle.restore()
+        if self.result_cache is not None and config.stop_sim_flag == False:
+            self.result_cache.finish_run()
+        if config_special.sim_event_log_path is not None:
+            self.sim_log.write_csv(config_special.sim_event_log_path)
+        if self.profiler.enabled:
+            self.show_profile_report()
         if config.stop_sim_flag == True:
             config.app.processEvents()
             self.iterationsSelector.setValue(self.iteration)
@@ -2830,10 +2975,7 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
             if self.iteration == 1: #Reset all iteration dictionaries to empty
                 self.fb_calculation_view_list[fb_key].iterations_parameters = {}
                 self.fb_calculation_view_list[fb_key].iterations_results = {}
-                length_port_list = len(self.fb_calculation_list[fb_key].fb_ports_list)
-                for p in range(1, length_port_list+1):
-                    self.fb_calculation_view_list[fb_key].ports[p].iterations_input_signals = {}
-                    self.fb_calculation_view_list[fb_key].ports[p].iterations_return_signals = {} 
+                self.reset_port_signal_history(fb_key)
                     
                 # Reset data panel dictionaries associated with current project-----------
                 # MV 20.01.r2 20-Feb-20
@@ -2851,106 +2993,73 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
         
         self.s = 0 #Functional blocks that are in a "completed" state (reset to 0 before starting sim) 
         self.t = 0 # MV 20.01.r3 27-Jul-20
-        self.fb_counter = 0
-        fb_key = self.fb_keys[0] #Reset to first functional block ID in the list
-                
-        while True: 
-            # Simulation will keep running until all functional blocks are in
-            # either "Complete" or "Unable to complete calculation" state
-            fb_name = self.fb_calculation_list[fb_key].fb_name
-            text_5 = 'Verifying calculation status of ' + fb_name + ' (ID:'+ str(fb_key)+ ')'
+        if self.streaming is not None:
+            self.run_streaming_frames(self.fb_num*self.iterations_sim*self.streaming.frames)
+        else:
+            self.run_scheduled_blocks(self.fb_num*self.iterations_sim)
+        if config.stop_sim_flag == False:
+            text_6 = 'Simulation for iteration ' + str(self.iteration) + ' is complete'
             if self.check_box_sim_status.checkState() == 2:
-                config.sim_status_win.text_update(text_5)
+                config.sim_status_win.text_update(text_6)
+            config.status.setText(text_6)
             config.app.processEvents()
-            status = self.check_calculation_status(fb_key)
-            if status == 'Ready': #Functional block is ready to calculate
-                #Call fb_script calculation====================              
-                fb_script_ok = self.run_fb_script(fb_key)
-                if fb_script_ok == False:
-                    config.stop_sim_flag = True                   
-                    # Highlight fb which has error in project scene
-                    self.fb_error = self.fb_calculation_view_list[fb_key]
-                    style = set_line_type('DashLine')
-                    self.fb_error.setPen(QtGui.QPen(QtGui.QBrush(QtGui.QColor('#ff0000')), 1, style))                   
-                    self.fb_error.setBrush(QtGui.QBrush(QtGui.QColor(255, 0, 0, 50)))
-                    self.fb_error.fb_error_state = True
-                    break
-                #==============================================
-                #Check all FBs to see if simulation is complete
-                self.fb_calculation_list[fb_key].fb_calculation_status = 'Complete'
-                self.s += 1
-                self.s_iterations += 1
-                prog = self.s_iterations/(self.fb_num*self.iterations_sim)
-                if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.simulatedBlocks.setText(str(self.s))
-                    config.sim_status_win.update_progress_bar(100*float(prog))
-                window.tableWidget3.item(2, 1).setText(format(np.round(prog*100), 'n'))
-                window.tableWidget3.resizeColumnsToContents()
-                exit_simulation = self.check_exit_simulation()
-                if exit_simulation == True: #All FBs have reported complete
-                    text_6 = 'Simulation for iteration ' + str(self.iteration) + ' is complete'
-                    if self.check_box_sim_status.checkState() == 2:
-                        config.sim_status_win.text_update(text_6)
-                    config.status.setText(text_6)
-                    config.app.processEvents()
-                    break
-                else: #Continue simulation
-                    fb_key = self.next_fb(fb_key)
-                            
-            elif status == 'Complete': #Functional block has already finished its calculation
-                #Check if all functional blocks have completed their calculations
-                exit_simulation = self.check_exit_simulation()
-                if exit_simulation == True:
-                    if self.check_box_sim_status.checkState() == 2:
-                        config.sim_status_win.text_update(text_6)
-                    break
-                else:
-                    fb_key = self.next_fb(fb_key)
-                    text_7 = 'FB ID set to: ' + str(fb_key)
-                    if self.check_box_sim_status.checkState() == 2:
-                        config.sim_status_win.text_update(text_7)
-                    config.app.processEvents()
-                            
-            else: #Functional block is not ready (continue to next one)
-                self.fb_calculation_list[fb_key].status_counter += 1
-                if self.fb_calculation_list[fb_key].status_counter > int(self.max_attempts):
-                    # MV 20.01.r3 27-Jul-20: Include unable to calculate 
-                    # components in the total calculation----------------------
-                    self.s += 1
-                    self.s_iterations += 1
-                    prog = self.s_iterations/(self.fb_num*self.iterations_sim)
-                    if self.check_box_sim_status.checkState() == 2:
-                        config.sim_status_win.simulatedBlocks.setText(str(self.s))
-                        config.sim_status_win.update_progress_bar(100*float(prog))
-                    window.tableWidget3.item(2, 1).setText(format(np.round(prog*100), 'n'))
-                    window.tableWidget3.resizeColumnsToContents()
-                    self.t += 1
-                    #----------------------------------------------------------
-                    status = 'Unable to complete calculation'
-                    self.fb_calculation_list[fb_key].fb_calculation_status = status
-                    text_4 = ('Unable to complete calculation after ' 
-                              + str(self.max_attempts) +' attempts.')
-                    if self.check_box_sim_status.checkState() == 2:
-                        config.sim_status_win.text_update(text_4)
-                    text_8 = (self.fb_calculation_list[fb_key].fb_name
-                              + ' status set to ' 
-                              + self.fb_calculation_list[fb_key].fb_calculation_status)
-                    if self.check_box_sim_status.checkState() == 2:
-                        config.sim_status_win.text_update(text_8)
-                    config.app.processEvents()
-                    exit_simulation = self.check_exit_simulation()
-                    if exit_simulation == True:
-                        text_9 = 'Exiting main simulation routine...'
-                        if self.check_box_sim_status.checkState() == 2:
-                            config.sim_status_win.text_update(text_9)
-                        config.status.setText(text_9)
-                        config.app.processEvents()
-                        break
-                    else:
-                        fb_key = self.next_fb(fb_key)           
-                else:
-                    fb_key = self.next_fb(fb_key)
-                    
+
+    def load_sweep_iteration(self):
+        '''Independent iterations: waits for the outputs of the current iteration
+           (calculated in a worker process) and loads them into the iteration
+           dictionaries of the functional blocks and ports
+        '''
+        text_1 = 'Waiting for iteration ' + str(self.iteration) + ' (worker process)...'
+        config.status.setText(text_1)
+        while not self.iteration_sweep.done(self.iteration):
+            if config.stop_sim_flag == True:
+                return
+            time_data.sleep(0.05)
+            config.app.processEvents()
+        try:
+            outputs = self.iteration_sweep.result(self.iteration)
+        except:
+            self.fb_script_error('Error/exception while calculating iteration '
+                                 + str(self.iteration) + ' in a worker process')
+            return
+        for time_entry, level, fb_key, text in outputs.log_entries:
+            self.sim_log.add(level, text, fb_key)
+        if not outputs.completed:
+            self.fb_script_error('Error/exception while calculating iteration '
+                                 + str(self.iteration) + ' in a worker process',
+                                 str(outputs.error))
+            return
+        proj = window.project_scenes_list[self.key_index]
+        self.s = 0
+        for fb_key in outputs.results:
+            proj.fb_list[fb_key].fb_parameters_list = outputs.parameters[fb_key]
+            proj.fb_list[fb_key].fb_results_list = outputs.results[fb_key]
+            fb_view = proj.fb_design_view_list[fb_key]
+            fb_view.iterations_parameters[self.iteration] = outputs.parameters[fb_key]
+            fb_view.iterations_results[self.iteration] = outputs.results[fb_key]
+            self.update_simulation_progress(self.fb_num*self.iterations_sim)
+        for (fb_key, portID) in outputs.input_signals:
+            port = proj.fb_design_view_list[fb_key].ports[portID]
+            port.iterations_input_signals[self.iteration] = (
+                    outputs.input_signals[(fb_key, portID)])
+            port.clear_signal_metrics(self.iteration)
+        for (fb_key, portID) in outputs.return_signals:
+            port = proj.fb_design_view_list[fb_key].ports[portID]
+            port.iterations_return_signals[self.iteration] = (
+                    outputs.return_signals[(fb_key, portID)])
+            port.clear_signal_metrics(self.iteration)
+        config.data_tables.update(outputs.data_tables) # Allocated to the iteration
+                                                       # after the loop
+        for fb_key in outputs.unable_to_complete:
+            self.sim_log.add('warning', 'Calculation could not be completed for '
+                             + self.fb_calculation_list[fb_key].fb_name + ' (iteration '
+                             + str(self.iteration) + ')', fb_key)
+        text_2 = 'Simulation for iteration ' + str(self.iteration) + ' is complete'
+        if self.check_box_sim_status.checkState() == 2:
+            config.sim_status_win.text_update(text_2)
+        config.status.setText(text_2)
+        config.app.processEvents()
+    
     def main_simulation_loop_feedback(self):
         '''Main simulation loop with feedback - called for each iteration. Used when 
            feedback is enabled
@@ -2990,130 +3099,264 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
                 if self.iteration == 1: #Reset all iteration dictionaries to empty
                     self.fb_calculation_view_list[fb_key].iterations_parameters = {}
                     self.fb_calculation_view_list[fb_key].iterations_results = {}
-                    length_port_list = len(self.fb_calculation_list[fb_key].fb_ports_list)
-                    for p in range(1, length_port_list+1):
-                        self.fb_calculation_view_list[fb_key].ports[p].iterations_input_signals = {}
-                        self.fb_calculation_view_list[fb_key].ports[p].iterations_return_signals = {}
+                    self.reset_port_signal_history(fb_key)
                 self.fb_counter += 1
         
             self.s = 0 # Functional blocks that are in a "completed" state 
                        # (reset to 0 before starting sim) 
             self.t = 0 # MV 20.01.r3 27-Jul-20
-            self.fb_counter = 0
-            fb_key = self.fb_keys[0] #Reset to first functional block ID in the list
-                    
-            while True: 
-                #Simulation will keep running until all functional blocks are in
-                #either "Complete" or "Unable to complete calculation" state
-                fb_name = self.fb_calculation_list[fb_key].fb_name
-                text_1 = 'Verifying calculation status of ' + fb_name + ' (ID:'+ str(fb_key)+ ')'
+            self.run_scheduled_blocks(self.fb_num*self.iterations_sim*self.segments)
+            if config.stop_sim_flag == False:
+                text_2 = 'Simulation for feedback segment ' + str(i) + ' is complete'
                 if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.text_update(text_1)
-                status = self.check_calculation_status(fb_key)
-                if status == 'Ready': #Functional block is ready to calculate
-                    #Call fb_script calculation===========================================
+                    config.sim_status_win.textEdit.setTextColor(QtGui.QColor('#007900'))
+                    config.sim_status_win.text_update(text_2)
+                    config.sim_status_win.textEdit.setTextColor(QtGui.QColor('#000000'))
+
+    def run_streaming_frames(self, total_calculations):
+        '''Streaming mode - the functional blocks are calculated once per frame of the
+           time window (the port signals hold the data of the current frame)
+        '''
+        proj = window.project_scenes_list[self.key_index]
+        self.streaming.reset()
+        for frame in range(1, self.streaming.frames + 1):
+            if config.stop_sim_flag == True:
+                break
+            if frame > 1: # Reset block status and port "data ready" attributes
+                for fb_key in self.fb_calculation_list:
+                    self.fb_calculation_list[fb_key].fb_calculation_status = 'Not ready'
+                    self.fb_calculation_list[fb_key].status_counter = 0
+                    for port in proj.fb_list[fb_key].fb_ports_list:
+                        if port[4] == 'Disabled' or port[3] == 'In-Feedback':
+                            port[6] = True
+                        else:
+                            port[6] = False
+            self.streaming.set_frame(frame)
+            text_1 = ('Starting stream frame ' + str(frame) + ' of '
+                      + str(self.streaming.frames) + '...')
+            if self.check_box_sim_status.checkState() == 2:
+                config.sim_status_win.text_update(text_1)
+            config.status.setText(text_1)
+            config.app.processEvents()
+            self.run_scheduled_blocks(total_calculations)
+
+    def run_scheduled_blocks(self, total_calculations):
+        '''Runs the functional blocks of the current iteration (or feedback segment)
+           in dataflow order. Blocks are taken from the scheduler ready queue and
+           downstream blocks are released as soon as all of their IN ports have
+           received data.
+        '''
+        self.scheduler.start()
+        # Blocks that can never be calculated (identified when building the graph)
+        for fb_key in self.scheduler.order:
+            if fb_key in self.scheduler.blocked:
+                self.set_unable_to_complete(fb_key, total_calculations)
+        
+        if self.executor is not None:
+            fb_script_ok = self.run_scheduled_blocks_parallel(total_calculations)
+            if fb_script_ok == False:
+                return
+        
+        while True:
+            fb_key = self.scheduler.next_ready()
+            if fb_key is None: # Ready queue is empty
+                break
+            self.set_fb_running(fb_key)
+            #Call fb_script calculation===========================================
+            fb_script_ok = self.run_fb_script(fb_key)
+            if fb_script_ok == False:
+                self.highlight_fb_error(fb_key)
+                return
+            #=====================================================================
+            self.set_fb_complete(fb_key, total_calculations)
+        
+        # Blocks still waiting for data (one or more upstream blocks did not
+        # return signals for their output ports)
+        for fb_key in self.scheduler.unresolved_blocks():
+            self.set_unable_to_complete(fb_key, total_calculations)
+            
+    def run_scheduled_blocks_parallel(self, total_calculations):
+        '''Parallel execution mode: all blocks in the ready queue are dispatched to
+           the block executor (thread or process pool) and their returned signals are
+           loaded into the port signal objects as the results arrive. Returns False
+           if an fb script has raised an exception.
+        '''
+        proj = window.project_scenes_list[self.key_index]
+        running = {} # future -> fb_key
+        fb_script_ok = True
+        while True:
+            fb_key = self.scheduler.next_ready()
+            while fb_key is not None and fb_script_ok == True:
+                self.set_fb_running(fb_key)
+                script_name = str(proj.fb_list[fb_key].fb_script_module)
+                if (self.executor.main_thread_script(script_name)
+                        or self.cached_fb_outputs(fb_key) is not None):
                     fb_script_ok = self.run_fb_script(fb_key)
-                    if fb_script_ok == False:
-                        config.stop_sim_flag = True
-                        # Highlight fb which has error in project scene
-                        self.fb_error = self.fb_calculation_view_list[fb_key]
-                        style = set_line_type('DashLine')
-                        self.fb_error.setPen(QtGui.QPen(QtGui.QBrush(QtGui.QColor('#ff0000')), 1, style))                   
-                        self.fb_error.setBrush(QtGui.QBrush(QtGui.QColor(255, 0, 0, 50)))
-                        self.fb_error.fb_error_state = True
-                        break
-                    #=====================================================================                
-                    #Check all FBs to see if simulation is complete
-                    self.fb_calculation_list[fb_key].fb_calculation_status = 'Complete'
-                    self.s += 1
-                    self.s_iterations += 1
-                    prog = self.s_iterations/(self.fb_num*self.iterations_sim*self.segments)
-                    if self.check_box_sim_status.checkState() == 2:
-                        config.sim_status_win.simulatedBlocks.setText(str(self.s))
-                        config.sim_status_win.update_progress_bar(100*float(prog))
-                    window.tableWidget3.item(2, 1).setText(format(np.round(prog*100), 'n'))
-                    window.tableWidget3.resizeColumnsToContents()
-                    
-                    exit_simulation = self.check_exit_simulation()
-                    if exit_simulation == True: #All FBs have reported complete
-                        text_2 = 'Simulation for feedback segment ' + str(i) + ' is complete'
-                        if self.check_box_sim_status.checkState() == 2:
-                            config.sim_status_win.textEdit.setTextColor(QtGui.QColor('#007900'))
-                            config.sim_status_win.text_update(text_2)
-                            config.sim_status_win.textEdit.setTextColor(QtGui.QColor('#000000'))
-                        break
-                    else: #Continue simulation
-                        fb_key = self.next_fb(fb_key)  
-                           
-                elif status == 'Complete': #Functional block has finished its calculation
-                    #Check if all functional blocks have completed their calculations
-                    exit_simulation = self.check_exit_simulation()
-                    if exit_simulation == True:
-                        if self.check_box_sim_status.checkState() == 2:
-                            config.sim_status_win.text_update(text_2)
-                        break
+                    if fb_script_ok == True:
+                        self.set_fb_complete(fb_key, total_calculations)
                     else:
-                        fb_key = self.next_fb(fb_key)
-                        text_3 = 'FB ID set to: ' + str(fb_key)
-                        if self.check_box_sim_status.checkState() == 2:
-                            config.sim_status_win.text_update('FB ID set to: ' 
-                                                              + str(fb_key))
-                            config.sim_status_win.text_update(text_3)
-                        config.app.processEvents()
-                        
-                else: #Functional block is not ready (continue to next one)
-                    self.fb_calculation_list[fb_key].status_counter += 1
-                    if self.fb_calculation_list[fb_key].status_counter > int(self.max_attempts):
-                        # MV 20.01.r3 27-Jul-20: Include unable to calculate 
-                        # components in the total calculation------------------
-                        self.s += 1
-                        self.s_iterations += 1
-                        prog = self.s_iterations/(self.fb_num*self.iterations_sim)
-                        if self.check_box_sim_status.checkState() == 2:
-                            config.sim_status_win.simulatedBlocks.setText(str(self.s))
-                            config.sim_status_win.update_progress_bar(100*float(prog))
-                        window.tableWidget3.item(2, 1).setText(format(np.round(prog*100), 'n'))
-                        window.tableWidget3.resizeColumnsToContents()
-                        self.t += 1
-                        #------------------------------------------------------
-                        status = 'Unable to complete calculation'
-                        self.fb_calculation_list[fb_key].fb_calculation_status = status
-                        text_4 = ('Unable to complete calculation after ' 
-                                  + str(self.max_attempts) +' attempts')
-                        if self.check_box_sim_status.checkState() == 2:
-                            config.sim_status_win.text_update(text_4)
-                        text_5 = (self.fb_calculation_list[fb_key].fb_name
-                                   + ' status set to ' 
-                                   + self.fb_calculation_list[fb_key].fb_calculation_status)
-                        if self.check_box_sim_status.checkState() == 2:
-                            config.sim_status_win.text_update(text_5)
-                        exit_simulation = self.check_exit_simulation()
-                        if exit_simulation == True:
-                            text_6 = 'Exiting main simulation routine...'
-                            if self.check_box_sim_status.checkState() == 2:
-                                config.sim_status_win.text_update(text_6)
-                            config.status.setText(text_6)
-                            break
-                        else:
-                            fb_key = self.next_fb(fb_key)           
+                        self.highlight_fb_error(fb_key)
+                else:
+                    future = self.submit_fb_script(fb_key, script_name)
+                    if future is None:
+                        fb_script_ok = False
+                        self.highlight_fb_error(fb_key)
                     else:
-                        fb_key = self.next_fb(fb_key)
+                        running[future] = fb_key
+                fb_key = self.scheduler.next_ready()
+            if not running:
+                break
+            done = self.executor.wait(list(running))
+            config.app.processEvents()
+            for future in done:
+                fb_key = running.pop(future)
+                if fb_script_ok == False: # Simulation is stopping (discard results)
+                    continue
+                try:
+                    signals_data, parameters, results, data_tables, stream_state = (
+                            future.result())
+                    # Run time of submitted blocks: until the result has been collected
+                    profile = self.block_profiles.pop(fb_key, self.profiler.null_profile)
+                    profile.mark('run')
+                except:
+                    msg_err = ('Error/exception while calculating python script module for FB: '
+                               + str(self.fb_calculation_list[fb_key].fb_name))
+                    self.fb_script_error(msg_err)
+                    fb_script_ok = False
+                    self.highlight_fb_error(fb_key)
+                    continue
+                if data_tables: # Data panel tables updated by the script
+                    config.data_tables.update(data_tables)
+                if stream_state is not None: # Stream state updated in a worker process
+                    self.streaming.block_state[fb_key] = stream_state
+                if self.load_fb_script_outputs(fb_key, signals_data, parameters, results):
+                    profile.add_signals(signals_data)
+                    profile.mark('outputs')
+                    if self.result_cache is not None:
+                        self.result_cache.store(fb_key, self.iteration, signals_data,
+                                                parameters, results, data_tables)
+                    self.set_fb_complete(fb_key, total_calculations)
+                else:
+                    fb_script_ok = False
+                    self.highlight_fb_error(fb_key)
+        return fb_script_ok
     
-    def check_exit_simulation(self):
-        exit_simulation = True   
-        counter = 0
-        self.fb_keys = list(self.fb_calculation_list.keys())
-        while counter < len(self.fb_calculation_list):
-            fb_key = self.fb_keys[counter]
-            text_1 = (self.fb_calculation_list[fb_key].fb_name + ' (ID:'+ str(fb_key) 
-                      + ') status: ' + self.fb_calculation_list[fb_key].fb_calculation_status)
-            if self.check_box_sim_status.checkState() == 2:
-                config.sim_status_win.text_update(text_1)
-            if (self.fb_calculation_list[fb_key].fb_calculation_status == 'Ready' or
-                self.fb_calculation_list[fb_key].fb_calculation_status == 'Not ready'):
-                exit_simulation = False             
-            counter += 1
-        return exit_simulation
+    def submit_fb_script(self, fb_key, script_name):
+        '''Prepares the inputs of an fb script and submits module.run to the block
+           executor. Returns the future (None if an exception was raised)
+        '''
+        proj = window.project_scenes_list[self.key_index]
+        profile = self.profiler.block(fb_key, self.fb_calculation_list[fb_key].fb_name,
+                                      script_name, self.iteration)
+        input_signals_data = self.prepare_fb_script_inputs(fb_key)
+        if input_signals_data is None:
+            return None
+        profile.mark('inputs')
+        profile.add_signals(input_signals_data)
+        self.block_profiles[fb_key] = profile
+        # Each script receives its own copy of the project settings (the temporary
+        # fb name is specific to each block)
+        settings = dict(proj.design_settings)
+        settings['fb_name'] = self.fb_calculation_list[fb_key].fb_name
+        if self.streaming is not None:
+            settings['stream_state'] = self.streaming.state(fb_key)
+        settings['rng'] = self.random_streams.generator(fb_key, settings)
+        parameters_input = proj.fb_list[fb_key].fb_parameters_list
+        try:
+            future = self.executor.submit(script_name, self.script_paths,
+                                          input_signals_data, parameters_input, settings)
+            profile.mark('import') # Module import (thread mode) and dispatch
+            return future
+        except:
+            text_1 = ('The python script module for FB: '
+                      + str(self.fb_calculation_list[fb_key].fb_name)
+                      + ' could not be successfully loaded' )
+            self.fb_script_error(text_1)
+            return None
+        
+    def show_profile_report(self):
+        '''Displays the profiling summary (sortable table and sim status window) and
+           writes the report files (if config_special.profiling_report_path is set)
+        '''
+        if config_special.profiling_report_path is not None:
+            self.profiler.write_report(config_special.profiling_report_path)
+        if self.check_box_sim_status.checkState() == 2:
+            for text in self.profiler.report_lines(config_special.profiling_status_rows):
+                config.sim_status_win.text_update(text)
+        self.profile_view = ResultsTableGUI()
+        self.profile_view.setWindowTitle('Simulation profile (per functional block)')
+        table = self.profile_view.resultsTable
+        table.setSortingEnabled(False)
+        table.setColumnCount(len(self.profiler.summary_columns))
+        table.setHorizontalHeaderLabels(self.profiler.summary_columns)
+        rows = self.profiler.summary()
+        table.setRowCount(len(rows))
+        for r in range(0, len(rows)):
+            for c in range(0, len(rows[r])):
+                item = QtWidgets.QTableWidgetItem()
+                value = rows[r][c]
+                if isinstance(value, float):
+                    value = float(format(value, '0.4f'))
+                # Numeric values are set as data (sorted as numbers)
+                item.setData(QtCore.Qt.DisplayRole, value)
+                item.setFlags(item.flags() & ~QtCore.Qt.ItemIsEditable)
+                table.setItem(r, c, item)
+        table.setSortingEnabled(True)
+        table.resizeColumnsToContents()
+        self.profile_view.show()
+        
+    def set_fb_running(self, fb_key):
+        self.fb_calculation_list[fb_key].fb_calculation_status = 'Ready'
+        fb_name = self.fb_calculation_list[fb_key].fb_name
+        text_1 = 'Running calculation for ' + fb_name + ' (ID:'+ str(fb_key)+ ')'
+        self.trace_message(fb_key, text_1)
+        
+    def trace_message(self, fb_key, text):
+        '''Per-block tracing message: recorded in the simulation event log and displayed
+           in the sim status window if config_special.sim_status_trace is True
+        '''
+        self.sim_log.add('trace', text, fb_key)
+        if (config_special.sim_status_trace == True
+                and self.check_box_sim_status.checkState() == 2):
+            config.sim_status_win.text_update(text)
+    
+    def set_fb_complete(self, fb_key, total_calculations):
+        self.fb_calculation_list[fb_key].fb_calculation_status = 'Complete'
+        self.update_simulation_progress(total_calculations)
+        self.scheduler.block_complete(fb_key)
+        
+    def highlight_fb_error(self, fb_key):
+        config.stop_sim_flag = True
+        # Highlight fb which has error in project scene
+        self.fb_error = self.fb_calculation_view_list[fb_key]
+        style = set_line_type('DashLine')
+        self.fb_error.setPen(QtGui.QPen(QtGui.QBrush(QtGui.QColor('#ff0000')), 1, style))                   
+        self.fb_error.setBrush(QtGui.QBrush(QtGui.QColor(255, 0, 0, 50)))
+        self.fb_error.fb_error_state = True
+            
+    def set_unable_to_complete(self, fb_key, total_calculations):
+        # MV 20.01.r3 27-Jul-20: Include unable to calculate 
+        # components in the total calculation
+        self.update_simulation_progress(total_calculations)
+        self.t += 1
+        status = 'Unable to complete calculation'
+        self.fb_calculation_list[fb_key].fb_calculation_status = status
+        text_1 = (self.fb_calculation_list[fb_key].fb_name + ' (ID:' + str(fb_key) 
+                  + ') status set to ' + status)
+        self.sim_log.add('warning', text_1, fb_key)
+        if self.check_box_sim_status.checkState() == 2:
+            config.sim_status_win.text_update(text_1)
+        
+    def update_simulation_progress(self, total_calculations):
+        self.s += 1
+        self.s_iterations += 1
+        prog = self.s_iterations/total_calculations
+        if self.check_box_sim_status.checkState() == 2:
+            config.sim_status_win.simulatedBlocks.setText(str(self.s))
+            config.sim_status_win.update_progress_bar(100*float(prog))
+        window.tableWidget3.item(2, 1).setText(format(np.round(prog*100), 'n'))
+        if self.gui_throttle.pump(): # Throttled GUI update (events have been processed)
+            window.tableWidget3.resizeColumnsToContents()
     
     def sim_pause(self):
         msg_sim_paused = 'Simulation has been paused - press pause action to continue'        
@@ -3124,509 +3367,242 @@ class SystemLabMainApp(QtWidgets.QMainWindow, Ui_MainWindow):
         config.status.setText(msg_sim_paused)
         config.app.processEvents()                                                         
     
-    def next_fb(self, key):
-        self.fb_counter += 1
-        if self.fb_counter > len(self.fb_calculation_list) - 1:
-            self.fb_counter = 0
-        key = self.fb_keys[self.fb_counter]
-        fb_name = self.fb_calculation_list[key].fb_name
-        text_1 = 'Proceeding to ' + fb_name + ' (ID:' + str(key) + ')'
-        if self.check_box_sim_status.checkState() == 2:
-            config.sim_status_win.text_update(text_1)
-        return key
-    
-    def check_calculation_status(self, fb_key):
-        if (self.fb_calculation_list[fb_key].fb_calculation_status == 'Complete' 
-        or self.fb_calculation_list[fb_key].fb_calculation_status == 'Unable to complete calculation'):
-            return(self.fb_calculation_list[fb_key].fb_calculation_status)
-        else:
-            tab_index, key_index = retrieve_current_project_key_index()
-            port_list = window.project_scenes_list[key_index].fb_list[fb_key].fb_ports_list
-            length_port_list = len(port_list) 
-            # Assume first that component is "Ready" and then change its status
-            # if this is not the case
-            self.fb_calculation_list[fb_key].fb_calculation_status = 'Ready'          
-            # Check all IN ports for data 
-            # IF at least one port has no data, then set status to "Not ready"
-            for i in range(0, length_port_list):
-                direction = port_list[i][3]
-                data_ready = port_list[i][6]
-                if direction == 'In' and data_ready == False:
-                    self.fb_calculation_list[fb_key].fb_calculation_status = 'Not ready'                   
-            # MV 20.01.r3 8-Jun-20 Check to see if all IN ports are disabled
-            count_in = 0
-            count_disabled = 0
-            for i in range(0, length_port_list):
-                if 'In' in port_list[i][3]: 
-                    count_in += 1
-                if 'Disabled' in port_list[i][4]: 
-                    count_disabled += 1
-            if count_in > 0 and count_disabled == count_in: # All IN ports are disabled
-                self.fb_calculation_list[fb_key].fb_calculation_status = 'Unable to complete calculation'
-            # Update status of functional block
-            fb_name = self.fb_calculation_list[fb_key].fb_name 
-            fb_status = self.fb_calculation_list[fb_key].fb_calculation_status
-            text_1 = fb_name + ' (ID:' + str(fb_key) + ') status: ' + fb_status
-            if self.check_box_sim_status.checkState() == 2:
-                config.sim_status_win.text_update(text_1)
-            return(self.fb_calculation_list[fb_key].fb_calculation_status)
-        
     def run_fb_script(self, fb_key):
         start_time = time_data.time()
         self.fb_script_state = True
-        while True: # Program will break once all routines have been completed or if an
-                    # exception is raised (simulation will also be halted for the latter)                    
-            try: # MV 20.01.r3 22-Jul-20
-                tab_index, key_index = retrieve_current_project_key_index()
-                proj = window.project_scenes_list[key_index]
-                fb_ports = proj.fb_list[fb_key].fb_ports_list
-                length_port_list = len(fb_ports)
-                if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.currentBlockName.setText(self.fb_calculation_list[fb_key].fb_name)
-                self.time = proj.design_settings['time_window']
-                self.num_samples = int(round(proj.design_settings['num_samples']))
-                self.num_sym = 100
-                #Prepare input signals data===================================================
-                input_signals_data = []
-                in_sig = 0
-                for i in range(0, length_port_list):
-                    portID = fb_ports[i][0]
-                    direction = fb_ports[i][3]
-                    connected = fb_ports[i][5]
-                    data_ready = fb_ports[i][6]
-                    signal_type = fb_ports[i][4]
-                    port = proj.fb_design_view_list[fb_key].ports[portID]
-                    port_sig = proj.fb_design_view_list[fb_key].signals[portID]
-                    #Process input ports that have data available (feedback and non-feedback)
-                    if ((direction == 'In' or direction == 'In-Feedback')
-                         and (connected == True) and (data_ready == True)):
-                        #Electrical signal
-                        if signal_type == 'Electrical':
-                            if port_sig.time_array.size != 0:
-                                t = port_sig.time_array
-                                a = port_sig.amplitude_array 
-                                noise = port_sig.noise_array
-                            else:
-                                t = np.linspace(0, self.time, self.num_samples)
-                                a = np.zeros(self.num_samples)
-                                noise = np.zeros(self.num_samples)
-                            carrier = port_sig.carrier
-                            fs = port_sig.sample_rate                   
-                            signal_list = [portID, signal_type, carrier,
-                                           fs, t, a, noise, carrier]
-                            input_signals_data.append(signal_list)               
-                            if (self.check_box_port_data.checkState() == 0
-                                and self.iteration == self.iterations_sim):
-                                port_sig.time_array = np.array([])
-                                port_sig.amplitude_array  = np.array([])
-                                port_sig.noise_array = np.array([])  
-                        #Optical signal
-                        if signal_type == 'Optical':
-                            signals_optical = []
-                            if port_sig.time_array.size != 0:
-                                t = port_sig.time_array
-                                noise_freq = port_sig.psd_array #MV 20.01.r1 26 Sep 2019
-                                #MV - Update (20.01.r1 8-Sep-19) Added for loops to manage 
-                                #multiple optical channels------------------------------------
-                                for ch in range(0, len(port_sig.wave_channel_group)):
-                                    a = port_sig.wave_channel_group[ch+1].envelope_array 
-                                    noise_time = port_sig.wave_channel_group[ch+1].noise_array
-                                    #noise_freq = port_sig.wave_channel_group[ch+1].psd_array
-                                    wave = port_sig.wave_channel_group[ch+1].wave_channel
-                                    wave_key = port_sig.wave_channel_group[ch+1].wave_key
-                                    jones = port_sig.wave_channel_group[ch+1].jones_vector  
-                                    signal_optical = [wave_key, wave, jones, a, noise_time, noise_freq]
-                                    signals_optical.append(signal_optical)                                
-                            else:
-                                t = np.linspace(0, self.time, self.num_samples)
-                                a = np.zeros(self.num_samples)
-                                noise_time = np.zeros(self.num_samples)
-                                noise_freq = np.array([np.zeros(20), np.zeros(20)])
-                                wave = port_sig.wave_channel_group[1].wave_channel
-                                wave_key = port_sig.wave_channel_group[1].wave_key
-                                jones = port_sig.wave_channel_group[1].jones_vector                         
-                                signal_optical = [wave_key, wave, jones, a, noise_time]
-                                signals_optical.append(signal_optical)
-                            fs  = port_sig.sample_rate
-                            signal_list = [portID, signal_type, fs, t, noise_freq, signals_optical]
-                            
-                            input_signals_data.append(signal_list)           
-                            if (self.check_box_port_data.checkState() == 0
-                                and self.iteration == self.iterations_sim):
-                                port_sig.time_array = np.array([])
-                                port_sig.psd_array = np.array([])
-                                for ch in range(0, len(port_sig.wave_channel_group)):
-                                    port_sig.wave_channel_group[ch+1].envelope_array = np.array([])
-                                    port_sig.wave_channel_group[ch+1].noise_array = np.array([])
-                                    #port_sig.wave_channel_group[ch+1].psd_array = np.array([])
-                                    
-                        #Digital signal
-                        if signal_type == 'Digital':
-                            if port_sig.time_array.size != 0:
-                                t = port_sig.time_array
-                                a = port_sig.discrete_array 
-                            else:
-                                t = np.linspace(0, self.time, self.num_samples)
-                                a = np.zeros(self.num_sym)
-                            sym_rate = port_sig.symbol_rate
-                            b_rate = port_sig.bit_rate
-                            N = port_sig.order
-                            signal_list = [portID, signal_type, sym_rate, b_rate, N, t, a]
-                            input_signals_data.append(signal_list)
-                            if (self.check_box_port_data.checkState() == 0
-                                and self.iteration == self.iterations_sim):
-                                port_sig.time_array = np.array([])
-                                port_sig.discrete_array  = np.array([])
-                        #Analog signal
-                        if (signal_type == 'Analog (1)' or signal_type == 'Analog (2)'
-                        or signal_type == 'Analog (3)'):
-                            if port_sig.time_array.size != 0:
-                                t = port_sig.time_array
-                                a = port_sig.amplitude_array 
-                            else:
-                                t = np.linspace(0, self.time, self.num_samples)
-                                a = np.zeros(self.num_samples)
-                            fs = port_sig.sample_rate   
-                            signal_list = [portID, signal_type, fs, t, a]
-                            input_signals_data.append(signal_list)
-                            if (self.check_box_port_data.checkState() == 0
-                                and self.iteration == self.iterations_sim):
-                                port_sig.time_array = np.array([])
-                                port_sig.amplitude_array  = np.array([])
-                        if self.check_box_port_data.checkState() == 2:
-                            port.iterations_input_signals[self.iteration] = input_signals_data[in_sig]               
-                        in_sig += 1
-            except: # MV 20.01.r3 22-Jul-20
-                e0 = sys.exc_info() [0]
-                e1 = sys.exc_info() [1]
-                msg_err = ('Error/exception while loading input signals for FB: '
-                           + str(self.fb_calculation_list[fb_key].fb_name))
-                if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#aa0000')))
-                    config.sim_status_win.text_update(msg_err)
-                    config.sim_status_win.text_update(str(e0) + ' '+ str(e1))
-                    config.sim_status_win.text_update(str(traceback.format_exc()))
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#000000')))     
-                config.status.setText(msg_err)
-                config.app.processEvents()
-                self.reset_simulation_action_buttons()
-                self.re_enable_tabs() # MV 20.01.r3 28-Aug-20
-                config.stop_sim_flag = True
-                self.fb_script_state = False
-                break
-                
-            '''====FUNCTIONAL BLOCK SCRIPT CALCULATION - START========================='''
-            #INPUT: input_signals_data, parameters_input, project settings
-            #RETURN: output signals, parameters, results
-            sys.path.clear()  
-            # MV 20.01.r3 27-May-20 (Re-insert path for current working directory)
-            sys.path.append(str(os.getcwd())) 
-            #Load file paths for default script folders
-            for i in range(0, len(config_lib.scripts_path_list)):
-                #script_path =  str(root_path) + str(config_lib.scripts_path_list[i])
-                #sys.path.append(script_path)
-                # MV 20.01.r3 28-May-20
-                script_path = os.path.join(root_path, 'syslab_fb_scripts', 
-                                            str(config_lib.scripts_path_list[i]))
-                script_path = os.path.abspath(script_path)
-                sys.path.append(script_path)
-                
-            #Load file paths for project script folders
-            path1 = proj.design_settings['file_path_1']
-            path2 = proj.design_settings['file_path_2']
-            
-            path1 = os.path.abspath(path1)
-            path2 = os.path.abspath(path2)
-            
-            sys.path.append(path1)
-            sys.path.append(path2)
-
-            #Retrieve script name
-            script_name = str(proj.fb_list[fb_key].fb_script_module)
-            try: #Import script module. If unsuccessful, issue error message and exit 
-                 #fb_script routine (simulation stop status flag will be set to True)
-                module = __import__(script_name)
-                
-                #module = importlib.import_module(script)
-                
-                importlib.reload(module)
-                text_1 = 'Loading ' + str(module)
-                if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.text_update(text_1)
-                config.status.setText(text_1)
-                config.app.processEvents()
-                
-            except:
-                e0 = sys.exc_info() [0]
-                e1 = sys.exc_info() [1]
-                text_2 = ('The python script module for FB: '
-                          + str(self.fb_calculation_list[fb_key].fb_name)
-                          + ' could not be successfully loaded' )
-                if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#aa0000')))
-                    config.sim_status_win.text_update(text_2)
-                    config.sim_status_win.text_update(str(e0) + ' '+ str(e1))
-                    config.sim_status_win.text_update(str(traceback.format_exc()))
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#000000')))    
-                config.status.setText(text_2)
-                config.app.processEvents()
-                self.reset_simulation_action_buttons()
-                self.re_enable_tabs() # MV 20.01.r3 28-Aug-20
-                config.stop_sim_flag = True
-                self.fb_script_state = False
-                break
-            
-            settings = proj.design_settings
-            # MV 20.01.r3 13-Jun-20 Add temporary information (fb name) to
-            # settings dict
-            settings['fb_name'] = self.fb_calculation_list[fb_key].fb_name
-            
-            parameters_input = proj.fb_list[fb_key].fb_parameters_list
-            try:#Run fb_script (module.run). If unsuccessful, issue error message and exit 
-                #fb_script routine (simulation stop status flag will also be set to True)
-                text_3 = 'Initiating module.run...'
-                if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.text_update(text_3)
-                config.status.setText(text_3)
-                config.app.processEvents()
-                #font_bold = QtGui.QFont("Arial", 8, QtGui.QFont.Bold)
-                #config.sim_status_win.textEdit.setCurrentFont(font_bold)
-                config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#00007f')))
-                '''-RUN FB SCRIPT-------------------------------------------'''
-                signals_data, parameters, results = module.run(input_signals_data, 
-                                                    parameters_input, settings)
-                '''---------------------------------------------------------'''
-                #config.sim_status_win.textEdit.setCurrentFont(font_normal)
-                config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#000000')))
-            except:
-                e0 = sys.exc_info() [0]
-                e1 = sys.exc_info() [1]
-                msg_err = ('Error/exception while calculating python script module for FB: '
-                           + str(self.fb_calculation_list[fb_key].fb_name))
-                if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.textEdit.setCurrentFont(font_sim_status_normal) #MV 20.01.r3 2-Jun-20
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#aa0000')))
-                    config.sim_status_win.text_update(msg_err)
-                    config.sim_status_win.text_update(str(e0) + ' '+ str(e1))
-                    config.sim_status_win.text_update(str(traceback.format_exc()))
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#000000')))     
-                config.status.setText(msg_err)
-                config.app.processEvents()
-                self.reset_simulation_action_buttons()
-                self.re_enable_tabs() # MV 20.01.r3 28-Aug-20
-                config.stop_sim_flag = True
-                self.fb_script_state = False
-                break
-            # MV 20.01.r3 13-Jun-20 Remove temporary key from settings dict
+        tab_index, key_index = retrieve_current_project_key_index()
+        proj = window.project_scenes_list[key_index]
+        if self.check_box_sim_status.checkState() == 2:
+            config.sim_status_win.currentBlockName.setText(self.fb_calculation_list[fb_key].fb_name)
+        #Retrieve script name
+        script_name = str(proj.fb_list[fb_key].fb_script_module)
+        profile = self.profiler.block(fb_key, self.fb_calculation_list[fb_key].fb_name,
+                                      script_name, self.iteration)
+        #Prepare input signals data===================================================
+        input_signals_data = self.prepare_fb_script_inputs(fb_key)
+        if input_signals_data is None:
+            return self.fb_script_state
+        profile.mark('inputs')
+        profile.add_signals(input_signals_data)
+            
+        '''====FUNCTIONAL BLOCK SCRIPT CALCULATION - START========================='''
+        #INPUT: input_signals_data, parameters_input, project settings
+        #RETURN: output signals, parameters, results
+        try: #Import script module. If unsuccessful, issue error message and exit 
+             #fb_script routine (simulation stop status flag will be set to True)
+            module = engine.load_script_module(script_name)
+            text_1 = 'Loading ' + str(module)
+            self.trace_message(fb_key, text_1)
+            config.status.setText(text_1)
+            config.app.processEvents()
+            profile.mark('import')
+        except:
+            text_2 = ('The python script module for FB: '
+                      + str(self.fb_calculation_list[fb_key].fb_name)
+                      + ' could not be successfully loaded' )
+            self.fb_script_error(text_2)
+            return self.fb_script_state
+        
+        # Incremental re-simulation: no changes since the previous run
+        cached = self.cached_fb_outputs(fb_key)
+        if cached is not None:
+            signals_data, parameters, results, data_tables = cached
+            config.data_tables.update(data_tables)
+            self.trace_message(fb_key, 'No changes - outputs of previous run are reused')
+            self.load_fb_script_outputs(fb_key, signals_data, parameters, results)
+            profile.mark('outputs')
+            return self.fb_script_state
+        if self.result_cache is not None:
+            data_tables_snapshot = engine.data_tables_snapshot()
+        
+        settings = proj.design_settings
+        # MV 20.01.r3 13-Jun-20 Add temporary information (fb name) to
+        # settings dict
+        settings['fb_name'] = self.fb_calculation_list[fb_key].fb_name
+        if self.streaming is not None: # Stream state of the block (streaming mode)
+            settings['stream_state'] = self.streaming.state(fb_key)
+        # Random number generator of the block calculation
+        settings['rng'] = self.random_streams.generator(fb_key, settings)
+        
+        parameters_input = proj.fb_list[fb_key].fb_parameters_list
+        try:#Run fb_script (module.run). If unsuccessful, issue error message and exit 
+            #fb_script routine (simulation stop status flag will also be set to True)
+            text_3 = 'Initiating module.run...'
+            self.trace_message(fb_key, text_3)
+            config.status.setText(text_3)
+            config.app.processEvents()
+            config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#00007f')))
+            '''-RUN FB SCRIPT-------------------------------------------'''
+            signals_data, parameters, results = module.run(input_signals_data, 
+                                                parameters_input, settings)
+            '''---------------------------------------------------------'''
+            profile.mark('run')
+            config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#000000')))
+        except:
             settings.pop('fb_name')
-            
-            '''====FUNCTIONAL BLOCK SCRIPT CALCULATION-END============================='''       
-            #Save returned signals and load into signals object of associated ports
-            try:
-                if len(signals_data) > 0:
-                    if self.check_box_sim_status.checkState() == 2:
-                        config.sim_status_win.text_update('Preparing signals for output ports...')
-                    self.error_loading_signals_flag = False
-                    for i in range(0, len(signals_data)):
-                        port_sig = proj.fb_design_view_list[fb_key].signals[signals_data[i][0]]
-                        port = proj.fb_design_view_list[fb_key].ports[signals_data[i][0]]
-                    
-                        if (port.port_direction == "In" 
-                            or port.port_direction == "In-Feedback"
-                            or port.signal_type == 'Disabled'): 
-                            # MV 20.01.r1 - Added condition for 'Disabled'
-                            # Set error flag to stop simulation (incorrect port type
-                            # has been specified)
-                            self.error_loading_signals_flag = True
-                            break
-                        
-                        if port.connected == True:
-                            link_key = port.link_key
-                            link = proj.signal_links_list[link_key]
-                            d_port_fb_key = link.fb_end_key
-                            d_port_ID = link.end_port_ID
-                        
-                        #Electrical signal (IF)===========================================
-                        if signals_data[i][1] == 'Electrical':
-                            port_sig.carrier = signals_data[i][2]
-                            port_sig.sample_rate = signals_data[i][3]
-                            port_sig.time_array = signals_data[i][4]
-                            port_sig.amplitude_array = signals_data[i][5]
-                            port_sig.noise_array = signals_data[i][6]
-                            #Check if port is linked to another port and copy data to downstream port
-                            if port.connected == True:
-                                d_port_sig_elec = proj.fb_design_view_list[d_port_fb_key].signals[d_port_ID]
-                                d_port_sig_elec.carrier = signals_data[i][2]
-                                d_port_sig_elec.sample_rate = signals_data[i][3]
-                                d_port_sig_elec.time_array = signals_data[i][4]
-                                d_port_sig_elec.amplitude_array = signals_data[i][5]
-                                d_port_sig_elec.noise_array = signals_data[i][6]
-                                proj.fb_list[d_port_fb_key].fb_ports_list[d_port_ID-1][6] = True 
-                            #If final iteration AND save port data is off,
-                            #delete data arrays associated with current port
-                            if (self.check_box_port_data.checkState() == 0 
-                                and self.iteration == self.iterations_sim):
-                                port_sig.time_array = np.array([])
-                                port_sig.amplitude_array  = np.array([])
-                                port_sig.noise_array = np.array([])
-                            
-                        #Optical signal (IF)==================================================
-                        if signals_data[i][1] == 'Optical':                           
-                            port_sig.sample_rate = signals_data[i][2]
-                            port_sig.time_array = signals_data[i][3]  
-                            port_sig.psd_array = signals_data[i][4] #MV 20.01.r1 26-Sep-19
-                            #Update (20.01.r1 8-Sep-19) Added for loops to manage multiple
-                            #optical channels---------------------------------------------
-                            sig = signals_data[i][5] #MV 20.01.r1 - previously [i][4]
-                            for ch in range(0, len(sig)):
-                                channel_current = signls.SignalAnalogOptical(sig[ch][0], 
-                                                  sig[ch][1], sig[ch][2], sig[ch][3],
-                                                  sig[ch][4])
-                                port_sig.wave_channel_group[ch+1] = channel_current
-                            
-                            #Check if port is linked to another port and copy data to downstream port
-                            if port.connected == True:   
-                                d_port_sig_opt = proj.fb_design_view_list[d_port_fb_key].signals[d_port_ID]
-                                #Reset to empty (MV - Fix 20.01.r1 8-Sep-19) - Previous
-                                #channel group data was not being overwritten for 
-                                #downstream port------------------------------------------
-                                d_port_sig_opt.wave_channel_group = {} 
-                                #---------------------------------------------------------
-                                d_port_sig_opt.sample_rate = signals_data[i][2]
-                                d_port_sig_opt.time_array = signals_data[i][3]
-                                d_port_sig_opt.psd_array = signals_data[i][4] #MV 20.01.r1 26-Sep-19
-                                
-                                #MV - Update (20.01.r1 8-Sep-19) Added for loops to manage multiple
-                                #optical channels---------------------------------------------                           
-                                sig = signals_data[i][5] #MV 20.01.r1 - previously [i][4]
-                                for ch in range(0, len(sig)):
-                                    channel_current = signls.SignalAnalogOptical(sig[ch][0], 
-                                                      sig[ch][1], sig[ch][2], sig[ch][3],
-                                                      sig[ch][4])
-                                    d_port_sig_opt.wave_channel_group[ch+1] = channel_current
-                                proj.fb_list[d_port_fb_key].fb_ports_list[d_port_ID-1][6] = True 
-                            #If final iteration AND save port data is off,
-                            #delete data arrays associated with current port
-                            if (self.check_box_port_data.checkState() == 0
-                                and self.iteration == self.iterations_sim):
-                                port_sig.time_array = np.array([]) 
-                                port_sig.psd_array = np.array([]) #MV - Update (20.01.r1 26-Sep-19)
-                                for ch in range(0, len(sig)): #MV - Update (20.01.r1 8-Sep-19)
-                                    port_sig.wave_channel_group[ch+1].envelope_array  = np.array([])
-                                    port_sig.wave_channel_group[ch+1].noise_array = np.array([])
-                                    #port_sig.wave_channel_group[ch+1].psd_array = np.array([])                               
-                            
-                        #Digital signal (IF)==================================================
-                        if signals_data[i][1] == 'Digital':
-                            port_sig.symbol_rate = signals_data[i][2]
-                            port_sig.bit_rate = signals_data[i][3]
-                            port_sig.order = signals_data[i][4]
-                            port_sig.time_array = signals_data[i][5]
-                            port_sig.discrete_array = signals_data[i][6]
-                            #Check if port is linked to another port and
-                            #copy data to downstream port
-                            if port.connected == True:
-                                d_port_sig_dgt = proj.fb_design_view_list[d_port_fb_key].signals[d_port_ID]
-                                d_port_sig_dgt.symbol_rate = signals_data[i][2]
-                                d_port_sig_dgt.bit_rate = signals_data[i][3]
-                                d_port_sig_dgt.order = signals_data[i][4]
-                                d_port_sig_dgt.time_array = signals_data[i][5]
-                                d_port_sig_dgt.discrete_array = signals_data[i][6]
-                                proj.fb_list[d_port_fb_key].fb_ports_list[d_port_ID-1][6] = True 
-                            #If final iteration AND save port data is off, 
-                            # delete data arrays associated with current port
-                            if (self.check_box_port_data.checkState() == 0
-                                and self.iteration == self.iterations_sim):
-                                port_sig.time_array = np.array([])
-                                port_sig.discrete_array  = np.array([])
-                                
-                        #Analog signal (IF)===================================================
-                        if (signals_data[i][1] == 'Analog (1)' or signals_data[i][1] == 'Analog (2)'
-                            or signals_data[i][1] == 'Analog (3)'):
-                            port_sig.sample_rate = signals_data[i][2]
-                            port_sig.time_array = signals_data[i][3]
-                            port_sig.amplitude_array = signals_data[i][4]
-                            #Check if port is linked to another port and copy data to downstream port
-                            if port.connected == True:
-                                d_port_sig_analog = proj.fb_design_view_list[d_port_fb_key].signals[d_port_ID]
-                                d_port_sig_analog.sample_rate = signals_data[i][2]
-                                d_port_sig_analog.time_array = signals_data[i][3]
-                                d_port_sig_analog.amplitude_array = signals_data[i][4]
-                                proj.fb_list[d_port_fb_key].fb_ports_list[d_port_ID-1][6] = True 
-                            #If final iteration AND save port data is off,
-                            #delete data arrays associated with current port
-                            if (self.check_box_port_data.checkState() == 0 
-                                and self.iteration == self.iterations_sim):
-                                port_sig.time_array = np.array([])
-                                port_sig.amplitude_array  = np.array([])
-                    
-                        #Allocate return signals to dictionary (for iterations)
-                        if self.check_box_port_data.checkState() == 2:
-                            sig_data = proj.fb_design_view_list[fb_key].ports[signals_data[i][0]]
-                            sig_data.iterations_return_signals[self.iteration] = signals_data[i]
-                    signals_data = []
-                    
-            except:
-                e0 = sys.exc_info() [0]
-                e1 = sys.exc_info() [1]
-                msg_err = ('Error/exception while loading return signals for FB: '
-                           + str(self.fb_calculation_list[fb_key].fb_name))
-                if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#aa0000')))
-                    config.sim_status_win.text_update(msg_err)
-                    config.sim_status_win.text_update(str(e0) + ' '+ str(e1))
-                    config.sim_status_win.text_update(str(traceback.format_exc()))
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#000000')))     
-                config.status.setText(msg_err)
-                config.app.processEvents()
-                self.reset_simulation_action_buttons()
-                self.re_enable_tabs() # MV 20.01.r3 28-Aug-20
-                config.stop_sim_flag = True
-                self.fb_script_state = False
-                break
-            #Check if an error resulted during the loading of the signal data    
-            if self.error_loading_signals_flag == True:
-                text_5 = ('Error preparing the output signals for FB: '
-                          + str(self.fb_calculation_list[fb_key].fb_name))
-                text_6 = ( 'Incorrect port ID specified. Attempted to allocate output' +
-                           ' signal data to an input port or to a disabled port.' )
-                if self.check_box_sim_status.checkState() == 2:
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#aa0000')))
-                    config.sim_status_win.text_update(text_5)
-                    config.sim_status_win.text_update(text_6)
-                    config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#000000')))                                                                       
-                config.status.setText(text_6)
-                config.app.processEvents()
-                self.reset_simulation_action_buttons()
-                self.re_enable_tabs() # MV 20.01.r3 28-Aug-20
-                config.stop_sim_flag = True
-                self.fb_script_state = False
-                break
-            
-            #Save parameters to the fb_parameters_list
-            proj.fb_list[fb_key].fb_parameters_list = parameters       
-            #Allocate parameters to dictionary 
-            #(in case some were changed by script as part of iterations)
-            proj.fb_design_view_list[fb_key].iterations_parameters[self.iteration] = parameters                   
-            #Save results to the fb_results_list          
-            proj.fb_list[fb_key].fb_results_list = results               
-            #Allocate results to dictionary (for iterations)
-            proj.fb_design_view_list[fb_key].iterations_results[self.iteration] = results
-        
-            #If save data check box is not selected, then port signal data is deleted
-            if (self.check_box_port_data.checkState() == 0 
-                and self.iteration == self.iterations_sim):
-                input_signals_data = []
-                signals_data = []
-            break #End of fb_script routines (exit While True)
+            settings.pop('stream_state', None)
+            settings.pop('rng')
+            msg_err = ('Error/exception while calculating python script module for FB: '
+                       + str(self.fb_calculation_list[fb_key].fb_name))
+            self.fb_script_error(msg_err)
+            return self.fb_script_state
+        # MV 20.01.r3 13-Jun-20 Remove temporary key from settings dict
+        settings.pop('fb_name')
+        settings.pop('stream_state', None)
+        settings.pop('rng')
+        '''====FUNCTIONAL BLOCK SCRIPT CALCULATION-END============================='''
+        
+        if (self.load_fb_script_outputs(fb_key, signals_data, parameters, results)
+                and self.result_cache is not None):
+            self.result_cache.store(fb_key, self.iteration, signals_data, parameters,
+                                    results, engine.data_tables_changes(data_tables_snapshot))
+        profile.add_signals(signals_data)
+        profile.mark('outputs')
         end_time = time_data.time()
         time_elapsed = end_time - start_time
         time_elapsed = np.round(time_elapsed, 3)
-        if self.check_box_sim_status.checkState() == 2:
-            config.sim_status_win.text_update('Time to complete script: ' 
-                                              + str(time_elapsed) + ' sec')
+        self.trace_message(fb_key, 'Time to complete script: ' + str(time_elapsed) + ' sec')
         return self.fb_script_state # Return status of fb_script routine (has an exception
                                     # been raised?)
+    
+    def reset_port_signal_history(self, fb_key):
+        '''Resets the iteration dictionaries of the port signals of a block (replaced by
+           disk-backed port histories if config_special.signal_history_on_disk is True)
+           and the tool tip metrics of the ports
+        '''
+        length_port_list = len(self.fb_calculation_list[fb_key].fb_ports_list)
+        for p in range(1, length_port_list+1):
+            port = self.fb_calculation_view_list[fb_key].ports[p]
+            if self.signal_history is not None:
+                port.iterations_input_signals = self.signal_history.port(
+                                                    str(fb_key) + '_' + str(p) + '_in')
+                port.iterations_return_signals = self.signal_history.port(
+                                                    str(fb_key) + '_' + str(p) + '_out')
+            else:
+                port.iterations_input_signals = {}
+                port.iterations_return_signals = {}
+            port.clear_signal_metrics()
+    
+    def cached_fb_outputs(self, fb_key):
+        '''Incremental re-simulation: returns the outputs of the previous run (signals
+           data, parameters, results, data tables) if the block and its upstream
+           blocks are unchanged (None if the block has to be calculated)
+        '''
+        if self.result_cache is None:
+            return None
+        proj = window.project_scenes_list[self.key_index]
+        try:
+            self.result_cache.block_key(fb_key, self.iteration, proj.fb_list[fb_key],
+                                        proj.design_settings)
+        except: # Script module not found (reported when the block is calculated)
+            return None
+        return self.result_cache.lookup(fb_key, self.iteration)
+    
+    def prepare_fb_script_inputs(self, fb_key):
+        '''Returns the input signals data for the fb script (None if an exception
+           was raised)
+        '''
+        try: # MV 20.01.r3 22-Jul-20
+            tab_index, key_index = retrieve_current_project_key_index()
+            proj = window.project_scenes_list[key_index]
+            fb_view = proj.fb_design_view_list[fb_key]
+            self.time = proj.design_settings['time_window']
+            self.num_samples = int(round(proj.design_settings['num_samples']))
+            input_signals_data = engine.prepare_input_signals(proj.fb_list[fb_key],
+                                        fb_view.signals, self.time, self.num_samples,
+                                        self.clear_port_data())
+            if self.check_box_port_data.checkState() == 2:
+                for signal_list in input_signals_data:
+                    port = fb_view.ports[signal_list[0]]
+                    port.iterations_input_signals[self.iteration] = signal_list
+                    port.clear_signal_metrics(self.iteration)
+            return input_signals_data
+        except: # MV 20.01.r3 22-Jul-20
+            msg_err = ('Error/exception while loading input signals for FB: '
+                       + str(self.fb_calculation_list[fb_key].fb_name))
+            self.fb_script_error(msg_err)
+            return None
+        
+    def load_fb_script_outputs(self, fb_key, signals_data, parameters, results):
+        '''Saves returned signals (loads them into the signal objects of the associated
+           ports), parameters and results of the fb script. Returns False if an
+           exception was raised
+        '''
+        tab_index, key_index = retrieve_current_project_key_index()
+        proj = window.project_scenes_list[key_index]
+        signals_loaded = True
+        try:
+            if len(signals_data) > 0:
+                self.trace_message(fb_key, 'Preparing signals for output ports...')
+                fb_signals = {}
+                for key in proj.fb_design_view_list:
+                    fb_signals[key] = proj.fb_design_view_list[key].signals
+                signals_loaded = engine.load_output_signals(fb_key, signals_data,
+                                        proj.fb_list, fb_signals,
+                                        self.scheduler.downstream_ports,
+                                        self.clear_port_data())
+                #Allocate return signals to dictionary (for iterations)
+                if signals_loaded and self.check_box_port_data.checkState() == 2:
+                    for i in range(0, len(signals_data)):
+                        sig_data = proj.fb_design_view_list[fb_key].ports[signals_data[i][0]]
+                        sig_data.iterations_return_signals[self.iteration] = signals_data[i]
+                        sig_data.clear_signal_metrics(self.iteration)
+        except:
+            msg_err = ('Error/exception while loading return signals for FB: '
+                       + str(self.fb_calculation_list[fb_key].fb_name))
+            self.fb_script_error(msg_err)
+            return False
+        #Check if an error resulted during the loading of the signal data    
+        if signals_loaded == False:
+            text_5 = ('Error preparing the output signals for FB: '
+                      + str(self.fb_calculation_list[fb_key].fb_name))
+            text_6 = ( 'Incorrect port ID specified. Attempted to allocate output' +
+                       ' signal data to an input port or to a disabled port.' )
+            self.fb_script_error(text_5, text_6)
+            return False
+        
+        #Save parameters to the fb_parameters_list
+        proj.fb_list[fb_key].fb_parameters_list = parameters       
+        #Allocate parameters to dictionary 
+        #(in case some were changed by script as part of iterations)
+        proj.fb_design_view_list[fb_key].iterations_parameters[self.iteration] = parameters                   
+        #Save results to the fb_results_list          
+        proj.fb_list[fb_key].fb_results_list = results               
+        #Allocate results to dictionary (for iterations)
+        proj.fb_design_view_list[fb_key].iterations_results[self.iteration] = results
+        return True
+    
+    def clear_port_data(self):
+        #If final iteration AND save port data is off, port signal data is deleted
+        return (self.check_box_port_data.checkState() == 0 
+                and self.iteration == self.iterations_sim)
+        
+    def fb_script_error(self, msg_err, details=None):
+        '''Reports an error/exception raised while running an fb script and sets the
+           stop simulation flag
+        '''
+        self.sim_log.add('error', msg_err if details is None else msg_err + ' ' + details)
+        if self.check_box_sim_status.checkState() == 2:
+            config.sim_status_win.textEdit.setCurrentFont(font_sim_status_normal) #MV 20.01.r3 2-Jun-20
+            config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#aa0000')))
+            config.sim_status_win.text_update(msg_err)
+            if details is None:
+                e0 = sys.exc_info() [0]
+                e1 = sys.exc_info() [1]
+                config.sim_status_win.text_update(str(e0) + ' '+ str(e1))
+                config.sim_status_win.text_update(str(traceback.format_exc()))
+            else:
+                config.sim_status_win.text_update(details)
+            config.sim_status_win.textEdit.setTextColor((QtGui.QColor('#000000')))
+        if details is None:
+            config.status.setText(msg_err)
+        else:
+            config.status.setText(details)
+        config.app.processEvents()
+        self.reset_simulation_action_buttons()
+        self.re_enable_tabs() # MV 20.01.r3 28-Aug-20
+        config.stop_sim_flag = True
+        self.fb_script_state = False
             
     def update_data_boxes(self, iteration, update): #Previously update_data_boxes(self) 20.01.r1
         tab_index, key_index = retrieve_current_project_key_index()
@@ -3794,7 +3770,8 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
                                 'border_opacity':0.5, 'border_width': 0.75,
                                 'edit_script_path': 'start .\wscite\SciTE -open:',
                                 'project_parameters_filename': 'project_parameters.txt',
-                                'project_config_filename': 'project_config.py'} #MV 20.01.r2 26-Feb-20
+                                'project_config_filename': 'project_config.py', #MV 20.01.r2 26-Feb-20
+                                'independent_iterations': 0, 'random_seed': None}
         self.text_list = {} #Text field data model
         self.text_design_view_list = {} #Text field (QtGraphicsTextItem instances)
         # MV 20.01.r1 31-Oct-19------------------------------
@@ -3812,6 +3789,11 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
         self.fb_parameters_view_list = {} #MV 20.01.r1 New dictionary to hold parameter tables
         #=================================================================================
         
+        # Modification tracking: the generation is increased each time the project is
+        # modified (project_close compares it with the generation of the last open/save)
+        self.generation = 0
+        self.pressed_items = [] # Items (and positions) moved by the mouse
+        
         self.setSceneRect(QtCore.QRectF(0,0,self.design_settings['scene_width'],
                                         self.design_settings['scene_height']))
         
@@ -4067,6 +4049,7 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
                 proj_sc.design_settings['iterations'] = int(iterations)
                 window.tableWidget2.item(0, 1).setText(format(int(iterations), 'n'))
                 window.iterationsSelector.setMaximum(int(iterations))
+                proj_sc.project_modified()
         
         # MV 20.01.r2 26-Feb-20 New feature for accessing project-wide parameters
         if action == edit_proj_parameters_action:
@@ -4291,38 +4274,38 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
         fb_file = os.path.join(root_path, local_dir, str(file_name) + '.slb')
             
         try:
-            dict_list = pickle.load(open(fb_file, 'rb'))
+            template = project_file.fb_template(fb_file)
             #Instantiate new FB and FB design view objects
-            name = dict_list[1][1].fb_name
-            display_name = dict_list[1][1].display_name
-            display_port_name = dict_list[1][1].display_port_name
-            geometry = dict_list[1][1].fb_geometry
-            dim = dict_list[1][1].fb_dim
-            position = dict_list[1][1].fb_position
-            ports = dict_list[1][1].fb_ports_list
-            script = dict_list[1][1].fb_script_module
-            icon_display = dict_list[1][1].fb_icon_display         
-            icon = dict_list[1][1].fb_icon
-            icon_x = dict_list[1][1].fb_icon_x
-            icon_y = dict_list[1][1].fb_icon_y
-            parameters = dict_list[1][1].fb_parameters_list
-            results = dict_list[1][1].fb_results_list
-            text_size = dict_list[1][1].text_size
-            text_length = dict_list[1][1].text_length
-            text_color = dict_list[1][1].text_color
-            text_bold = dict_list[1][1].text_bold
-            text_italic = dict_list[1][1].text_italic
-            color = dict_list[1][1].fb_color
-            color2 = dict_list[1][1].fb_color_2
-            grad = dict_list[1][1].fb_gradient
-            border_color = dict_list[1][1].fb_border_color
-            border_style = dict_list[1][1].fb_border_style
-            text_pos_x = dict_list[1][1].text_pos_x
-            text_pos_y = dict_list[1][1].text_pos_y               
-            port_label_size = dict_list[1][1].port_label_size
-            port_label_bold = dict_list[1][1].port_label_bold
-            port_label_italic = dict_list[1][1].port_label_italic
-            port_label_color = dict_list[1][1].port_label_color
+            name = template.fb_name
+            display_name = template.display_name
+            display_port_name = template.display_port_name
+            geometry = template.fb_geometry
+            dim = template.fb_dim
+            position = template.fb_position
+            ports = template.fb_ports_list
+            script = template.fb_script_module
+            icon_display = template.fb_icon_display         
+            icon = template.fb_icon
+            icon_x = template.fb_icon_x
+            icon_y = template.fb_icon_y
+            parameters = template.fb_parameters_list
+            results = template.fb_results_list
+            text_size = template.text_size
+            text_length = template.text_length
+            text_color = template.text_color
+            text_bold = template.text_bold
+            text_italic = template.text_italic
+            color = template.fb_color
+            color2 = template.fb_color_2
+            grad = template.fb_gradient
+            border_color = template.fb_border_color
+            border_style = template.fb_border_style
+            text_pos_x = template.text_pos_x
+            text_pos_y = template.text_pos_y               
+            port_label_size = template.port_label_size
+            port_label_bold = template.port_label_bold
+            port_label_italic = template.port_label_italic
+            port_label_color = template.port_label_color
 
             proj_sc.fb_list[i] = models.FunctionalBlock(i,
                                     name, display_name, display_port_name, geometry, dim,
@@ -4374,6 +4357,8 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
         samplesNumber = proj_design_settings['num_samples']
         iterationNumber = proj_design_settings['iterations']
         feedbackMode = proj_design_settings['feedback_enabled']
+        independentIterations = proj_design_settings.get('independent_iterations', 0)
+        randomSeed = proj_design_settings.get('random_seed')
         feedbackSegments = proj_design_settings['feedback_segments']
         samplesPerSegment = proj_design_settings['samples_per_segment']
         symbolRate = proj_design_settings['symbol_rate']
@@ -4420,6 +4405,9 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
         project_dialog.projectSegments.setText(str(feedbackSegments))
         project_dialog.samplesPerSegment.setText(str(samplesPerSegment))
         project_dialog.checkBoxFeedback.setCheckState(feedbackMode)
+        project_dialog.checkBoxIndependentIterations.setCheckState(independentIterations)
+        if randomSeed is not None:
+            project_dialog.randomSeed.setText(str(randomSeed))
         project_dialog.projectSymbolRate.setText(str(format(symbolRate, '0.4E')))
         project_dialog.projectSamplesSym.setText(str(format(samplesPerSym, '0.0f'))) # MV 20.01.r3
         project_dialog.maxCalculationAttempts.setText(str(format(max_calculation_attempts, 'n')))
@@ -4450,6 +4438,7 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
         #Display window
         project_dialog.show()
         if project_dialog.exec():           
+            window.project_scenes_list[key_index].project_modified()
             #If project name is changed, update projects list dict and tab title
             new_project_name = project_dialog.projectName.text()
             window.tabWidget.setTabText(tab_index, new_project_name) #Tab title
@@ -4517,6 +4506,8 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
             b_width = float(project_dialog.borderLineWidth.text())
             
             feedback = project_dialog.checkBoxFeedback.checkState()
+            independent_iterations = project_dialog.checkBoxIndependentIterations.checkState()
+            random_seed = project_dialog.randomSeed.text()
             
             max_attempts = project_dialog.maxCalculationAttempts.text()
             edit_script = project_dialog.editScriptPath.text()
@@ -4539,6 +4530,8 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
             d_settings['border_width'] = b_width
             
             d_settings['feedback_enabled'] = int(feedback)
+            d_settings['independent_iterations'] = int(independent_iterations)
+            d_settings['random_seed'] = engine.project_seed({'random_seed': random_seed})
             
             d_settings['max_calculation_attempts'] = int(max_attempts)
             d_settings['edit_script_path'] = str(edit_script)
@@ -4604,6 +4597,7 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
             # background after color selection
             proj_view.setBackgroundBrush(QtGui.QBrush(QtGui.QColor(color)))
             proj.design_settings['back_color'] = color.name()
+            proj.project_modified()
                   
     def save_image_scene(self, proj_view):
         view_x = proj_view.viewport().width()
@@ -4620,9 +4614,33 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
         window.sceneMouseMoveEvent(mouseEvent)
         super(DesignLayoutScene, self).mouseMoveEvent(mouseEvent)  
     
+    def mousePressEvent(self, mouseEvent): #QT specific method
+        super(DesignLayoutScene, self).mousePressEvent(mouseEvent)
+        items = self.selectedItems()
+        if self.mouseGrabberItem() is not None: # e.g. line-arrow anchors
+            items.append(self.mouseGrabberItem())
+        self.pressed_items = [(item, item.pos()) for item in items]
+    
     def mouseReleaseEvent(self, mouseEvent): #QT specific method
         window.sceneMouseReleaseEvent(mouseEvent)
         super(DesignLayoutScene, self).mouseReleaseEvent(mouseEvent)
+        for item, pos in self.pressed_items:
+            if item.pos() != pos: # Item has been moved
+                self.project_modified()
+                break
+        self.pressed_items = []
+    
+    def addItem(self, item):
+        super(DesignLayoutScene, self).addItem(item)
+        self.generation += 1
+        
+    def removeItem(self, item):
+        super(DesignLayoutScene, self).removeItem(item)
+        self.generation += 1
+        
+    def project_modified(self):
+        '''Called after the project data (settings, data models) has been modified'''
+        self.generation += 1
     
     def check_item_selected(self):
         items = self.selectedItems()
@@ -4671,41 +4689,41 @@ class DesignLayoutScene(QtWidgets.QGraphicsScene):
                 # MV 20.01.r3 (20-May-20)
                 # Added if condition to check for custom fb--------------------
                 if os.path.exists(fb_file): 
-                    dict_list = pickle.load(open(fb_file, 'rb'))
+                    template = project_file.fb_template(fb_file)
                 else:
-                    dict_list = pickle.load(open(fb_file_custom, 'rb'))
+                    template = project_file.fb_template(fb_file_custom)
                 # -------------------------------------------------------------
                 #Instantiate new FB and FB design view objects
-                name = dict_list[1][1].fb_name
-                display_name = dict_list[1][1].display_name
-                display_port_name = dict_list[1][1].display_port_name
-                geometry = dict_list[1][1].fb_geometry
-                dim = dict_list[1][1].fb_dim
-                position = dict_list[1][1].fb_position
-                ports = dict_list[1][1].fb_ports_list
-                script = dict_list[1][1].fb_script_module
-                icon_display = dict_list[1][1].fb_icon_display         
-                icon = dict_list[1][1].fb_icon
-                icon_x = dict_list[1][1].fb_icon_x
-                icon_y = dict_list[1][1].fb_icon_y
-                parameters = dict_list[1][1].fb_parameters_list
-                results = dict_list[1][1].fb_results_list
-                text_size = dict_list[1][1].text_size
-                text_length = dict_list[1][1].text_length
-                text_color = dict_list[1][1].text_color
-                text_bold = dict_list[1][1].text_bold
-                text_italic = dict_list[1][1].text_italic
-                color = dict_list[1][1].fb_color
-                color2 = dict_list[1][1].fb_color_2
-                grad = dict_list[1][1].fb_gradient
-                border_color = dict_list[1][1].fb_border_color
-                border_style = dict_list[1][1].fb_border_style
-                text_pos_x = dict_list[1][1].text_pos_x
-                text_pos_y = dict_list[1][1].text_pos_y               
-                port_label_size = dict_list[1][1].port_label_size
-                port_label_bold = dict_list[1][1].port_label_bold
-                port_label_italic = dict_list[1][1].port_label_italic
-                port_label_color = dict_list[1][1].port_label_color
+                name = template.fb_name
+                display_name = template.display_name
+                display_port_name = template.display_port_name
+                geometry = template.fb_geometry
+                dim = template.fb_dim
+                position = template.fb_position
+                ports = template.fb_ports_list
+                script = template.fb_script_module
+                icon_display = template.fb_icon_display         
+                icon = template.fb_icon
+                icon_x = template.fb_icon_x
+                icon_y = template.fb_icon_y
+                parameters = template.fb_parameters_list
+                results = template.fb_results_list
+                text_size = template.text_size
+                text_length = template.text_length
+                text_color = template.text_color
+                text_bold = template.text_bold
+                text_italic = template.text_italic
+                color = template.fb_color
+                color2 = template.fb_color_2
+                grad = template.fb_gradient
+                border_color = template.fb_border_color
+                border_style = template.fb_border_style
+                text_pos_x = template.text_pos_x
+                text_pos_y = template.text_pos_y               
+                port_label_size = template.port_label_size
+                port_label_bold = template.port_label_bold
+                port_label_italic = template.port_label_italic
+                port_label_color = template.port_label_color
     
                 proj_sc.fb_list[i] = models.FunctionalBlock(i,
                                         name, display_name, display_port_name, geometry, dim,
@@ -5198,32 +5216,7 @@ class FunctionalBlockDesignView(QtWidgets.QGraphicsRectItem):
             self.ports[portID].setZValue(50)
             
             #Instantiate associated signal object (based on signal type)
-            if signalType == 'Electrical':
-                self.signals[portID] = signls.SignalAnalogElectrical(portID, signalType,
-                                               0, fs, np.array([]), np.array([]),
-                                               np.array([]))
-            elif signalType == 'Optical': 
-                signal_1 = signls.SignalAnalogOptical(1, 193.1, np.full([1, 2], 0+1j*0, dtype=complex), 
-                                                      np.array([]), np.array([]))
-
-                self.signals[portID] = signls.SignalAnalogOpticalCollection(portID, 
-                                       signalType, fs, np.array([]), np.array([]))
-                self.signals[portID].wave_channel_group[1] = signal_1 #MV - Update (20.01.r1 8-Sep-19)
-                
-            elif signalType == 'Digital':
-                self.signals[portID] = signls.SignalDigital(portID, signalType, 10e9,
-                                               10e9, 1, np.array([]), np.array([]))
-                
-            elif signalType == 'Analog (1)': #Analog generic (1)
-                self.signals[portID] = signls.SignalAnalogGeneric(portID, signalType, fs, 
-                                                np.array([]), np.array([]))
-                
-            elif signalType == 'Analog (2)': #Analog generic (2)
-                self.signals[portID] = signls.SignalAnalogGeneric2(portID, signalType, fs, 
-                                                np.array([]), np.array([]))   
-            else: #Analog generic (3)
-                self.signals[portID] = signls.SignalAnalogGeneric3(portID, signalType, fs, 
-                                                np.array([]), np.array([]))
+            self.signals[portID] = engine.create_port_signal(portID, signalType, fs)
                 
             #Update position of port object (PortsDesignView)
             if self.display_port_name == 2:
@@ -5250,33 +5243,7 @@ class FunctionalBlockDesignView(QtWidgets.QGraphicsRectItem):
                 del fb.signals[portID]
                 fs = proj.design_settings['sampling_rate']        
                 #Instantiate associated signal object (based on signal type)
-                if signalType == 'Electrical':
-                    fb.signals[portID] = signls.SignalAnalogElectrical(portID, signalType,
-                                               0, fs, np.array([]), np.array([]),
-                                               np.array([]))
-                elif signalType == 'Optical': 
-                    signal_1 = signls.SignalAnalogOptical(1, 193.1, np.full([1, 2], 
-                                                          0+1j*0, dtype=complex), 
-                                                          np.array([]), np.array([]))
-
-                    fb.signals[portID] = signls.SignalAnalogOpticalCollection(portID, 
-                                       signalType, fs, np.array([]), np.array([]))
-                    fb.signals[portID].wave_channel_group[1] = signal_1
-                
-                elif signalType == 'Digital':
-                    fb.signals[portID] = signls.SignalDigital(portID, signalType, 10e9,
-                                               10e9, 1, np.array([]), np.array([]))
-                
-                elif signalType == 'Analog (1)': #Analog generic (1)
-                    fb.signals[portID] = signls.SignalAnalogGeneric(portID, signalType, fs, 
-                                                np.array([]), np.array([]))
-                
-                elif signalType == 'Analog (2)': #Analog generic (2)
-                    fb.signals[portID] = signls.SignalAnalogGeneric2(portID, signalType, fs, 
-                                                np.array([]), np.array([]))   
-                else: #Analog generic (3)
-                    fb.signals[portID] = signls.SignalAnalogGeneric3(portID, signalType, fs, 
-                                                np.array([]), np.array([]))
+                fb.signals[portID] = engine.create_port_signal(portID, signalType, fs)
                 break
                 
     def adjust_ports(self):
@@ -5553,6 +5520,7 @@ class FunctionalBlockDesignView(QtWidgets.QGraphicsRectItem):
             #Display window
             FB_dim_win.show()
             if FB_dim_win.exec(): #OK selected        
+                self.scene().project_modified()
                 fb_width = FB_dim_win.functionalBlock_width.text()
                 fb_height = FB_dim_win.functionalBlock_height.text()     
                 try:
@@ -6019,6 +5987,7 @@ class FunctionalBlockDesignView(QtWidgets.QGraphicsRectItem):
         #Display window
         FB_win.show()
         if FB_win.exec(): #OK selected       
+            self.scene().project_modified()
             #If name/dimensions/scripts are updated, capture/rename associated objects
             fb_view_new_name = FB_win.functionalBlockName.text()
             fb_display_new_name = FB_win.checkBoxName.checkState()
@@ -6447,6 +6416,8 @@ class PortsDesignView(QtWidgets.QGraphicsRectItem):
         self.posCallbacks = []
         self.iterations_input_signals = {}
         self.iterations_return_signals = {}   
+        self.signal_metrics = {} # Tool tip metrics of the port signals ((iteration, samples)
+                                 # -> metrics), calculated on the first hover
         self.setFlag(self.ItemSendsScenePositionChanges, True)
         self.setAcceptHoverEvents(True)
            
@@ -6558,19 +6529,9 @@ class PortsDesignView(QtWidgets.QGraphicsRectItem):
                 if len(signal_data) >= iteration: # Safety check in case simulation has
                                                   # been paused/stopped before completion
                                                   # of all planned iterations
-                    signal_array = signal_data[iteration]    
-                    sig = signal_array[5]
-                    noise = signal_array[6]
-                    sig_avg = np.mean(np.real(sig))
-                    sig_var = np.var(np.real(sig))
-                    sig_std = np.std(np.real(sig))
-                    sig_pwr = np.sum(np.abs(sig)*np.abs(sig))
-                    sig_pwr_avg = sig_pwr/samples
-                    noise_avg = np.mean(np.real(noise))
-                    noise_var = np.var(np.real(noise))
-                    noise_std = np.std(np.real(noise))
-                    noise_pwr = np.sum(np.abs(noise)*np.abs(noise))
-                    noise_pwr_avg = noise_pwr/samples
+                    (sig_avg, sig_var, sig_std, sig_pwr, sig_pwr_avg, noise_avg, noise_var,
+                     noise_std, noise_pwr, noise_pwr_avg) = self.port_signal_metrics(
+                                                            signal_data, iteration, samples)
                 
                     text_sig_avg = ("<tr><td>Signal (mean): </b>" + "</td><td>" 
                                 + str(sig_avg) + "</td><td>" + ""  + "</td></tr>")
@@ -6614,12 +6575,8 @@ class PortsDesignView(QtWidgets.QGraphicsRectItem):
                 if len(signal_data) >= iteration: # Safety check in case simulation has
                                                   # been paused/stopped before completion
                                                   # of all planned iterations
-                    signal_array = signal_data[iteration] 
-                    sym_rate = signal_array[2]
-                    bit_rate = signal_array[3]
-                    order = signal_array[4]
-                    discrete = signal_array[6]
-                    len_seq = len(discrete)
+                    sym_rate, bit_rate, order, len_seq = self.port_signal_metrics(
+                                                            signal_data, iteration, samples)
                 
                     text_sig_length = ("<tr><td>Sequence length: </b>" + "</td><td>" 
                                 + str(len_seq) + "</td><td>" + ""  + "</td></tr>")
@@ -6650,24 +6607,8 @@ class PortsDesignView(QtWidgets.QGraphicsRectItem):
                 if len(signal_data) >= iteration: # Safety check in case simulation has
                                                   # been paused/stopped before completion
                                                   # of all planned iterations
-                    optical_group = signal_data[iteration] 
-                    optical_list = optical_group[5]
-                    channels = len(optical_list)
-                    
-                    # Calculate signal power (total/avg) - all channels
-                    sig_pwr = 0
-                    sig_pwr_avg = 0
-                    noise_pwr = 0
-                    noise_pwr_avg = 0
-                    for ch in range(0, channels):
-                        signal_ch = optical_list[ch][3]
-                        noise_ch = optical_list[ch][4]
-                        if optical_list[ch][3].ndim == 2: # Ex-Ey format
-                            sig_pwr += (np.sum((np.abs(signal_ch[0]))**2 
-                                               + (np.abs(signal_ch[1]))**2))
-                        else:
-                            sig_pwr += np.sum((np.abs(signal_ch))**2)
-                        noise_pwr += np.sum((np.abs(noise_ch))**2 )
+                    channels, sig_pwr, noise_pwr = self.port_signal_metrics(signal_data,
+                                                                            iteration, samples)
                     if sig_pwr > 0:
                         sig_pwr_dbm = 10*np.log10(sig_pwr*1e3)
                         sig_pwr_dbm = str(format(sig_pwr_dbm, '0.4f'))
@@ -6730,6 +6671,54 @@ class PortsDesignView(QtWidgets.QGraphicsRectItem):
                         + "<li><b>Pos(x/y): </b>" + text_posx + " " + text_posy + "</li>"
                         + "<li><b>Signal data: </b>" + text_data + "</li>"
                         + results_text + all_results + "</table>")
+        
+    def port_signal_metrics(self, signal_data, iteration, samples):
+        '''Returns the tool tip metrics of the port signal (iteration). The metrics are
+           calculated over the signal arrays on the first hover and reused until new
+           signal data is stored for the port (see clear_signal_metrics)
+        '''
+        key = (iteration, samples)
+        if key in self.signal_metrics:
+            return self.signal_metrics[key]
+        signal_array = signal_data[iteration]
+        if self.signal_type == 'Electrical':
+            sig = signal_array[5]
+            noise = signal_array[6]
+            sig_pwr = np.sum(np.abs(sig)*np.abs(sig))
+            noise_pwr = np.sum(np.abs(noise)*np.abs(noise))
+            metrics = (np.mean(np.real(sig)), np.var(np.real(sig)), np.std(np.real(sig)),
+                       sig_pwr, sig_pwr/samples, np.mean(np.real(noise)),
+                       np.var(np.real(noise)), np.std(np.real(noise)), noise_pwr,
+                       noise_pwr/samples)
+        elif self.signal_type == 'Digital':
+            metrics = (signal_array[2], signal_array[3], signal_array[4], 
+                       len(signal_array[6]))
+        else: # Optical
+            # Calculate signal power (total) - all channels
+            optical_list = signal_array[5]
+            channels = len(optical_list)
+            sig_pwr = 0
+            noise_pwr = 0
+            for ch in range(0, channels):
+                signal_ch = optical_list[ch][3]
+                noise_ch = optical_list[ch][4]
+                if optical_list[ch][3].ndim == 2: # Ex-Ey format
+                    sig_pwr += (np.sum((np.abs(signal_ch[0]))**2 
+                                       + (np.abs(signal_ch[1]))**2))
+                else:
+                    sig_pwr += np.sum((np.abs(signal_ch))**2)
+                noise_pwr += np.sum((np.abs(noise_ch))**2 )
+            metrics = (channels, sig_pwr, noise_pwr)
+        self.signal_metrics[key] = metrics
+        return metrics
+    
+    def clear_signal_metrics(self, iteration=None):
+        '''Removes the tool tip metrics of an iteration (all iterations if None)'''
+        if iteration is None:
+            self.signal_metrics = {}
+        else:
+            for key in [k for k in self.signal_metrics if k[0] == iteration]:
+                del self.signal_metrics[key]
  
     def itemChange(self, change, value):
         if change == self.ItemScenePositionHasChanged and self.connected == True:
@@ -7241,6 +7230,7 @@ class DataBoxDesignView(QtWidgets.QGraphicsRectItem):
         #Display window
         data_win.show()
         if data_win.exec(): #OK selected
+            self.scene().project_modified()
             # Title section properties
             t_text = data_win.title_text.text()
             t_text_width = data_win.title_text_width.text()
@@ -7684,6 +7674,7 @@ class DescriptionBoxDesignView(QtWidgets.QGraphicsRectItem):
         #Display window
         desc_win.show()
         if desc_win.exec(): #OK selected
+            self.scene().project_modified()
             text_width = desc_win.textWidth.text()
             text = desc_win.textDesc.text()
             box_width = desc_win.box_width.text()
@@ -7892,6 +7883,7 @@ class TextBoxDesignView(QtWidgets.QGraphicsRectItem):
         text_win.show()
         
         if text_win.exec(): #OK selected
+            self.scene().project_modified()
             #Retrieve field values
             text = text_win.textEdit.toPlainText()
             #text_width = text_win.textWidth.text() # MV 20.01.r1
@@ -8512,6 +8504,7 @@ class LineArrowDesignView(QtWidgets.QGraphicsLineItem):
         #Display window
         line_win.show()
         if line_win.exec(): #OK selected
+            self.scene().project_modified()
             line_color = line_win.lineColor.text()
             line_style = line_win.comboBoxLine.currentText()
             line_width = line_win.lineWidth.text()
@@ -8699,9 +8692,12 @@ class History():
         self.counter_undo += 1
         self._commands.append(command)
         command.execute()
+        command.proj.project_modified()
         
     def undo(self):
-        self._commands.pop().undo() #removes last element from list 
+        command = self._commands.pop() #removes last element from list 
+        command.undo()
+        command.proj.project_modified()
         if len(self._commands) == 0:
             window.action_UndoCommand.setEnabled(False)
 
@@ -9732,6 +9728,7 @@ class FunctionalBlockGUI(QtWidgets.QDialog, Ui_FBWindow):
             self.load_ports_table()
             
     def save_port_table_data(self):
+        window.project_scenes_list[self.key_index].project_modified()
         ports_list = window.project_scenes_list[self.key_index].fb_list[self.fb_key].fb_ports_list
         ports_list.clear()
         row = 0
@@ -10650,11 +10647,8 @@ if __name__ == '__main__':
     print(screen_size.width())
     print(screen_size.height())'''
 
-    # Create hash digest of default start project (to track modifications)
-    proj_default = window.project_scenes_list[1]
-    items = proj_default.items()
-    dict_list_image = window.prepare_project_data_and_items(proj_default, items)
-    window.hash_list_open[1] = hashlib.sha256(str(dict_list_image).encode()).hexdigest()
+    # Save generation of default start project (to track modifications)
+    window.saved_generation[1] = window.project_scenes_list[1].generation
     # Event loop    
     sys.exit(config.app.exec_())
 '''===================================================================================='''
\ No newline at end of file
@@ -0,0 +1,174 @@
+'''
+    SystemLab-Design Version 20.01
+    Copyright © 2019-2020 SystemLab Inc. All rights reserved.
+
+    NOTICE================================================================================
+    This file is part of SystemLab-Design 20.01.
+
+    SystemLab-Design 20.01 is free software: you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License,
+    or (at your option) any later version.
+
+    SystemLab-Design 20.01 is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with SystemLab-Design 20.01.  If not, see <https://www.gnu.org/licenses/>.
+    ======================================================================================
+
+    ABOUT THIS MODULE
+    Name: systemlab_profiler
+    Per-block profiling of a simulation. For each functional block calculation (per
+    iteration) the wall time is recorded for each calculation phase (input marshalling,
+    script module import, module.run, output allocation) together with the size of the
+    signal arrays (bytes) at each input/output port. The records are aggregated per
+    block into a summary table (sorted by total time) that can be exported to JSON/CSV.
+'''
+import time
+import json
+import csv
+import numpy as np
+
+phases = ['inputs', 'import', 'run', 'outputs'] # Calculation phases of a block
+
+def signal_bytes(signal_list):
+    '''Returns the size (bytes) of the arrays held by a signal list (format returned by
+       module.run, including the channel lists of optical signals)
+    '''
+    size = 0
+    for item in signal_list:
+        if isinstance(item, np.ndarray):
+            size += item.nbytes
+        elif isinstance(item, (list, tuple)):
+            size += signal_bytes(item)
+    return size
+
+class BlockProfile():
+    '''Timing record of one functional block calculation. mark(phase) adds the time
+       since the previous mark (or since the record was created) to the phase
+    '''
+    def __init__(self, fb_key, fb_name, script_name, iteration):
+        self.fb_key = fb_key
+        self.fb_name = fb_name
+        self.script_name = script_name
+        self.iteration = iteration
+        self.times = dict.fromkeys(phases, 0.0)
+        self.port_bytes = {} # portID -> bytes
+        self.mark_time = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.times[phase] += now - self.mark_time
+        self.mark_time = now
+
+    def add_signals(self, signals_data):
+        '''Records the size of the signal arrays at each port (input or output signals)'''
+        for signal_list in signals_data:
+            portID = signal_list[0]
+            self.port_bytes[portID] = max(self.port_bytes.get(portID, 0),
+                                          signal_bytes(signal_list))
+
+    def total(self):
+        return sum(self.times.values())
+
+    def to_dict(self):
+        return {'fb_key': self.fb_key, 'fb_name': self.fb_name,
+                'script': self.script_name, 'iteration': self.iteration,
+                'times': dict(self.times), 'total': self.total(),
+                'port_bytes': {str(p): b for p, b in self.port_bytes.items()}}
+
+class NullProfile():
+    '''Record used when profiling is not enabled (nothing is recorded)'''
+    def mark(self, phase):
+        pass
+
+    def add_signals(self, signals_data):
+        pass
+
+class BlockProfiler():
+    '''Profiling records of a simulation (block() returns a NullProfile when profiling
+       is not enabled)
+    '''
+    summary_columns = ['FB ID', 'FB name', 'Script', 'Calls', 'Inputs (s)', 'Import (s)',
+                       'Run (s)', 'Outputs (s)', 'Total (s)', 'Mean (s)', 'Max (s)',
+                       'Peak port (bytes)']
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.records = []
+        self.null_profile = NullProfile()
+
+    def block(self, fb_key, fb_name, script_name, iteration):
+        if not self.enabled:
+            return self.null_profile
+        profile = BlockProfile(fb_key, fb_name, script_name, iteration)
+        self.records.append(profile)
+        return profile
+
+    def summary(self):
+        '''Returns the aggregated records per block (list of rows in the order of
+           summary_columns, sorted by total time)
+        '''
+        blocks = {}
+        for profile in self.records:
+            if profile.fb_key not in blocks:
+                blocks[profile.fb_key] = {'name': profile.fb_name,
+                                          'script': profile.script_name, 'calls': 0,
+                                          'times': dict.fromkeys(phases, 0.0),
+                                          'max': 0.0, 'port_bytes': 0}
+            block = blocks[profile.fb_key]
+            block['calls'] += 1
+            for phase in phases:
+                block['times'][phase] += profile.times[phase]
+            block['max'] = max(block['max'], profile.total())
+            if profile.port_bytes:
+                block['port_bytes'] = max(block['port_bytes'],
+                                          max(profile.port_bytes.values()))
+        rows = []
+        for fb_key, block in blocks.items():
+            total = sum(block['times'].values())
+            rows.append([fb_key, block['name'], block['script'], block['calls']]
+                        + [block['times'][phase] for phase in phases]
+                        + [total, total/block['calls'], block['max'], block['port_bytes']])
+        rows.sort(key=lambda row: row[8], reverse=True)
+        return rows
+
+    def report_lines(self, max_rows=None):
+        '''Summary table as text lines (console/status window)'''
+        rows = self.summary()
+        total = sum(row[8] for row in rows)
+        lines = ['Profile (blocks sorted by total time) - total: '
+                 + format(total, '0.3f') + ' s']
+        for row in rows[:max_rows]:
+            share = 100*row[8]/total if total > 0 else 0
+            lines.append(format(share, '5.1f') + '%  ' + format(row[8], '0.3f') + ' s  '
+                         + str(row[1]) + ' (ID:' + str(row[0]) + ', ' + str(row[2])
+                         + ')  run: ' + format(row[6], '0.3f') + ' s  peak port: '
+                         + format(row[11]/1e6, '0.2f') + ' MB')
+        return lines
+
+    def write_json(self, file_path):
+        summary = [dict(zip(self.summary_columns, row)) for row in self.summary()]
+        with open(file_path, 'w') as f:
+            json.dump({'summary': summary,
+                       'records': [profile.to_dict() for profile in self.records]},
+                      f, indent=1, default=str)
+
+    def write_csv(self, file_path):
+        with open(file_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.summary_columns)
+            for row in self.summary():
+                writer.writerow(row)
+
+    def write_report(self, base_path):
+        '''Writes <base_path>_profile.json and <base_path>_profile.csv. Returns the list
+           of files written
+        '''
+        files = [base_path + '_profile.json', base_path + '_profile.csv']
+        self.write_json(files[0])
+        self.write_csv(files[1])
+        return files
@@ -0,0 +1,236 @@
+'''
+    SystemLab-Design Version 20.01
+    Copyright © 2019-2020 SystemLab Inc. All rights reserved.
+
+    NOTICE================================================================================
+    This file is part of SystemLab-Design 20.01.
+
+    SystemLab-Design 20.01 is free software: you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License,
+    or (at your option) any later version.
+
+    SystemLab-Design 20.01 is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with SystemLab-Design 20.01.  If not, see <https://www.gnu.org/licenses/>.
+    ======================================================================================
+
+    ABOUT THIS MODULE
+    Name: systemlab_project_file
+    Reading and writing of project files (.slb). A project is saved as a zip archive
+    with a JSON manifest (project.json: format name/version, design settings, functional
+    blocks, signal links, description/data/text boxes and line-arrows) and a .npy file
+    for each numpy array of the project data (arrays/, stored uncompressed so that they
+    can be memory-mapped from the archive and loaded on demand). The data model objects
+    of systemlab_scene_models are saved as attribute dictionaries: attributes added to
+    (or removed from) the classes do not prevent older files from loading.
+    Project files of earlier releases (pickled dict_list) are still read, and can still
+    be written with config_special.project_file_format = 'pickle'.
+    The functional block templates of the block libraries (syslab_fb_library) are
+    parsed once and kept in memory (fb_template).
+'''
+import os
+import io
+import copy
+import json
+import base64
+import pickle
+import zipfile
+import importlib
+import numpy as np
+from PyQt5 import QtCore
+import systemlab_scene_models as models
+config_special = importlib.import_module('syslab_config_files.config_special')
+
+format_name = 'SystemLab-Design project'
+format_version = 1
+manifest_name = 'project.json'
+
+# Sections of the project data (dict_list order, see prepare_project_data_and_items)
+section_names = ['design_settings', 'fb_list', 'signal_links_list', 'desc_box_list',
+                 'data_box_list', 'text_list', 'line_arrow_list']
+
+# Data model classes that can be restored from a project file
+model_classes = {'FunctionalBlock': models.FunctionalBlock,
+                 'SignalLink': models.SignalLink,
+                 'DescriptionBox': models.DescriptionBox,
+                 'DataBox': models.DataBox,
+                 'TextBox': models.TextBox,
+                 'LineArrow': models.LineArrow}
+
+# Arrays smaller than this size (bytes) are read into memory when memory-mapping is
+# requested
+min_mmap_bytes = 1 << 20
+
+# Parsed functional block templates (library file path -> (modification time, block))
+fb_templates = {}
+
+'''Encoding (project data -> JSON)========================================================
+'''
+def encode(item, arrays):
+    '''Returns the JSON representation of item. Values other than str/int/float/bool/
+       None, lists and dictionaries with str keys are written as single-key tagged
+       objects ({'__tag__': value}). numpy arrays are added to arrays (archive name ->
+       array) and replaced by their archive name
+    '''
+    item_type = type(item)
+    if item is None or item_type in (str, int, float, bool):
+        return item
+    if item_type is list:
+        return [encode(x, arrays) for x in item]
+    if item_type is dict:
+        if all(type(k) is str for k in item) and not (len(item) == 1
+                                                      and is_tag(next(iter(item)))):
+            return {k: encode(v, arrays) for k, v in item.items()}
+        return {'__dict__': [[encode(k, arrays), encode(v, arrays)]
+                             for k, v in item.items()]}
+    if item_type is tuple:
+        return {'__tuple__': [encode(x, arrays) for x in item]}
+    if isinstance(item, QtCore.Qt.CheckState):
+        return {'__CheckState__': int(item)}
+    if isinstance(item, QtCore.QPointF):
+        return {'__QPointF__': [item.x(), item.y()]}
+    if isinstance(item, QtCore.QRectF):
+        return {'__QRectF__': [item.x(), item.y(), item.width(), item.height()]}
+    if isinstance(item, QtCore.QLineF):
+        return {'__QLineF__': [item.x1(), item.y1(), item.x2(), item.y2()]}
+    if isinstance(item, np.ndarray) and item.dtype != object:
+        name = 'arrays/' + str(len(arrays) + 1) + '.npy'
+        arrays[name] = item
+        return {'__ndarray__': name}
+    if isinstance(item, np.generic):
+        return encode(item.item(), arrays)
+    if model_classes.get(item_type.__name__) is item_type:
+        return {'__model__': [item_type.__name__, encode(vars(item), arrays)]}
+    # Other types (e.g. objects added by custom scripts) are pickled
+    return {'__pickle__': base64.b64encode(pickle.dumps(item)).decode('ascii')}
+
+def is_tag(key):
+    return key.startswith('__') and key.endswith('__')
+
+def save_project(file_path, dict_list):
+    '''Saves the project data (dict_list) to file_path. The file is written to a
+       temporary file first (the existing file is kept if the project can't be saved,
+       and arrays memory-mapped from it remain valid while the new file is written)
+    '''
+    temp_path = file_path + '.tmp'
+    try:
+        if config_special.project_file_format == 'pickle': # Format of earlier releases
+            with open(temp_path, 'wb') as f:
+                pickle.dump(dict_list, f)
+        else:
+            arrays = {}
+            manifest = {'format': format_name, 'version': format_version}
+            for name, section in zip(section_names, dict_list):
+                manifest[name] = encode(section, arrays)
+            with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr(manifest_name, json.dumps(manifest, indent=1))
+                for name, array in arrays.items():
+                    buffer = io.BytesIO()
+                    np.save(buffer, array, allow_pickle=False)
+                    archive.writestr(name, buffer.getvalue(), zipfile.ZIP_STORED)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+'''Decoding (JSON -> project data)========================================================
+'''
+class ProjectArchive():
+    '''Open project archive (used for loading the arrays referenced by the manifest)
+       mmap_arrays: arrays of min_mmap_bytes or more are memory-mapped (read-only)
+       from the file instead of being read into memory
+    '''
+    def __init__(self, file_path, archive, mmap_arrays):
+        self.file_path = file_path
+        self.archive = archive
+        self.mmap_arrays = mmap_arrays
+
+    def load_array(self, name):
+        info = self.archive.getinfo(name)
+        if (self.mmap_arrays and info.compress_type == zipfile.ZIP_STORED
+                and info.file_size >= min_mmap_bytes):
+            with open(self.file_path, 'rb') as f:
+                # Start of the .npy data: local file header (30 bytes) + file name + extra
+                f.seek(info.header_offset + 26)
+                name_length = int.from_bytes(f.read(2), 'little')
+                extra_length = int.from_bytes(f.read(2), 'little')
+                f.seek(info.header_offset + 30 + name_length + extra_length)
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                offset = f.tell()
+            return np.memmap(self.file_path, dtype=dtype, mode='r', offset=offset,
+                             shape=shape, order='F' if fortran_order else 'C')
+        with self.archive.open(name) as f:
+            return np.load(io.BytesIO(f.read()), allow_pickle=False)
+
+def decode(item, project_archive):
+    '''Returns the project data of a JSON representation (see encode)'''
+    if type(item) is list:
+        return [decode(x, project_archive) for x in item]
+    if type(item) is not dict:
+        return item
+    if len(item) == 1:
+        tag, value = next(iter(item.items()))
+        if tag == '__dict__':
+            return {decode(k, project_archive): decode(v, project_archive)
+                    for k, v in value}
+        if tag == '__tuple__':
+            return tuple(decode(x, project_archive) for x in value)
+        if tag == '__CheckState__':
+            return QtCore.Qt.CheckState(value)
+        if tag == '__QPointF__':
+            return QtCore.QPointF(*value)
+        if tag == '__QRectF__':
+            return QtCore.QRectF(*value)
+        if tag == '__QLineF__':
+            return QtCore.QLineF(*value)
+        if tag == '__ndarray__':
+            return project_archive.load_array(value)
+        if tag == '__model__':
+            model_class = model_classes[value[0]]
+            model = model_class.__new__(model_class)
+            model.__dict__.update(decode(value[1], project_archive))
+            return model
+        if tag == '__pickle__':
+            return pickle.loads(base64.b64decode(value))
+    return {k: decode(v, project_archive) for k, v in item.items()}
+
+def load_project(file_path, mmap_arrays=False):
+    '''Returns the project data (dict_list: design settings, functional blocks, signal
+       links, description boxes, data boxes, text boxes, line-arrows) of a .slb file
+       mmap_arrays: memory-map large arrays from the file (the file must not be
+       overwritten while they are in use)
+    '''
+    if not zipfile.is_zipfile(file_path): # Project file of an earlier release
+        with open(file_path, 'rb') as f:
+            return pickle.load(f)
+    with zipfile.ZipFile(file_path) as archive:
+        manifest = json.loads(archive.read(manifest_name).decode('utf-8'))
+        if manifest.get('format') != format_name:
+            raise ValueError(str(file_path) + ' is not a SystemLab-Design project file')
+        if manifest.get('version', 0) > format_version:
+            raise ValueError(str(file_path) + ' was saved with a newer release (project '
+                             + 'file format version ' + str(manifest['version']) + ')')
+        project_archive = ProjectArchive(file_path, archive, mmap_arrays)
+        return [decode(manifest.get(name, {}), project_archive) for name in section_names]
+
+def fb_template(file_path):
+    '''Returns a copy of the functional block of a library file (.slb). The file is
+       parsed the first time (and again after it has been modified) and the block is
+       kept as a template for the blocks added to a project
+    '''
+    modified = os.path.getmtime(file_path)
+    entry = fb_templates.get(file_path)
+    if entry is None or entry[0] != modified:
+        dict_list = load_project(file_path)
+        entry = (modified, dict_list[1][1])
+        fb_templates[file_path] = entry
+    return copy.deepcopy(entry[1])
@@ -0,0 +1,177 @@
+'''
+    SystemLab-Design Version 20.01
+    Copyright © 2019-2020 SystemLab Inc. All rights reserved.
+
+    NOTICE================================================================================
+    This file is part of SystemLab-Design 20.01.
+
+    SystemLab-Design 20.01 is free software: you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License,
+    or (at your option) any later version.
+
+    SystemLab-Design 20.01 is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with SystemLab-Design 20.01.  If not, see <https://www.gnu.org/licenses/>.
+    ======================================================================================
+
+    ABOUT THIS MODULE
+    Name: systemlab_scheduler
+    Dataflow scheduler for the simulation engine. A dependency graph of the functional
+    blocks is built once per simulation (from the signal links of the design) and the
+    blocks are released for calculation in topological order through a ready queue.
+    Blocks that can never be calculated (unconnected or disabled input ports, signal
+    loops without feedback ports) are identified before the simulation starts.
+'''
+import heapq
+
+def port_entry(fb, port_ID):
+    '''Returns the entry of fb_ports_list for port_ID (or None if not found)
+       Format: [portID, portName, portCardinal, portDirection, signal, connected, data_ready]
+    '''
+    for port in fb.fb_ports_list:
+        if port[0] == port_ID:
+            return port
+    return None
+
+def input_ports_ready(fb):
+    '''Returns True when all IN ports of the functional block have data available
+       (disabled and feedback ports are set to "data ready" at the start of each run)
+    '''
+    for port in fb.fb_ports_list:
+        if port[3] == 'In' and port[6] == False:
+            return False
+    return True
+
+
+class DataflowScheduler():
+    '''Dependency graph and ready queue for the functional blocks of a design.
+       fb_list and signal_links_list are the data model dictionaries held by the
+       project scene (FunctionalBlock and SignalLink instances).
+    '''
+    def __init__(self, fb_list, signal_links_list):
+        self.fb_list = fb_list
+        self.signal_links_list = signal_links_list
+        self.successors = {} # fb_key -> list of downstream fb keys
+        self.predecessors = {} # fb_key -> list of upstream fb keys
+        self.downstream_ports = {} # (fb_key, port_ID) -> (fb_end_key, end_port_ID)
+        self.order = [] # Functional block keys (topological order)
+        self.rank = {} # fb_key -> position in topological order
+        self.blocked = {} # fb_key -> reason why block can never be calculated
+        self.ready_queue = [] # Heap of (rank, fb_key)
+        self.pending = set() # Blocks waiting for input data
+        self.build_graph()
+
+    def build_graph(self):
+        fb_keys = list(self.fb_list.keys())
+        for fb_key in fb_keys:
+            self.successors[fb_key] = []
+            self.predecessors[fb_key] = []
+        connected_inputs = set()
+        for link_key in self.signal_links_list:
+            link = self.signal_links_list[link_key]
+            start_key = link.fb_start_key
+            end_key = link.fb_end_key
+            self.downstream_ports[(start_key, link.start_port_ID)] = (end_key, link.end_port_ID)
+            connected_inputs.add((end_key, link.end_port_ID))
+            if start_key not in self.fb_list or end_key not in self.fb_list:
+                continue
+            # Links ending at feedback ports do not create a dependency (data at these
+            # ports is carried over from the previous feedback segment)
+            end_port = port_entry(self.fb_list[end_key], link.end_port_ID)
+            if end_port is None or end_port[3] != 'In':
+                continue
+            if end_key not in self.successors[start_key]:
+                self.successors[start_key].append(end_key)
+                self.predecessors[end_key].append(start_key)
+
+        # Topological order (Kahn's algorithm, ties resolved by fb_list order)
+        index = {}
+        for i in range(0, len(fb_keys)):
+            index[fb_keys[i]] = i
+        in_degree = {}
+        heap = []
+        for fb_key in fb_keys:
+            in_degree[fb_key] = len(self.predecessors[fb_key])
+            if in_degree[fb_key] == 0:
+                heapq.heappush(heap, (index[fb_key], fb_key))
+        while heap:
+            i, fb_key = heapq.heappop(heap)
+            self.order.append(fb_key)
+            for succ in self.successors[fb_key]:
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    heapq.heappush(heap, (index[succ], succ))
+        # Blocks inside a signal loop (without feedback ports) have no position
+        # in the topological order and can never be calculated
+        for fb_key in fb_keys:
+            if in_degree[fb_key] > 0:
+                self.order.append(fb_key)
+                self.blocked[fb_key] = 'Part of a signal loop without feedback ports'
+        for r in range(0, len(self.order)):
+            self.rank[self.order[r]] = r
+
+        # Blocks with input ports that will never receive data
+        for fb_key in self.order:
+            if fb_key in self.blocked:
+                continue
+            port_list = self.fb_list[fb_key].fb_ports_list
+            count_in = 0
+            count_disabled = 0
+            for port in port_list:
+                if 'In' in port[3]:
+                    count_in += 1
+                    if 'Disabled' in port[4]:
+                        count_disabled += 1
+                    elif port[3] == 'In' and (fb_key, port[0]) not in connected_inputs:
+                        self.blocked[fb_key] = ('Input port ' + str(port[0]) + ' ('
+                                                + str(port[1]) + ') is not connected')
+            if count_in > 0 and count_disabled == count_in:
+                self.blocked[fb_key] = 'All input ports are disabled'
+            if fb_key in self.blocked:
+                continue
+            for pred in self.predecessors[fb_key]:
+                if pred in self.blocked:
+                    self.blocked[fb_key] = ('Upstream block ' + str(self.fb_list[pred].fb_name)
+                                            + ' (ID:' + str(pred) + ') cannot be calculated')
+                    break
+
+    def start(self):
+        '''Resets the ready queue. Called at the start of each iteration (or feedback
+           segment), after the "data ready" flags of the ports have been reset
+        '''
+        self.ready_queue = []
+        self.pending = set()
+        for fb_key in self.order:
+            if fb_key in self.blocked:
+                continue
+            if input_ports_ready(self.fb_list[fb_key]):
+                heapq.heappush(self.ready_queue, (self.rank[fb_key], fb_key))
+            else:
+                self.pending.add(fb_key)
+
+    def next_ready(self):
+        '''Returns the key of the next functional block that is ready to calculate
+           (or None if no blocks are ready)
+        '''
+        if self.ready_queue:
+            r, fb_key = heapq.heappop(self.ready_queue)
+            return fb_key
+        return None
+
+    def block_complete(self, fb_key):
+        '''Releases downstream blocks that have received data at all of their IN ports'''
+        for succ in self.successors[fb_key]:
+            if succ in self.pending and input_ports_ready(self.fb_list[succ]):
+                self.pending.discard(succ)
+                heapq.heappush(self.ready_queue, (self.rank[succ], succ))
+
+    def unresolved_blocks(self):
+        '''Blocks still waiting for input data once the ready queue is empty (an upstream
+           block did not return signals for one or more of its output ports)
+        '''
+        return sorted(self.pending, key=lambda fb_key: self.rank[fb_key])
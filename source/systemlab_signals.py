@@ -26,9 +26,14 @@
     SystemLab module for signal classes:
     SignalAnalogElectrical, SignalAnalogOpticalCollection, SignalAnalogOptical,
     SignalDigital, SignalGeneric, SignalGeneric2, SignalGeneric3 
+    Functions for sharing signal arrays between linked ports: read_only, writable
+    Function for vectorized calculations across optical channels: stack_channels
 '''
+import numpy as np
 
 class SignalAnalogElectrical():
+    __slots__ = ('portID', 'signal_type', 'sample_rate', 'time_array', 'amplitude_array',
+                 'noise_array', 'carrier')
     
     def __init__(self, portID, signal_type, carrier, sample_rate, time_array, amplitude_array, noise_array):
         self.portID = portID
@@ -47,6 +52,18 @@ class SignalAnalogElectrical():
         + 'Noise array: ' + str(self.noise_array)
         
 class SignalAnalogOpticalCollection():
+    '''Optical signal of a port. The field envelopes and noise arrays of all wavelength
+       channels are held in two contiguous arrays (envelope_block: channels x samples for
+       the Exy format or channels x 2 x samples for the Ex-Ey format, noise_block:
+       channels x samples) and the channel data (wave keys, frequencies, Jones vectors)
+       in arrays indexed by channel. If the channel arrays have different shapes they are
+       held in lists instead.
+       wave_channel_group returns the channels as a dict of SignalAnalogOptical objects
+       (keys 1...N, arrays are views of the channel blocks)
+    '''
+    __slots__ = ('portID', 'signal_type', 'sample_rate', 'time_array', 'psd_array',
+                 'wave_keys', 'wave_channels', 'jones_vectors', 'envelope_block',
+                 'noise_block')
     
     def __init__(self, portID, signal_type, sample_rate, time_array, psd_array):
         self.portID = portID
@@ -54,9 +71,79 @@ class SignalAnalogOpticalCollection():
         self.sample_rate = sample_rate
         self.time_array = time_array 
         self.psd_array = psd_array #MV (19.02.r2 8-Sep-19) Moved from SignalAnalogOptical 
-        self.wave_channel_group = {} #MV (19.02.r2 8-Sep-19) Renamed from wave_channel_dict 
+        self.set_channels([])
+        
+    def set_channels(self, channels, read_only=False):
+        '''Loads the optical channels (list format returned by module.run:
+           [[wave_key, wave_channel, jones_vector, envelope_array, noise_array], ...]).
+           The channel arrays are copied into the channel blocks, arrays that are already
+           the consecutive channels of one block are not copied (set read_only to share
+           the blocks with other ports and scripts)
+        '''
+        self.wave_keys = [channel[0] for channel in channels]
+        self.wave_channels = np.array([channel[1] for channel in channels], dtype=float)
+        self.jones_vectors = [channel[2] for channel in channels]
+        self.envelope_block = stack_arrays([channel[3] for channel in channels])
+        self.noise_block = stack_arrays([channel[4] for channel in channels])
+        if read_only:
+            self.envelope_block = read_only_block(self.envelope_block)
+            self.noise_block = read_only_block(self.noise_block)
+            
+    def share_channels(self, collection):
+        '''Uses the channel blocks of another port signal (no copies are made)'''
+        self.wave_keys = collection.wave_keys
+        self.wave_channels = collection.wave_channels
+        self.jones_vectors = collection.jones_vectors
+        self.envelope_block = collection.envelope_block
+        self.noise_block = collection.noise_block
+        
+    def clear_channel_data(self):
+        '''Releases the field envelope and noise arrays (channel data is kept)'''
+        channels = len(self.wave_keys)
+        self.envelope_block = np.empty([channels, 0], dtype=complex)
+        self.noise_block = np.empty([channels, 0], dtype=complex)
+        
+    def channels_list(self):
+        '''Returns the channels in list format [[wave_key, wave_channel, jones_vector,
+           envelope_array, noise_array], ...] (arrays are views of the channel blocks)
+        '''
+        return [[self.wave_keys[ch], self.wave_channels[ch], self.jones_vectors[ch],
+                 self.envelope_block[ch], self.noise_block[ch]]
+                for ch in range(0, len(self.wave_keys))]
+    
+    @property
+    def wave_channel_group(self): #MV (19.02.r2 8-Sep-19) Renamed from wave_channel_dict
+        group = {}
+        channels = self.channels_list()
+        for ch in range(0, len(channels)):
+            group[ch+1] = SignalAnalogOptical(*channels[ch])
+        return group
+    
+    @wave_channel_group.setter
+    def wave_channel_group(self, group):
+        channels = []
+        for key in sorted(group):
+            channel = group[key]
+            channels.append([channel.wave_key, channel.wave_channel, channel.jones_vector,
+                             channel.envelope_array, channel.noise_array])
+        self.set_channels(channels)
+
+def stack_arrays(arrays):
+    # Channel arrays -> contiguous block (list if the shapes are different)
+    if len(arrays) == 0:
+        return np.empty([0, 0], dtype=complex)
+    try:
+        return stack_channels(arrays) # Existing block is reused (no copy)
+    except ValueError:
+        return list(arrays)
+    
+def read_only_block(block):
+    if isinstance(block, list):
+        return [read_only(array) for array in block]
+    return read_only(block)
 
 class SignalAnalogOptical():
+    __slots__ = ('wave_key', 'wave_channel', 'jones_vector', 'envelope_array', 'noise_array')
     
     def __init__(self, wave_key, wave_channel, jones_vector, envelope_array, noise_array):
         self.wave_key = wave_key
@@ -95,6 +182,8 @@ class SignalAnalogOptical():
 #        + 'PSD array: ' + str(self.noise_array)
          
 class SignalDigital():
+    __slots__ = ('portID', 'signal_type', 'symbol_rate', 'bit_rate', 'order', 'time_array',
+                 'discrete_array')
     
     def __init__(self, portID, signal_type, symbol_rate, bit_rate, order, time_array, discrete_array):
         self.portID = portID
@@ -113,6 +202,7 @@ class SignalDigital():
          
          
 class SignalAnalogGeneric():
+    __slots__ = ('portID', 'signal_type', 'sample_rate', 'time_array', 'amplitude_array')
     
     def __init__(self, portID, signal_type, sample_rate, time_array, amplitude_array):
         self.portID = portID
@@ -122,6 +212,7 @@ class SignalAnalogGeneric():
         self.amplitude_array = amplitude_array
         
 class SignalAnalogGeneric2():
+    __slots__ = ('portID', 'signal_type', 'sample_rate', 'time_array', 'amplitude_array')
     
     def __init__(self, portID, signal_type, sample_rate, time_array, amplitude_array):
         self.portID = portID
@@ -131,6 +222,7 @@ class SignalAnalogGeneric2():
         self.amplitude_array = amplitude_array
         
 class SignalAnalogGeneric3():
+    __slots__ = ('portID', 'signal_type', 'sample_rate', 'time_array', 'amplitude_array')
     
     def __init__(self, portID, signal_type, sample_rate, time_array, amplitude_array):
         self.portID = portID
@@ -144,4 +236,52 @@ class SignalAnalogGeneric3():
 #        + 'Sample rate (Hz): ' + str(self.sample_rate) + ' Carrier (Hz): ' + str(self.carrier) + '\n' \
 #        + 'Time array: ' + str(self.time_array) + '\n' \
 #        + 'Amp array: ' + str(self.amplitude_array) + '\n' \
-#        + 'Noise array: ' + str(self.noise_array)
\ No newline at end of file
+#        + 'Noise array: ' + str(self.noise_array)
+
+'''Shared signal buffers (copy-on-write)=================================================
+Signal arrays returned by a functional block script are shared (without copying) by the
+output port, the linked input port and the script of the downstream block. They are
+held as read-only views so that a script cannot modify the signal data of another port
+in place - a script that needs to modify an input array must first obtain its own copy
+with writable().
+'''
+def read_only(array):
+    '''Returns a read-only view of a numpy array (no copy). Other objects are returned
+       unchanged
+    '''
+    if isinstance(array, np.ndarray) and array.flags.writeable:
+        array = array.view()
+        array.flags.writeable = False
+    return array
+
+def writable(array):
+    '''Returns an array that can be modified in place: the array itself if it is
+       writable, otherwise a copy (copy-on-write)
+    '''
+    if isinstance(array, np.ndarray) and not array.flags.writeable:
+        return array.copy()
+    return array
+
+'''Vectorized calculations across optical channels=========================================
+'''
+def stack_channels(arrays):
+    '''Returns the envelope (or noise) arrays of a list of optical channels as one array
+       (channels first). When the arrays are the consecutive channels of a port channel
+       block (input signals prepared by the simulation engine) the block is returned
+       without copying
+    '''
+    block = arrays[0].base if isinstance(arrays[0], np.ndarray) else None
+    if (isinstance(block, np.ndarray) and block.ndim == arrays[0].ndim + 1
+            and block.shape[0] == len(arrays)):
+        consecutive = True
+        for ch in range(0, len(arrays)):
+            if (arrays[ch].shape != block.shape[1:] or arrays[ch].strides != block.strides[1:]
+                    or (arrays[ch].__array_interface__['data'][0]
+                        != block[ch].__array_interface__['data'][0])):
+                consecutive = False
+                break
+        if consecutive:
+            if not arrays[0].flags.writeable: # Shared channel block (read-only)
+                block = read_only(block)
+            return block
+    return np.stack(arrays)
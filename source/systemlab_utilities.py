@@ -23,6 +23,40 @@
     Name: systemlab_utilities
     Common procedures used in algorithms and fb scripts
 '''
+import importlib
+import threading
+import numpy as np
+config_special = importlib.import_module('syslab_config_files.config_special')
+
+# Optional FFT libraries (config_special.fft_backend selects the library used by the
+# spectral procedures below, numpy.fft is used if the library is not installed)
+try:
+    import scipy.fft as scipy_fft
+except ImportError:
+    scipy_fft = None
+try:
+    import pyfftw
+    import pyfftw.interfaces.scipy_fft as pyfftw_fft
+    pyfftw.interfaces.cache.enable() # Keep the FFTW plans between calls
+except ImportError:
+    pyfftw_fft = None
+
+# Frequency grids of the centred spectra ((n, fs, ctr_freq) -> read-only array)
+frequency_grid_cache = {}
+frequency_grid_cache_size = 64
+
+# Frequency-domain transfer functions shared by the fb scripts (key -> read-only
+# complex response array). The least recently used responses are removed when the
+# total size of the cached arrays exceeds transfer_function_cache_bytes
+transfer_function_cache = {}
+transfer_function_cache_bytes = 256e6
+transfer_function_lock = threading.Lock()
+
+# Windows of the averaged power spectrum (Welch method, periodic windows of m samples)
+psd_windows = {'rectangular': np.ones,
+               'hann': lambda m: np.hanning(m + 1)[:-1],
+               'hamming': lambda m: np.hamming(m + 1)[:-1],
+               'blackman': lambda m: np.blackman(m + 1)[:-1]}
       
 def adjust_units_time(unit_format):
     #Converts values defined in ms, us, ns, ps and fs into seconds
@@ -59,4 +93,233 @@ def adjust_units_wave(unit_format):
         unit_adjust = 1e-6
     elif unit_format == 'nm':
         unit_adjust = 1e-9
-    return unit_adjust
\ No newline at end of file
+    return unit_adjust
+
+def block_rng(settings):
+    #Random number generator of the block calculation (settings['rng'], provided by the
+    #simulation engine). A new generator is created when the script is run without one
+    rng = settings.get('rng')
+    if rng is None:
+        rng = np.random.default_rng()
+    return rng
+
+def overlap_save_input(stream_state, key, x, overlap):
+    #Streaming mode (overlap-save): returns the input frame x preceded by the last
+    #overlap samples of the previous frame (zeros for the first frame). The end of the
+    #frame is kept in stream_state[key] for the next frame. The output of the FFT-based
+    #calculation is trimmed with overlap_save_output
+    x = np.asarray(x)
+    tail = stream_state.get(key)
+    if tail is None:
+        tail = np.zeros(x.shape[:-1] + (overlap,), dtype=x.dtype)
+    x_ext = np.concatenate((tail, x), axis=-1)
+    stream_state[key] = x_ext[..., np.size(x_ext, -1)-overlap:].copy()
+    return x_ext
+
+def overlap_save_output(y, overlap, delay=0):
+    #Streaming mode (overlap-save): removes the overlap samples from the output frame.
+    #Causal responses (impulse response shorter than overlap): the overlap samples at the
+    #start of the frame are removed (delay=0). Two-sided responses (impulse response
+    #centred on t=0, e.g. dispersion): delay samples are removed from the end of the
+    #frame and overlap-delay from the start, the output is delayed by delay samples
+    #(overlap//2 for an impulse response shorter than overlap//2 on each side)
+    return y[..., overlap-delay:np.size(y, -1)-delay]
+
+def transfer_function(key, calculate):
+    #Returns the transfer function (complex response array) for key, a tuple of the
+    #script name, the block parameters that define the response, n, fs and the channel
+    #centre frequency. The response is calculated with calculate() the first time and
+    #shared between blocks and iterations afterwards (the array is read-only)
+    with transfer_function_lock:
+        H = transfer_function_cache.pop(key, None)
+        if H is not None:
+            transfer_function_cache[key] = H # Most recently used
+            return H
+    H = np.array(calculate(), dtype=complex)
+    H.setflags(write=False)
+    with transfer_function_lock:
+        transfer_function_cache[key] = H
+        cache_bytes = sum(h.nbytes for h in transfer_function_cache.values())
+        while cache_bytes > transfer_function_cache_bytes and len(transfer_function_cache) > 1:
+            oldest = next(iter(transfer_function_cache))
+            cache_bytes -= transfer_function_cache.pop(oldest).nbytes
+    return H
+
+def frequency_grid(n, fs, ctr_freq=0):
+    #Returns the frequency points (Hz) of the centred (fftshift) spectrum of n samples
+    #at sample rate fs, offset by ctr_freq (e.g. the channel centre frequency). The grid
+    #is calculated once per (n, fs, ctr_freq) and shared between blocks (read-only)
+    key = (n, fs, ctr_freq)
+    frq = frequency_grid_cache.get(key)
+    if frq is None:
+        T = n/fs
+        k = np.arange(n)
+        frq = k/T # Positive/negative freq (double sided)
+        frq = frq - frq[int(round(n/2))] + ctr_freq
+        frq.setflags(write=False)
+        if len(frequency_grid_cache) >= frequency_grid_cache_size:
+            frequency_grid_cache.pop(next(iter(frequency_grid_cache)), None)
+        frequency_grid_cache[key] = frq
+    return frq
+
+def fft_module():
+    #Returns the FFT module and keyword arguments for config_special.fft_backend
+    backend = getattr(config_special, 'fft_backend', 'numpy')
+    workers = getattr(config_special, 'fft_workers', None)
+    if backend == 'pyfftw' and pyfftw_fft is not None:
+        return pyfftw_fft, {'workers': workers}
+    if backend in ('scipy', 'pyfftw') and scipy_fft is not None:
+        return scipy_fft, {'workers': workers}
+    return np.fft, {}
+
+def fft(x, axis=-1):
+    #Complex FFT of x along axis (x may be a stack of channels/polarizations)
+    module, kwargs = fft_module()
+    return module.fft(x, axis=axis, **kwargs)
+
+def ifft(Y, axis=-1):
+    #Complex inverse FFT of Y along axis
+    module, kwargs = fft_module()
+    return module.ifft(Y, axis=axis, **kwargs)
+
+def rfft(x, axis=-1):
+    #Real FFT (positive frequencies) of the real signals x along axis
+    module, kwargs = fft_module()
+    return module.rfft(x, axis=axis, **kwargs)
+
+def irfft(Y, n, axis=-1):
+    #Inverse of rfft (returns n real samples along axis)
+    module, kwargs = fft_module()
+    return module.irfft(Y, n, axis=axis, **kwargs)
+
+def spectrum(x, axis=-1):
+    #Centred spectrum (fftshift(fft(x))) of x along axis, frequency points are given by
+    #frequency_grid(n, fs, ctr_freq)
+    return np.fft.fftshift(fft(x, axis), axes=axis)
+
+def inverse_spectrum(Y, axis=-1):
+    #Time-domain signal of the centred spectrum Y (ifft(ifftshift(Y))) along axis
+    return ifft(np.fft.ifftshift(Y, axes=axis), axis)
+
+def apply_transfer_function(field, H):
+    #Applies the transfer functions H (channels x samples, centred spectra) to the field
+    #envelopes of all channels (channels x samples for polarization format Exy,
+    #channels x 2 x samples for Ex-Ey) with one broadcast multiply. Returns the filtered
+    #field envelopes (time domain)
+    field = np.asarray(field)
+    if field.ndim == 3: # Polarization format: Ex-Ey
+        H = H[:, np.newaxis, :]
+    return inverse_spectrum(spectrum(field)*H)
+
+class WelchEstimator():
+    #Averaged power spectrum (Welch method): the signal is divided into segments of
+    #segment_length samples overlapping by overlap (fraction of the segment length), each
+    #segment is multiplied by the window and the power spectra of the segments are
+    #averaged (the first averages segments, None: all segments). Settings that are not
+    #specified are taken from config_special (psd_*). The signal can be added in parts
+    #of any length (e.g. the frames of the streaming mode or slices of a memory-mapped
+    #array): the segments are transformed psd_block_segments at a time and only the
+    #samples of the last incomplete segment are kept between calls, so the memory used
+    #does not depend on the length of the signal. Signals may be stacks of channels/
+    #polarizations (samples along the last axis)
+    def __init__(self, segment_length=None, overlap=None, window=None, averages=None):
+        if segment_length is None:
+            segment_length = config_special.psd_segment_length
+        if overlap is None:
+            overlap = config_special.psd_overlap
+        if window is None:
+            window = config_special.psd_window
+        if averages is None:
+            averages = config_special.psd_averages
+        if window not in psd_windows:
+            raise ValueError('Unknown spectrum window: ' + str(window) + ' (windows: '
+                             + ', '.join(psd_windows) + ')')
+        if not 0 <= overlap < 1:
+            raise ValueError('Segment overlap must be at least 0 and less than 1')
+        self.segment_length = max(1, int(segment_length))
+        self.step = max(1, int(round(self.segment_length*(1 - overlap))))
+        self.window = psd_windows[window](self.segment_length)
+        self.averages = averages
+        self.block_segments = max(1, int(config_special.psd_block_segments))
+        self.segments = 0 # Segments averaged
+        self.power_sum = None # Sum of the power spectra of the segments (fft order)
+        self.tail = None # Samples not yet used (start of the next segment)
+
+    def add(self, x):
+        #Adds the next samples of the signal (the segments continue over the parts)
+        x = np.asarray(x)
+        part = self.block_segments*self.step
+        for start in range(0, np.size(x, -1), part):
+            self.add_part(x[..., start:start + part])
+
+    def add_part(self, x):
+        if self.averages is not None and self.segments >= self.averages:
+            return
+        if self.tail is not None:
+            x = np.concatenate((self.tail, x), axis=-1)
+        m = self.segment_length
+        length = np.size(x, -1)
+        count = 0
+        if length >= m:
+            count = (length - m)//self.step + 1
+        if self.averages is not None:
+            count = max(0, min(count, int(self.averages) - self.segments))
+        for first in range(0, count, self.block_segments):
+            k = min(self.block_segments, count - first)
+            start = first*self.step
+            block = x[..., start:start + (k - 1)*self.step + m]
+            segments = np.lib.stride_tricks.sliding_window_view(block, m, axis=-1)
+            Y = fft(segments[..., ::self.step, :]*self.window)
+            power = np.sum(Y.real*Y.real + Y.imag*Y.imag, axis=-2)
+            if self.power_sum is None:
+                self.power_sum = power
+            else:
+                self.power_sum += power
+            self.segments += k
+        if self.averages is not None and self.segments >= self.averages:
+            self.tail = None # Remaining samples are not used
+        else:
+            self.tail = x[..., count*self.step:].copy()
+
+    def power_spectrum(self, centred=True):
+        #Averaged power spectrum (power of each frequency point, W for signals in sqrt(W)):
+        #the spectra are normalized by the power of the window, so the sum over the
+        #frequency points is the average power of the signal. Centred spectrum (frequency
+        #points: frequency_grid(segment_length, fs, ctr_freq)) or fft order (centred=False)
+        if self.segments == 0:
+            raise ValueError('Signal is shorter than the spectrum segment length ('
+                             + str(self.segment_length) + ' samples)')
+        m = self.segment_length
+        P = self.power_sum/(self.segments*m*np.sum(self.window*self.window))
+        if centred:
+            return np.fft.fftshift(P, axes=-1)
+        return P
+
+    def power_spectral_density(self, fs, centred=True):
+        #Averaged power spectral density (W/Hz for signals in sqrt(W))
+        return self.power_spectrum(centred)*self.segment_length/fs
+
+    def band_power(self, fs, f_start, f_end, ctr_freq=0):
+        #Power of the frequency points from f_start to f_end (Hz, spectrum centred on
+        #ctr_freq)
+        frq = frequency_grid(self.segment_length, fs, ctr_freq)
+        band = (frq >= f_start) & (frq <= f_end)
+        return np.sum(self.power_spectrum()[..., band], axis=-1)
+
+def averaged_spectrum(n, streaming=False):
+    #Returns True if the measurement scripts analyse signals of n samples with the
+    #averaged power spectrum (WelchEstimator) instead of the FFT of the complete signal
+    #(more than config_special.psd_max_fft_samples samples, or streaming mode)
+    return streaming or n > config_special.psd_max_fft_samples
+
+def welch_power_spectrum(x, segment_length=None, overlap=None, window=None,
+                         averages=None, centred=True):
+    #Averaged power spectrum of x along the last axis (WelchEstimator), the segment
+    #length is limited to the number of samples of x. Frequency points of the centred
+    #spectrum: frequency_grid(np.size(P, -1), fs, ctr_freq)
+    if segment_length is None:
+        segment_length = config_special.psd_segment_length
+    estimator = WelchEstimator(min(int(segment_length), np.size(x, -1)), overlap, window,
+                               averages)
+    estimator.add(x)
+    return estimator.power_spectrum(centred)
@@ -0,0 +1,120 @@
+'''
+    SystemLab-Design Version 20.01
+    Copyright © 2019-2020 SystemLab Inc. All rights reserved.
+
+    NOTICE================================================================================
+    This file is part of SystemLab-Design 20.01.
+
+    SystemLab-Design 20.01 is free software: you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License,
+    or (at your option) any later version.
+
+    SystemLab-Design 20.01 is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with SystemLab-Design 20.01.  If not, see <https://www.gnu.org/licenses/>.
+    ======================================================================================
+
+    ABOUT THIS MODULE
+    Name: check_fiber_streaming
+    Regression check of the streaming mode of Optical_Fiber_Linear (overlap-save): the
+    fiber is calculated for a multi-frame time window frame by frame and in one block,
+    and the streamed output (delayed by overlap/2 samples, see config_special) is
+    compared with the single-block output away from the ends of the time window (where
+    the single-block FFT wraps around). The sampled dispersion response is not limited
+    in time (its tails decay as 1/t from the band edge), so the outputs agree within
+    the tolerance for band-limited fields. Exits with status 1 if the outputs differ.
+
+    Usage: python tools/check_fiber_streaming.py
+'''
+import os
+import sys
+import numpy as np
+
+source_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'source')
+sys.path.insert(0, source_path)
+sys.path.insert(0, os.path.join(source_path, 'syslab_fb_scripts', 'optical'))
+import config
+import systemlab_engine as engine
+import Optical_Fiber_Linear
+
+fs = 1.6e11 # Sample rate (Hz)
+frame_samples = 4096
+overlap = 1024
+frames = 8
+signal_bandwidth = 0.1 # Gaussian spectrum of the test fields (-1/e width, fraction of fs)
+tolerance = 1e-4 # Maximum difference (relative to the peak field amplitude)
+
+# Fiber parameters table: length (km), loss (dB/km), beta 1 (n_eff), beta 2 (ps/(km*nm)),
+# beta 3 (ps/(km*nm*nm)), 2 = included
+fiber_parameters = [['', ''], ['Length', 10], ['Loss', 0.2], ['', ''], ['Beta 1', 0],
+                    ['n_eff', 1.47], ['Beta 2', 2], ['Dispersion', 17], ['Beta 3', 2],
+                    ['Slope', 0.08]]
+
+def fiber_settings(n):
+    return {'num_samples': n, 'current_iteration': 1, 'feedback_segments': 1,
+            'feedback_current_segment': 1, 'feedback_enabled': 0, 'time_window': n/fs,
+            'sampling_rate': fs, 'sampling_period': 1/fs}
+
+def fiber_input(field, noise):
+    time_array = np.arange(np.size(field, -1))/fs
+    channel = [1, 193.1e12, np.array([1 + 0j, 0j]), field, noise]
+    return [[1, 'Optical', fs, time_array, np.zeros((2, 2)), [channel]]]
+
+def band_limited_field(rng, n, amplitude):
+    field = rng.standard_normal(n) + 1j*rng.standard_normal(n)
+    Y = np.fft.fft(field)*np.exp(-(np.fft.fftfreq(n)/signal_bandwidth)**2)
+    return amplitude*np.fft.ifft(Y)
+
+def fiber_output(outputs):
+    channel = outputs[0][5][0]
+    return channel[3], channel[4]
+
+def main():
+    engine.install_console_outputs()
+    rng = np.random.default_rng(1)
+    n = frame_samples*frames
+    field = band_limited_field(rng, n, 1e-2)
+    noise = band_limited_field(rng, n, 1e-4)
+
+    # Single block (complete time window)
+    outputs, parameters, results = Optical_Fiber_Linear.run(fiber_input(field, noise),
+                                                            fiber_parameters, fiber_settings(n))
+    block_field, block_noise = fiber_output(outputs)
+
+    # Streaming mode (frame by frame, stream state kept between frames)
+    stream_state = {}
+    stream_field = []
+    stream_noise = []
+    for frame in range(frames):
+        frame_slice = slice(frame*frame_samples, (frame + 1)*frame_samples)
+        settings = fiber_settings(frame_samples)
+        settings['stream_state'] = stream_state
+        settings['stream_overlap'] = overlap
+        outputs, parameters, results = Optical_Fiber_Linear.run(
+                fiber_input(field[frame_slice], noise[frame_slice]), fiber_parameters, settings)
+        frame_field, frame_noise = fiber_output(outputs)
+        stream_field.append(frame_field)
+        stream_noise.append(frame_noise)
+    stream_field = np.concatenate(stream_field)
+    stream_noise = np.concatenate(stream_noise)
+
+    # Streamed sample j is the single-block sample j - overlap/2
+    delay = overlap//2
+    compared = slice(overlap, n - overlap) # Single-block samples (no wrap around)
+    failed = False
+    for name, block, stream in [('Signal', block_field, stream_field),
+                                ('Noise', block_noise, stream_noise)]:
+        stream = stream[delay:][:n - delay]
+        error = np.max(np.abs(stream[compared] - block[compared]))/np.max(np.abs(block))
+        print(name + ' field: max difference (streamed/single block) ' + format(error, '0.3E'))
+        failed = failed or not error < tolerance
+    print('FAILED' if failed else 'OK')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
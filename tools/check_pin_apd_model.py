@@ -0,0 +1,342 @@
+'''
+    SystemLab-Design Version 20.01
+    Copyright © 2019-2020 SystemLab Inc. All rights reserved.
+
+    NOTICE================================================================================
+    This file is part of SystemLab-Design 20.01.
+
+    SystemLab-Design 20.01 is free software: you can redistribute it
+    and/or modify it under the terms of the GNU General Public License
+    as published by the Free Software Foundation, either version 3 of the License,
+    or (at your option) any later version.
+
+    SystemLab-Design 20.01 is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with SystemLab-Design 20.01.  If not, see <https://www.gnu.org/licenses/>.
+    ======================================================================================
+
+    ABOUT THIS MODULE
+    Name: check_pin_apd_model
+    Regression check of the vectorized calculations of PIN_APD_Model_V3: the outputs of
+    the script are compared with a reference calculation made sample by sample (the
+    per-sample loops of the script before vectorization: rectangular OSNR filter,
+    extinction ratio, optical carrier (coherent regime), shot noise, ASE noise groups
+    and signal-ASE beat noise). The reference draws the noise samples one by one from
+    a generator with the same seed, so the detected signal and noise currents and the
+    results must be equal (within rounding, relative tolerance 1e-12). Dual-pol fields
+    are referenced with the power of both polarizations (extinction ratio, signal-ASE
+    noise). Exits with status 1 if a comparison fails.
+
+    Usage: python tools/check_pin_apd_model.py
+'''
+import os
+import sys
+import tempfile
+import numpy as np
+from scipy import constants
+
+source_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'source')
+sys.path.insert(0, source_path)
+sys.path.insert(0, os.path.join(source_path, 'syslab_fb_scripts', 'optical'))
+os.chdir(source_path) # Viewer modules are imported from syslab_config_files
+import config
+import systemlab_engine as engine
+import PIN_APD_Model_V3
+
+seed = 2020
+n = 16384
+samples_per_sym = 16
+fs = 1.6e11 # Sample rate (Hz)
+wave_freq_1 = 193.1e12 # Frequency of channel 1 (Hz)
+ch_spacing = 50e9 # Channel spacing (Hz)
+pwr_1 = 1e-4 # Optical power of "1" symbols (W), "0" symbols: 1%
+tolerance = 1e-12 # Maximum difference (relative)
+
+# Receiver parameters
+r_direct = 0.8 # Responsivity (A/W)
+i_d = 10 # Dark current (nA)
+rbw = 7.5e9 # Receiver bandwidth (Hz)
+m_apd = 10 # Average avalanche gain
+x_apd = 0.7 # Noise coefficient
+noise_temp = 290 # Thermal noise temperature (K)
+r_load = 50 # Load resistance (ohm)
+opt_filter_bw = 50e9 # Optical filter bandwidth - OSNR (Hz)
+
+# Test cases: detection model, shot noise model, optical regime, channels, dual-pol
+# field, ASE noise ('Off', 'Groups': noise groups of the psd array, 'Field': PSD of the
+# received noise field)
+cases = [('PIN', 'Gaussian', 'Incoherent', 1, False, 'Off'),
+         ('PIN', 'Poisson', 'Incoherent', 1, False, 'Off'),
+         ('APD', 'Gaussian', 'Incoherent', 1, False, 'Off'),
+         ('APD', 'Poisson', 'Incoherent', 1, False, 'Off'),
+         ('APD', 'Gaussian', 'Incoherent', 2, False, 'Field'),
+         ('PIN', 'Poisson', 'Incoherent', 2, False, 'Groups'),
+         ('PIN', 'Gaussian', 'Coherent', 2, False, 'Groups'),
+         ('APD', 'Gaussian', 'Coherent', 1, False, 'Field'),
+         ('PIN', 'Poisson', 'Coherent', 2, True, 'Groups'),
+         ('PIN', 'Gaussian', 'Coherent', 1, True, 'Field')]
+
+# Results of the script that are compared with the reference
+compared_results = ['Received optical pwr (avg)', 'Optical noise PSD (before detection)',
+                    'Extinction ratio (P1/P0 - linear)', 'OSNR (avg sig pwr)',
+                    'Thermal noise PSD (linear)', 'Shot noise PSD (linear)',
+                    'Dark current noise PSD (linear)', 'Sig-ASE PSD (linear)',
+                    'ASE-ASE PSD (linear)']
+
+def pin_apd_parameters(detection_model, shot_noise_model, opt_regime, ase):
+    # Parameters table of PIN_APD_Model_V3 (Parameter name(0), Value(1)), 2 = enabled
+    return [['General', ''], ['Optical regime', opt_regime],
+            ['Detection model', detection_model], ['Responsivity model', 'Direct'],
+            ['Quantum efficiency', 0.8], ['Responsivity', r_direct],
+            ['Dark current', i_d], ['Receiver bandwidth', rbw],
+            ['Q target', 7], ['APD', ''], ['Avalanche gain', m_apd],
+            ['ENF model', 'Noise coeff.'], ['Noise coefficient', x_apd],
+            ['Ionization coefficient', 0.5], ['Noise', ''],
+            ['Thermal noise', 2], ['Thermal noise model', 'Circuit'],
+            ['Thermal noise PSD', 1e-22], ['Noise temperature', noise_temp],
+            ['Load resistance', r_load], ['Shot noise', 2],
+            ['Shot noise model', shot_noise_model],
+            ['Optical noise', 0 if ase == 'Off' else 2],
+            ['Optical noise model', 'Analytical'],
+            ['Optical filter bandwidth', opt_filter_bw/1e9],
+            ['Output noise', ''], ['Add noise to signal', 0], ['Results', ''],
+            ['Display noise metrics', 2], ['Display optical noise metrics', 2],
+            ['Reference channel', 1], ['Data panel ID', 'pin_apd_1'],
+            ['Data export', 0], ['Data attribute', 'pwr_rcv']]
+
+def pin_apd_settings(folder):
+    return {'fb_name': 'PIN/APD', 'num_samples': n, 'current_iteration': 1,
+            'sampling_rate': fs, 'sampling_period': 1/fs,
+            'samples_per_sym': samples_per_sym, 'file_path_1': folder,
+            'rng': np.random.default_rng(seed)}
+
+def optical_input(channels, dual_pol, ase):
+    # NRZ field envelopes (random symbols), optical noise fields and ASE noise groups
+    rng = np.random.default_rng(1)
+    time_array = np.arange(n)/fs
+    opt_channels = []
+    for ch in range(0, channels):
+        symbols = rng.integers(0, 2, n//samples_per_sym)
+        pwr = np.repeat(np.where(symbols == 1, pwr_1, 0.01*pwr_1), samples_per_sym)
+        jones_vector = np.array([1 + 0j, 0j])
+        field = np.sqrt(pwr).astype(complex)
+        if dual_pol: # Ex-Ey field (elliptical polarization)
+            theta = 0.3 + 0.4*ch
+            jones_vector = np.array([np.cos(theta), np.sin(theta)*np.exp(1j*0.7)])
+            field = jones_vector[:, np.newaxis]*field
+        if ase == 'Field':
+            noise = 1e-5*(rng.standard_normal(n) + 1j*rng.standard_normal(n))
+        else: # Noise field below -200 dBm/Hz (ASE given by the noise groups)
+            noise = np.full(n, 1e-16 + 0j)
+        opt_channels.append([ch + 1, wave_freq_1 + ch*ch_spacing, jones_vector, field,
+                             noise])
+    psd_frequencies = np.arange(wave_freq_1 - 1.2e11, wave_freq_1 + (channels-1)*ch_spacing
+                                + 1.2e11, 1e10)
+    psd_array = np.array([psd_frequencies, np.full(np.size(psd_frequencies), 2e-21)])
+    return [[1, 'Optical', fs, time_array, psd_array, opt_channels]]
+
+def rect_profile_reference(frq, ctr_freq, bw):
+    tr_fcn_filter = np.full(np.size(frq), 0 + 1j*0, dtype=complex)
+    for i in range(0, np.size(frq)):
+        if frq[i] >= ctr_freq - (bw/2) and frq[i] <= ctr_freq + (bw/2):
+            tr_fcn_filter[i] = 1 + 1j*0
+    return tr_fcn_filter
+
+def frequency_points(ctr_freq):
+    T = n/fs
+    k = np.arange(n)
+    frq = (k/T)
+    return frq - frq[int(round(n/2))] + ctr_freq
+
+def reference_outputs(input_signal_data, detection_model, shot_noise_model, opt_regime,
+                      ase):
+    '''Detected signal and noise currents and results, calculated sample by sample
+       (noise draw order of PIN_APD_Model_V3: thermal, shot, ASE-ASE, signal-ASE, dark
+       current)
+    '''
+    rng = np.random.default_rng(seed)
+    q = constants.e
+    t_step = 1/fs
+    time_array = input_signal_data[0][3]
+    psd_array = np.copy(input_signal_data[0][4])
+    opt_channels = input_signal_data[0][5]
+    channels = len(opt_channels)
+    wave_freq = [channel[1] for channel in opt_channels]
+    jones_vector = [channel[2] for channel in opt_channels]
+    fields = [np.array(channel[3], dtype=complex) for channel in opt_channels]
+    noise_fields = [channel[4] for channel in opt_channels]
+    dual_pol = fields[0].ndim == 2
+    results = {}
+
+    # OSNR (reference channel 1)
+    frq = frequency_points(wave_freq[0])
+    tr_fcn_filt = rect_profile_reference(frq, wave_freq[0], opt_filter_bw)
+    Y = np.fft.fftshift(np.fft.fft(fields[0]), axes=-1)*tr_fcn_filt
+    N = np.fft.fftshift(np.fft.fft(noise_fields[0]))*tr_fcn_filt
+    sig_pwr = np.sum(np.square(np.abs(np.fft.ifft(np.fft.ifftshift(Y, axes=-1)))))
+    noise_pwr = np.sum(np.square(np.abs(np.fft.ifft(np.fft.ifftshift(N)))))
+    results['OSNR (avg sig pwr)'] = 10*np.log10(sig_pwr/noise_pwr)
+
+    # Extinction ratio (power of both polarizations for dual-pol fields)
+    pwr = np.empty(n)
+    for i in range(0, n):
+        if dual_pol:
+            pwr[i] = (np.square(np.abs(fields[0][0, i] + jones_vector[0][0]*noise_fields[0][i]))
+                      + np.square(np.abs(fields[0][1, i] + jones_vector[0][1]*noise_fields[0][i])))
+        else:
+            pwr[i] = np.square(np.abs(fields[0][i] + noise_fields[0][i]))
+    avg_pwr = np.mean(pwr)
+    P0 = 0
+    P1 = 0
+    count_P0 = 0
+    count_P1 = 0
+    for i in range(0, n):
+        if pwr[i] > avg_pwr:
+            P1 += pwr[i]
+            count_P1 += 1
+        else:
+            P0 += pwr[i]
+            count_P0 += 1
+    results['Extinction ratio (P1/P0 - linear)'] = (P1/count_P1)/(P0/count_P0)
+
+    # Received fields and powers
+    m = m_apd if detection_model == 'APD' else 1
+    e_field_x = np.zeros(n, dtype=complex)
+    e_field_y = np.zeros(n, dtype=complex)
+    noise_x = np.zeros(n, dtype=complex)
+    noise_y = np.zeros(n, dtype=complex)
+    rcv_pwr = 0
+    opt_noise_pwr_total = 0
+    i_signal = np.zeros(n)
+    for ch in range(0, channels):
+        if opt_regime == 'Coherent':
+            for i in range(0, n):
+                carrier = np.exp(1j*2*np.pi*wave_freq[ch]*time_array[i])
+                if dual_pol:
+                    fields[ch][0, i] = fields[ch][0, i]*carrier
+                    fields[ch][1, i] = fields[ch][1, i]*carrier
+                else:
+                    fields[ch][i] = fields[ch][i]*carrier
+            if dual_pol:
+                e_field_x += fields[ch][0]
+                e_field_y += fields[ch][1]
+                noise_x += jones_vector[ch][0]*noise_fields[ch]
+                noise_y += jones_vector[ch][1]*noise_fields[ch]
+            else:
+                e_field_x += fields[ch]
+                noise_x += noise_fields[ch]
+        else: # Received powers of the last channel (powers are reset for each channel)
+            rcv_pwr = np.mean(np.square(np.abs(fields[ch])))
+            opt_noise_pwr_total = np.sum(np.square(np.abs(noise_fields[ch])))
+            i_signal += m*r_direct*np.square(np.abs(fields[ch]))
+    if opt_regime == 'Coherent':
+        rcv_pwr = np.mean(np.square(np.abs(e_field_x))) + np.mean(np.square(np.abs(e_field_y)))
+        opt_noise_pwr_total = (np.sum(np.square(np.abs(noise_x)))
+                               + np.sum(np.square(np.abs(noise_y))))
+        i_signal = m*r_direct*(np.square(np.abs(e_field_x)) + np.square(np.abs(e_field_y)))
+    results['Received optical pwr (avg)'] = 10*np.log10(rcv_pwr*1e3)
+    opt_noise_psd = opt_noise_pwr_total/fs/n
+    results['Optical noise PSD (before detection)'] = 10*np.log10(opt_noise_psd*1e3)
+
+    # Thermal noise
+    th_variance = rbw*4*constants.k*noise_temp/r_load
+    i_th = rng.normal(0, np.sqrt(th_variance), n)
+
+    # Shot noise
+    enf_apd = np.power(m_apd, x_apd)
+    i_shot = np.zeros(n)
+    for i in range(0, n):
+        if shot_noise_model == 'Gaussian' or detection_model == 'APD':
+            shot_variance = 2*q*i_signal[i]*rbw
+            if detection_model == 'APD':
+                shot_variance = m_apd*enf_apd*shot_variance
+            i_shot[i] = rng.normal(0, np.sqrt(shot_variance), 1)[0]
+        else:
+            mean_photons = round((i_signal[i]*t_step)/q)
+            photons_detected = rng.poisson(mean_photons, 1)[0]
+            i_shot[i] = photons_detected*q/t_step - i_signal[i]
+
+    # ASE noise (noise groups counted once) and signal-ASE beat noise
+    i_ase_ase = np.zeros(n)
+    i_sig_ase = np.zeros(n)
+    if ase != 'Off':
+        psd_ase = opt_noise_psd
+        if 10*np.log10(opt_noise_psd*1e3) < -200.0:
+            ng_w = psd_array[0, 1] - psd_array[0, 0]
+            pwr_ase = 0
+            for ch in range(0, channels):
+                frq = frequency_points(wave_freq[ch])
+                for i in range(0, np.size(psd_array, 1)):
+                    if psd_array[0, i] > frq[0] and psd_array[0, i] < frq[n-1]:
+                        pwr_ase += 2*psd_array[1, i]*ng_w
+                        psd_array[1, i] = 0
+            psd_ase = pwr_ase/fs
+        ase_ase_variance = 2*(r_direct**2)*(psd_ase**2)*((2*opt_filter_bw) - rbw)*rbw
+        i_ase_ase = rng.normal(0, np.sqrt(ase_ase_variance), n)
+        for i in range(0, n):
+            if dual_pol:
+                s_pwr = np.square(np.abs(fields[0][0, i])) + np.square(np.abs(fields[0][1, i]))
+            else:
+                s_pwr = np.square(np.abs(fields[0][i]))
+            sig_ase_variance = 4*(r_direct**2)*(s_pwr*psd_ase)*rbw
+            i_sig_ase[i] = rng.normal(0, np.sqrt(sig_ase_variance), 1)[0]
+
+    # Dark current noise
+    noise_d_variance = 2*q*i_d*1e-9*rbw
+    if detection_model == 'APD':
+        noise_d_variance = np.square(m_apd)*enf_apd*noise_d_variance
+    i_d_noise = rng.normal(0, np.sqrt(noise_d_variance), n)
+
+    results['Thermal noise PSD (linear)'] = np.var(i_th)/rbw
+    results['Shot noise PSD (linear)'] = np.var(i_shot)/rbw
+    results['Dark current noise PSD (linear)'] = np.var(i_d_noise)/rbw
+    results['Sig-ASE PSD (linear)'] = np.var(i_sig_ase)/rbw
+    results['ASE-ASE PSD (linear)'] = np.var(i_ase_ase)/rbw
+    i_noise = i_th + i_shot + i_d_noise + i_sig_ase + i_ase_ase
+    return i_signal, i_noise, results
+
+def compare(name, x, x_ref):
+    '''Returns True if x is equal to the reference (within rounding)'''
+    x = np.asarray(x, dtype=float)
+    x_ref = np.asarray(x_ref, dtype=float)
+    error = np.max(np.abs(x - x_ref))/max(np.max(np.abs(x_ref)), 1e-300)
+    ok = error <= tolerance
+    if not ok:
+        print('    ' + name + ': difference ' + format(error, '0.3E') + ' FAILED')
+    return ok
+
+def main():
+    engine.install_console_outputs()
+    folder = tempfile.mkdtemp() # No project_config (data export disabled)
+    failed = False
+    frq = frequency_points(wave_freq_1)
+    if not np.array_equal(PIN_APD_Model_V3.rect_profile(frq, wave_freq_1, opt_filter_bw),
+                          rect_profile_reference(frq, wave_freq_1, opt_filter_bw)):
+        print('Rectangular filter profile FAILED')
+        failed = True
+    for case in cases:
+        detection_model, shot_noise_model, opt_regime, channels, dual_pol, ase = case
+        input_signal_data = optical_input(channels, dual_pol, ase)
+        outputs, parameters, results = PIN_APD_Model_V3.run(input_signal_data,
+                pin_apd_parameters(detection_model, shot_noise_model, opt_regime, ase),
+                pin_apd_settings(folder))
+        i_signal_ref, i_noise_ref, results_ref = reference_outputs(input_signal_data,
+                detection_model, shot_noise_model, opt_regime, ase)
+        case_ok = compare('Signal current', outputs[0][5], i_signal_ref)
+        case_ok = compare('Noise current', outputs[0][6], i_noise_ref) and case_ok
+        results = dict((result[0], result[1]) for result in results)
+        for name in compared_results:
+            case_ok = compare(name, results[name], results_ref[name]) and case_ok
+        print(', '.join([detection_model, shot_noise_model, opt_regime, str(channels) + ' ch',
+                         'dual-pol' if dual_pol else 'single-pol', 'ASE ' + ase])
+              + (': OK' if case_ok else ': FAILED'))
+        failed = failed or not case_ok
+    print('FAILED' if failed else 'OK')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())